@@ -2,62 +2,106 @@
 
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 
-# Try to load .env from multiple locations
-def load_env_from_multiple_locations():
-    """Load .env file from multiple possible locations"""
-    possible_paths = [
-        Path.cwd() / '.env',  # Current directory (should be ~/agentkit)
-        Path.cwd().parent / '.env',  # Parent directory
-        Path.home() / '.env',  # Home directory (fallback)
-    ]
-    
-    env_loaded = False
-    for env_path in possible_paths:
-        if env_path.exists():
-            print(f"[INFO] Loading environment from: {env_path}")
-            from dotenv import load_dotenv
-            load_dotenv(env_path)
-            
-            # Check if OpenAI key was loaded
-            api_key = os.getenv('OPENAI_API_KEY')
-            if api_key and api_key != 'your-openai-api-key-here':
-                print(f"[INFO] OpenAI API key loaded successfully from {env_path}")
-                env_loaded = True
-                break
-            else:
-                print(f"[WARNING] Found .env at {env_path} but no valid OpenAI key")
-    
-    if not env_loaded:
-        print("[WARNING] No valid OpenAI API key found in any .env file")
-        print("[INFO] Checked locations:")
-        for path in possible_paths:
-            print(f"  - {path}")
-    
-    return env_loaded
-
-# Load environment variables
-load_env_from_multiple_locations()
-
+import hashlib
+import hmac
+import signal
+import socket
+import sqlite3
 import subprocess
+import time
+import uuid
 import json
 import asyncio
 from datetime import datetime
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import uvicorn
-# Regex removed - all prompts go through OpenAI
-import openai
-from typing import Optional, List, Dict, Any
-from openai import AsyncOpenAI
-# Force reload of the module to pick up changes
-import importlib
-import parsers.workflow.openaiWorkflowParserEnhanced as openai_workflow_parser_enhanced
-importlib.reload(openai_workflow_parser_enhanced)
-from parsers.workflow.openaiWorkflowParserEnhanced import EnhancedOpenAIWorkflowParser
-from scripts.utils.simple_workflow_parser import SimpleWorkflowParser
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from config import config
+from services.tracing import SpanExporter, Tracer, build_waterfall, extract_spans_from_output
+from parsers.workflow.workflowPlanOptimizer import optimize_plan
+from parsers.workflow.workflowConditionEvaluator import evaluate_conditions
+from services.structured_logging import (
+    configure_logging, correlation_scope, get_logger, new_correlation_id, truncate, update_logging,
+)
+
+configure_logging(
+    level=config.logging.level,
+    fmt=config.logging.format,
+    debug_mode=config.logging.debug_mode,
+    debug_sample_rate=config.logging.debug_sample_rate,
+    queue_size=config.logging.queue_size,
+)
+log = get_logger("agentkit.chat_service")
+
+from services.profiling import ADMIN_HEADER, ProfileStore, RequestProfiler
+from services.workflow_history_store import WorkflowHistoryStore, decode_cursor
+from services.circle_client import CircleAPIError, CircleClient, Transfer
+from services.transfer_poller import TransferPoller
+from services import circle_webhooks
+from services.artifact_store import ArtifactStore
+from services.verification_cache import VerificationCache, key_for
+from services.shared_state import SharedState
+from services.workflow_checkpoints import RUNNING, CheckpointStore
+from services.proof_tiering import ProofTiering, backend_from_url
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Stores and clients open SQLite files, create directories or hold sessions,
+# so each one is built on first use rather than when this module is imported
+
+@lru_cache(maxsize=1)
+def profiler():
+    return RequestProfiler(
+        ProfileStore(config.profiling.directory, config.profiling.max_profiles),
+        admin_token=config.profiling.admin_token,
+        sample_rate=config.profiling.sample_rate,
+    )
+
+@lru_cache(maxsize=1)
+def history_store():
+    return WorkflowHistoryStore(config.database.workflow_history_db, config.database.workflow_history)
+
+@lru_cache(maxsize=1)
+def circle_client():
+    """One keep-alive session for every Circle status check"""
+    return CircleClient(config.circle.api_key, config.circle.api_url,
+                        max_retries=config.circle.max_retries)
+
+@lru_cache(maxsize=1)
+def webhook_keys():
+    """Circle's notification signing keys, fetched on first use"""
+    return circle_webhooks.PublicKeyCache(circle_client().get_notification_public_key)
+
+@lru_cache(maxsize=1)
+def verification_cache():
+    return VerificationCache(config.database.verification_cache)
+
+@lru_cache(maxsize=1)
+def shared_state():
+    """Parse cache, idempotency records, leader jobs and transfer status, shared by all workers"""
+    return SharedState(config.database.shared_state)
+
+@lru_cache(maxsize=1)
+def checkpoints():
+    """Per-step progress of running workflows, so a restart resumes instead of starting over"""
+    return CheckpointStore(config.workflow.checkpoint_dir)
+
+@lru_cache(maxsize=1)
+def proof_tiering() -> Optional[ProofTiering]:
+    if not config.tiering.backend:
+        return None
+    return ProofTiering(
+        ArtifactStore(config.zkengine.artifact_store_dir),
+        backend_from_url(config.tiering.backend, config.tiering.s3_endpoint),
+        hot_days=config.tiering.hot_days,
+        hot_access_count=config.tiering.hot_access_count,
+        local_budget_bytes=int(config.tiering.local_budget_gb * (1 << 30)),
+    )
 
 app = FastAPI(title="Verifiable Agent Kit v4.1 - Real zkEngine Only")
 
@@ -69,16 +113,216 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize OpenAI
-openai.api_key = os.getenv('OPENAI_API_KEY')
-if not openai.api_key or openai.api_key == 'your-openai-api-key-here':
-    print("[ERROR] OpenAI API key not properly configured!")
-    print("[INFO] Please ensure a valid API key is in one of these locations:")
-    print("  - ~/agentkit/.env (recommended)")
-    print("  - ~/.env")
-    print("[INFO] The key should be in format: OPENAI_API_KEY=sk-...")
+@app.middleware("http")
+async def correlation_id_middleware(request, call_next):
+    """Bind a per-request correlation ID to every log record emitted while serving it"""
+    correlation_id = request.headers.get("X-Request-ID") or new_correlation_id()
+    with correlation_scope(correlation_id):
+        profiles = profiler()
+        if profiles.should_profile(request.url.path, request.headers):
+            with profiles.capture(request.url.path) as capture:
+                response = await call_next(request)
+            if capture["id"]:
+                log.info("profile.captured", path=request.url.path, profile_id=capture["id"])
+                response.headers["X-Profile-Id"] = capture["id"]
+        else:
+            response = await call_next(request)
+    response.headers["X-Request-ID"] = correlation_id
+    return response
+
+def require_admin(token: Optional[str]):
+    if not profiler().is_admin(token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+INTERNAL_HEADER = "X-Internal-Token"
+LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+def require_internal(request: Request):
+    """Internal routes: the shared token when one is configured, otherwise loopback callers only"""
+    token = config.server.internal_token
+    if token:
+        presented = request.headers.get(INTERNAL_HEADER) or ""
+        if hmac.compare_digest(presented, token):
+            return
+    elif request.client and request.client.host in LOOPBACK_HOSTS:
+        return
+    raise HTTPException(status_code=403, detail="Internal endpoint")
+
+@app.get("/admin/profiles")
+async def list_profiles(x_admin_token: Optional[str] = Header(None, alias=ADMIN_HEADER)):
+    """List stored request profiles, newest first"""
+    require_admin(x_admin_token)
+    return {"success": True, "profiles": profiler().store.list()}
+
+@app.get("/admin/profiles/{filename}")
+async def download_profile(filename: str, x_admin_token: Optional[str] = Header(None, alias=ADMIN_HEADER)):
+    """Download one profile file (.prof for pstats/snakeviz, .cpu.txt, .mem.txt)"""
+    require_admin(x_admin_token)
+    path = profiler().store.path_for(filename)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=filename)
+
+async def run_proof_tiering():
+    """Offload cold proof artifacts every TIERING_INTERVAL_SECS"""
+    while True:
+        try:
+            result = await asyncio.to_thread(proof_tiering().run_once)
+            if result["demoted"] or result["purged"]:
+                log.info("tiering.run", **result)
+        except Exception as e:
+            log.error("tiering.failed", error=str(e))
+        await asyncio.sleep(config.tiering.interval_secs)
+
+async def run_proof_gc():
+    """Enforce the proof storage budget every GC_INTERVAL_SECS"""
+    from services.proof_gc import from_config
+    gc = from_config(config)
+    while True:
+        try:
+            result = await asyncio.to_thread(gc.run_once)
+            if result["deleted"] or result["recovered"]:
+                log.info("gc.run", deleted=len(result["deleted"]), freed_bytes=result["freed_bytes"],
+                         usage_bytes=result["usage_bytes"], skipped_pinned=result["skipped_pinned"])
+        except Exception as e:
+            log.error("gc.failed", error=str(e))
+        await asyncio.sleep(config.gc.interval_secs)
+
+# Duties that must run in exactly one worker; whoever holds the "leader" lease runs them
+is_leader = False
+leader_tasks: List[asyncio.Task] = []
+LEADER_POLL_SECS = 0.5
+PURGE_INTERVAL_SECS = 300
+CHECKPOINT_SCAN_SECS = 30
+resume_tasks: set = set()
+
+async def become_leader():
+    global is_leader
+    is_leader = True
+    log.info("leader.acquired", worker=WORKER_ID)
+    if proof_tiering():
+        leader_tasks.append(asyncio.create_task(run_proof_tiering()))
+    if config.gc.budget_gb > 0:
+        leader_tasks.append(asyncio.create_task(run_proof_gc()))
+    transfer_poller().start()
+
+async def step_down():
+    global is_leader
+    is_leader = False
+    log.warning("leader.lost", worker=WORKER_ID)
+    for task in leader_tasks:
+        task.cancel()
+    leader_tasks.clear()
+    await transfer_poller().stop()
+
+async def run_leader_jobs():
+    """Apply work other workers handed over through the shared job queue"""
+    state, poller = shared_state(), transfer_poller()
+    for job in await asyncio.to_thread(state.take_jobs, WORKER_ID):
+        try:
+            if job.kind == "watch_transfer":
+                poller.watch(job.payload["transferId"], job.payload.get("blockchain", "ETH"))
+            elif job.kind == "transfer_update":
+                await poller.apply(Transfer.from_api(job.payload["transfer"]))
+            else:
+                log.warning("leader.unknown_job", kind=job.kind, job_id=job.id)
+        except Exception as e:
+            # Left leased; handed out again once the lease runs out
+            log.error("leader.job_failed", kind=job.kind, job_id=job.id, attempts=job.attempts, error=str(e))
+            continue
+        await asyncio.to_thread(state.finish_job, job.id)
+
+async def run_leadership():
+    last_purge = 0.0
+    last_checkpoint_scan = 0.0
+    while True:
+        try:
+            held = await asyncio.to_thread(shared_state().acquire_lease, "leader", WORKER_ID,
+                                           config.server.leader_lease_secs)
+        except sqlite3.Error as e:
+            log.error("leader.lease_failed", error=str(e))
+            held = False
+        if held and not is_leader:
+            await become_leader()
+        elif is_leader and not held:
+            await step_down()
+        if is_leader:
+            await run_leader_jobs()
+            if time.monotonic() - last_purge > PURGE_INTERVAL_SECS:
+                last_purge = time.monotonic()
+                await asyncio.to_thread(shared_state().purge)
+            if time.monotonic() - last_checkpoint_scan > CHECKPOINT_SCAN_SECS:
+                last_checkpoint_scan = time.monotonic()
+                await resume_orphaned_workflows()
+        await asyncio.sleep(LEADER_POLL_SECS)
+
+@app.on_event("shutdown")
+async def close_circle_client():
+    await transfer_poller().stop()
+    if is_leader:
+        await asyncio.to_thread(shared_state().release_lease, "leader", WORKER_ID)
+    await circle_client().close()
+    await update_channel.close()
+
+@app.on_event("startup")
+async def start_storage_maintenance():
+    asyncio.create_task(run_leadership())
+    # Settings reload on SIGHUP or when .env changes, without a restart
+    if hasattr(signal, "SIGHUP"):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, config.try_reload)
+    if config.server.config_watch_secs > 0:
+        asyncio.create_task(config.watch(config.server.config_watch_secs))
+
+@app.post("/internal/artifacts/{file_hash}/recall")
+async def recall_artifact(file_hash: str, request: Request):
+    """Bring an offloaded proof artifact back to local disk (called by the Rust server)"""
+    require_internal(request)
+    if not proof_tiering():
+        raise HTTPException(status_code=404, detail="Tiering is not configured")
+    if len(file_hash) != 64 or any(c not in "0123456789abcdef" for c in file_hash):
+        raise HTTPException(status_code=400, detail="Invalid artifact hash")
+    try:
+        recalled = await asyncio.to_thread(proof_tiering().recall, file_hash)
+    except Exception as e:
+        log.error("tiering.recall_failed", hash=file_hash, error=str(e))
+        raise HTTPException(status_code=502, detail=f"Recall failed: {e}")
+    if not recalled:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return {"success": True, "hash": file_hash}
+
+# OpenAI clients (and the openai package itself) are only loaded on first use
+OPENAI_API_KEY = config.ai.openai_api_key
+if not OPENAI_API_KEY or OPENAI_API_KEY == 'your-openai-api-key-here':
+    log.error("openai.key_missing", env_file=str(config.env_path or "nowhere"),
+              hint="set OPENAI_API_KEY=sk-... in ~/agentkit/.env (recommended) or ~/.env")
 else:
-    print(f"[INFO] OpenAI API key configured (ending in ...{openai.api_key[-4:]})")
+    log.info("openai.key_configured", key_suffix=OPENAI_API_KEY[-4:])
+
+@lru_cache(maxsize=1)
+def openai_client():
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=OPENAI_API_KEY)
+
+@lru_cache(maxsize=1)
+def workflow_parser():
+    from parsers.workflow.openaiWorkflowParserEnhanced import EnhancedOpenAIWorkflowParser
+    return EnhancedOpenAIWorkflowParser(api_key=OPENAI_API_KEY)
+
+# Spans for one workflow are collected across processes and exported together
+tracer = Tracer(
+    service="chat_service",
+    exporter=SpanExporter(config.tracing.export_path) if config.tracing.enabled else None,
+)
+
+def finish_workflow_trace(root_span, status: Optional[str] = None) -> Dict[str, Any]:
+    """End the root workflow span and return the trace summary for the response"""
+    tracer.finish(root_span, status)
+    spans = tracer.pop_trace(root_span.trace_id)
+    return {
+        "traceId": root_span.trace_id,
+        "durationMs": root_span.duration_ms,
+        "waterfall": build_waterfall(spans),
+    }
 
 class ChatRequest(BaseModel):
     message: str
@@ -91,14 +335,13 @@ class WorkflowRequest(BaseModel):
 async def get_openai_response(message: str) -> str:
     """Get pure OpenAI response for natural language queries"""
     try:
-        if not openai.api_key:
+        if not OPENAI_API_KEY:
             return "OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."
         
-        # Use the newer OpenAI client syntax
-        client = AsyncOpenAI(api_key=openai.api_key)
+        client = openai_client()
         
         response = await client.chat.completions.create(
-            model="gpt-3.5-turbo",
+            model=config.ai.chat_model,
             messages=[
                 {"role": "system", "content": "You are a helpful assistant. Answer questions naturally and conversationally. Keep responses concise but informative."},
                 {"role": "user", "content": message}
@@ -110,16 +353,16 @@ async def get_openai_response(message: str) -> str:
         return response.choices[0].message.content.strip()
         
     except Exception as e:
-        print(f"[ERROR] OpenAI API error: {str(e)}")
+        log.error("openai.request_failed", error=str(e))
         return f"I encountered an error processing your question: {str(e)}. Please check your OpenAI API key and try again."
 
 async def process_with_ai(request: str, context: str, proof_summary: Dict[str, Any], original_command: str) -> str:
     """Process any AI request in the context of zkp operations"""
     try:
-        if not openai.api_key:
+        if not OPENAI_API_KEY:
             return "OpenAI API key not configured."
         
-        client = AsyncOpenAI(api_key=openai.api_key)
+        client = openai_client()
         
         # Build context from proof summary
         context_info = f"The user requested: '{original_command}'\n"
@@ -151,7 +394,7 @@ async def process_with_ai(request: str, context: str, proof_summary: Dict[str, A
             user_prompt = f"{context_info}\n\n{request}"
         
         response = await client.chat.completions.create(
-            model="gpt-3.5-turbo",
+            model=config.ai.chat_model,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
@@ -163,7 +406,7 @@ async def process_with_ai(request: str, context: str, proof_summary: Dict[str, A
         return response.choices[0].message.content.strip()
         
     except Exception as e:
-        print(f"[ERROR] OpenAI processing error: {str(e)}")
+        log.error("openai.processing_failed", error=str(e))
         return "Unable to process AI request at this time."
 
 # Removed - all parsing now done by OpenAI
@@ -176,31 +419,42 @@ async def process_with_ai(request: str, context: str, proof_summary: Dict[str, A
 
 async def parse_workflow_with_openai(message: str) -> Dict[str, Any]:
     """Parse complex workflows using OpenAI for better natural language understanding."""
-    print(f"[DEBUG] parse_workflow_with_openai called with: {message}")
+    log.debug("parse_workflow.start", command=message)
     try:
-        if not openai.api_key:
-            print(f"[ERROR] OpenAI API key not configured")
+        if not OPENAI_API_KEY:
+            log.error("parse_workflow.no_api_key")
             raise ValueError("OpenAI API key not configured")
         
-        print(f"[DEBUG] Creating enhanced OpenAI parser...")
-        parser = EnhancedOpenAIWorkflowParser(api_key=openai.api_key)
+        # Identical commands parse to the same workflow; any worker may have seen it already
+        cache_key = hashlib.sha256(" ".join(message.split()).lower().encode()).hexdigest()
+        ttl = config.workflow.parse_cache_ttl_secs
+        cached = None
+        if ttl > 0:
+            cached = await asyncio.to_thread(shared_state().cache_get, "workflow_parse", cache_key)
+        if cached:
+            log.debug("parse_workflow.cache_hit", step_count=len(cached.get('steps', [])))
+            return cached
+        
+        parser = workflow_parser()
         
         # Use the enhanced parser which supports blockchain verification steps
         result = parser.parse_workflow(message)
         
         # Validate the workflow
         if parser.validate_workflow(result):
-            print(f"[DEBUG] Workflow validation passed")
+            log.debug("parse_workflow.validated")
         else:
-            print(f"[WARNING] Workflow validation failed, but continuing")
+            log.warning("parse_workflow.validation_failed", step_count=len(result.get('steps', [])))
         
-        print(f"[DEBUG] Parsed result: {json.dumps(result, indent=2)}")
-        print(f"[DEBUG] Returning parsed workflow with {len(result.get('steps', []))} steps")
+        log.verbose("parse_workflow.result", workflow=lambda: json.dumps(result))
+        log.debug("parse_workflow.done", step_count=len(result.get('steps', [])))
         
+        if ttl > 0 and result.get('steps') and not result.get('error'):
+            await asyncio.to_thread(shared_state().cache_put, "workflow_parse", cache_key, result, ttl)
         return result
         
     except asyncio.TimeoutError:
-        print(f"[ERROR] OpenAI API timeout")
+        log.error("parse_workflow.timeout")
         # Fall back to a simple structure
         return {
             "description": message,
@@ -209,9 +463,7 @@ async def parse_workflow_with_openai(message: str) -> Dict[str, Any]:
             "error": "OpenAI API timeout"
         }
     except Exception as e:
-        print(f"[ERROR] OpenAI workflow parsing error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("parse_workflow.error", error=str(e))
         # Fall back to a simple structure
         return {
             "description": message,
@@ -228,21 +480,17 @@ async def chat_endpoint(request: ChatRequest):
         
         # Log all incoming chat requests for debugging
         request_time = datetime.now()
-        print(f"[CHAT_REQUEST] Time: {request_time.isoformat()}")
-        print(f"[CHAT_REQUEST] Message: {message}")
+        log.info("chat.request", message=message, time=request_time.isoformat())
         
         # Block empty messages and common greeting loops
         if not message or message.lower() in ['hello', 'hello!', 'hi', 'hi!', '']:
-            print(f"[DEBUG] Blocking potential loop message: '{message}'")
+            log.debug("chat.blocked", message=message)
             return {
                 "intent": "blocked",
                 "response": "",
             }
         
-        print(f"[DEBUG] chat endpoint: {message}")
-        
         # ALL commands now go through workflow processing with OpenAI
-        print(f"[DEBUG] Processing with OpenAI workflow parser")
         
         # Execute as workflow - OpenAI will determine what type of command it is
         workflow_request = WorkflowRequest(command=message)
@@ -272,91 +520,278 @@ async def chat_endpoint(request: ChatRequest):
             }
         
     except Exception as e:
-        print(f"[ERROR] Chat endpoint error: {str(e)}")
+        log.exception("chat.error", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 import asyncio
-import aiohttp
+
+from services.update_channel import UpdateChannel
+
+# One keep-alive connection to the Rust server; updates are micro-batched
+update_channel = UpdateChannel(config.server.workflow_update_url,
+                               linger_ms=config.server.update_linger_ms,
+                               max_queue=config.server.update_queue_size)
 
 async def send_workflow_update(message):
     """Send workflow update to Rust WebSocket server"""
+    await update_channel.send(message)
+
+# Single owner of pending-transfer polling (runs in the leader worker); changes go out over the WebSocket update path
+async def publish_transfer_update(message):
+    """Record the status for every worker, then push it to the UI"""
+    await asyncio.to_thread(shared_state().record_transfer, message)
+    await send_workflow_update(message)
+
+@lru_cache(maxsize=1)
+def transfer_poller():
+    return TransferPoller(
+        circle_client(), publish_transfer_update,
+        base_interval=config.circle.poll_base_secs,
+        max_interval=config.circle.poll_max_secs,
+        rate_per_sec=config.circle.rate_limit_per_sec,
+        max_age_secs=config.circle.poll_max_age_secs,
+        # With webhooks, poll only transfers that have gone quiet for the grace period
+        push_grace_secs=config.circle.webhook_grace_secs if config.circle.webhooks else 0,
+    )
+
+@config.on_change
+def apply_config_changes(old, new, changes):
+    """Push reloaded settings into long-lived objects; the rest is read per request"""
+    global OPENAI_API_KEY
+    if "ai.openai_api_key" in changes:
+        OPENAI_API_KEY = new.ai.openai_api_key
+        openai_client.cache_clear()
+        workflow_parser.cache_clear()
+    if any(name.startswith("logging.") for name in changes):
+        update_logging(new.logging.level, new.logging.debug_mode, new.logging.debug_sample_rate)
+    profiles = profiler()
+    profiles.sample_rate = new.profiling.sample_rate
+    profiles.admin_token = new.profiling.admin_token
+    poller = transfer_poller()
+    poller.base_interval = new.circle.poll_base_secs
+    poller.max_interval = new.circle.poll_max_secs
+    poller.max_age_secs = new.circle.poll_max_age_secs
+    poller.push_grace_secs = new.circle.webhook_grace_secs if new.circle.webhooks else 0
+    poller.bucket.rate = new.circle.rate_limit_per_sec
+    poller.bucket.capacity = max(1, int(new.circle.rate_limit_per_sec))
+    log.info("config.applied", version=config.version, changed=sorted(changes))
+
+@app.post("/execute_workflow")
+async def execute_workflow(request: WorkflowRequest, idempotency_key: Optional[str] = Header(None)):
+    """Execute a workflow; a repeated Idempotency-Key replays the first response from any worker"""
+    if not idempotency_key:
+        return await run_workflow(request)
+    key = f"workflow:{idempotency_key}"
+    existing = await asyncio.to_thread(shared_state().claim, key, config.server.leader_lease_secs)
+    if existing:
+        if existing["state"] == "done":
+            log.info("workflow.replayed", idempotency_key=idempotency_key)
+            return existing["response"]
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still running")
+    return await run_claimed(key, lambda: run_workflow(request))
+
+async def hold_claim(key: str):
+    """Renew a pending claim while this worker is alive; if it dies, the claim lapses within a lease"""
+    while True:
+        lease = config.server.leader_lease_secs
+        await asyncio.sleep(lease / 3)
+        await asyncio.to_thread(shared_state().renew, key, lease)
+
+async def run_claimed(key: str, work: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run ``work`` for a key this worker just claimed. The result is stored
+    for replay (IDEMPOTENCY_TTL_SECS); a failure releases the claim so a
+    retry can run.
+    """
+    holder = asyncio.create_task(hold_claim(key))
+    try:
+        result = await work()
+    except BaseException:
+        holder.cancel()
+        await asyncio.to_thread(shared_state().release, key)
+        raise
+    holder.cancel()
+    await asyncio.to_thread(shared_state().complete, key, result, config.workflow.idempotency_ttl_secs)
+    return result
+
+def executor_env(traceparent: str) -> Dict[str, str]:
+    """Environment for the Node executor: REAL zkEngine only"""
+    env = os.environ.copy()
+    env.update({
+        'ZKENGINE_BINARY': os.getenv('ZKENGINE_BINARY', './zkengine_binary/zkEngine'),
+        'WASM_DIR': os.getenv('WASM_DIR', './zkengine_binary'),
+        'PROOFS_DIR': os.getenv('PROOFS_DIR', './proofs'),
+        'TRACEPARENT': traceparent,
+    })
+    
+    # Remove ALL simulation-related environment variables
+    simulation_vars = [
+        'USE_REAL_ZKENGINE', 'FALLBACK_MODE', 'TEST_MODE'
+    ]
+    for var in simulation_vars:
+        env.pop(var, None)
+    return env
+
+async def run_executor(workflow_id: str, parsed_workflow_file: str, settings, env: Dict[str, str]):
+    """
+    Run the Node executor on a parsed workflow. If it dies part-way (its
+    checkpoint still says running), run it again: it resumes at the first
+    unfinished step. Output of every attempt is returned together.
+    """
+    output = ""
+    while True:
+        try:
+            result = await asyncio.to_thread(
+                subprocess.run,
+                ['node', '../parsers/workflow/workflowCLI.js', '--parsed-file', parsed_workflow_file,
+                 '--checkpoint', checkpoints().path(workflow_id)],
+                capture_output=True,
+                text=True,
+                cwd=os.path.expanduser(settings.circle_dir),
+                env=env,
+                timeout=settings.executor_timeout_secs,
+            )
+        except subprocess.TimeoutExpired:
+            # A stuck step, not a crash: do not resume it later
+            checkpoints().update(workflow_id, status="failed")
+            raise
+        result.stdout = output + result.stdout
+        output = result.stdout
+        checkpoint = checkpoints().load(workflow_id)
+        if not checkpoint or checkpoint.get('status') != RUNNING:
+            return result
+        attempts = checkpoint.get('attempts', 0)
+        if attempts >= settings.resume_attempts:
+            log.error("workflow.resume_abandoned", workflow_id=workflow_id, attempts=attempts,
+                      position=checkpoint.get('position'))
+            checkpoints().update(workflow_id, status="failed")
+            return result
+        checkpoints().update(workflow_id, attempts=attempts + 1, executorPid=None, executorToken=None)
+        log.warning("workflow.executor_interrupted", workflow_id=workflow_id, return_code=result.returncode,
+                    position=checkpoint.get('position'), attempt=attempts + 1)
+        await asyncio.sleep(1)
+
+async def resume_workflow(checkpoint: Dict[str, Any]):
+    """Finish a workflow whose worker and executor both died, from its checkpoint"""
+    workflow_id = checkpoint['workflowId']
+    settings = config.snapshot().workflow
+    parsed_workflow_file = os.path.join(os.path.expanduser(settings.circle_dir),
+                                        f"parsed_workflow_{workflow_id}.json")
+    plan = checkpoint['plan']
+    log.warning("workflow.resume", workflow_id=workflow_id, position=checkpoint.get('position', 0),
+                step_count=len(plan.get('steps', [])), attempt=checkpoint.get('attempts', 0) + 1)
     try:
-        async with aiohttp.ClientSession() as session:
-            # Send to a special endpoint on the Rust server
-            async with session.post('http://localhost:8001/workflow_update', 
-                                  json=message,
-                                  headers={'Content-Type': 'application/json'}) as resp:
-                if resp.status != 200:
-                    print(f"[WARNING] Failed to send workflow update: {resp.status}")
+        with open(parsed_workflow_file, 'w') as f:
+            json.dump(plan, f)
+        traceparent = (plan.get('trace') or {}).get('traceparent', '')
+        result = await run_executor(workflow_id, parsed_workflow_file, settings, executor_env(traceparent))
+        log.info("workflow.resume_done", workflow_id=workflow_id, return_code=result.returncode)
     except Exception as e:
-        print(f"[WARNING] Error sending workflow update: {e}")
+        log.exception("workflow.resume_failed", workflow_id=workflow_id, error=str(e))
+    finally:
+        checkpoints().remove(workflow_id)
+        try:
+            os.remove(parsed_workflow_file)
+        except OSError:
+            pass
 
-@app.post("/execute_workflow") 
-async def execute_workflow(request: WorkflowRequest):
+async def resume_orphaned_workflows():
+    """Leader duty: resume workflows interrupted by a restart of any worker"""
+    for checkpoint in await asyncio.to_thread(checkpoints().orphaned):
+        if checkpoint.get('status') != RUNNING:
+            # The executor outlived its worker and finished on its own
+            log.info("workflow.finished_unattended", workflow_id=checkpoint['workflowId'],
+                     status=checkpoint.get('status'))
+            checkpoints().remove(checkpoint['workflowId'])
+            continue
+        if checkpoint.get('attempts', 0) >= config.workflow.resume_attempts:
+            log.error("workflow.resume_abandoned", workflow_id=checkpoint['workflowId'],
+                      attempts=checkpoint.get('attempts', 0), position=checkpoint.get('position'))
+            checkpoints().remove(checkpoint['workflowId'])
+            continue
+        # Adopted before the next scan, so it is started once
+        checkpoints().adopt(checkpoint['workflowId'])
+        task = asyncio.create_task(resume_workflow(checkpoint))
+        resume_tasks.add(task)
+        task.add_done_callback(resume_tasks.discard)
+
+async def run_workflow(request: WorkflowRequest):
     """Execute all operations as workflows - unified system"""
     try:
         command = request.command.strip()
+        # One snapshot per workflow, so a reload mid-run cannot mix settings
+        settings = config.snapshot().workflow
+        circle_dir = os.path.expanduser(settings.circle_dir)
         request_time = datetime.now()
-        workflow_id = f"wf_{int(request_time.timestamp())}"
+        # Unique across workers, which may take requests in the same second
+        workflow_id = f"wf_{int(request_time.timestamp())}_{uuid.uuid4().hex[:8]}"
+        root_span = tracer.start_span("workflow.execute", workflow_id=workflow_id, command=command)
         
         # Log request details for debugging duplicate workflows
-        print(f"[WORKFLOW_REQUEST] Time: {request_time.isoformat()}")
-        print(f"[WORKFLOW_REQUEST] Command: {command}")
-        print(f"[WORKFLOW_REQUEST] Workflow ID: {workflow_id}")
+        log.info("workflow.request", command=command, workflow_id=workflow_id,
+                 trace_id=root_span.trace_id, time=request_time.isoformat())
         
         workflow_data = None
         steps = []
         parsed_workflow_file = None
         
         # Always use OpenAI for all commands - unified system
-        if openai.api_key is not None:
-            print(f"[DEBUG] Using OpenAI parser for workflow")
+        if OPENAI_API_KEY is not None:
             try:
-                workflow_data = await asyncio.wait_for(
-                    parse_workflow_with_openai(command),
-                    timeout=35.0  # Slightly longer than the internal timeout
-                )
-                print(f"[DEBUG] OpenAI returned workflow_data: {json.dumps(workflow_data, indent=2) if workflow_data else 'None'}")
+                with tracer.span("workflow.parse", parent=root_span, parser="openai"):
+                    workflow_data = await asyncio.wait_for(
+                        parse_workflow_with_openai(command),
+                        timeout=settings.parse_timeout_secs
+                    )
+                log.verbose("workflow.parsed", workflow=lambda: json.dumps(workflow_data))
                 
                 # Check if OpenAI parsing failed or returned no steps
                 if workflow_data.get('error') or not workflow_data.get('steps'):
-                    print(f"[ERROR] OpenAI parsing failed or returned no steps")
-                    print(f"[ERROR] Details: {workflow_data.get('error', 'No steps returned')}")
+                    log.error("workflow.parse_failed", details=workflow_data.get('error', 'No steps returned'))
+                    finish_workflow_trace(root_span, "error")
                     return {
                         "success": False,
                         "error": workflow_data.get('error', 'OpenAI returned no workflow steps'),
                         "details": "Failed to parse workflow. Please check command syntax."
                     }
                 else:
-                    print(f"[DEBUG] OpenAI parsing successful with {len(workflow_data.get('steps', []))} steps")
+                    log.debug("workflow.parse_ok", step_count=len(workflow_data.get('steps', [])))
+                    if settings.optimize_plans:
+                        workflow_data = optimize_plan(workflow_data)
+                        optimization = workflow_data['optimization']
+                        log.info("workflow.plan_optimized", workflow_id=workflow_id,
+                                 step_count=len(workflow_data['steps']),
+                                 removed=len(optimization['removedSteps']),
+                                 estimated_seconds_saved=optimization['estimatedSecondsSaved'])
+                    if settings.early_conditions:
+                        with tracer.span("workflow.evaluate_conditions", parent=root_span):
+                            workflow_data = await asyncio.to_thread(
+                                evaluate_conditions, workflow_data, cached_validity)
+                        for branch in workflow_data['skippedBranches']:
+                            log.info("workflow.branch_skipped", workflow_id=workflow_id,
+                                     condition=branch['condition'], reason=branch['reason'],
+                                     skipped_steps=len(branch['skippedSteps']))
             except Exception as e:
-                print(f"[ERROR] OpenAI parser exception: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                log.exception("workflow.parse_exception", error=str(e))
                 # No fallback - OpenAI is required
+                finish_workflow_trace(root_span, "error")
                 return {
                     "success": False,
                     "error": f"OpenAI parsing error: {str(e)}",
                     "details": "Failed to parse workflow with OpenAI. Please check command syntax."
                 }
         
-        # Check conditions separately for better debugging
-        print(f"[DEBUG] Checking parsed file creation conditions:")
-        print(f"[DEBUG]   workflow_data exists: {workflow_data is not None}")
-        if workflow_data:
-            print(f"[DEBUG]   workflow_data has error: {workflow_data.get('error', False)}")
-            print(f"[DEBUG]   workflow_data has steps: {len(workflow_data.get('steps', []))}")
-            print(f"[DEBUG]   workflow_data is simple: {workflow_data.get('simple', False)}")
-        
         if workflow_data and not workflow_data.get('error'):
             # Save the parsed workflow to a temporary file for the executor
-            parsed_workflow_file = os.path.join(os.path.expanduser("~/agentkit/circle"), f"parsed_workflow_{workflow_id}.json")
-            print(f"[DEBUG] Saving parsed workflow to: {parsed_workflow_file}")
+            parsed_workflow_file = os.path.join(circle_dir, f"parsed_workflow_{workflow_id}.json")
+            # The executor continues the trace from this context
+            workflow_data['trace'] = root_span.context()
             with open(parsed_workflow_file, 'w') as f:
-                json.dump(workflow_data, f, indent=2)
-            print(f"[DEBUG] Parsed workflow saved successfully")
+                json.dump(workflow_data, f)
+            checkpoints().create(workflow_id, workflow_data, command)
+            log.debug("workflow.parsed_file_saved", path=parsed_workflow_file)
         else:
-            print(f"[DEBUG] NOT creating parsed file because conditions not met")
+            log.debug("workflow.parsed_file_skipped", has_data=workflow_data is not None)
         
         if workflow_data and not workflow_data.get('error'):
             # Create step structure for UI from parsed data
@@ -382,7 +817,8 @@ async def execute_workflow(request: WorkflowRequest):
                 steps.append(ui_step)
         
         if not workflow_data or not parsed_workflow_file:
-            print(f"[ERROR] Failed to parse workflow")
+            log.error("workflow.parse_failed", details="no parsed workflow")
+            finish_workflow_trace(root_span, "error")
             return {
                 "success": False,
                 "error": "Failed to parse workflow. Please check the command syntax.",
@@ -408,37 +844,17 @@ async def execute_workflow(request: WorkflowRequest):
         #         command = " then ".join(transfer_parts)
         #         print(f"[DEBUG] Preprocessed multi-condition: {command}")
 
-        print(f"[DEBUG] execute_workflow: {command}")
-        
         # Configure environment for REAL zkEngine ONLY
-        env = os.environ.copy()
-        env.update({
-            'ZKENGINE_BINARY': os.getenv('ZKENGINE_BINARY', './zkengine_binary/zkEngine'),
-            'WASM_DIR': os.getenv('WASM_DIR', './zkengine_binary'),
-            'PROOFS_DIR': os.getenv('PROOFS_DIR', './proofs')
-        })
-        
-        # Remove ALL simulation-related environment variables
-        simulation_vars = [
-            'USE_REAL_ZKENGINE', 'FALLBACK_MODE', 'TEST_MODE'
-        ]
-        for var in simulation_vars:
-            env.pop(var, None)
-        
-        print(f"[DEBUG] Environment: REAL zkEngine ONLY")
-        print(f"  ZKENGINE_BINARY: {env.get('ZKENGINE_BINARY')}")
+        env = executor_env(root_span.context()['traceparent'])
+        
+        log.debug("workflow.environment", zkengine_binary=env.get('ZKENGINE_BINARY'))
         
         # Workflow started will be sent by executor when it connects
         # This prevents duplicate workflow cards in the UI
         
         # Check if we have a parsed workflow file
         if not parsed_workflow_file:
-            print(f"[ERROR] No parsed workflow file created")
-            print(f"[ERROR] use_openai_parser: {use_openai_parser}")
-            print(f"[ERROR] workflow_data exists: {workflow_data is not None}")
-            if workflow_data:
-                print(f"[ERROR] workflow_data has error: {workflow_data.get('error', 'No error field')}")
-                print(f"[ERROR] workflow_data has steps: {len(workflow_data.get('steps', []))}")
+            log.error("workflow.no_parsed_file", has_data=workflow_data is not None)
             return {
                 "success": False,
                 "error": "Failed to create parsed workflow file. OpenAI parsing may have failed.",
@@ -446,20 +862,21 @@ async def execute_workflow(request: WorkflowRequest):
             }
         
         # Execute with the parsed file
-        print(f"[DEBUG] Executing with parsed file: {parsed_workflow_file}")
-        result = subprocess.run(
-            ['node', '../parsers/workflow/workflowCLI.js', '--parsed-file', parsed_workflow_file],
-            capture_output=True,
-            text=True,
-            cwd=os.path.expanduser("~/agentkit/circle"),
-            env=env,
-            timeout=300,
-        )
+        log.debug("workflow.executor_start", path=parsed_workflow_file)
+        with tracer.span("executor.run", parent=root_span) as executor_span:
+            try:
+                result = await run_executor(workflow_id, parsed_workflow_file, settings, env)
+            finally:
+                checkpoints().remove(workflow_id)
+            executor_span.set_attribute("return_code", result.returncode)
+        
+        # Spans reported by the executor, Rust server and zkEngine
+        tracer.ingest(extract_spans_from_output(result.stdout))
         
-        print(f"[DEBUG] CLI return code: {result.returncode}")
-        print(f"[DEBUG] CLI stdout: {result.stdout[-500:]}")
-        if result.stderr:
-            print(f"[DEBUG] CLI stderr: {result.stderr}")
+        log.info("workflow.executor_done", return_code=result.returncode,
+                 duration_ms=executor_span.duration_ms)
+        log.verbose("workflow.executor_output", stdout=lambda: truncate(result.stdout),
+                    stderr=lambda: truncate(result.stderr))
         
         if result.returncode == 0:
             transfer_ids = []
@@ -529,18 +946,27 @@ async def execute_workflow(request: WorkflowRequest):
             
             response_data = {
                 "success": True,
-                "workflowId": f"wf_{int(datetime.now().timestamp())}",
+                "workflowId": workflow_id,
                 "transferIds": list(set(transfer_ids)),
                 "proofSummary": proof_summary,
                 "message": "Workflow executed successfully",
                 "executionLog": result.stdout[-1000:]
             }
+            if 'skippedBranches' in workflow_data:
+                response_data["skippedBranches"] = workflow_data['skippedBranches']
+            if workflow_data.get('optimization'):
+                response_data["plan"] = {
+                    "steps": workflow_data['steps'],
+                    "optimization": workflow_data['optimization'],
+                }
             
             # Add AI processing if requested
             if needs_ai_processing:
-                ai_response = await process_with_ai(ai_request, ai_context, proof_summary, command)
+                with tracer.span("ai.process", parent=root_span):
+                    ai_response = await process_with_ai(ai_request, ai_context, proof_summary, command)
                 response_data["ai_response"] = ai_response
             
+            response_data["trace"] = finish_workflow_trace(root_span)
             return response_data
         else:
             # Clean up temporary parsed workflow file if it exists
@@ -554,11 +980,14 @@ async def execute_workflow(request: WorkflowRequest):
                 "success": False,
                 "error": result.stderr or result.stdout or "Workflow execution failed",
                 "stderr": result.stderr,
-                "stdout": result.stdout
+                "stdout": result.stdout,
+                "trace": finish_workflow_trace(root_span, "error")
             }
         
     except Exception as e:
-        print(f"[ERROR] Workflow execution error: {str(e)}")
+        log.exception("workflow.error", error=str(e))
+        if 'root_span' in locals():
+            finish_workflow_trace(root_span, "error")
         
         # Clean up temporary parsed workflow file if it exists
         if 'use_openai_parser' in locals() and use_openai_parser and 'parsed_workflow_file' in locals() and parsed_workflow_file:
@@ -592,30 +1021,76 @@ async def test_parser(request: dict):
         }
 
 @app.get("/workflow_history")
-async def workflow_history():
-    """Get workflow execution history"""
+async def workflow_history(limit: int = 20, cursor: Optional[str] = None,
+                           status: Optional[str] = None, step_type: Optional[str] = None):
+    """Get workflow execution history, newest first; pass next_cursor back for older pages"""
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     try:
-        workflow_history_path = os.path.expanduser("~/agentkit/workflow_history.json")
-        if os.path.exists(workflow_history_path):
-            with open(workflow_history_path, 'r') as f:
-                history = json.load(f)
-            
-            workflows = history.get("workflows", [])
-            workflows.sort(key=lambda x: x.get("createdAt", ""), reverse=True)
-            
-            for wf in workflows:
-                wf["stepCount"] = len(wf.get("steps", []))
-            
-            return {
-                "success": True,
-                "workflows": workflows[:20]
-            }
-        else:
-            return {"success": True, "workflows": []}
+        await asyncio.to_thread(history_store().sync)
+        page = await asyncio.to_thread(history_store().query, limit=limit, cursor=cursor,
+                                       status=status, step_type=step_type)
+        return {
+            "success": True,
+            "workflows": page["workflows"],
+            "next_cursor": page["next_cursor"]
+        }
             
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+@app.get("/verification_cache/stats")
+async def verification_cache_stats():
+    """Hit rate and size of the verification result cache"""
+    return {"success": True, **verification_cache().stats()}
+
+def lookup_verification(proof_id: str, step_size: int = 50, count: bool = True) -> Optional[Dict[str, Any]]:
+    """Cache entry for a proof's current content: {} on a miss, None if the proof does not exist"""
+    candidates = [proof_id]
+    for prefix, other in (("proof_", "prove_"), ("prove_", "proof_")):
+        if proof_id.startswith(prefix):
+            candidates.append(other + proof_id[len(prefix):])
+    for name in candidates:
+        if "/" in name or name.startswith("."):
+            raise ValueError("Invalid proof ID")
+        try:
+            key = key_for(os.path.join(config.zkengine.proofs_dir, name), step_size)
+        except OSError:
+            continue
+        return verification_cache().lookup(key, count=count) or {}
+    return None
+
+def cached_validity(proof_id: str) -> Optional[bool]:
+    """Cached verification result used to evaluate workflow conditions up front"""
+    try:
+        return (lookup_verification(proof_id, count=False) or {}).get("valid")
+    except ValueError:
+        return None
+
+@app.get("/verification_cache/{proof_id}")
+async def cached_verification(proof_id: str, step_size: int = 50):
+    """Cached verification result for a proof's current content, if any"""
+    try:
+        cached = await asyncio.to_thread(lookup_verification, proof_id, step_size)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid proof ID")
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Proof not found")
+    if cached:
+        return {"success": True, "cached": True, "proof_id": proof_id, "valid": cached["valid"],
+                "verified_ms": cached["verified_ms"]}
+    return {"success": True, "cached": False, "proof_id": proof_id}
+
+@app.delete("/verification_cache/{target}")
+async def invalidate_verification(target: str, request: Request):
+    """Forget cached results for a proof ID or proof content hash"""
+    require_internal(request)
+    removed = verification_cache().invalidate(proof_id=target, proof_hash=target)
+    return {"success": True, "invalidated": removed}
+
 @app.post("/check_transfer_status")
 async def check_transfer_status(request: dict):
     """Check Circle transfer status"""
@@ -624,198 +1099,114 @@ async def check_transfer_status(request: dict):
         if not transfer_id:
             return {"success": False, "error": "Transfer ID required"}
         
-        env = os.environ.copy()
-        result = subprocess.run(
-            ['node', 'check-transfer-status.js', transfer_id],
-            capture_output=True,
-            text=True,
-            cwd=os.path.expanduser("~/agentkit/circle"),
-            env=env,
-            timeout=300,
-        )
-        
-        if result.returncode == 0:
-            # Simple string parsing instead of regex
-            status = "unknown"
-            transaction_hash = "pending"
-            
-            stdout_lines = result.stdout.split('\n')
-            for line in stdout_lines:
-                if 'Status:' in line:
-                    parts = line.split('Status:')
-                    if len(parts) > 1:
-                        status = parts[1].strip().split()[0]  # Get first word after Status:
-                elif 'Transaction Hash:' in line:
-                    parts = line.split('Transaction Hash:')
-                    if len(parts) > 1:
-                        transaction_hash = parts[1].strip().split()[0]  # Get first word (hash)
-            
-            return {
-                "success": True,
-                "status": status,
-                "transactionHash": transaction_hash,
-                "rawOutput": result.stdout
-            }
-        else:
-            return {
-                "success": False,
-                "error": result.stderr or "Failed to check transfer status"
-            }
-            
+        transfer = await circle_client().get_transfer(transfer_id)
+        return {
+            "success": True,
+            "status": transfer.status,
+            "transactionHash": transfer.transaction_hash or "pending",
+            "transfer": transfer.raw
+        }
+    
+    except CircleAPIError as e:
+        return {"success": False, "status": "rate_limited" if e.status == 429 else "unknown", "error": str(e)}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 @app.post("/poll_transfer")
 async def poll_transfer(request: dict):
-    """Poll Circle transfer status"""
-    try:
-        transfer_id = request.get("transferId")
-        blockchain = request.get("blockchain", "ETH")
-        if not transfer_id:
-            return {"success": False, "error": "Transfer ID required"}
-        
-        env = os.environ.copy()
-        
-        # Call the check-transfer-status.js script
-        result = subprocess.run(
-            ['node', 'check-transfer-status.js', transfer_id],
-            capture_output=True,
-            text=True,
-            cwd=os.path.expanduser("~/agentkit/circle"),
-            env=env,
-            timeout=10,
-        )
-        
-        if result.returncode == 0:
-            # Parse the output to extract status
-            output = result.stdout
-            print(f"[DEBUG] Transfer check output for {blockchain}: {output[:500]}")
-            
-            status = "pending"
-            transaction_hash = None
-            explorer_link = None
-            
-            # Try to parse JSON output
-            try:
-                # Find ALL JSON objects in the output (there might be multiple)
-                json_objects = []
-                temp = output
-                while True:
-                    json_start = temp.find('{')
-                    if json_start == -1:
-                        break
-                    json_end = temp.find('\n\n', json_start)
-                    if json_end == -1:
-                        json_end = len(temp)
-                    
-                    # Try to find matching closing brace
-                    brace_count = 0
-                    for i in range(json_start, min(json_end, len(temp))):
-                        if temp[i] == '{':
-                            brace_count += 1
-                        elif temp[i] == '}':
-                            brace_count -= 1
-                            if brace_count == 0:
-                                json_end = i + 1
-                                break
-                    
-                    if brace_count == 0:
-                        try:
-                            json_str = temp[json_start:json_end]
-                            obj = json.loads(json_str)
-                            json_objects.append(obj)
-                        except:
-                            pass
-                    
-                    temp = temp[json_end:]
-                
-                # Look for the most complete JSON object (one with status field)
-                transfer_data = {}
-                for obj in json_objects:
-                    if 'status' in obj:
-                        transfer_data = obj
-                        break
-                
-                if not transfer_data and json_objects:
-                    transfer_data = json_objects[0]
-                
-                # Extract status
-                status = transfer_data.get('status', 'pending')
-                print(f"[DEBUG] Parsed status from Circle API: {status}")
-                
-                # Extract transaction hash - handle different field names and nested structure
-                transaction_hash = transfer_data.get('transactionHash') or transfer_data.get('txHash')
-                
-                # Check nested structure for transaction hash
-                if not transaction_hash and 'blockchainLocation' in transfer_data:
-                    transaction_hash = transfer_data['blockchainLocation'].get('txHash')
-                
-                # For Solana, check if we need to look in a different field
-                if not transaction_hash and blockchain == 'SOL' and 'transactionId' in transfer_data:
-                    transaction_hash = transfer_data.get('transactionId')
-                
-                # Build explorer link if we have hash and chain
-                destination = transfer_data.get('destination', {})
-                if transaction_hash and destination:
-                    chain = destination.get('chain', blockchain)
-                    if chain == 'ETH':
-                        explorer_link = f"https://sepolia.etherscan.io/tx/{transaction_hash}"
-                    elif chain == 'SOL':
-                        explorer_link = f"https://explorer.solana.com/tx/{transaction_hash}?cluster=devnet"
-                        
-                # For completed Solana transfers without hash, provide transfer ID link
-                elif status == 'complete' and blockchain == 'SOL' and not transaction_hash:
-                    print(f"[WARNING] Solana transfer complete but no tx hash. Transfer ID: {transfer_id}")
-                    # Provide a message about Solana finality
-                    explorer_link = f"Transfer ID: {transfer_id} (Solana tx pending finality)"
-                            
-            except json.JSONDecodeError:
-                print(f"[WARNING] Could not parse JSON from transfer status output")
-                # Fallback to simple string parsing
-                for line in output.split('\n'):
-                    if '"transactionHash"' in line and ':' in line:
-                        parts = line.split(':')
-                        if len(parts) > 1:
-                            hash_part = parts[1].strip().strip('"').strip(',')
-                            if hash_part:
-                                transaction_hash = hash_part
-                    elif 'View on Explorer:' in line:
-                        parts = line.split('View on Explorer:')
-                        if len(parts) > 1:
-                            link = parts[1].strip().split()[0]  # Get first word (URL)
-                            if link.startswith('https://'):
-                                explorer_link = link
-            
-            return {
-                "success": True,
-                "status": status,
-                "transactionHash": transaction_hash,
-                "explorerLink": explorer_link,
-                "blockchain": blockchain
-            }
-        else:
-            return {
-                "success": False,
-                "status": "pending",
-                "error": result.stderr
-            }
-            
-    except Exception as e:
-        print(f"[ERROR] poll_transfer error: {str(e)}")
+    """Register a transfer with the background poller and return its last known state"""
+    transfer_id = request.get("transferId")
+    blockchain = request.get("blockchain", "ETH")
+    if not transfer_id:
+        return {"success": False, "error": "Transfer ID required"}
+
+    if is_leader:
+        watched = transfer_poller().watch(transfer_id, blockchain)
         return {
-            "success": False,
-            "status": "pending",
-            "error": str(e)
+            "success": True,
+            "status": watched.status,
+            "transactionHash": watched.transaction_hash,
+            "explorerLink": watched.explorer_link,
+            "blockchain": watched.blockchain
         }
 
+    # Another worker runs the poller: hand the watch over and answer from the shared status
+    known = await asyncio.to_thread(shared_state().get_transfer, transfer_id)
+    if not known:
+        await asyncio.to_thread(shared_state().enqueue, "watch_transfer",
+                                {"transferId": transfer_id, "blockchain": blockchain})
+    known = known or {}
+    return {
+        "success": True,
+        "status": known.get("status", "pending"),
+        "transactionHash": known.get("transactionHash"),
+        "explorerLink": known.get("explorerLink"),
+        "blockchain": known.get("blockchain", blockchain)
+    }
+
+@app.post("/transfers/watch")
+async def watch_transfer(request: dict):
+    """Start background status polling for a transfer (called by the executor after initiating one)"""
+    return await poll_transfer(request)
+
+@app.post("/webhooks/circle")
+async def circle_webhook(request: Request):
+    """Signed Circle transfer notification; updates subscribers without waiting for a poll"""
+    if not config.circle.webhooks:
+        raise HTTPException(status_code=404, detail="Circle webhooks are not configured")
+    body = await request.body()
+    try:
+        await circle_webhooks.authenticate(webhook_keys(), body, request.headers)
+        notification_id, transfer = circle_webhooks.parse(body)
+    except circle_webhooks.WebhookError as e:
+        log.warning("webhook.rejected", reason=str(e))
+        raise HTTPException(status_code=e.status, detail=str(e))
+
+    # Circle retries may reach a different worker. The claim is marked done only
+    # once the notification is handled; a failure releases it for the retry.
+    claim_key = f"webhook:{notification_id}"
+    existing = await asyncio.to_thread(shared_state().claim, claim_key, config.server.leader_lease_secs)
+    if existing:
+        if existing["state"] == "pending":
+            raise HTTPException(status_code=409, detail="Notification is already being processed")
+        return {"success": True, "duplicate": True}
+
+    async def handle():
+        if transfer is None:
+            return {"success": True, "ignored": True}
+        if not is_leader:
+            await asyncio.to_thread(shared_state().enqueue, "transfer_update", {"transfer": transfer.raw})
+            return {"success": True, "queued": True}
+        changed = await transfer_poller().apply(transfer)
+        log.info("webhook.transfer", transfer_id=transfer.id, status=transfer.status, changed=changed)
+        return {"success": True, "changed": changed}
+
+    return await run_claimed(claim_key, handle)
+
+@app.get("/transfers/poller/stats")
+async def transfer_poller_stats():
+    poller = transfer_poller()
+    return {
+        "worker": WORKER_ID,
+        "leader": is_leader,
+        "watching": len(poller.transfers),
+        "apiCalls": poller.api_calls,
+        "transfers": {t.transfer_id: t.status for t in poller.transfers.values()},
+    }
+
+@app.get("/state/stats")
+async def shared_state_stats():
+    """Row counts and lease holders in the cross-worker state store"""
+    return {"success": True, "worker": WORKER_ID, **await asyncio.to_thread(shared_state().stats)}
+
 if __name__ == "__main__":
-    print("🚀 Starting Verifiable Agent Kit v4.1 - REAL zkEngine ONLY")
-    print("📋 Configuration:")
-    print("   • NO SIMULATION MODE - Real zkEngine or failure")
-    print("   • Proof Generation → Real zkEngine via Rust WebSocket")
-    print("   • Proof Verification → Real zkEngine via Rust WebSocket")
-    print("   • Multi-step Workflows → Real zkEngine execution") 
-    print("   • Natural Language → OpenAI API")
-    print("🔗 Listening on http://localhost:8002")
+    log.info("chat_service.starting", version="4.1", mode="real zkEngine only",
+             url=f"http://localhost:{config.ai.chat_service_port}", workers=config.server.workers)
     
-    uvicorn.run(app, host="0.0.0.0", port=8002, log_level="info")
+    if config.server.workers > 1:
+        # Fresh interpreters per worker; this process only supervises
+        from services.serving import main as serve
+        sys.exit(serve([]))
+    import uvicorn
+    uvicorn.run(app, host=config.ai.chat_service_host, port=config.ai.chat_service_port,
+                loop=config.server.loop, http=config.server.http, log_level="info")
@@ -29,7 +29,7 @@ class CircleHandlerFixed {
         }
     }
 
-    async transfer(amount, recipientAddress, blockchain = 'ETH') {
+    async transfer(amount, recipientAddress, blockchain = 'ETH', options = {}) {
         if (!this.initialized) {
             await this.initialize();
         }
@@ -51,8 +51,8 @@ class CircleHandlerFixed {
                 console.log(`   (Resolved "${recipientAddress}" to ${resolvedAddress})`);
             }
 
-            // Create idempotency key
-            const idempotencyKey = uuidv4();
+            // Callers that may retry pass a stable key so Circle deduplicates the request
+            const idempotencyKey = options.idempotencyKey || uuidv4();
             
             const transferRequest = {
                 idempotencyKey: idempotencyKey,
@@ -119,10 +119,14 @@ class CircleHandlerFixed {
                 console.error('API Error Details:', JSON.stringify(error.response.data, null, 2));
                 console.error('Status Code:', error.response.status);
             }
+            const statusCode = error.response?.status;
             return {
                 success: false,
                 error: error.message,
-                details: error.response?.data
+                details: error.response?.data,
+                statusCode: statusCode,
+                // No response (network error) or a 429/5xx can be retried with the same idempotency key
+                retryable: statusCode ? statusCode === 429 || statusCode >= 500 : Boolean(error.request)
             };
         }
     }
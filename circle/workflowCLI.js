@@ -44,7 +44,7 @@ class WorkflowCLI {
         const workflow = await this.processCommand(command);
         
         // Force save before execution
-        this.manager.saveWorkflowHistory();
+        this.manager.saveWorkflowHistory(workflow.id);
         
         console.log('\n▶️  Starting execution in 3 seconds...\n');
         await new Promise(resolve => setTimeout(resolve, 3000));
@@ -45,7 +45,7 @@ class WorkflowExecutor {
                 
                 workflow.completedSteps.push(i);
                 workflow.results[`step_${i}`] = result;
-                this.manager.saveWorkflowHistory();
+                this.manager.saveWorkflowHistory(workflowId);
                 
                 console.log(`✅ Step ${i + 1} completed`);
                 
@@ -63,7 +63,7 @@ class WorkflowExecutor {
             console.error(`\n❌ Workflow failed at step ${workflow.currentStep + 1}: ${error.message}`);
             this.manager.updateWorkflowStatus(workflowId, 'failed');
             workflow.error = error.message;
-            this.manager.saveWorkflowHistory();
+            this.manager.saveWorkflowHistory(workflowId);
         } finally {
             this.executing.delete(workflowId);
         }
@@ -8,10 +8,25 @@ import { dirname } from 'path';
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = dirname(__filename);
 
+// Compact once the journal holds this many entries and at least twice as many as there are workflows
+const JOURNAL_COMPACT_MIN_ENTRIES = 1000;
+// Every executor process appends to the same journal, so appends and
+// compaction take a lock file; one older than this was left by a crash
+const JOURNAL_LOCK_STALE_MS = 30000;
+const JOURNAL_LOCK_TIMEOUT_MS = 10000;
+const JOURNAL_LOCK_RETRY_MS = 10;
+
+function sleepSync(ms) {
+    Atomics.wait(new Int32Array(new SharedArrayBuffer(4)), 0, 0, ms);
+}
+
 class WorkflowManager {
     constructor() {
         this.workflows = new Map();
         this.workflowHistoryFile = path.join(__dirname, '..', 'workflow_history.json');
+        // Append-only change log; services/workflow_history_store.py tails it
+        this.workflowJournalFile = this.workflowHistoryFile + 'l';
+        this.journalEntries = 0;
         this.loadWorkflowHistory();
     }
 
@@ -29,7 +44,7 @@ class WorkflowManager {
         };
         
         this.workflows.set(workflowId, workflow);
-        this.saveWorkflowHistory();
+        this.saveWorkflowHistory(workflowId);
         
         console.log(`✅ Created workflow ${workflowId}`);
         return workflow;
@@ -44,11 +59,20 @@ class WorkflowManager {
         if (workflow) {
             workflow.status = status;
             workflow.updatedAt = new Date().toISOString();
-            this.saveWorkflowHistory();
+            this.saveWorkflowHistory(workflowId);
         }
     }
 
     loadWorkflowHistory() {
+        const persisted = this.readPersistedWorkflows();
+        this.workflows = persisted.workflows;
+        this.journalEntries = persisted.journalEntries;
+    }
+
+    // Snapshot plus the changes appended since the last compaction
+    readPersistedWorkflows() {
+        const workflows = new Map();
+        let journalEntries = 0;
         try {
             if (fs.existsSync(this.workflowHistoryFile)) {
                 const data = JSON.parse(fs.readFileSync(this.workflowHistoryFile, 'utf8'));
@@ -56,33 +80,130 @@ class WorkflowManager {
                 // Handle both array and object formats
                 if (Array.isArray(data)) {
                     data.forEach(workflow => {
-                        this.workflows.set(workflow.id, workflow);
+                        workflows.set(workflow.id, workflow);
                     });
                 } else {
                     // Object format
                     Object.entries(data).forEach(([id, workflow]) => {
-                        this.workflows.set(id, workflow);
+                        workflows.set(id, workflow);
                     });
                 }
             }
         } catch (error) {
             console.error('Error loading workflow history:', error);
         }
+
+        try {
+            if (fs.existsSync(this.workflowJournalFile)) {
+                const lines = fs.readFileSync(this.workflowJournalFile, 'utf8').split('\n');
+                lines.forEach(line => {
+                    if (!line.trim()) return;
+                    try {
+                        const workflow = JSON.parse(line);
+                        workflows.set(workflow.id, workflow);
+                        journalEntries++;
+                    } catch (e) {
+                        // Torn final line from an interrupted append
+                    }
+                });
+            }
+        } catch (error) {
+            console.error('Error replaying workflow journal:', error);
+        }
+        return { workflows, journalEntries };
     }
 
-    saveWorkflowHistory() {
+    // Run fn holding the journal lock (an exclusively created lock file)
+    withJournalLock(fn) {
+        const lockFile = `${this.workflowJournalFile}.lock`;
+        const deadline = Date.now() + JOURNAL_LOCK_TIMEOUT_MS;
+        let fd;
+        for (;;) {
+            try {
+                fd = fs.openSync(lockFile, 'wx');
+                break;
+            } catch (error) {
+                if (error.code !== 'EEXIST') throw error;
+                try {
+                    if (Date.now() - fs.statSync(lockFile).mtimeMs > JOURNAL_LOCK_STALE_MS) {
+                        fs.unlinkSync(lockFile);
+                        continue;
+                    }
+                } catch (e) {
+                    continue; // Released while we looked at it
+                }
+                if (Date.now() > deadline) {
+                    throw new Error(`Timed out waiting for ${lockFile}`);
+                }
+                sleepSync(JOURNAL_LOCK_RETRY_MS);
+            }
+        }
         try {
-            console.log("📝 Saving workflow history...");
-            const workflowsObj = {};
-            this.workflows.forEach((workflow, id) => {
-                workflowsObj[id] = workflow;
+            fs.writeSync(fd, String(process.pid));
+            return fn();
+        } finally {
+            fs.closeSync(fd);
+            fs.unlinkSync(lockFile);
+        }
+    }
+
+    // Persist one workflow by appending it to the journal. Without an ID the
+    // full history is compacted into the snapshot instead.
+    saveWorkflowHistory(workflowId) {
+        if (!workflowId) {
+            this.compactWorkflowHistory();
+            return;
+        }
+        const workflow = this.workflows.get(workflowId);
+        if (!workflow) return;
+        try {
+            this.withJournalLock(() => {
+                fs.appendFileSync(this.workflowJournalFile, JSON.stringify(workflow) + '\n');
             });
-            fs.writeFileSync(this.workflowHistoryFile, JSON.stringify(workflowsObj, null, 2));
-            console.log(`✅ Saved ${Object.keys(workflowsObj).length} workflows to ${this.workflowHistoryFile}`);
+            this.journalEntries++;
+            if (this.journalEntries >= JOURNAL_COMPACT_MIN_ENTRIES &&
+                this.journalEntries >= 2 * this.workflows.size) {
+                this.compactWorkflowHistory();
+            }
         } catch (error) {
             console.error('Error saving workflow history:', error);
         }
     }
+
+    // Rewrite the snapshot and start a fresh journal, under the journal lock
+    // so no other process appends in between. The snapshot is rebuilt from
+    // what is on disk, which includes other processes' workflows; ours were
+    // journaled on every change. Both files are replaced by rename so
+    // readers never see a partial file.
+    compactWorkflowHistory() {
+        try {
+            const count = this.withJournalLock(() => {
+                const { workflows } = this.readPersistedWorkflows();
+                // Keep our own objects: callers hold and mutate them
+                this.workflows.forEach((workflow, id) => workflows.set(id, workflow));
+                workflows.forEach((workflow, id) => {
+                    if (!this.workflows.has(id)) this.workflows.set(id, workflow);
+                });
+
+                const workflowsObj = {};
+                workflows.forEach((workflow, id) => {
+                    workflowsObj[id] = workflow;
+                });
+                const snapshotTmp = `${this.workflowHistoryFile}.${process.pid}.tmp`;
+                fs.writeFileSync(snapshotTmp, JSON.stringify(workflowsObj, null, 2));
+                fs.renameSync(snapshotTmp, this.workflowHistoryFile);
+
+                const journalTmp = `${this.workflowJournalFile}.${process.pid}.tmp`;
+                fs.writeFileSync(journalTmp, '');
+                fs.renameSync(journalTmp, this.workflowJournalFile);
+                return workflows.size;
+            });
+            this.journalEntries = 0;
+            console.log(`✅ Compacted ${count} workflows into ${this.workflowHistoryFile}`);
+        } catch (error) {
+            console.error('Error compacting workflow history:', error);
+        }
+    }
 }
 
 // CLI Test Interface
@@ -108,9 +108,11 @@ class ZKPVerifier {
         console.log('📁 Looking for proof files in:', proofDir);
         
         const proofFile = path.join(proofDir, 'proof.bin');
+        // Stored proofs keep only a pointer into the artifact store
+        const proofRef = path.join(proofDir, 'proof.ref');
         const publicFile = path.join(proofDir, 'public.json');
         
-        if (!fs.existsSync(proofFile) || !fs.existsSync(publicFile)) {
+        if (!(fs.existsSync(proofFile) || fs.existsSync(proofRef)) || !fs.existsSync(publicFile)) {
             throw new Error(`Proof files not found for ${proofData.proof_id}. Verification failed.`);
         }
         
@@ -12,6 +12,11 @@ const config = {
     port: process.env.PORT || 8001,
     host: process.env.HOST || 'localhost',
     wsUrl: process.env.WS_URL || 'ws://localhost:8001/ws',
+    workflowUpdateUrl: process.env.WORKFLOW_UPDATE_URL || 'http://localhost:8001/workflow_update',
+    updateLingerMs: parseFloat(process.env.UPDATE_LINGER_MS || '5'),
+    updateQueueSize: parseInt(process.env.UPDATE_QUEUE_SIZE || '1000', 10),
+    workflowUpdateWindowMs: parseInt(process.env.WORKFLOW_UPDATE_WINDOW_MS || '50', 10),
+    workflowSnapshotIntervalMs: parseInt(process.env.WORKFLOW_SNAPSHOT_INTERVAL_MS || '5000', 10),
   },
 
   // AI Service Configuration
@@ -20,6 +25,7 @@ const config = {
     chatServicePort: process.env.CHAT_SERVICE_PORT || 8002,
     openaiApiKey: process.env.OPENAI_API_KEY,
     openaiModel: process.env.OPENAI_MODEL || 'gpt-4',
+    chatModel: process.env.OPENAI_CHAT_MODEL || 'gpt-3.5-turbo',
   },
 
   // Blockchain Configuration
@@ -49,6 +55,14 @@ const config = {
     usdcTokenId: process.env.CIRCLE_USDC_TOKEN_ID || '2552c76e-860a-47c8-a6d1-a20ba3e59334',
     pollInterval: 5000, // 5 seconds
     maxRetries: 3,
+    pollBaseSecs: parseFloat(process.env.TRANSFER_POLL_BASE_SECS || '2'),
+    pollMaxSecs: parseFloat(process.env.TRANSFER_POLL_MAX_SECS || '60'),
+    pollMaxAgeSecs: parseFloat(process.env.TRANSFER_POLL_MAX_AGE_SECS || '1800'),
+    rateLimitPerSec: parseFloat(process.env.CIRCLE_RATE_LIMIT_PER_SEC || '5'),
+    webhooks: process.env.CIRCLE_WEBHOOKS === 'true',
+    webhookGraceSecs: parseFloat(process.env.CIRCLE_WEBHOOK_GRACE_SECS || '30'),
+    walletRatePerSec: parseFloat(process.env.CIRCLE_WALLET_RATE_PER_SEC || '2'),
+    walletBurst: parseInt(process.env.CIRCLE_WALLET_BURST || '5', 10),
   },
 
   // zkEngine Configuration
@@ -56,6 +70,7 @@ const config = {
     binaryPath: process.env.ZKENGINE_BINARY || './zkengine_binary/zkEngine',
     wasmDir: process.env.WASM_DIR || './zkengine_binary',
     proofsDir: process.env.PROOFS_DIR || './proofs',
+    artifactStoreDir: process.env.ARTIFACT_STORE_DIR || './artifacts',
     defaultStepSize: 50,
     proofTypes: {
       kyc: 'prove_kyc.wat',
@@ -67,8 +82,30 @@ const config = {
   // Database Configuration
   database: {
     proofsDb: process.env.PROOFS_DB || './proofs_db.json',
+    proofStore: process.env.PROOF_STORE_DB || './proofs_db.sqlite',
     verificationsDb: process.env.VERIFICATIONS_DB || './verifications_db.json',
+    verificationCache: process.env.VERIFICATION_CACHE_DB || './verification_cache.sqlite',
     workflowHistory: process.env.WORKFLOW_HISTORY || './workflow_history.json',
+    workflowHistoryDb: process.env.WORKFLOW_HISTORY_DB || './workflow_history.sqlite',
+  },
+
+  // Cold-tier offload for proof artifacts (services/proof_tiering.py)
+  tiering: {
+    backend: process.env.TIERING_BACKEND || null,
+    hotDays: parseFloat(process.env.TIERING_HOT_DAYS || '7'),
+    localBudgetGb: parseFloat(process.env.TIERING_LOCAL_BUDGET_GB || '0'),
+  },
+
+  // Proof garbage collection under a storage budget (services/proof_gc.py)
+  gc: {
+    budgetGb: parseFloat(process.env.GC_BUDGET_GB || '0'),
+    policy: process.env.GC_POLICY || 'lru',
+  },
+
+  // Per-topic event gateway in front of the Rust broadcast (services/event_gateway.py)
+  eventGateway: {
+    port: parseInt(process.env.EVENT_GATEWAY_PORT || '8003', 10),
+    maxQueue: parseInt(process.env.EVENT_GATEWAY_MAX_QUEUE || '256', 10),
   },
 
   // Frontend Configuration
@@ -2,108 +2,249 @@
 Centralized Configuration for Agentkit (Python Services)
 """
 
+import logging
 import os
-from dataclasses import dataclass, field
-from typing import Optional
-from dotenv import load_dotenv
+import threading
+from dataclasses import dataclass, field, fields, is_dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-# Load environment variables
-load_dotenv()
+ENV_LOCATIONS = (Path.cwd() / '.env', Path.cwd().parent / '.env', Path.home() / '.env')
 
-@dataclass
+# Variables set by the process environment always win over .env, on reload too
+_process_env = frozenset(os.environ)
+_loaded_from_file: set = set()
+
+
+def find_env() -> Optional[Path]:
+    for env_path in ENV_LOCATIONS:
+        if env_path.exists():
+            return env_path
+    return None
+
+
+def load_env() -> Optional[Path]:
+    """Load the first .env found in ENV_LOCATIONS; calling it again applies edits and removals"""
+    global _loaded_from_file
+    env_path = find_env()
+    try:
+        from dotenv import dotenv_values
+    except ImportError:
+        return None
+    values = {}
+    if env_path is not None:
+        values = {k: v for k, v in dotenv_values(env_path).items()
+                  if v is not None and k not in _process_env}
+    for name in _loaded_from_file - values.keys():
+        os.environ.pop(name, None)
+    os.environ.update(values)
+    _loaded_from_file = set(values)
+    return env_path
+
+
+env_path = load_env()
+
+
+# Defaults are read from the environment when a config object is built, not
+# when this module is imported, so Config() always reflects the current env.
+def env(name: str, default: Any = None, cast: Callable[[str], Any] = str):
+    def read():
+        value = os.getenv(name)
+        if value is None:
+            return default
+        return cast(value)
+    return field(default_factory=read)
+
+
+def env_flag(name: str, default: bool):
+    """'true' enables a default-off flag; anything but 'false' keeps a default-on flag on"""
+    if default:
+        return env(name, True, lambda v: v.lower() != 'false')
+    return env(name, False, lambda v: v.lower() == 'true')
+
+@dataclass(frozen=True)
 class ServerConfig:
-    port: int = int(os.getenv('PORT', 8001))
-    host: str = os.getenv('HOST', 'localhost')
-    ws_url: str = os.getenv('WS_URL', 'ws://localhost:8001/ws')
+    port: int = env('PORT', 8001, int)
+    host: str = env('HOST', 'localhost')
+    ws_url: str = env('WS_URL', 'ws://localhost:8001/ws')
+    workflow_update_url: str = env('WORKFLOW_UPDATE_URL', 'http://localhost:8001/workflow_update')
+    update_linger_ms: float = env('UPDATE_LINGER_MS', 5.0, float)
+    update_queue_size: int = env('UPDATE_QUEUE_SIZE', 1000, int)
+    config_watch_secs: float = env('CONFIG_WATCH_SECS', 2.0, float)
+    # chat_service worker processes (python -m services.serving) and their event loop / HTTP parser
+    workers: int = env('CHAT_SERVICE_WORKERS', 1, int)
+    loop: str = env('SERVER_LOOP', 'auto')
+    http: str = env('SERVER_HTTP', 'auto')
+    leader_lease_secs: float = env('LEADER_LEASE_SECS', 15.0, float)
+    # Internal routes (cache invalidation, artifact recall) accept loopback callers,
+    # or only callers sending this token in X-Internal-Token when it is set
+    internal_token: Optional[str] = env('INTERNAL_API_TOKEN')
 
-@dataclass
+@dataclass(frozen=True)
 class AIConfig:
-    chat_service_url: str = os.getenv('CHAT_SERVICE_URL', 'http://localhost:8002')
-    chat_service_port: int = int(os.getenv('CHAT_SERVICE_PORT', 8002))
-    openai_api_key: Optional[str] = os.getenv('OPENAI_API_KEY')
-    openai_model: str = os.getenv('OPENAI_MODEL', 'gpt-4')
+    chat_service_url: str = env('CHAT_SERVICE_URL', 'http://localhost:8002')
+    chat_service_host: str = env('CHAT_SERVICE_HOST', '0.0.0.0')
+    chat_service_port: int = env('CHAT_SERVICE_PORT', 8002, int)
+    openai_api_key: Optional[str] = env('OPENAI_API_KEY')
+    openai_model: str = env('OPENAI_MODEL', 'gpt-4')
+    chat_model: str = env('OPENAI_CHAT_MODEL', 'gpt-3.5-turbo')
+
+@dataclass(frozen=True)
+class EthereumConfig:
+    network: str = env('ETH_NETWORK', 'sepolia')
+    rpc_url: str = env('ETH_RPC_URL', 'https://sepolia.infura.io/v3/YOUR_KEY')
+    contract_address: str = '0x1e8150050a7a4715aad42b905c08df76883f396f'
+    chain_id: int = 11155111  # Sepolia
+    explorer_url: str = 'https://sepolia.etherscan.io'
+
+@dataclass(frozen=True)
+class SolanaConfig:
+    network: str = env('SOL_NETWORK', 'devnet')
+    rpc_url: str = env('SOL_RPC_URL', 'https://api.devnet.solana.com')
+    program_id: str = '2qohsyvXBRZMVRbKX74xkM6oUfntBqGMB7Jdk15n8wn7'
+    commitment: str = 'confirmed'
+    explorer_url: str = 'https://explorer.solana.com'
 
-@dataclass
+@dataclass(frozen=True)
 class BlockchainConfig:
-    class Ethereum:
-        network: str = os.getenv('ETH_NETWORK', 'sepolia')
-        rpc_url: str = os.getenv('ETH_RPC_URL', 'https://sepolia.infura.io/v3/YOUR_KEY')
-        contract_address: str = '0x1e8150050a7a4715aad42b905c08df76883f396f'
-        chain_id: int = 11155111  # Sepolia
-        explorer_url: str = 'https://sepolia.etherscan.io'
-    
-    class Solana:
-        network: str = os.getenv('SOL_NETWORK', 'devnet')
-        rpc_url: str = os.getenv('SOL_RPC_URL', 'https://api.devnet.solana.com')
-        program_id: str = '2qohsyvXBRZMVRbKX74xkM6oUfntBqGMB7Jdk15n8wn7'
-        commitment: str = 'confirmed'
-        explorer_url: str = 'https://explorer.solana.com'
-
-@dataclass
+    Ethereum: EthereumConfig = field(default_factory=EthereumConfig)
+    Solana: SolanaConfig = field(default_factory=SolanaConfig)
+
+@dataclass(frozen=True)
 class CircleConfig:
-    api_key: Optional[str] = os.getenv('CIRCLE_API_KEY')
-    api_url: str = os.getenv('CIRCLE_API_URL', 'https://api-sandbox.circle.com/v1')
-    eth_wallet_id: Optional[str] = os.getenv('CIRCLE_ETH_WALLET_ID')
-    sol_wallet_id: Optional[str] = os.getenv('CIRCLE_SOL_WALLET_ID')
-    usdc_token_id: str = os.getenv('CIRCLE_USDC_TOKEN_ID', '2552c76e-860a-47c8-a6d1-a20ba3e59334')
+    api_key: Optional[str] = env('CIRCLE_API_KEY')
+    api_url: str = env('CIRCLE_API_URL', 'https://api-sandbox.circle.com/v1')
+    eth_wallet_id: Optional[str] = env('CIRCLE_ETH_WALLET_ID')
+    sol_wallet_id: Optional[str] = env('CIRCLE_SOL_WALLET_ID')
+    usdc_token_id: str = env('CIRCLE_USDC_TOKEN_ID', '2552c76e-860a-47c8-a6d1-a20ba3e59334')
     poll_interval: int = 5000  # milliseconds
     max_retries: int = 3
+    poll_base_secs: float = env('TRANSFER_POLL_BASE_SECS', 2.0, float)
+    poll_max_secs: float = env('TRANSFER_POLL_MAX_SECS', 60.0, float)
+    poll_max_age_secs: float = env('TRANSFER_POLL_MAX_AGE_SECS', 1800.0, float)
+    rate_limit_per_sec: float = env('CIRCLE_RATE_LIMIT_PER_SEC', 5.0, float)
+    # Verify and apply Circle transfer notifications (needs the cryptography package)
+    webhooks: bool = env_flag('CIRCLE_WEBHOOKS', False)
+    webhook_grace_secs: float = env('CIRCLE_WEBHOOK_GRACE_SECS', 30.0, float)
 
-@dataclass
+@dataclass(frozen=True)
 class ZKEngineConfig:
-    binary_path: str = os.getenv('ZKENGINE_BINARY', './zkengine_binary/zkEngine')
-    wasm_dir: str = os.getenv('WASM_DIR', './zkengine_binary')
-    proofs_dir: str = os.getenv('PROOFS_DIR', './proofs')
+    binary_path: str = env('ZKENGINE_BINARY', './zkengine_binary/zkEngine')
+    wasm_dir: str = env('WASM_DIR', './zkengine_binary')
+    proofs_dir: str = env('PROOFS_DIR', './proofs')
+    artifact_store_dir: str = env('ARTIFACT_STORE_DIR', './artifacts')
     default_step_size: int = 50
-    proof_types: dict = None
+    proof_types: dict = field(default_factory=lambda: {
+        'kyc': 'prove_kyc.wat',
+        'location': 'prove_location.wat',
+        'ai_content': 'prove_ai_content.wat',
+    })
 
-    def __post_init__(self):
-        if self.proof_types is None:
-            self.proof_types = {
-                'kyc': 'prove_kyc.wat',
-                'location': 'prove_location.wat',
-                'ai_content': 'prove_ai_content.wat',
-            }
+@dataclass(frozen=True)
+class WorkflowConfig:
+    circle_dir: str = env('WORKFLOW_CIRCLE_DIR', '~/agentkit/circle')
+    parse_timeout_secs: float = env('WORKFLOW_PARSE_TIMEOUT_SECS', 35.0, float)
+    executor_timeout_secs: float = env('WORKFLOW_EXECUTOR_TIMEOUT_SECS', 300.0, float)
+    # Shared across workers (services.shared_state); 0 disables the parse cache
+    parse_cache_ttl_secs: float = env('PARSE_CACHE_TTL_SECS', 3600.0, float)
+    # How long a finished request's response is replayed; a request still running
+    # holds its key for LEADER_LEASE_SECS at a time, renewed while its worker lives
+    idempotency_ttl_secs: float = env('IDEMPOTENCY_TTL_SECS', 86400.0, float)
+    # Drop duplicate proofs, verifications and listings before execution
+    optimize_plans: bool = env_flag('WORKFLOW_OPTIMIZE_PLANS', True)
+    # Skip the proofs behind conditional transfers already known to fail; the
+    # transfer itself still fails in place (a critical one stops the workflow)
+    early_conditions: bool = env_flag('WORKFLOW_EARLY_CONDITIONS', True)
+    # Per-step progress of running workflows, resumed after a restart
+    checkpoint_dir: str = env('WORKFLOW_CHECKPOINT_DIR', '~/agentkit/circle/workflow_checkpoints')
+    resume_attempts: int = env('WORKFLOW_RESUME_ATTEMPTS', 2, int)
 
-@dataclass
+@dataclass(frozen=True)
 class DatabaseConfig:
-    proofs_db: str = os.getenv('PROOFS_DB', './proofs_db.json')
-    verifications_db: str = os.getenv('VERIFICATIONS_DB', './verifications_db.json')
-    workflow_history: str = os.getenv('WORKFLOW_HISTORY', './workflow_history.json')
+    proofs_db: str = env('PROOFS_DB', './proofs_db.json')
+    proof_store: str = env('PROOF_STORE_DB', './proofs_db.sqlite')
+    verifications_db: str = env('VERIFICATIONS_DB', './verifications_db.json')
+    verification_cache: str = env('VERIFICATION_CACHE_DB', './verification_cache.sqlite')
+    workflow_history: str = env('WORKFLOW_HISTORY', './workflow_history.json')
+    workflow_history_db: str = env('WORKFLOW_HISTORY_DB', './workflow_history.sqlite')
+    shared_state: str = env('SHARED_STATE_DB', './chat_state.sqlite')
 
-@dataclass
+@dataclass(frozen=True)
 class LoggingConfig:
-    level: str = os.getenv('LOG_LEVEL', 'info')
-    format: str = os.getenv('LOG_FORMAT', 'json')
-    debug_mode: bool = os.getenv('DEBUG_MODE', 'false').lower() == 'true'
+    level: str = env('LOG_LEVEL', 'info')
+    format: str = env('LOG_FORMAT', 'json')
+    debug_mode: bool = env_flag('DEBUG_MODE', False)
+    debug_sample_rate: float = env('LOG_DEBUG_SAMPLE_RATE', 1.0, float)
+    queue_size: int = env('LOG_QUEUE_SIZE', 10000, int)
+
+@dataclass(frozen=True)
+class TracingConfig:
+    enabled: bool = env_flag('TRACING_ENABLED', True)
+    export_path: str = env('TRACE_EXPORT_PATH', './traces/spans.jsonl')
+
+@dataclass(frozen=True)
+class ProfilingConfig:
+    admin_token: Optional[str] = env('PROFILING_ADMIN_TOKEN')
+    sample_rate: float = env('PROFILING_SAMPLE_RATE', 0.0, float)
+    directory: str = env('PROFILING_DIR', './profiles')
+    max_profiles: int = env('PROFILING_MAX_PROFILES', 50, int)
+
+@dataclass(frozen=True)
+class TieringConfig:
+    backend: Optional[str] = env('TIERING_BACKEND')
+    s3_endpoint: Optional[str] = env('TIERING_S3_ENDPOINT')
+    hot_days: float = env('TIERING_HOT_DAYS', 7.0, float)
+    hot_access_count: int = env('TIERING_HOT_ACCESS_COUNT', 3, int)
+    local_budget_gb: float = env('TIERING_LOCAL_BUDGET_GB', 0.0, float)
+    interval_secs: int = env('TIERING_INTERVAL_SECS', 600, int)
+
+@dataclass(frozen=True)
+class GCConfig:
+    budget_gb: float = env('GC_BUDGET_GB', 0.0, float)
+    policy: str = env('GC_POLICY', 'lru')
+    batch_size: int = env('GC_BATCH_SIZE', 50, int)
+    min_age_hours: float = env('GC_MIN_AGE_HOURS', 24.0, float)
+    inflight_hours: float = env('GC_INFLIGHT_HOURS', 24.0, float)
+    # Candidates examined per run at most (pinned objects are skipped, not collected)
+    scan_limit: int = env('GC_SCAN_LIMIT', 1000, int)
+    interval_secs: int = env('GC_INTERVAL_SECS', 900, int)
 
-@dataclass
+@dataclass(frozen=True)
+class EventGatewayConfig:
+    host: str = env('EVENT_GATEWAY_HOST', '127.0.0.1')
+    port: int = env('EVENT_GATEWAY_PORT', 8003, int)
+    upstream_url: str = env('EVENT_GATEWAY_UPSTREAM', 'ws://localhost:8001/ws')
+    max_queue: int = env('EVENT_GATEWAY_MAX_QUEUE', 256, int)
+
+@dataclass(frozen=True)
 class SecurityConfig:
     max_file_size: int = 50 * 1024 * 1024  # 50MB
-    allowed_file_types: list = None
-    cors_origin: str = os.getenv('CORS_ORIGIN', '*')
-    
-    def __post_init__(self):
-        if self.allowed_file_types is None:
-            self.allowed_file_types = ['.wat', '.wasm']
+    allowed_file_types: list = field(default_factory=lambda: ['.wat', '.wasm'])
+    cors_origin: str = env('CORS_ORIGIN', '*')
 
-@dataclass
+@dataclass(frozen=True)
 class FeatureFlags:
-    enable_openai: bool = os.getenv('ENABLE_OPENAI', 'true').lower() != 'false'
-    enable_circle_transfers: bool = os.getenv('ENABLE_CIRCLE', 'true').lower() != 'false'
-    enable_solana: bool = os.getenv('ENABLE_SOLANA', 'true').lower() != 'false'
-    enable_ethereum: bool = os.getenv('ENABLE_ETHEREUM', 'true').lower() != 'false'
-    enable_debug_panel: bool = os.getenv('ENABLE_DEBUG_PANEL', 'false').lower() == 'true'
+    enable_openai: bool = env_flag('ENABLE_OPENAI', True)
+    enable_circle_transfers: bool = env_flag('ENABLE_CIRCLE', True)
+    enable_solana: bool = env_flag('ENABLE_SOLANA', True)
+    enable_ethereum: bool = env_flag('ENABLE_ETHEREUM', True)
+    enable_debug_panel: bool = env_flag('ENABLE_DEBUG_PANEL', False)
 
-@dataclass
+@dataclass(frozen=True)
 class Config:
     server: ServerConfig = field(default_factory=ServerConfig)
     ai: AIConfig = field(default_factory=AIConfig)
     blockchain: BlockchainConfig = field(default_factory=BlockchainConfig)
     circle: CircleConfig = field(default_factory=CircleConfig)
     zkengine: ZKEngineConfig = field(default_factory=ZKEngineConfig)
+    workflow: WorkflowConfig = field(default_factory=WorkflowConfig)
     database: DatabaseConfig = field(default_factory=DatabaseConfig)
     logging: LoggingConfig = field(default_factory=LoggingConfig)
+    tracing: TracingConfig = field(default_factory=TracingConfig)
+    profiling: ProfilingConfig = field(default_factory=ProfilingConfig)
+    tiering: TieringConfig = field(default_factory=TieringConfig)
+    gc: GCConfig = field(default_factory=GCConfig)
+    event_gateway: EventGatewayConfig = field(default_factory=EventGatewayConfig)
     security: SecurityConfig = field(default_factory=SecurityConfig)
     features: FeatureFlags = field(default_factory=FeatureFlags)
 
@@ -126,8 +267,108 @@ def validate_config(config: Config) -> bool:
     
     return len(missing) == 0
 
-# Create global config instance
-config = Config()
+def diff_config(old: Any, new: Any, prefix: str = '') -> Dict[str, Tuple[Any, Any]]:
+    """Dotted names of the settings that differ between two snapshots"""
+    changes = {}
+    for f in fields(old):
+        name = f'{prefix}{f.name}'
+        before, after = getattr(old, f.name), getattr(new, f.name)
+        if is_dataclass(before):
+            changes.update(diff_config(before, after, f'{name}.'))
+        elif before != after:
+            changes[name] = (before, after)
+    return changes
+
+
+class RuntimeConfig:
+    """
+    The current Config snapshot, swapped atomically on reload.
+
+    Attribute reads go to the current snapshot (``config.ai.chat_model``), so
+    a hot path pays one extra lookup. Code that needs several settings to
+    agree takes ``config.snapshot()`` once and reads from that. Snapshots are
+    frozen; ``reload()`` rereads .env and the environment, builds a new one
+    and replaces the reference, then tells ``on_change`` listeners what
+    changed. A snapshot that fails to build leaves the current one in place.
+    """
+
+    def __init__(self, build: Callable[[], Config] = Config):
+        self._build = build
+        self._snapshot = build()
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Config, Config, Dict[str, Tuple[Any, Any]]], None]] = []
+        self.version = 1
+
+    def snapshot(self) -> Config:
+        return self._snapshot
+
+    @property
+    def env_path(self) -> Optional[Path]:
+        """The .env file the last (re)load read, or None"""
+        return env_path
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._snapshot, name)
+
+    def on_change(self, listener):
+        """Register ``listener(old, new, changes)``; usable as a decorator"""
+        self._listeners.append(listener)
+        return listener
+
+    def reload(self) -> Dict[str, Tuple[Any, Any]]:
+        """Rebuild from the environment; raises ValueError if a setting does not parse"""
+        global env_path
+        with self._lock:
+            env_path = load_env() or env_path
+            old, new = self._snapshot, self._build()
+            changes = diff_config(old, new)
+            if not changes:
+                return changes
+            self._snapshot = new
+            self.version += 1
+        for listener in self._listeners:
+            try:
+                listener(old, new, changes)
+            except Exception:
+                logger.exception('config.listener_failed')
+        return changes
+
+    def try_reload(self) -> Optional[Dict[str, Tuple[Any, Any]]]:
+        """reload() for signal handlers and watchers: log failures instead of raising"""
+        try:
+            changes = self.reload()
+        except (TypeError, ValueError) as e:
+            logger.error('config.reload_failed: %s', e)
+            return None
+        if changes:
+            # Names only: values may be secrets
+            logger.info('config.reloaded version=%s changed=%s', self.version, ','.join(sorted(changes)))
+        return changes
+
+    async def watch(self, interval: float, path: Optional[Path] = None):
+        """Reload whenever the .env file's mtime changes"""
+        import asyncio
+
+        def mtime():
+            target = path or env_path or find_env()
+            try:
+                return target.stat().st_mtime_ns if target else None
+            except OSError:
+                return None
+
+        last = mtime()
+        while True:
+            await asyncio.sleep(interval)
+            current = mtime()
+            if current != last:
+                last = current
+                self.try_reload()
+
+
+logger = logging.getLogger('agentkit.config')
+
+# Global config; attribute reads always see the latest snapshot
+config = RuntimeConfig()
 
 if __name__ == '__main__':
     # Test configuration loading
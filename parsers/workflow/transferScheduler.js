@@ -0,0 +1,82 @@
+// transferScheduler.js - Concurrent Circle transfers with per-wallet rate limits
+import { createHash } from 'crypto';
+
+// Circle expects UUID idempotency keys; derive one deterministically so a
+// retried request for the same workflow step can never pay twice
+export function transferIdempotencyKey(workflowId, stepIndex, step) {
+    const hex = createHash('sha256')
+        .update([workflowId, stepIndex, step.amount, step.recipient, step.blockchain || 'ETH'].join(':'))
+        .digest('hex');
+    const variant = ((parseInt(hex[16], 16) & 0x3) | 0x8).toString(16);
+    return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-5${hex.slice(13, 16)}-${variant}${hex.slice(17, 20)}-${hex.slice(20, 32)}`;
+}
+
+export function sourceWalletId(blockchain) {
+    return blockchain === 'SOL' ? process.env.CIRCLE_SOL_WALLET_ID : process.env.CIRCLE_ETH_WALLET_ID;
+}
+
+class TokenBucket {
+    constructor(ratePerSec, burst) {
+        this.rate = ratePerSec;
+        this.capacity = burst;
+        this.tokens = burst;
+        this.updated = Date.now();
+        this.queue = Promise.resolve();
+    }
+
+    // Waiters are chained so tokens are handed out in request order
+    acquire() {
+        const turn = this.queue.then(async () => {
+            for (;;) {
+                const now = Date.now();
+                this.tokens = Math.min(this.capacity, this.tokens + (now - this.updated) / 1000 * this.rate);
+                this.updated = now;
+                if (this.tokens >= 1) {
+                    this.tokens -= 1;
+                    return;
+                }
+                await new Promise(resolve => setTimeout(resolve, (1 - this.tokens) / this.rate * 1000));
+            }
+        });
+        this.queue = turn;
+        return turn;
+    }
+}
+
+class TransferScheduler {
+    constructor(options = {}) {
+        this.ratePerSec = options.ratePerSec || parseFloat(process.env.CIRCLE_WALLET_RATE_PER_SEC || '2');
+        this.burst = options.burst || parseInt(process.env.CIRCLE_WALLET_BURST || '5', 10);
+        this.maxAttempts = options.maxAttempts || 3;
+        this.retryDelayMs = options.retryDelayMs === undefined ? 500 : options.retryDelayMs;
+        this.buckets = new Map();
+    }
+
+    bucketFor(walletId) {
+        const key = walletId || 'default';
+        if (!this.buckets.has(key)) {
+            this.buckets.set(key, new TokenBucket(this.ratePerSec, this.burst));
+        }
+        return this.buckets.get(key);
+    }
+
+    // Run send() under the wallet's rate limit, retrying transient failures.
+    // send must reuse the same idempotency key on every attempt.
+    async submit(walletId, send) {
+        const bucket = this.bucketFor(walletId);
+        let result;
+        for (let attempt = 1; attempt <= this.maxAttempts; attempt++) {
+            await bucket.acquire();
+            result = await send();
+            if (result.success || !result.retryable) {
+                return { ...result, attempts: attempt };
+            }
+            if (attempt < this.maxAttempts) {
+                await new Promise(resolve => setTimeout(resolve, this.retryDelayMs * 2 ** (attempt - 1)));
+            }
+        }
+        return { ...result, attempts: this.maxAttempts };
+    }
+}
+
+export default TransferScheduler;
@@ -0,0 +1,166 @@
+// updateCoalescer.js - Merge and delta-encode workflow progress updates
+//
+// Step updates for a workflow are merged over a short window and sent as one
+// workflow_delta carrying only the fields that changed since the last frame.
+// While a workflow runs, a full workflow_snapshot goes out periodically so
+// clients that joined late (or missed a frame) can rebuild the card. A
+// client that sees a gap in delta sequence numbers sends a
+// workflow_snapshot_request and gets a snapshot right away.
+//
+// Each update may carry the trace span it belongs to. Messages sent as-is keep
+// their span; deltas and snapshots merge several steps, so they go out under
+// the span the workflow_started update came with.
+
+const sameValue = (a, b) => JSON.stringify(a) === JSON.stringify(b);
+
+class UpdateCoalescer {
+    constructor(send, options = {}) {
+        this.send = send;
+        this.windowMs = options.windowMs ?? parseInt(process.env.WORKFLOW_UPDATE_WINDOW_MS || '50', 10);
+        this.snapshotIntervalMs = options.snapshotIntervalMs
+            ?? parseInt(process.env.WORKFLOW_SNAPSHOT_INTERVAL_MS || '5000', 10);
+        this.workflows = new Map();
+        this.stats = { received: 0, sent: 0 };
+    }
+
+    workflow(workflowId) {
+        if (!this.workflows.has(workflowId)) {
+            this.workflows.set(workflowId, {
+                seq: 0,
+                status: 'executing',
+                steps: new Map(),    // stepId -> state as last sent
+                pending: new Map(),  // stepId -> merged updates not yet sent
+                flushTimer: null,
+                snapshotTimer: null,
+                lastSnapshotMs: 0,
+                span: null
+            });
+        }
+        return this.workflows.get(workflowId);
+    }
+
+    push(type, data, span = null) {
+        this.stats.received++;
+        const workflowId = data.workflowId || data.workflow_id;
+        if (!workflowId) {
+            this.emit(type, data, span);
+            return;
+        }
+
+        if (type === 'workflow_step_update') {
+            const wf = this.workflow(workflowId);
+            const stepId = data.stepId || data.step_id;
+            wf.pending.set(stepId, { ...(wf.pending.get(stepId) || {}), ...data.updates });
+            if (!wf.flushTimer) {
+                wf.flushTimer = setTimeout(() => this.flush(workflowId), this.windowMs);
+                wf.flushTimer.unref?.();
+            }
+            return;
+        }
+
+        if (type === 'workflow_started') {
+            const wf = this.workflow(workflowId);
+            for (const step of data.steps || []) {
+                wf.steps.set(step.id, { ...step });
+            }
+            wf.span = span;
+            this.emit(type, data, span);
+            if (this.snapshotIntervalMs > 0) {
+                wf.snapshotTimer = setInterval(() => this.sendSnapshot(workflowId), this.snapshotIntervalMs);
+                wf.snapshotTimer.unref?.();
+            }
+            return;
+        }
+
+        if (type === 'workflow_completed') {
+            // Step updates must land before the completion they led to
+            this.flush(workflowId);
+            this.emit(type, data, span);
+            this.finish(workflowId);
+            return;
+        }
+
+        this.flush(workflowId);
+        this.emit(type, data, span);
+    }
+
+    flush(workflowId) {
+        const wf = this.workflows.get(workflowId);
+        if (!wf) return;
+        clearTimeout(wf.flushTimer);
+        wf.flushTimer = null;
+
+        const steps = {};
+        for (const [stepId, updates] of wf.pending) {
+            const previous = wf.steps.get(stepId) || {};
+            const delta = {};
+            for (const [field, value] of Object.entries(updates)) {
+                if (!sameValue(previous[field], value)) {
+                    delta[field] = value;
+                }
+            }
+            if (Object.keys(delta).length > 0) {
+                steps[stepId] = delta;
+                wf.steps.set(stepId, { ...previous, ...delta });
+            }
+        }
+        wf.pending.clear();
+
+        if (Object.keys(steps).length > 0) {
+            this.emit('workflow_delta', { workflowId, seq: ++wf.seq, steps }, wf.span);
+        }
+    }
+
+    snapshot(workflowId) {
+        const wf = this.workflows.get(workflowId);
+        if (!wf) return null;
+        return {
+            workflowId,
+            seq: wf.seq,
+            status: wf.status,
+            steps: [...wf.steps.values()]
+        };
+    }
+
+    sendSnapshot(workflowId) {
+        this.flush(workflowId);
+        const snapshot = this.snapshot(workflowId);
+        if (snapshot) {
+            const wf = this.workflows.get(workflowId);
+            wf.lastSnapshotMs = Date.now();
+            this.emit('workflow_snapshot', snapshot, wf.span);
+        }
+    }
+
+    // A client missed a delta. Every client that missed the same frame asks,
+    // so at most one snapshot per window is sent.
+    requestSnapshot(workflowId) {
+        const wf = this.workflows.get(workflowId);
+        if (!wf || Date.now() - wf.lastSnapshotMs < this.windowMs) return false;
+        this.sendSnapshot(workflowId);
+        return true;
+    }
+
+    finish(workflowId) {
+        const wf = this.workflows.get(workflowId);
+        if (!wf) return;
+        clearTimeout(wf.flushTimer);
+        clearInterval(wf.snapshotTimer);
+        this.workflows.delete(workflowId);
+    }
+
+    // Flush everything and stop timers (e.g. before the connection closes)
+    close() {
+        for (const workflowId of [...this.workflows.keys()]) {
+            this.flush(workflowId);
+            this.finish(workflowId);
+        }
+    }
+
+    emit(type, data, span = null) {
+        this.stats.sent++;
+        this.send(type, data, span);
+    }
+}
+
+export default UpdateCoalescer;
@@ -6,6 +6,7 @@ import { fileURLToPath } from 'url';
 import { dirname, join } from 'path';
 import WorkflowManager from '../../circle/workflowManager.js';
 import WorkflowExecutor from './workflowExecutor.js';
+import WorkflowCheckpoint from './workflowCheckpoint.js';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = dirname(__filename);
@@ -13,6 +14,7 @@ const __dirname = dirname(__filename);
 // Check if we're using a pre-parsed file or need to parse a command
 let workflow = null;
 let command = null;
+let checkpoint = null;
 
 if (process.argv[2] === '--parsed-file' && process.argv[3]) {
     // Load pre-parsed workflow from file
@@ -21,6 +23,9 @@ if (process.argv[2] === '--parsed-file' && process.argv[3]) {
         workflow = JSON.parse(parsedContent);
         command = workflow.description || 'Pre-parsed workflow';
         console.log(`\n🔄 Processing pre-parsed workflow: ${command}\n`);
+        if (process.argv[4] === '--checkpoint' && process.argv[5]) {
+            checkpoint = new WorkflowCheckpoint(process.argv[5]);
+        }
     } catch (error) {
         console.error('❌ Failed to load parsed workflow file:', error.message);
         process.exit(1);
@@ -31,7 +36,7 @@ if (process.argv[2] === '--parsed-file' && process.argv[3]) {
     
     if (!command) {
         console.error('Usage: node workflowCLI_generic.js "command"');
-        console.error('   or: node workflowCLI_generic.js --parsed-file <path>');
+        console.error('   or: node workflowCLI_generic.js --parsed-file <path> [--checkpoint <path>]');
         console.error('Example: node workflowCLI_generic.js "Generate KYC proof then send 0.01 to alice"');
         process.exit(1);
     }
@@ -73,7 +78,7 @@ async function runWorkflow() {
         await new Promise(resolve => setTimeout(resolve, 100));
         
         // Execute the workflow
-        const result = await executor.executeWorkflow(workflow);
+        const result = await executor.executeWorkflow(workflow, checkpoint);
         
         // Extract results
         const transferIds = [];
@@ -113,6 +118,13 @@ async function runWorkflow() {
             transferIds.push(...result.transferIds);
         }
         
+        manager.updateWorkflowStatus(workflowRecord.id, result.success ? 'completed' : 'failed');
+        
+        // Spans are collected by chat_service from this marker line
+        if (result.spans && result.spans.length > 0) {
+            console.log(`TRACE_SPANS: ${JSON.stringify(result.spans)}`);
+        }
+
         console.log('\n' + '='.repeat(60));
         console.log('📊 WORKFLOW SUMMARY');
         console.log('='.repeat(60));
@@ -126,6 +138,10 @@ async function runWorkflow() {
             console.log(`Steps Completed: ${completedSteps}/${workflow.steps.length}`);
         }
         
+        if (result.traceId) {
+            console.log(`Trace ID: ${result.traceId}`);
+        }
+
         if (transferIds.length > 0) {
             console.log('\n💸 Transfers:');
             transferIds.forEach(id => {
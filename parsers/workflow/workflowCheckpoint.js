@@ -0,0 +1,49 @@
+// workflowCheckpoint.js - Durable per-step progress of one workflow
+//
+// chat_service creates the checkpoint file (services/workflow_checkpoints.py)
+// and passes it with --checkpoint; the executor saves its state after every
+// step. A run that finds executor state in the file resumes at the first
+// unfinished step with the same executor workflow ID, so transfer
+// idempotency keys match the interrupted run. The executor's PID is saved
+// with a token (boot ID and process start time) so a later process reusing
+// the PID is not mistaken for it.
+
+import { existsSync, readFileSync, renameSync, writeFileSync } from 'fs';
+
+// Same format as process_token in services/workflow_checkpoints.py
+function processToken(pid) {
+    try {
+        const bootId = readFileSync('/proc/sys/kernel/random/boot_id', 'utf-8').trim();
+        const stat = readFileSync(`/proc/${pid}/stat`, 'utf-8');
+        // starttime is field 22; the command name before it may contain spaces
+        return `${bootId}:${stat.slice(stat.lastIndexOf(')') + 2).split(' ')[19]}`;
+    } catch (error) {
+        return null;
+    }
+}
+
+class WorkflowCheckpoint {
+    constructor(path) {
+        this.path = path;
+        this.executorToken = processToken(process.pid);
+        this.data = existsSync(path) ? JSON.parse(readFileSync(path, 'utf-8')) : {};
+    }
+
+    // Executor state left by an earlier run, or null for a fresh workflow
+    resumeState() {
+        return this.data.status === 'running' && this.data.executorWorkflowId ? this.data : null;
+    }
+
+    save(fields) {
+        this.data = {
+            ...this.data, ...fields,
+            executorPid: process.pid, executorToken: this.executorToken, updatedMs: Date.now()
+        };
+        // Replace atomically: a crash mid-write leaves the previous checkpoint
+        const tmp = `${this.path}.${process.pid}.tmp`;
+        writeFileSync(tmp, JSON.stringify(this.data));
+        renameSync(tmp, this.path);
+    }
+}
+
+export default WorkflowCheckpoint;
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Pre-execution evaluation of conditional transfers
+
+The executor checks a transfer's condition (``kyc_verified``, ``location
+verified``, ...) only when it reaches the transfer, after the proofs behind
+it have been generated and verified. Some of those outcomes are known
+before anything runs:
+
+- a KYC proof generated with ``kyc_approved`` = 0 proves the wallet is not
+  approved, so its verification never counts as KYC compliance;
+- a proof named by ID that is in the verification cache as INVALID;
+- a condition on a proof type the plan never verifies before the transfer.
+
+``evaluate_conditions`` predicts each verification step from those facts and
+treats a conditional transfer as doomed when every verification it could
+rely on is known to fail, following the same per-type rules as the
+executor's ``checkTransferCondition``. The proof steps that only served
+doomed transfers are removed. The doomed transfer itself stays in the plan
+with ``precondition_failed`` set: the executor fails it without checking,
+so a critical one still stops the workflow exactly where it did before.
+Each branch is reported under ``skippedBranches``. Anything not known up
+front is left for the executor to decide at run time.
+"""
+
+import copy
+import re
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+GENERATE_TYPES = {
+    'generate_proof': None,
+    'kyc_proof': 'kyc',
+    'location_proof': 'location',
+    'ai_content_proof': 'ai_content',
+}
+VERIFY_TYPES = ('verify_proof', 'verification', 'verify_on_ethereum', 'verify_on_solana')
+PROOF_TYPE_ALIASES = {'ai': 'ai_content'}
+PROOF_ID_PATTERN = re.compile(r'^(?:proof|prove)_(kyc|location|ai_content)_')
+
+ProofKey = Tuple[str, Optional[str]]
+
+
+def _proof_type(step: Dict[str, Any]) -> Optional[str]:
+    proof_type = GENERATE_TYPES.get(step.get('type')) or step.get('proof_type') or step.get('proofType')
+    return PROOF_TYPE_ALIASES.get(proof_type, proof_type)
+
+
+def _concrete_proof_id(step: Dict[str, Any]) -> Optional[str]:
+    proof_id = step.get('proof_id')
+    if proof_id and not str(proof_id).startswith('pending_'):
+        return str(proof_id)
+    return None
+
+
+def kyc_approved(step: Dict[str, Any]) -> Optional[bool]:
+    """The kyc_approved input of a KYC generation step, if the plan sets one"""
+    value = (step.get('parameters') or {}).get('kyc_approved', step.get('kyc_approved'))
+    if value is None:
+        return None
+    return str(value).strip().lower() not in ('0', 'false', 'no')
+
+
+def required_types(condition: str) -> Optional[Set[str]]:
+    """
+    Proof types a transfer condition needs a passing verification of, as
+    checkTransferCondition reads it; an empty set means any verification,
+    None a condition it does not check.
+    """
+    condition = condition.lower()
+    types = {name for keyword, name in (('kyc', 'kyc'), ('location', 'location'), ('ai', 'ai_content'))
+             if keyword in condition}
+    if types or 'verified' in condition or 'compliant' in condition:
+        return types
+    return None
+
+
+class _Verification:
+    def __init__(self, index: int, proof_type: Optional[str], key: Optional[ProofKey],
+                 outcome: Optional[bool], reason: Optional[str]):
+        self.index = index
+        self.proof_type = proof_type
+        self.key = key
+        self.outcome = outcome  # False: known to fail, None: decided at run time
+        self.reason = reason
+
+
+def _summary(index: int, step: Dict[str, Any]) -> Dict[str, Any]:
+    return {'index': index, 'type': step.get('type'), 'description': step.get('description', '')}
+
+
+def evaluate_conditions(workflow: Dict[str, Any],
+                        cached_validity: Optional[Callable[[str], Optional[bool]]] = None) -> Dict[str, Any]:
+    """
+    Return a copy of a parsed workflow without the proof steps of branches
+    that cannot succeed, listed under ``skippedBranches``; their transfers
+    are kept and marked ``precondition_failed``.
+
+    ``cached_validity(proof_id)`` gives the cached verification result of an
+    existing proof, or None on a miss.
+    """
+    plan = copy.deepcopy(workflow)
+    steps: List[Dict[str, Any]] = plan.get('steps') or []
+
+    generated: Dict[ProofKey, Tuple[int, Optional[bool]]] = {}
+    verifications: List[_Verification] = []
+    for i, step in enumerate(steps):
+        step_type = step.get('type')
+        proof_type = _proof_type(step)
+        if step_type in GENERATE_TYPES:
+            approved = kyc_approved(step) if proof_type == 'kyc' else None
+            generated[(proof_type, step.get('person'))] = (i, False if approved is False else None)
+        elif step_type in VERIFY_TYPES:
+            proof_id = _concrete_proof_id(step)
+            if proof_id:
+                match = PROOF_ID_PATTERN.match(proof_id)
+                valid = cached_validity(proof_id) if cached_validity and match else None
+                verifications.append(_Verification(
+                    i, match.group(1) if match else None, None, False if valid is False else None,
+                    f"{proof_id} is cached as invalid" if valid is False else None))
+                continue
+            key = _resolve(generated, proof_type, step.get('person'))
+            outcome = generated[key][1] if key else None
+            verifications.append(_Verification(
+                i, proof_type, key, outcome,
+                f"step {generated[key][0] + 1} generates it with kyc_approved=0" if outcome is False else None))
+
+    # Conditional transfers that cannot pass
+    doomed: Dict[int, str] = {}
+    live_types: Set[str] = set()
+    for i, step in enumerate(steps):
+        if step.get('type') != 'transfer' or not step.get('condition'):
+            continue
+        types = required_types(step['condition'])
+        if types is None:
+            continue
+        before = [v for v in verifications if v.index < i]
+        reasons = []
+        for proof_type in sorted(types) or [None]:
+            candidates = [v for v in before if proof_type is None or v.proof_type == proof_type]
+            if any(v.outcome is not False for v in candidates):
+                continue
+            label = f"{proof_type} " if proof_type else ""
+            reasons.append("; ".join(v.reason for v in candidates) if candidates
+                           else f"no {label}verification before it")
+        if reasons:
+            doomed[i] = "; ".join(reasons)
+        else:
+            live_types |= types
+
+    # Proof steps whose verifications only feed doomed transfers
+    skipped: Dict[int, List[int]] = {i: [] for i in doomed}
+    claimed: Set[int] = set()
+    for i in doomed:
+        types = required_types(steps[i]['condition']) or set()
+        for v in verifications:
+            if v.outcome is not False or v.index > i or v.proof_type not in types or v.proof_type in live_types:
+                continue
+            chain = [v.index]
+            if v.key is not None:
+                chain.append(generated[v.key][0])
+                chain += [w.index for w in verifications if w.key == v.key]
+            chain = [n for n in chain if n not in claimed]
+            claimed.update(chain)
+            skipped[i] += chain
+
+    branches = []
+    removed: Set[int] = set()
+    for i, reason in doomed.items():
+        step = steps[i]
+        step['precondition_failed'] = reason
+        removed.update(skipped[i])
+        branches.append({
+            'condition': step['condition'],
+            'transfer': {'index': i, 'recipient': step.get('recipient'), 'amount': step.get('amount'),
+                         'critical': step.get('critical') is not False},
+            'reason': reason,
+            'skippedSteps': [_summary(n, steps[n]) for n in sorted(set(skipped[i]))],
+        })
+
+    plan['steps'] = [step for i, step in enumerate(steps) if i not in removed]
+    for index, step in enumerate(plan['steps']):
+        step['index'] = index
+    plan['skippedBranches'] = branches
+    return plan
+
+
+def _resolve(generated: Dict[ProofKey, Tuple[int, Optional[bool]]], proof_type: Optional[str],
+             person: Optional[str]) -> Optional[ProofKey]:
+    """The generation a verification step finds, as the executor looks it up"""
+    if (proof_type, person) in generated:
+        return proof_type, person
+    if person:
+        return None
+    return next((key for key in generated if key[0] == proof_type), None)
@@ -2,6 +2,9 @@
 import WebSocket from 'ws';
 import { v4 as uuidv4 } from 'uuid';
 import CircleHandler from '../../circle/circleHandler.js';
+import WorkflowTracer from './workflowTracer.js';
+import TransferScheduler, { sourceWalletId, transferIdempotencyKey } from './transferScheduler.js';
+import UpdateCoalescer from './updateCoalescer.js';
 import { fileURLToPath } from 'url';
 import { dirname, join } from 'path';
 import path from 'path';
@@ -9,6 +12,16 @@ import path from 'path';
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = dirname(__filename);
 
+// Exit status when a workflow stops part-way and can resume from its checkpoint
+export const EXIT_INTERRUPTED = 75;
+
+// kyc_approved input of a KYC step: approved unless the plan sets it to 0
+function kycApprovedInput(step) {
+    const value = step.parameters?.kyc_approved ?? step.kyc_approved;
+    if (value === undefined || value === null) return '1';
+    return ['0', 'false', 'no'].includes(String(value).trim().toLowerCase()) ? '0' : '1';
+}
+
 class WorkflowExecutor {
     constructor() {
         this.wsClient = null;
@@ -17,6 +30,48 @@ class WorkflowExecutor {
         this.verificationResults = {}; // Store verification results
         this.workflowId = null;
         this.stepResults = [];
+        this.tracer = null;
+        this.circleHandler = new CircleHandler();
+        this.transferScheduler = new TransferScheduler();
+        this.transferProgress = null;
+        this.updates = new UpdateCoalescer((type, data, span) => this.sendMessage(type, data, span));
+    }
+
+    // Trace context for a span (the caller's parent when null), attached to outgoing requests
+    traceContext(span = null) {
+        return this.tracer ? this.tracer.context(span) : undefined;
+    }
+
+    // Result from the shared verification cache, or null on a miss (or if
+    // chat_service is unreachable) so the caller falls back to the prover
+    async cachedVerification(proofId, stepSize) {
+        const chatServiceUrl = process.env.CHAT_SERVICE_URL || 'http://localhost:8002';
+        try {
+            const response = await fetch(
+                `${chatServiceUrl}/verification_cache/${encodeURIComponent(proofId)}?step_size=${stepSize}`);
+            if (!response.ok) {
+                return null;
+            }
+            const data = await response.json();
+            return data.cached ? data : null;
+        } catch (error) {
+            return null;
+        }
+    }
+
+    // Hand a new transfer to chat_service's background poller, which pushes
+    // transfer_update messages to every UI client as its status changes
+    async watchTransfer(transferId, blockchain) {
+        const chatServiceUrl = process.env.CHAT_SERVICE_URL || 'http://localhost:8002';
+        try {
+            await fetch(`${chatServiceUrl}/transfers/watch`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ transferId, blockchain })
+            });
+        } catch (error) {
+            console.warn(`⚠️  Could not register transfer ${transferId} for status updates: ${error.message}`);
+        }
     }
 
     async connect() {
@@ -28,6 +83,19 @@ class WorkflowExecutor {
                 resolve();
             });
             
+            // UI clients that missed a workflow_delta ask for the full state
+            this.wsClient.on('message', (raw) => {
+                let message;
+                try {
+                    message = JSON.parse(raw);
+                } catch (error) {
+                    return;
+                }
+                if (message.type === 'workflow_snapshot_request' && message.workflowId) {
+                    this.updates.requestSnapshot(message.workflowId);
+                }
+            });
+            
             this.wsClient.on('error', (error) => {
                 console.error('❌ WebSocket error:', error);
                 reject(error);
@@ -35,19 +103,41 @@ class WorkflowExecutor {
             
             this.wsClient.on('close', () => {
                 console.log('🔌 WebSocket connection closed');
+                if (this.checkpoint?.data.status === 'running') {
+                    // Replies to in-flight requests are lost with the connection (e.g. the
+                    // Rust server restarted); exit so chat_service resumes from the checkpoint
+                    console.error('❌ Lost the Rust server mid-workflow, exiting to resume from checkpoint');
+                    process.exit(EXIT_INTERRUPTED);
+                }
             });
         });
     }
 
-    async executeWorkflow(parsedWorkflow) {
+    // checkpoint: a WorkflowCheckpoint; if it holds state from an interrupted
+    // run, execution continues at the first step that had not finished
+    async executeWorkflow(parsedWorkflow, checkpoint = null) {
+        const saved = checkpoint?.resumeState();
         this.currentWorkflow = parsedWorkflow;
-        this.workflowId = `wf_${uuidv4()}`;
-        this.proofResults = {};
-        this.verificationResults = {};
-        this.stepResults = [];
+        this.checkpoint = checkpoint;
+        this.workflowId = saved?.executorWorkflowId || `wf_${uuidv4()}`;
+        this.proofResults = saved?.proofResults || {};
+        this.verificationResults = saved?.verificationResults || {};
+        this.stepResults = saved?.stepResults || [];
+        const start = saved?.position || 0;
+        this.tracer = new WorkflowTracer(parsedWorkflow.trace);
+        const workflowSpan = this.tracer.startSpan('executor.workflow', {
+            workflow_id: this.workflowId,
+            step_count: parsedWorkflow.steps.length,
+            ...(saved ? { resumed_at_step: start + 1 } : {})
+        });
         
         console.log(`\n🚀 Starting workflow execution: ${this.workflowId}`);
+        console.log(`🧭 Trace ID: ${this.tracer.traceId}`);
         console.log(`📋 Steps to execute: ${parsedWorkflow.steps.length}`);
+        if (saved) {
+            console.log(`♻️  Resuming from checkpoint at step ${start + 1} (${start} steps already done)`);
+        }
+        this.saveCheckpoint(start);
         
         // Send workflow started message with steps
         this.sendWorkflowUpdate('workflow_started', {
@@ -56,122 +146,263 @@ class WorkflowExecutor {
                 id: `step_${index + 1}`,
                 action: step.type,
                 description: step.description || `${step.type} operation`,
-                status: 'pending',
+                status: index < start
+                    ? (this.stepResults.find(r => r.step === index + 1)?.status || 'completed')
+                    : 'pending',
                 proofType: step.type.includes('kyc') ? 'kyc' : 
                           step.type.includes('location') ? 'location' : 
                           step.type.includes('ai') ? 'ai_content' : undefined
             }))
-        });
+        }, workflowSpan);
         
         try {
-            for (let i = 0; i < parsedWorkflow.steps.length; i++) {
-                const step = parsedWorkflow.steps[i];
-                const stepId = `step_${i + 1}`;
-                console.log(`\n📝 Executing step ${i + 1}: ${step.type}`);
-                
-                // Check if step should be skipped based on conditions
-                if (await this.shouldSkipStep(step, i)) {
-                    console.log(`⏭️  Skipping step ${i + 1}: Condition not met`);
-                    
-                    // Send step update for skipped step
-                    this.sendWorkflowUpdate('workflow_step_update', {
-                        workflowId: this.workflowId,
-                        stepId: stepId,
-                        updates: {
-                            status: 'skipped',
-                            reason: 'Condition not met',
-                            startTime: Date.now(),
-                            endTime: Date.now()
-                        }
-                    });
-                    
-                    this.stepResults.push({
-                        step: i + 1,
-                        type: step.type,
-                        status: 'skipped',
-                        reason: 'Condition not met'
-                    });
+            const steps = parsedWorkflow.steps;
+            for (let i = start; i < steps.length; i++) {
+                // Consecutive transfers don't depend on each other, so they go out together
+                const group = this.transferGroup(steps, i);
+                if (group.length > 1) {
+                    await this.runTransferGroup(group, workflowSpan);
+                    i = group[group.length - 1];
+                    this.saveCheckpoint(i + 1);
                     continue;
                 }
                 
-                // Send step update: executing
-                this.sendWorkflowUpdate('workflow_step_update', {
-                    workflowId: this.workflowId,
-                    stepId: stepId,
-                    updates: {
-                        status: 'executing',
-                        startTime: Date.now()
-                    }
-                });
-                
-                const startTime = Date.now();
-                const result = await this.executeStep(step, i);
-                const endTime = Date.now();
-                
-                // Send step update: completed or failed
-                this.sendWorkflowUpdate('workflow_step_update', {
-                    workflowId: this.workflowId,
-                    stepId: stepId,
-                    updates: {
-                        status: result.success ? 'completed' : 'failed',
-                        endTime: endTime,
-                        startTime: startTime,
-                        result: result.success ? 'Success' : result.error
-                    }
-                });
-                
-                this.stepResults.push({
-                    step: i + 1,
-                    type: step.type,
-                    status: result.success ? 'completed' : 'failed',
-                    result: result
-                });
+                const result = await this.runStep(steps[i], i, workflowSpan);
                 
                 // If step failed, decide whether to continue
-                if (!result.success && step.critical !== false) {
+                if (result && !result.success && steps[i].critical !== false) {
                     console.error(`❌ Critical step failed, stopping workflow`);
-                    throw new Error(`Step ${i + 1} (${step.type}) failed: ${result.error}`);
+                    throw new Error(`Step ${i + 1} (${steps[i].type}) failed: ${result.error}`);
                 }
+                this.saveCheckpoint(i + 1);
             }
             
+            this.tracer.endSpan(workflowSpan, 'ok');
+            this.saveCheckpoint(steps.length, 'completed');
+            
             // Send workflow completed message
             this.sendWorkflowUpdate('workflow_completed', {
                 workflowId: this.workflowId,
                 success: true,
                 steps: this.stepResults,
                 proofSummary: this.getProofSummary(),
-                transferIds: this.getTransferIds()
-            });
+                transferIds: this.getTransferIds(),
+                skippedBranches: parsedWorkflow.skippedBranches || []
+            }, workflowSpan);
             
             return {
                 success: true,
                 workflowId: this.workflowId,
                 steps: this.stepResults,
                 proofSummary: this.getProofSummary(),
-                transferIds: this.getTransferIds()
+                transferIds: this.getTransferIds(),
+                skippedBranches: parsedWorkflow.skippedBranches || [],
+                traceId: this.tracer.traceId,
+                spans: this.tracer.toJSON()
             };
             
         } catch (error) {
             console.error(`❌ Workflow execution failed: ${error.message}`);
+            this.tracer.endSpan(workflowSpan, 'error', { error: error.message });
+            this.saveCheckpoint(this.checkpoint?.data.position ?? start, 'failed');
             
             // Send workflow completed message with error
             this.sendWorkflowUpdate('workflow_completed', {
                 workflowId: this.workflowId,
                 success: false,
                 error: error.message,
-                steps: this.stepResults
-            });
+                steps: this.stepResults,
+                skippedBranches: parsedWorkflow.skippedBranches || []
+            }, workflowSpan);
             
             return {
                 success: false,
                 workflowId: this.workflowId,
                 error: error.message,
-                steps: this.stepResults
+                steps: this.stepResults,
+                skippedBranches: parsedWorkflow.skippedBranches || [],
+                traceId: this.tracer.traceId,
+                spans: this.tracer.toJSON()
             };
         }
     }
 
 
+    // Record progress: `position` steps are done and their results are in memory
+    saveCheckpoint(position, status = 'running') {
+        if (!this.checkpoint) return;
+        try {
+            this.checkpoint.save({
+                status,
+                position,
+                executorWorkflowId: this.workflowId,
+                proofResults: this.proofResults,
+                verificationResults: this.verificationResults,
+                stepResults: this.stepResults
+            });
+        } catch (error) {
+            console.warn(`⚠️  Could not save workflow checkpoint: ${error.message}`);
+        }
+    }
+
+    // Execute one step with its span, UI updates and stepResults entry.
+    // Returns the step result, or null if the step was skipped.
+    async runStep(step, i, workflowSpan) {
+        const stepId = `step_${i + 1}`;
+        console.log(`\n📝 Executing step ${i + 1}: ${step.type}`);
+        
+        const stepSpan = this.tracer.startSpan(`step.${step.type}`, {
+            step_id: stepId,
+            step_type: step.type
+        }, workflowSpan.span_id);
+        
+        // Check if step should be skipped based on conditions
+        if (await this.shouldSkipStep(step, i)) {
+            console.log(`⏭️  Skipping step ${i + 1}: Condition not met`);
+            this.tracer.endSpan(stepSpan, 'skipped');
+            
+            // Send step update for skipped step
+            this.sendWorkflowUpdate('workflow_step_update', {
+                workflowId: this.workflowId,
+                stepId: stepId,
+                updates: {
+                    status: 'skipped',
+                    reason: 'Condition not met',
+                    startTime: Date.now(),
+                    endTime: Date.now()
+                }
+            }, stepSpan);
+            
+            this.stepResults.push({
+                step: i + 1,
+                type: step.type,
+                status: 'skipped',
+                reason: 'Condition not met'
+            });
+            return null;
+        }
+        
+        // Send step update: executing
+        this.sendWorkflowUpdate('workflow_step_update', {
+            workflowId: this.workflowId,
+            stepId: stepId,
+            updates: {
+                status: 'executing',
+                startTime: Date.now()
+            }
+        }, stepSpan);
+        
+        const startTime = Date.now();
+        let result;
+        try {
+            result = await this.executeStep(step, i, stepSpan);
+        } catch (error) {
+            this.tracer.endSpan(stepSpan, 'error', { error: error.message });
+            throw error;
+        }
+        const endTime = Date.now();
+        this.tracer.endSpan(stepSpan, result.success ? 'ok' : 'error');
+        
+        // Send step update: completed or failed
+        this.sendWorkflowUpdate('workflow_step_update', {
+            workflowId: this.workflowId,
+            stepId: stepId,
+            updates: {
+                status: result.success ? 'completed' : 'failed',
+                endTime: endTime,
+                startTime: startTime,
+                result: result.success ? 'Success' : result.error,
+                ...(this.transferProgress && step.type === 'transfer'
+                    ? { batchProgress: this.recordTransferProgress(result) } : {})
+            }
+        }, stepSpan);
+        
+        this.stepResults.push({
+            step: i + 1,
+            type: step.type,
+            status: result.success ? 'completed' : 'failed',
+            result: result,
+            startTime: startTime,
+            endTime: endTime,
+            durationMs: endTime - startTime
+        });
+        return result;
+    }
+
+    // Indices of the run of transfer steps starting at index i
+    transferGroup(steps, i) {
+        const group = [];
+        for (let j = i; j < steps.length && steps[j].type === 'transfer'; j++) {
+            group.push(j);
+        }
+        return group;
+    }
+
+    // Run the transfers concurrently and wait for every one of them, so each
+    // transfer's outcome is reported even when another one fails or throws
+    async runTransferGroup(group, workflowSpan) {
+        const steps = this.currentWorkflow.steps;
+        console.log(`\n💸 Executing ${group.length} transfers concurrently (steps ${group[0] + 1}-${group[group.length - 1] + 1})`);
+        this.transferProgress = { total: group.length, completed: 0, failed: 0 };
+        let settled;
+        try {
+            settled = await Promise.allSettled(group.map(i => this.runStep(steps[i], i, workflowSpan)));
+            settled.forEach((outcome, k) => {
+                if (outcome.status === 'rejected') {
+                    this.recordThrownStep(steps[group[k]], group[k], outcome.reason);
+                }
+            });
+        } finally {
+            this.transferProgress = null;
+            this.stepResults.sort((a, b) => a.step - b.step);
+        }
+        
+        // A thrown step stops the workflow as it does when run on its own
+        const thrown = settled.findIndex(outcome => outcome.status === 'rejected');
+        if (thrown !== -1) {
+            throw settled[thrown].reason;
+        }
+        const results = settled.map(outcome => outcome.value);
+        const failed = group.findIndex((i, k) => results[k] && !results[k].success && steps[i].critical !== false);
+        if (failed !== -1) {
+            const i = group[failed];
+            console.error(`❌ Critical step failed, stopping workflow`);
+            throw new Error(`Step ${i + 1} (${steps[i].type}) failed: ${results[failed].error}`);
+        }
+    }
+
+    // Report a step whose execution threw instead of returning a result
+    recordThrownStep(step, i, error) {
+        const message = error && error.message ? error.message : String(error);
+        const endTime = Date.now();
+        this.sendWorkflowUpdate('workflow_step_update', {
+            workflowId: this.workflowId,
+            stepId: `step_${i + 1}`,
+            updates: {
+                status: 'failed',
+                endTime: endTime,
+                result: message,
+                ...(this.transferProgress ? { batchProgress: this.recordTransferProgress({ success: false }) } : {})
+            }
+        });
+        this.stepResults.push({
+            step: i + 1,
+            type: step.type,
+            status: 'failed',
+            result: { success: false, error: message },
+            endTime: endTime
+        });
+    }
+
+    recordTransferProgress(result) {
+        if (result.success) {
+            this.transferProgress.completed++;
+        } else {
+            this.transferProgress.failed++;
+        }
+        return { ...this.transferProgress };
+    }
+
     async shouldSkipStep(step, stepIndex) {
         // Check if this step has conditions
         if (!step.condition) {
@@ -217,16 +448,16 @@ class WorkflowExecutor {
         return false;
     }
 
-    async executeStep(step, stepIndex) {
+    async executeStep(step, stepIndex, stepSpan) {
         switch (step.type) {
             case 'kyc_proof':
                 // KYC proof expects wallet_hash and kyc_approved (both as integers)
                 // Use timestamp-based wallet hash to ensure uniqueness
                 const kycTs = Date.now();
                 const walletHash = (kycTs % 999999).toString();  // Use last 6 digits of timestamp
-                const kycApproved = '1';     // 1 = approved, 0 = rejected
+                const kycApproved = kycApprovedInput(step);     // 1 = approved, 0 = rejected
                 console.log(`🎲 Using timestamp-based wallet hash: ${walletHash} for unique proof`);
-                return await this.generateProof('prove_kyc', [walletHash, kycApproved], stepIndex);
+                return await this.generateProof('prove_kyc', [walletHash, kycApproved], stepIndex, stepSpan);
                 
             case 'location_proof':
                 // Format location arguments properly
@@ -250,7 +481,7 @@ class WorkflowExecutor {
                 }
                 
                 console.log(`📍 Location proof with packed input: ${packedInput} (lat/lon/device packed)`);
-                return await this.generateProof('prove_location', [String(packedInput)], stepIndex);
+                return await this.generateProof('prove_location', [String(packedInput)], stepIndex, stepSpan);
                 
             case 'ai_content_proof':
                 // Convert hash to numeric value
@@ -275,7 +506,7 @@ class WorkflowExecutor {
                 
                 return await this.generateProof('prove_ai_content', 
                     [contentHash, providerSignature, apiKeyHash, timestamp, contentLength], 
-                    stepIndex);
+                    stepIndex, stepSpan);
 
             case 'generate_proof':
                 // Handle generic generate_proof from OpenAI parser
@@ -284,9 +515,9 @@ class WorkflowExecutor {
                     // Use timestamp-based wallet hash to ensure uniqueness
                     const kycTimestamp = Date.now();
                     const walletHash = (kycTimestamp % 999999).toString();  // Use last 6 digits of timestamp
-                    const kycApproved = '1';
+                    const kycApproved = kycApprovedInput(step);
                     console.log(`🎲 Using timestamp-based wallet hash: ${walletHash} for unique proof`);
-                    return await this.generateProof('prove_kyc', [walletHash, kycApproved], stepIndex);
+                    return await this.generateProof('prove_kyc', [walletHash, kycApproved], stepIndex, stepSpan);
                 } else if (proofType === 'location') {
                     const lat = 103;
                     const lon = 182;
@@ -294,7 +525,7 @@ class WorkflowExecutor {
                     const deviceId = 5000 + (Date.now() % 10000); // Vary device ID
                     const packedInput = ((lat & 0xFF) << 24) | ((lon & 0xFF) << 16) | (deviceId & 0xFFFF);
                     console.log(`🎲 Using device ID: ${deviceId} for unique location proof`);
-                    return await this.generateProof('prove_location', [String(packedInput)], stepIndex);
+                    return await this.generateProof('prove_location', [String(packedInput)], stepIndex, stepSpan);
                 } else if (proofType === 'ai_content' || proofType === 'ai') {
                     const contentHash = '12345';
                     const providerSignature = '1347440205';
@@ -303,7 +534,7 @@ class WorkflowExecutor {
                     const contentLength = '100';
                     return await this.generateProof('prove_ai_content', 
                         [contentHash, providerSignature, apiKeyHash, aiTimestamp, contentLength], 
-                        stepIndex);
+                        stepIndex, stepSpan);
                 } else {
                     throw new Error(`Unknown proof type: ${proofType}`);
                 }
@@ -317,7 +548,7 @@ class WorkflowExecutor {
                     const proofIdMatch = step.description.match(/proof_\w+_\d+/);
                     if (proofIdMatch) {
                         console.log(`Found proof ID in description: ${proofIdMatch[0]}`);
-                        return await this.verifyLastProof(proofIdMatch[0]);
+                        return await this.verifyLastProof(proofIdMatch[0], null, stepSpan);
                     }
                 }
                 
@@ -326,24 +557,35 @@ class WorkflowExecutor {
                     const firstArg = step.arguments[0];
                     if (firstArg && (firstArg.startsWith('proof_') || firstArg.startsWith('prove_'))) {
                         console.log(`Found proof ID in arguments: ${firstArg}`);
-                        return await this.verifyLastProof(firstArg);
+                        return await this.verifyLastProof(firstArg, null, stepSpan);
                     }
                 }
                 
                 // Check if we have a specific proof_id (but skip if it's a placeholder like "pending_")
                 if (step.proof_id && !step.proof_id.startsWith('pending_')) {
-                    return await this.verifyLastProof(step.proof_id);
+                    return await this.verifyLastProof(step.proof_id, null, stepSpan);
                 }
                 
-                return await this.verifyLastProof(step.verificationType || step.proofType || step.proof_type || 'last', step.person);
+                return await this.verifyLastProof(step.verificationType || step.proofType || step.proof_type || 'last', step.person, stepSpan);
                 
             case 'verify_on_ethereum':
-                return await this.verifyOnBlockchain('ethereum', step.proofType || step.proof_type, step.person, stepIndex);
+                return await this.verifyOnBlockchain('ethereum', step.proofType || step.proof_type, step.person, stepIndex, step.verify_locally, stepSpan);
                 
             case 'verify_on_solana':
-                return await this.verifyOnBlockchain('solana', step.proofType || step.proof_type, step.person, stepIndex);
+                return await this.verifyOnBlockchain('solana', step.proofType || step.proof_type, step.person, stepIndex, step.verify_locally, stepSpan);
                 
             case 'transfer':
+                // Known to fail before the workflow started (workflowConditionEvaluator.py);
+                // fails like a failed condition check, so a critical transfer still stops the run
+                if (step.precondition_failed) {
+                    console.log(`⏭️  Transfer condition cannot pass: ${step.precondition_failed}`);
+                    return {
+                        success: false,
+                        error: 'Transfer condition not met - verification failed',
+                        reason: step.precondition_failed,
+                        skipped: true
+                    };
+                }
                 // CRITICAL: Check if we should execute transfer based on verification results
                 if (step.condition && !(await this.checkTransferCondition(step.condition, step.recipient))) {
                     return {
@@ -352,10 +594,10 @@ class WorkflowExecutor {
                         skipped: true
                     };
                 }
-                return await this.executeTransfer(step);
+                return await this.executeTransfer(step, stepIndex, stepSpan);
                 
             case 'list_proofs':
-                return await this.listProofs(step.list_type || 'proofs');
+                return await this.listProofs(step.list_type || 'proofs', stepSpan);
                 
             case 'process_with_ai':
                 // AI processing will be handled by the system after workflow completion
@@ -429,7 +671,7 @@ class WorkflowExecutor {
         return true;
     }
 
-    async generateProof(functionName, args, stepIndex) {
+    async generateProof(functionName, args, stepIndex, stepSpan = null) {
         return new Promise((resolve) => {
             const proofId = `proof_${functionName.replace('prove_', '')}_${Date.now()}`;
             
@@ -453,9 +695,11 @@ class WorkflowExecutor {
                         timestamp: Date.now(),
                         proofType: proofType,
                         person: this.currentWorkflow?.steps[stepIndex]?.person,
+                        arguments: args,
                         metrics: message.metrics // Capture real metrics from zkEngine
                     };
                     
+                    this.recordServerSpans(message, 'zkengine.prove', stepSpan);
                     console.log(`✅ Proof ${proofId} completed successfully`);
                     resolve({
                         success: true,
@@ -486,9 +730,11 @@ class WorkflowExecutor {
                     explanation: "Zero-knowledge proof generation",  // REQUIRED FIELD ADDED!
                     additional_context: {
                         workflow_id: this.workflowId,
-                        step_index: stepIndex
+                        step_index: stepIndex,
+                        trace: this.traceContext(stepSpan)
                     }
-                }
+                },
+                traceparent: this.traceContext(stepSpan)?.traceparent
             };
             
             this.wsClient.send(JSON.stringify(proofRequest));
@@ -496,7 +742,7 @@ class WorkflowExecutor {
     }
 
 
-    async verifyLastProof(proofType = 'last', person = null) {
+    async verifyLastProof(proofType = 'last', person = null, stepSpan = null) {
         console.log(`🔍 verifyLastProof called with proofType: ${proofType}, person: ${person}`);
         
         // Check if proofType looks like a proof ID (e.g., proof_kyc_1234567890 or prove_kyc_1234567890)
@@ -504,6 +750,31 @@ class WorkflowExecutor {
             // This is a specific proof ID - just send it to backend
             const proofId = proofType;
             
+            const verifyRequest = {
+                message: `Verify proof ${proofId}`,
+                proof_id: proofId,
+                metadata: {
+                    function: 'verify_proof',
+                    arguments: [proofId],
+                    step_size: 50,
+                    explanation: "Verifying proof",
+                    additional_context: {
+                        workflow_id: this.workflowId,
+                        is_verification: true,
+                        trace: this.traceContext(stepSpan)
+                    }
+                },
+                workflowId: this.workflowId,
+                traceparent: this.traceContext(stepSpan)?.traceparent
+            };
+            
+            // The Rust server keys cached results on the request's step size
+            const cached = await this.cachedVerification(proofId, verifyRequest.metadata.step_size);
+            if (cached) {
+                console.log(`✅ Verification result (cached): ${cached.valid ? 'VALID' : 'INVALID'}`);
+                return { success: true, valid: cached.valid, proofId: proofId, cached: true };
+            }
+            
             return new Promise((resolve) => {
                 console.log(`🔍 Verifying proof by ID: ${proofId}`);
                 
@@ -515,6 +786,7 @@ class WorkflowExecutor {
                         this.wsClient.off('message', messageHandler);
                         
                         const isValid = message.result === 'VALID';
+                        this.recordServerSpans(message, 'zkengine.verify', stepSpan);
                         console.log(`✅ Verification result: ${isValid ? 'VALID' : 'INVALID'}`);
                         
                         resolve({
@@ -535,22 +807,6 @@ class WorkflowExecutor {
                 this.wsClient.on('message', messageHandler);
                 
                 // Send verification request - backend will handle loading from disk
-                const verifyRequest = {
-                    message: `Verify proof ${proofId}`,
-                    proof_id: proofId,
-                    metadata: {
-                        function: 'verify_proof',
-                        arguments: [proofId],
-                        step_size: 50,
-                        explanation: "Verifying proof",
-                        additional_context: {
-                            workflow_id: this.workflowId,
-                            is_verification: true
-                        }
-                    },
-                    workflowId: this.workflowId
-                };
-                
                 this.wsClient.send(JSON.stringify(verifyRequest));
             });
         }
@@ -591,6 +847,40 @@ class WorkflowExecutor {
             console.error('❌ No proof found to verify in memory');
             return { success: false, error: 'No proof to verify' };
         }
+        const compliant = this.attestsCompliance(proofToVerify);
+        
+        const verifyRequest = {
+            message: `verify proof ${proofToVerify.proofId}`,
+            proof_id: proofToVerify.proofId,
+            metadata: {
+                function: 'verify_proof',
+                arguments: [proofToVerify.proofId],
+                step_size: 50,
+                explanation: "Proof verification",              // REQUIRED FIELD ADDED!
+                additional_context: {                        // REQUIRED FIELD ADDED!
+                    workflow_id: this.workflowId,
+                    step_index: 1,
+                    is_verification: true,
+                    trace: this.traceContext(stepSpan)
+                }
+            },
+            workflowId: this.workflowId,
+            traceparent: this.traceContext(stepSpan)?.traceparent
+        };
+        
+        const cached = await this.cachedVerification(proofToVerify.proofId, verifyRequest.metadata.step_size);
+        if (cached) {
+            this.verificationResults[resultKey] = cached.valid && compliant;
+            this.verificationResults[verifyType] = cached.valid && compliant;
+            console.log(`✅ Verification complete (cached): ${proofToVerify.proofId} - ${cached.valid ? 'VALID' : 'INVALID'}`);
+            return {
+                success: true,
+                valid: cached.valid,
+                proofId: proofToVerify.proofId,
+                result: cached.valid ? 'VALID' : 'INVALID',
+                cached: true
+            };
+        }
         
         return new Promise((resolve) => {
             console.log(`🔍 Verifying ${verifyType} proof: ${proofToVerify.proofId}`);
@@ -603,12 +893,13 @@ class WorkflowExecutor {
                     this.wsClient.off('message', messageHandler);
                     
                     const isValid = message.result === 'VALID';
+                    this.recordServerSpans(message, 'zkengine.verify', stepSpan);
                     
                     // CRITICAL: Store verification result for conditional checks
                     // Use the same key as proof results
-                    this.verificationResults[resultKey] = isValid;
+                    this.verificationResults[resultKey] = isValid && compliant;
                     // Also store by type for backward compatibility
-                    this.verificationResults[verifyType] = isValid;
+                    this.verificationResults[verifyType] = isValid && compliant;
                     
                     console.log(`✅ Verification complete: ${proofToVerify.proofId} - ${message.result}`);
                     
@@ -624,28 +915,13 @@ class WorkflowExecutor {
             this.wsClient.on('message', messageHandler);
             
             // Send verification request
-            const verifyRequest = {
-                message: `verify proof ${proofToVerify.proofId}`,
-                proof_id: proofToVerify.proofId,
-                metadata: {
-                    function: 'verify_proof',
-                    arguments: [proofToVerify.proofId],
-                    step_size: 50,
-                    explanation: "Proof verification",              // REQUIRED FIELD ADDED!
-                    additional_context: {                        // REQUIRED FIELD ADDED!
-                        workflow_id: this.workflowId,
-                        step_index: 1,
-                        is_verification: true
-                    }
-                },
-                workflowId: this.workflowId
-            };
-            
             this.wsClient.send(JSON.stringify(verifyRequest));
         });
     }
 
-    async verifyOnBlockchain(blockchain, proofType, person = null, stepIndex = 0) {
+    // verifyLocally: a verify_proof step the plan optimizer merged into this one.
+    // The proof data for the chain is fetched while the local verification runs.
+    async verifyOnBlockchain(blockchain, proofType, person = null, stepIndex = 0, verifyLocally = false, stepSpan = null) {
         // Find the proof to verify on blockchain
         let proofToVerify = null;
         let resultKey = null;
@@ -676,7 +952,17 @@ class WorkflowExecutor {
         // since the backend doesn't handle blockchain-specific verification
         try {
             // Get proof data from backend first
-            const proofDataResponse = await fetch(`http://localhost:8001/api/proof/${proofToVerify.proofId}/${blockchain.toLowerCase()}`);
+            const proofDataRequest = fetch(`http://localhost:8001/api/proof/${proofToVerify.proofId}/${blockchain.toLowerCase()}`);
+            let localVerification;
+            if (verifyLocally) {
+                // Settled here so a failed fetch is not reported as unhandled meanwhile
+                proofDataRequest.catch(() => {});
+                localVerification = await this.verifyLastProof(proofType, person, stepSpan);
+                if (!localVerification.success) {
+                    return localVerification;
+                }
+            }
+            const proofDataResponse = await proofDataRequest;
             if (!proofDataResponse.ok) {
                 throw new Error(`Failed to get proof data: ${proofDataResponse.statusText}`);
             }
@@ -695,7 +981,7 @@ class WorkflowExecutor {
                 proofType: proofType,
                 blockchain: blockchain.toUpperCase(),
                 proofData: proofData
-            });
+            }, stepSpan);
             
             console.log(`⏳ Waiting for user to verify on ${blockchain}...`);
             
@@ -713,11 +999,12 @@ class WorkflowExecutor {
                         if (message.success) {
                             // Store blockchain verification result
                             const blockchainKey = `${resultKey}_${blockchain}`;
-                            this.verificationResults[blockchainKey] = true;
+                            const compliant = this.attestsCompliance(proofToVerify);
+                            this.verificationResults[blockchainKey] = compliant;
                             
                             // ALSO store under the base key for transfer conditions
-                            this.verificationResults[resultKey] = true;
-                            this.verificationResults[proofType] = true;
+                            this.verificationResults[resultKey] = compliant;
+                            this.verificationResults[proofType] = compliant;
                             
                             // Send verification update through WebSocket
                             this.sendWorkflowUpdate('blockchain_verification_update', {
@@ -727,7 +1014,7 @@ class WorkflowExecutor {
                                 transactionHash: message.transactionHash,
                                 explorerUrl: message.explorerUrl,
                                 success: true
-                            });
+                            }, stepSpan);
                             
                             console.log(`✅ ${blockchain} verification complete: ${proofToVerify.proofId}`);
                             console.log(`   Transaction: ${message.transactionHash}`);
@@ -738,7 +1025,8 @@ class WorkflowExecutor {
                                 proofId: proofToVerify.proofId,
                                 blockchain: blockchain.toUpperCase(),
                                 transactionHash: message.transactionHash,
-                                explorerUrl: message.explorerUrl
+                                explorerUrl: message.explorerUrl,
+                                ...(localVerification ? { localVerification } : {})
                             });
                         } else {
                             console.log(`❌ ${blockchain} verification failed: ${message.error}`);
@@ -772,43 +1060,44 @@ class WorkflowExecutor {
         }
     }
 
-    async executeTransfer(step) {
+    async executeTransfer(step, stepIndex, stepSpan) {
         console.log(`💸 Transferring ${step.amount} USDC to ${step.recipient} on ${step.blockchain}`);
+        const transferSpan = this.tracer ? this.tracer.startSpan('circle.transfer', {
+            blockchain: step.blockchain,
+            amount: step.amount
+        }, stepSpan?.span_id) : null;
         
         try {
-            const circleHandler = new CircleHandler();
-            await circleHandler.initialize();
+            await this.circleHandler.initialize();
             
-            const transfer = await circleHandler.transfer(
-                step.amount,
-                step.recipient,
-                step.blockchain
+            // Same key on every retry of this step, so Circle never creates a second transfer
+            const idempotencyKey = transferIdempotencyKey(this.workflowId, stepIndex, step);
+            const transfer = await this.transferScheduler.submit(sourceWalletId(step.blockchain), () =>
+                this.circleHandler.transfer(step.amount, step.recipient, step.blockchain, { idempotencyKey })
             );
             
             if (transfer.success) {
                 console.log(`✅ Transfer initiated with ID: ${transfer.transferId}`);
+                this.tracer?.endSpan(transferSpan, 'ok', {
+                    transfer_id: transfer.transferId,
+                    attempts: transfer.attempts
+                });
+                await this.watchTransfer(transfer.transferId, step.blockchain);
                 
                 // Send transfer data update to UI
-                if (this.currentWorkflow && this.currentWorkflow.steps) {
-                    const currentStepIndex = this.currentWorkflow.steps.findIndex(s => 
-                        s.type === 'transfer' && s.amount === step.amount && s.recipient === step.recipient
-                    );
-                    if (currentStepIndex !== -1) {
-                        this.sendWorkflowUpdate('workflow_step_update', {
-                            workflowId: this.workflowId,
-                            stepId: `step_${currentStepIndex + 1}`,
-                            updates: {
-                                transferData: {
-                                    id: transfer.transferId,
-                                    amount: step.amount,
-                                    destinationAddress: step.recipient,
-                                    blockchain: step.blockchain,
-                                    status: transfer.status || 'pending'
-                                }
-                            }
-                        });
+                this.sendWorkflowUpdate('workflow_step_update', {
+                    workflowId: this.workflowId,
+                    stepId: `step_${stepIndex + 1}`,
+                    updates: {
+                        transferData: {
+                            id: transfer.transferId,
+                            amount: step.amount,
+                            destinationAddress: step.recipient,
+                            blockchain: step.blockchain,
+                            status: transfer.status || 'pending'
+                        }
                     }
-                }
+                }, stepSpan);
                 
                 return {
                     success: true,
@@ -822,6 +1111,7 @@ class WorkflowExecutor {
             }
         } catch (error) {
             console.error(`❌ Transfer failed: ${error.message}`);
+            this.tracer?.endSpan(transferSpan, 'error', { error: error.message });
             return {
                 success: false,
                 error: error.message
@@ -840,7 +1130,7 @@ class WorkflowExecutor {
         return summary;
     }
 
-    async listProofs(listType = 'proofs') {
+    async listProofs(listType = 'proofs', stepSpan = null) {
         return new Promise((resolve) => {
             console.log(`📋 Listing ${listType}...`);
             
@@ -870,7 +1160,7 @@ class WorkflowExecutor {
                     arguments: [listType],
                     step_size: 50,
                     explanation: `Listing ${listType}`,
-                    additional_context: null
+                    additional_context: this.tracer ? { trace: this.traceContext(stepSpan) } : null
                 },
                 workflowId: this.workflowId
             };
@@ -879,18 +1169,43 @@ class WorkflowExecutor {
         });
     }
 
+    // A valid KYC proof made with kyc_approved = 0 proves the wallet is NOT
+    // approved, so it must not satisfy a kyc_verified condition
+    attestsCompliance(proof) {
+        return !(proof.proofType === 'kyc' && proof.arguments?.[1] === '0');
+    }
+
+    // The Rust server reports zkEngine child-process timings on completion messages
+    recordServerSpans(message, name, stepSpan) {
+        const timing = message.trace;
+        if (!this.tracer || !timing) return;
+        this.tracer.recordSpan(name, timing.zkengine_start_ms, timing.zkengine_end_ms,
+            stepSpan?.span_id || null, 'zkengine', { proof_id: message.proof_id });
+        this.tracer.recordSpan('rust.handle', timing.received_ms, timing.completed_ms,
+            stepSpan?.span_id || null, 'rust_server', { proof_id: message.proof_id });
+    }
+
     getTransferIds() {
         return this.stepResults
             .filter(r => r.type === 'transfer' && r.result && r.result.success && r.result.transferId)
             .map(r => r.result.transferId);
     }
 
-    sendWorkflowUpdate(type, data) {
+    // Progress updates are merged per workflow and sent as deltas (see updateCoalescer.js);
+    // span is the step or workflow span the update's traceparent points at
+    sendWorkflowUpdate(type, data, span = null) {
+        this.updates.push(type, data, span);
+    }
+
+    sendMessage(type, data, span = null) {
         if (this.wsClient && this.wsClient.readyState === WebSocket.OPEN) {
             const message = {
                 type: type,
                 ...data
             };
+            if (this.tracer) {
+                message.traceparent = this.traceContext(span).traceparent;
+            }
             const jsonMessage = JSON.stringify(message);
             console.log(`📤 Sending ${type} via WebSocket:`, jsonMessage);
             this.wsClient.send(jsonMessage);
@@ -899,6 +1214,7 @@ class WorkflowExecutor {
     }
 
     disconnect() {
+        this.updates.close();
         if (this.wsClient) {
             this.wsClient.close();
         }
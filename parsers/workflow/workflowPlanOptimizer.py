@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Plan optimization between parsing and execution
+
+The LLM parser often repeats work: the same proof generated twice for one
+person, a local verify_proof right before an on-chain verification of the
+same proof, a second verification of a proof that is already verified, or
+several list_proofs steps. ``optimize_plan`` removes or merges those steps
+without changing what the executor ends up with:
+
+- generate_proof: a step that repeats the latest generation for the same
+  (proof type, person) with the same inputs (``parameters``, e.g.
+  ``kyc_approved``) is dropped; different inputs prove something else and
+  always run. Later steps that name the same proof differently ("ai" for
+  "ai_content", "Alice" for "alice") are rewritten to the kept step's
+  names, so the executor finds the proof under the key it was stored with.
+- verify_proof / verify_on_*: repeats for a proof already verified in the
+  same place are dropped; the executor keeps verification results for the
+  whole workflow, so later transfer conditions still see them.
+- verify_proof immediately followed by verify_on_* is merged into the
+  on-chain step with ``verify_locally`` when both name the same proof (read
+  as the executor reads them: ``verificationType`` first for verify_proof):
+  the executor loads the on-chain proof data while the local verification
+  runs.
+- list_proofs: only the last step per list type runs; proofs only
+  accumulate, so it lists everything the earlier ones would have.
+
+Verifications of an unknown or relative proof type ("last", "previous")
+are left alone. Verification placeholders (``pending_<type>_<person>``) are
+rewritten with the names above, step indices are renumbered, and the
+removed steps and an estimated saving are reported under ``optimization``.
+"""
+
+import copy
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Rough step durations (README: proofs 15-30 s, local verification 2-5 s,
+# blockchain verification 10-30 s)
+STEP_SECONDS = {
+    'generate_proof': 20.0,
+    'verify_proof': 3.5,
+    'verify_on_ethereum': 20.0,
+    'verify_on_solana': 20.0,
+    'list_proofs': 1.0,
+}
+# Saved by a merged verification: the proof artifacts load while the local
+# verification runs instead of after it, and one step round trip less
+ARTIFACT_LOAD_SECONDS = 1.0
+
+# Legacy step types the executor still accepts as proof generation
+GENERATE_TYPES = {
+    'generate_proof': None,
+    'kyc_proof': 'kyc',
+    'location_proof': 'location',
+    'ai_content_proof': 'ai_content',
+}
+VERIFY_TYPES = ('verify_proof', 'verification')
+CHAIN_VERIFY_TYPES = ('verify_on_ethereum', 'verify_on_solana')
+PROOF_TYPES = {'kyc', 'location', 'ai_content'}
+PROOF_TYPE_ALIASES = {'ai': 'ai_content'}
+# Step fields besides ``parameters`` that the executor turns into circuit inputs
+INPUT_FIELDS = ('kyc_approved', 'hash')
+PROOF_ID_PATTERN = re.compile(r'proof_\w+_\d+')
+
+
+def _proof_type(step: Dict[str, Any]) -> Optional[str]:
+    """The proof type a step works on, read in the executor's order"""
+    step_type = step.get('type')
+    if GENERATE_TYPES.get(step_type):
+        proof_type = GENERATE_TYPES[step_type]
+    elif step_type in VERIFY_TYPES:
+        proof_type = step.get('verificationType') or step.get('proofType') or step.get('proof_type')
+    elif step_type in CHAIN_VERIFY_TYPES:
+        proof_type = step.get('proofType') or step.get('proof_type')
+    else:
+        proof_type = step.get('proof_type') or step.get('proofType')
+    return PROOF_TYPE_ALIASES.get(proof_type, proof_type)
+
+
+def _proof_key(step: Dict[str, Any]) -> Tuple[Optional[str], str]:
+    """Where the executor stores (and looks up) the proof: type and person"""
+    return _proof_type(step), str(step.get('person') or 'user').strip().lower()
+
+
+def _inputs(step: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    """Normalized inputs of a generation step; steps with different inputs prove different things"""
+    inputs = dict(step.get('parameters') or {})
+    for field in INPUT_FIELDS:
+        if step.get(field) is not None:
+            inputs.setdefault(field, step[field])
+    return tuple(sorted(
+        (str(name), json.dumps(value, sort_keys=True) if isinstance(value, (dict, list))
+         else str(value).strip().lower())
+        for name, value in inputs.items()))
+
+
+def _target_proof_id(step: Dict[str, Any]) -> Optional[str]:
+    """The existing proof a step names by ID, looked for where (and in the order) the executor looks"""
+    proof_id = step.get('proof_id')
+    if step.get('type') in VERIFY_TYPES:
+        match = PROOF_ID_PATTERN.search(step.get('description') or '')
+        if match:
+            return match.group(0)
+        arguments = step.get('arguments') or []
+        if arguments and str(arguments[0]).startswith(('proof_', 'prove_')):
+            return str(arguments[0])
+        if proof_id and not str(proof_id).startswith('pending_'):
+            return str(proof_id)
+        target = step.get('verificationType') or step.get('proofType') or step.get('proof_type')
+        return str(target) if str(target).startswith(('proof_', 'prove_')) else None
+    if proof_id and not str(proof_id).startswith('pending_'):
+        return str(proof_id)
+    return None
+
+
+def _rename(step: Dict[str, Any], kept: Dict[str, Any]):
+    """Point a step at the proof generated by ``kept``"""
+    proof_type = _proof_type(kept)
+    step['proofType' if 'proofType' in step and 'proof_type' not in step else 'proof_type'] = proof_type
+    if 'verificationType' in step:
+        step['verificationType'] = proof_type
+    if kept.get('person'):
+        step['person'] = kept['person']
+    else:
+        step.pop('person', None)
+    if 'proof_id' in step and not _target_proof_id(step):
+        step['proof_id'] = f"pending_{proof_type}_{kept.get('person') or 'user'}"
+
+
+def optimize_plan(workflow: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return a copy of a parsed workflow with redundant steps removed.
+
+    ``optimization`` holds ``originalStepCount``, ``removedSteps`` (original
+    index, type and reason of each dropped step), ``mergedSteps`` and
+    ``estimatedSecondsSaved``.
+    """
+    plan = copy.deepcopy(workflow)
+    steps: List[Dict[str, Any]] = plan.get('steps') or []
+    removed: List[Dict[str, Any]] = []
+    merged: List[Dict[str, Any]] = []
+    saved = 0.0
+
+    def drop(index: int, reason: str):
+        nonlocal saved
+        removed.append({'index': index, 'type': steps[index].get('type'), 'reason': reason})
+        saved += STEP_SECONDS.get(steps[index].get('type'), 0.0)
+
+    # Latest generation per (type, person): later steps see only that proof
+    generated: Dict[Tuple[Optional[str], str], Dict[str, Any]] = {}
+    verified = set()
+    last_list = {step.get('list_type', 'proofs'): i for i, step in enumerate(steps)
+                 if step.get('type') == 'list_proofs'}
+    keep: List[int] = []
+
+    for i, step in enumerate(steps):
+        step_type = step.get('type')
+        if step_type in GENERATE_TYPES:
+            key = _proof_key(step)
+            inputs = _inputs(step)
+            if key in generated and generated[key]['inputs'] == inputs:
+                drop(i, f"duplicate of step {generated[key]['index'] + 1}")
+                continue
+            generated[key] = {'index': i, 'step': step, 'inputs': inputs}
+            # Verifications before the generation were of some other proof
+            verified = {place for place in verified if place[0] != key}
+        elif step_type in VERIFY_TYPES + CHAIN_VERIFY_TYPES:
+            proof_id = _target_proof_id(step)
+            if proof_id:
+                place = (proof_id, step_type)
+            elif _proof_type(step) not in PROOF_TYPES:
+                # "last", "previous" or unknown: which proof it means is decided at run time
+                keep.append(i)
+                continue
+            else:
+                key = _proof_key(step)
+                if key in generated:
+                    _rename(step, generated[key]['step'])
+                place = (key, 'local' if step_type in VERIFY_TYPES else step_type)
+            if place in verified:
+                drop(i, "already verified")
+                continue
+            verified.add(place)
+        elif step_type == 'list_proofs':
+            if last_list[step.get('list_type', 'proofs')] != i:
+                drop(i, "superseded by a later listing")
+                continue
+        keep.append(i)
+
+    # Merge local verification into an immediately following on-chain one
+    optimized: List[Dict[str, Any]] = []
+    for n, i in enumerate(keep):
+        step = steps[i]
+        following = steps[keep[n + 1]] if n + 1 < len(keep) else None
+        if (step.get('type') in VERIFY_TYPES and not _target_proof_id(step)
+                and following is not None and following.get('type') in CHAIN_VERIFY_TYPES
+                and not _target_proof_id(following)
+                and _proof_type(step) in PROOF_TYPES
+                and _proof_key(step) == _proof_key(following)
+                and not step.get('condition') and not following.get('condition')):
+            following['verify_locally'] = True
+            merged.append({'index': i, 'into': keep[n + 1]})
+            removed.append({'index': i, 'type': step.get('type'),
+                            'reason': f"merged into step {keep[n + 1] + 1}"})
+            saved += ARTIFACT_LOAD_SECONDS
+            continue
+        optimized.append(step)
+
+    for index, step in enumerate(optimized):
+        step['index'] = index
+    plan['steps'] = optimized
+    plan['optimization'] = {
+        'originalStepCount': len(steps),
+        'removedSteps': sorted(removed, key=lambda r: r['index']),
+        'mergedSteps': merged,
+        'estimatedSecondsSaved': round(saved, 1),
+    }
+    return plan
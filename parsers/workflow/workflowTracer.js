@@ -0,0 +1,85 @@
+// workflowTracer.js - Span bookkeeping for workflow execution traces
+import { randomBytes } from 'crypto';
+
+const newTraceId = () => randomBytes(16).toString('hex');
+const newSpanId = () => randomBytes(8).toString('hex');
+
+class WorkflowTracer {
+    constructor(traceContext = null, service = 'workflow_executor') {
+        // Continue the trace started by chat_service, or start a fresh one
+        const parent = traceContext || WorkflowTracer.parseTraceparent(process.env.TRACEPARENT) || {};
+        this.traceId = parent.trace_id || newTraceId();
+        this.rootParentId = parent.span_id || null;
+        this.service = service;
+        this.spans = [];
+    }
+
+    static parseTraceparent(header) {
+        if (!header) return null;
+        const parts = header.trim().split('-');
+        if (parts.length !== 4 || parts[1].length !== 32 || parts[2].length !== 16) {
+            return null;
+        }
+        return { trace_id: parts[1], span_id: parts[2] };
+    }
+
+    startSpan(name, attributes = {}, parentSpanId = undefined) {
+        return {
+            name: name,
+            trace_id: this.traceId,
+            span_id: newSpanId(),
+            parent_span_id: parentSpanId === undefined ? this.rootParentId : parentSpanId,
+            service: this.service,
+            start_ms: Date.now(),
+            end_ms: null,
+            status: 'ok',
+            attributes: { ...attributes }
+        };
+    }
+
+    endSpan(span, status = 'ok', attributes = {}) {
+        if (!span || span.end_ms !== null) return span;
+        span.end_ms = Date.now();
+        span.duration_ms = span.end_ms - span.start_ms;
+        span.status = status;
+        Object.assign(span.attributes, attributes);
+        this.spans.push(span);
+        return span;
+    }
+
+    // Record a span whose timing was measured by another process (e.g. zkEngine in the Rust server)
+    recordSpan(name, startMs, endMs, parentSpanId, service, attributes = {}) {
+        if (!startMs || !endMs) return null;
+        const span = {
+            name: name,
+            trace_id: this.traceId,
+            span_id: newSpanId(),
+            parent_span_id: parentSpanId,
+            service: service,
+            start_ms: startMs,
+            end_ms: endMs,
+            duration_ms: endMs - startMs,
+            status: 'ok',
+            attributes: { ...attributes }
+        };
+        this.spans.push(span);
+        return span;
+    }
+
+    // Propagation payload for additional_context and WebSocket messages
+    context(span) {
+        const spanId = span ? span.span_id : this.rootParentId;
+        return {
+            trace_id: this.traceId,
+            span_id: spanId,
+            traceparent: `00-${this.traceId}-${spanId || '0000000000000000'}-01`
+        };
+    }
+
+    toJSON() {
+        return this.spans;
+    }
+}
+
+export { WorkflowTracer };
+export default WorkflowTracer;
@@ -2,12 +2,36 @@
 
 const fs = require('fs');
 const path = require('path');
+const { execFileSync } = require('child_process');
 
-const PROOFS_DIR = path.join(__dirname, '..', 'proofs');
+const ROOT_DIR = path.join(__dirname, '..');
+const PROOFS_DIR = path.join(ROOT_DIR, 'proofs');
+const ARTIFACTS_DIR = process.env.ARTIFACT_STORE_DIR || path.join(ROOT_DIR, 'artifacts');
 const MAX_AGE_DAYS = 7; // Keep proofs for 7 days
 const DRY_RUN = process.argv.includes('--dry-run');
+const FORCE = process.argv.includes('--force');
 
 async function cleanupOldProofs() {
+    // With a storage budget configured, the access-aware collector decides
+    if (parseFloat(process.env.GC_BUDGET_GB || '0') > 0 && !FORCE) {
+        console.log('GC_BUDGET_GB is set: running the proof garbage collector instead of age-based cleanup');
+        console.log('(run with --force to delete old proof directories anyway)');
+        execFileSync('python3', ['-m', 'services.proof_gc', 'run', ...(DRY_RUN ? ['--dry-run'] : [])],
+            { cwd: ROOT_DIR, stdio: 'inherit' });
+        return;
+    }
+
+    // With a cold tier configured, old proofs are offloaded rather than deleted
+    if (process.env.TIERING_BACKEND && !FORCE) {
+        console.log('TIERING_BACKEND is set: offloading cold proof artifacts instead of deleting proofs');
+        console.log('(run with --force to delete old proof directories anyway)');
+        if (!DRY_RUN) {
+            execFileSync('python3', ['-m', 'services.proof_tiering', 'run', process.env.TIERING_BACKEND, ARTIFACTS_DIR],
+                { cwd: ROOT_DIR, stdio: 'inherit' });
+        }
+        return;
+    }
+
     console.log(`Starting proof cleanup (${DRY_RUN ? 'DRY RUN' : 'LIVE'})...`);
     
     const now = Date.now();
@@ -44,6 +68,17 @@ async function cleanupOldProofs() {
             }
         }
         
+        // Proof directories only hold pointers; drop their artifact references
+        // so objects no longer used by any proof are deleted too
+        if (!DRY_RUN && deletedCount > 0) {
+            try {
+                execFileSync('python3', ['-m', 'services.artifact_store', 'sweep', PROOFS_DIR, ARTIFACTS_DIR],
+                    { cwd: ROOT_DIR, stdio: 'inherit' });
+            } catch (error) {
+                console.error('Artifact sweep failed:', error.message);
+            }
+        }
+        
         console.log(`\nSummary:`);
         console.log(`- ${deletedCount} proof directories ${DRY_RUN ? 'would be' : 'were'} deleted`);
         console.log(`- ${keptCount} proof directories kept (less than ${MAX_AGE_DAYS} days old)`);
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Content-addressed proof artifact store
+
+Python side of ``src/artifact_store.rs``. Objects live at
+``<root>/objects/<hh>/<sha256>.zst`` (or ``.raw``), each proof directory keeps
+a ``proof.ref`` pointer, and ``<root>/index.sqlite`` counts references so an
+object is deleted only when the last proof using it goes away.
+
+``zstandard`` is optional: without it new objects are stored uncompressed
+(still deduplicated) and reading zstd objects raises ``RuntimeError``.
+
+Usage:
+    python -m services.artifact_store sweep [proofs_dir] [artifact_dir]
+    python -m services.artifact_store stats [artifact_dir]
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+POINTER_FILE = "proof.ref"
+RAW_FILE = "proof.bin"
+ZSTD_LEVEL = 3
+CHUNK_SIZE = 1 << 20
+
+# The index schema is shared with src/artifact_store.rs: add a migration in
+# both places and bump SCHEMA_VERSION (PRAGMA user_version) together. Indexes
+# written before versioning report version 0 but may already have some of
+# these changes, so migrations only add columns that are missing.
+SCHEMA_VERSION = 3
+
+MIGRATIONS = [
+    (1, [
+        """CREATE TABLE IF NOT EXISTS artifacts (
+            hash         TEXT PRIMARY KEY,
+            codec        TEXT NOT NULL,
+            size         INTEGER NOT NULL,
+            stored_size  INTEGER NOT NULL,
+            refcount     INTEGER NOT NULL DEFAULT 0,
+            created_ms   INTEGER NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS artifact_refs (
+            proof_id  TEXT PRIMARY KEY,
+            hash      TEXT NOT NULL REFERENCES artifacts(hash)
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_artifact_refs_hash ON artifact_refs(hash)",
+    ]),
+    # Access stats for tiering (services/proof_tiering.py)
+    (2, [
+        "ALTER TABLE artifacts ADD COLUMN tier TEXT NOT NULL DEFAULT 'local'",
+        "ALTER TABLE artifacts ADD COLUMN last_access_ms INTEGER",
+        "ALTER TABLE artifacts ADD COLUMN access_count INTEGER NOT NULL DEFAULT 0",
+        "CREATE INDEX IF NOT EXISTS idx_artifacts_tier_access ON artifacts(tier, last_access_ms)",
+    ]),
+    # Eviction order for services/proof_gc.py
+    (3, [
+        "CREATE INDEX IF NOT EXISTS idx_artifacts_lru "
+        "ON artifacts(COALESCE(last_access_ms, created_ms), access_count)",
+        "CREATE INDEX IF NOT EXISTS idx_artifacts_lfu "
+        "ON artifacts(access_count, COALESCE(last_access_ms, created_ms))",
+    ]),
+]
+ADD_COLUMN = re.compile(r'^ALTER TABLE (\w+) ADD COLUMN (\w+)')
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Bring an index up to SCHEMA_VERSION; returns the version it was at"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target, statements in MIGRATIONS:
+            if version >= target:
+                continue
+            for statement in statements:
+                match = ADD_COLUMN.match(statement)
+                if match and match.group(2) in {
+                        row[1] for row in conn.execute(f"PRAGMA table_info({match.group(1)})")}:
+                    continue
+                conn.execute(statement)
+        if version < SCHEMA_VERSION:
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return version
+
+
+def has_proof(proof_dir: str) -> bool:
+    return (os.path.exists(os.path.join(proof_dir, RAW_FILE))
+            or os.path.exists(os.path.join(proof_dir, POINTER_FILE)))
+
+
+def read_pointer(proof_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(proof_dir, POINTER_FILE)) as f:
+            pointer = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return pointer if isinstance(pointer, dict) and pointer.get('hash') else None
+
+
+def _require_zstd():
+    if zstandard is None:
+        raise RuntimeError("zstandard is required to read compressed proof artifacts "
+                           "(pip install zstandard)")
+
+
+class ArtifactStore:
+    def __init__(self, root: str, scratch_dir: Optional[str] = None):
+        self.root = os.path.expanduser(root)
+        self.scratch_dir = scratch_dir or os.path.join(tempfile.gettempdir(), 'agentkit-proofs')
+        os.makedirs(os.path.join(self.root, 'objects'), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(self.root, 'index.sqlite'),
+                                     timeout=10, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        migrate(self._conn)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._conn.close()
+
+    def object_path(self, file_hash: str, codec: str) -> str:
+        ext = 'zst' if codec == 'zstd' else 'raw'
+        return os.path.join(self.root, 'objects', file_hash[:2], f"{file_hash}.{ext}")
+
+    # --- writing ---------------------------------------------------------
+
+    def ingest(self, proof_id: str, proof_dir: str) -> Dict[str, Any]:
+        """Move proof_dir/proof.bin into the store and leave a pointer behind"""
+        raw_path = os.path.join(proof_dir, RAW_FILE)
+        codec = 'zstd' if zstandard is not None else 'raw'
+        tmp_path = os.path.join(self.root, 'objects', f"tmp-{uuid.uuid4().hex}")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(raw_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                sink = (zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(dst, closefd=False)
+                        if codec == 'zstd' else dst)
+                while True:
+                    chunk = src.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    sink.write(chunk)
+                    size += len(chunk)
+                if sink is not dst:
+                    sink.flush(zstandard.FLUSH_FRAME)
+                os.fsync(dst.fileno())
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        file_hash = digest.hexdigest()
+        # Reuse an existing object even if it was written with the other codec
+        row = self._conn.execute("SELECT codec FROM artifacts WHERE hash = ?", (file_hash,)).fetchone()
+        if row and os.path.exists(self.object_path(file_hash, row[0])):
+            codec = row[0]
+        object_path = self.object_path(file_hash, codec)
+        deduplicated = os.path.exists(object_path)
+        if deduplicated:
+            os.unlink(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            os.replace(tmp_path, object_path)
+        stored_size = os.path.getsize(object_path)
+
+        self._add_ref(proof_id, file_hash, codec, size, stored_size)
+        if not deduplicated:
+            # A cold object re-ingested locally is hot again; its remote copy
+            # shares the key and is overwritten by the next demotion
+            self.set_tier(file_hash, 'local')
+
+        pointer_tmp = os.path.join(proof_dir, POINTER_FILE + '.tmp')
+        with open(pointer_tmp, 'w') as f:
+            json.dump({"hash": file_hash, "codec": codec, "size": size}, f)
+        os.replace(pointer_tmp, os.path.join(proof_dir, POINTER_FILE))
+        os.unlink(raw_path)
+        return {"hash": file_hash, "size": size, "stored_size": stored_size,
+                "deduplicated": deduplicated}
+
+    def _add_ref(self, proof_id, file_hash, codec, size, stored_size):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO artifacts (hash, codec, size, stored_size, refcount, created_ms) "
+                "VALUES (?, ?, ?, ?, 0, ?)",
+                (file_hash, codec, size, stored_size, int(time.time() * 1000)))
+            row = self._conn.execute(
+                "SELECT hash FROM artifact_refs WHERE proof_id = ?", (proof_id,)).fetchone()
+            if row and row[0] == file_hash:
+                return
+            if row:
+                self._conn.execute(
+                    "UPDATE artifacts SET refcount = refcount - 1 WHERE hash = ?", (row[0],))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artifact_refs (proof_id, hash) VALUES (?, ?)",
+                (proof_id, file_hash))
+            self._conn.execute(
+                "UPDATE artifacts SET refcount = refcount + 1 WHERE hash = ?", (file_hash,))
+
+    def release(self, proof_id: str) -> bool:
+        """Drop a proof's reference; deletes the object when nothing else uses it"""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT r.hash, a.codec, a.refcount, a.tier FROM artifact_refs r "
+                "JOIN artifacts a ON a.hash = r.hash WHERE r.proof_id = ?", (proof_id,)).fetchone()
+            if not row:
+                return False
+            self._conn.execute("DELETE FROM artifact_refs WHERE proof_id = ?", (proof_id,))
+            if row['refcount'] <= 1 and row['tier'] != 'local':
+                # The cold copy is deleted by the tiering job, which owns the backend
+                self._conn.execute("UPDATE artifacts SET refcount = 0 WHERE hash = ?", (row['hash'],))
+            elif row['refcount'] <= 1:
+                self._conn.execute("DELETE FROM artifacts WHERE hash = ?", (row['hash'],))
+                try:
+                    os.unlink(self.object_path(row['hash'], row['codec']))
+                except FileNotFoundError:
+                    pass
+            else:
+                self._conn.execute(
+                    "UPDATE artifacts SET refcount = refcount - 1 WHERE hash = ?", (row['hash'],))
+            return True
+
+    def sweep(self, proofs_dir: str) -> int:
+        """Release references whose proof directory no longer has a pointer"""
+        proof_ids = [row[0] for row in self._conn.execute("SELECT proof_id FROM artifact_refs")]
+        released = 0
+        for proof_id in proof_ids:
+            if not os.path.exists(os.path.join(proofs_dir, proof_id, POINTER_FILE)):
+                released += self.release(proof_id)
+        return released
+
+    # --- reading ---------------------------------------------------------
+
+    def touch(self, file_hash: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE artifacts SET last_access_ms = ?, access_count = access_count + 1 WHERE hash = ?",
+                (int(time.time() * 1000), file_hash))
+
+    def artifact(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT * FROM artifacts WHERE hash = ?", (file_hash,)).fetchone()
+        return dict(row) if row else None
+
+    def set_tier(self, file_hash: str, tier: str):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE artifacts SET tier = ? WHERE hash = ?", (tier, file_hash))
+
+    @contextmanager
+    def open(self, proof_dir: str) -> Iterator[BinaryIO]:
+        """Stream the original proof bytes, decompressing on the fly"""
+        raw_path = os.path.join(proof_dir, RAW_FILE)
+        if os.path.exists(raw_path):
+            with open(raw_path, 'rb') as f:
+                yield f
+            return
+        pointer = read_pointer(proof_dir)
+        if not pointer:
+            raise FileNotFoundError(raw_path)
+        codec = pointer.get('codec', 'zstd')
+        with open(self.object_path(pointer['hash'], codec), 'rb') as f:
+            self.touch(pointer['hash'])
+            if codec == 'zstd':
+                _require_zstd()
+                with zstandard.ZstdDecompressor().stream_reader(f) as reader:
+                    yield reader
+            else:
+                yield f
+
+    @contextmanager
+    def materialize(self, proof_dir: str) -> Iterator[str]:
+        """Yield a path to the raw proof; scratch copies are removed afterwards"""
+        raw_path = os.path.join(proof_dir, RAW_FILE)
+        if os.path.exists(raw_path):
+            yield raw_path
+            return
+        os.makedirs(self.scratch_dir, exist_ok=True)
+        path = os.path.join(self.scratch_dir, f"{uuid.uuid4().hex}.bin")
+        try:
+            with self.open(proof_dir) as src, open(path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            yield path
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def stats(self) -> Dict[str, Any]:
+        objects, logical, stored, local = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size * refcount), 0), COALESCE(SUM(stored_size), 0), "
+            "COALESCE(SUM(CASE WHEN tier = 'local' THEN stored_size ELSE 0 END), 0) "
+            "FROM artifacts").fetchone()
+        return {"objects": objects, "logical_bytes": logical, "stored_bytes": stored,
+                "local_bytes": local, "saved_bytes": logical - stored}
+
+
+def main(argv) -> int:
+    if not argv or argv[0] not in ('sweep', 'stats'):
+        print(__doc__)
+        return 1
+    if argv[0] == 'sweep':
+        proofs_dir = argv[1] if len(argv) > 1 else os.getenv('PROOFS_DIR', './proofs')
+        root = argv[2] if len(argv) > 2 else os.getenv('ARTIFACT_STORE_DIR', './artifacts')
+        released = ArtifactStore(root).sweep(proofs_dir)
+        print(f"Released {released} artifact references for deleted proofs")
+    else:
+        root = argv[1] if len(argv) > 1 else os.getenv('ARTIFACT_STORE_DIR', './artifacts')
+        print(json.dumps(ArtifactStore(root).stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
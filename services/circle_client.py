@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Async Circle API client
+
+One pooled keep-alive ``aiohttp`` session per process replaces spawning a
+Node script (and a fresh TLS handshake) for every transfer status check.
+Responses are parsed into small typed models; 429 and 5xx responses and
+connection errors are retried with exponential backoff, honouring
+``Retry-After``.
+
+``aiohttp`` is imported when the first request is made, keeping it off the
+chat_service startup path.
+
+``services/circle_sandbox.py`` serves the same endpoints locally for tests
+and offline development (point ``CIRCLE_API_URL`` at it).
+"""
+
+import asyncio
+import json
+import random
+import uuid
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    import aiohttp
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+TERMINAL_STATUSES = {'complete', 'failed'}
+
+EXPLORERS = {
+    'ETH': "https://sepolia.etherscan.io/tx/{}",
+    'SOL': "https://explorer.solana.com/tx/{}?cluster=devnet",
+}
+
+
+class CircleAPIError(Exception):
+    def __init__(self, status: int, message: str, body: Optional[Dict[str, Any]] = None):
+        super().__init__(f"Circle API error {status}: {message}")
+        self.status = status
+        self.message = message
+        self.body = body or {}
+
+
+@dataclass
+class Money:
+    amount: str
+    currency: str = 'USD'
+
+    @classmethod
+    def from_api(cls, data: Optional[Dict[str, Any]]) -> Optional['Money']:
+        if not data:
+            return None
+        return cls(amount=str(data.get('amount', '0')), currency=data.get('currency', 'USD'))
+
+
+@dataclass
+class Transfer:
+    id: str
+    status: str
+    amount: Optional[Money] = None
+    source: Dict[str, Any] = field(default_factory=dict)
+    destination: Dict[str, Any] = field(default_factory=dict)
+    transaction_hash: Optional[str] = None
+    error_code: Optional[str] = None
+    create_date: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> 'Transfer':
+        # The hash has lived under several names across API versions and chains
+        tx_hash = (data.get('transactionHash') or data.get('txHash')
+                   or (data.get('blockchainLocation') or {}).get('txHash')
+                   or data.get('transactionId'))
+        return cls(
+            id=data.get('id', ''),
+            status=data.get('status', 'pending'),
+            amount=Money.from_api(data.get('amount')),
+            source=data.get('source') or {},
+            destination=data.get('destination') or {},
+            transaction_hash=tx_hash,
+            error_code=data.get('errorCode'),
+            create_date=data.get('createDate'),
+            raw=data,
+        )
+
+    @property
+    def chain(self) -> Optional[str]:
+        return self.destination.get('chain')
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def explorer_link(self, default_chain: str = 'ETH') -> Optional[str]:
+        template = EXPLORERS.get(self.chain or default_chain)
+        if not self.transaction_hash or not template:
+            return None
+        return template.format(self.transaction_hash)
+
+
+class CircleClient:
+    """Pooled Circle API client; create once and share it across requests"""
+
+    def __init__(self, api_key: Optional[str], base_url: str = 'https://api-sandbox.circle.com/v1',
+                 timeout: float = 10.0, max_retries: int = 3, backoff_base: float = 0.5,
+                 pool_size: int = 20):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.pool_size = pool_size
+        self._session: Optional['aiohttp.ClientSession'] = None
+
+    async def _get_session(self) -> 'aiohttp.ClientSession':
+        import aiohttp
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
+            if self.api_key:
+                headers['Authorization'] = f"Bearer {self.api_key}"
+            self._session = aiohttp.ClientSession(connector=connector, headers=headers,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def __aenter__(self) -> 'CircleClient':
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+        return self.backoff_base * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    async def request(self, method: str, path: str, base_url: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Send one API call with retries; returns the ``data`` envelope contents"""
+        import aiohttp
+        session = await self._get_session()
+        url = f"{base_url or self.base_url}{path}"
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    text = await response.text()
+                    try:
+                        body = json.loads(text) if text else {}
+                    except ValueError:
+                        body = {'message': text[:200]}
+                    if response.status < 400:
+                        return (body or {}).get('data', body or {})
+                    if response.status not in RETRY_STATUSES or attempt == self.max_retries:
+                        message = (body or {}).get('message') or response.reason or 'request failed'
+                        raise CircleAPIError(response.status, message, body)
+                    retry_after = response.headers.get('Retry-After')
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == self.max_retries:
+                    raise
+            await asyncio.sleep(self._delay(attempt, retry_after))
+        raise AssertionError("unreachable")
+
+    async def get_transfer(self, transfer_id: str) -> Transfer:
+        return Transfer.from_api(await self.request('GET', f"/transfers/{transfer_id}"))
+
+    async def get_notification_public_key(self, key_id: str) -> Dict[str, Any]:
+        """Key Circle signs webhooks with; only offered under the v2 API"""
+        root = self.base_url[:-len('/v1')] if self.base_url.endswith('/v1') else self.base_url
+        return await self.request('GET', f"/notifications/publicKey/{key_id}", base_url=f"{root}/v2")
+
+    async def create_transfer(self, source_wallet_id: str, address: str, chain: str, amount: str,
+                              idempotency_key: Optional[str] = None) -> Transfer:
+        """Blockchain transfer of USD(C); reusing an idempotency key never pays twice"""
+        payload = {
+            'idempotencyKey': idempotency_key or str(uuid.uuid4()),
+            'source': {'type': 'wallet', 'id': source_wallet_id},
+            'destination': {'type': 'blockchain', 'address': address, 'chain': chain},
+            'amount': {'amount': str(amount), 'currency': 'USD'},
+        }
+        return Transfer.from_api(await self.request('POST', "/transfers", json=payload))
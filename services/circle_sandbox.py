@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Circle sandbox transfers API
+
+Implements the endpoints ``services/circle_client.py`` uses with the same
+``{"data": ...}`` envelope. Transfers start ``pending`` and turn ``complete``
+(with a fake transaction hash) after ``complete_after`` status reads, and
+``fail_next`` injects error responses for retry tests.
+
+With a ``webhook_url`` it also stands in for Circle's notification sender:
+``notify`` POSTs a ``transfers`` notification signed with a P-256 key it
+generates (served at ``/v2/notifications/publicKey/{keyId}``; needs
+``cryptography``), and transfers created through the API complete (and
+notify) ``complete_after_secs`` later.
+
+Usage:
+    python -m services.circle_sandbox [port] [webhook_url]
+    CIRCLE_API_URL=http://localhost:8090/v1 python chat_service.py
+"""
+
+import asyncio
+import hashlib
+import json
+import sys
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+from services.circle_webhooks import public_key_b64, signed_headers
+
+
+class CircleSandbox:
+    def __init__(self, api_key: Optional[str] = None, complete_after: int = 1,
+                 webhook_url: Optional[str] = None,
+                 complete_after_secs: Optional[float] = None):
+        self.api_key = api_key
+        self.complete_after = complete_after
+        self.webhook_url = webhook_url
+        self.key_id = str(uuid.uuid4())
+        self._signing_key = None
+        self.complete_after_secs = complete_after_secs
+        self.notifications_sent = 0
+        self._tasks = set()
+        self.transfers: Dict[str, Dict[str, Any]] = {}
+        self.idempotency: Dict[str, str] = {}
+        self.reads: Dict[str, int] = {}
+        self.requests = 0
+        self._failures: List[int] = []
+
+    def fail_next(self, count: int = 1, status: int = 503):
+        self._failures.extend([status] * count)
+
+    def add_transfer(self, transfer_id: str, status: str = 'pending', chain: str = 'ETH',
+                     amount: str = '1.00') -> Dict[str, Any]:
+        transfer = {
+            'id': transfer_id,
+            'source': {'type': 'wallet', 'id': 'sandbox-wallet'},
+            'destination': {'type': 'blockchain', 'address': '0x0', 'chain': chain},
+            'amount': {'amount': amount, 'currency': 'USD'},
+            'status': status,
+            'createDate': datetime.now(timezone.utc).isoformat(),
+        }
+        if status == 'complete':
+            transfer['transactionHash'] = self._tx_hash(transfer_id)
+        self.transfers[transfer_id] = transfer
+        return transfer
+
+    @staticmethod
+    def _tx_hash(transfer_id: str) -> str:
+        return '0x' + hashlib.sha256(transfer_id.encode()).hexdigest()
+
+    def complete(self, transfer_id: str, status: str = 'complete'):
+        transfer = self.transfers[transfer_id]
+        transfer['status'] = status
+        if status == 'complete':
+            transfer['transactionHash'] = self._tx_hash(transfer_id)
+        else:
+            transfer['errorCode'] = 'transfer_failed'
+
+    @property
+    def signing_key(self):
+        if self._signing_key is None:
+            from cryptography.hazmat.primitives.asymmetric import ec
+            self._signing_key = ec.generate_private_key(ec.SECP256R1())
+        return self._signing_key
+
+    async def notify(self, transfer_id: str, notification_id: Optional[str] = None) -> int:
+        """Deliver a signed webhook for the transfer's current state; returns the HTTP status"""
+        body = json.dumps({
+            'notificationId': notification_id or str(uuid.uuid4()),
+            'notificationType': 'transfers',
+            'version': 1,
+            'transfer': self.transfers[transfer_id],
+        }).encode()
+        async with aiohttp.ClientSession() as session:
+            async with session.post(self.webhook_url, data=body,
+                                    headers=signed_headers(self.signing_key, self.key_id, body)) as response:
+                self.notifications_sent += 1
+                return response.status
+
+    async def _complete_later(self, transfer_id: str):
+        await asyncio.sleep(self.complete_after_secs)
+        self.complete(transfer_id)
+        if self.webhook_url:
+            try:
+                await self.notify(transfer_id)
+            except aiohttp.ClientError as e:
+                print(f"[WARNING] Webhook delivery failed for {transfer_id}: {e}")
+
+    # --- HTTP ------------------------------------------------------------
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        self.requests += 1
+        if self._failures:
+            status = self._failures.pop(0)
+            headers = {'Retry-After': '0'} if status == 429 else {}
+            return web.json_response({'code': status, 'message': 'injected failure'},
+                                     status=status, headers=headers)
+        if self.api_key and request.headers.get('Authorization') != f"Bearer {self.api_key}":
+            return web.json_response({'code': 401, 'message': 'Malformed authorization'}, status=401)
+        return await handler(request)
+
+    async def _create(self, request):
+        body = await request.json()
+        key = body.get('idempotencyKey')
+        if not key:
+            return web.json_response({'code': 2, 'message': 'idempotencyKey is required'}, status=400)
+        if key in self.idempotency:
+            return web.json_response({'data': self.transfers[self.idempotency[key]]}, status=201)
+        transfer = self.add_transfer(str(uuid.uuid4()),
+                                     chain=body.get('destination', {}).get('chain', 'ETH'),
+                                     amount=body.get('amount', {}).get('amount', '0'))
+        transfer['destination'] = body.get('destination', transfer['destination'])
+        transfer['source'] = body.get('source', transfer['source'])
+        self.idempotency[key] = transfer['id']
+        if self.complete_after_secs is not None:
+            task = asyncio.ensure_future(self._complete_later(transfer['id']))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return web.json_response({'data': transfer}, status=201)
+
+    async def _get(self, request):
+        transfer_id = request.match_info['transfer_id']
+        transfer = self.transfers.get(transfer_id)
+        if not transfer:
+            return web.json_response({'code': 404, 'message': 'Transfer not found'}, status=404)
+        self.reads[transfer_id] = self.reads.get(transfer_id, 0) + 1
+        if transfer['status'] == 'pending' and self.reads[transfer_id] >= self.complete_after:
+            self.complete(transfer_id)
+        return web.json_response({'data': transfer})
+
+    async def _list(self, request):
+        return web.json_response({'data': list(self.transfers.values())})
+
+    async def _public_key(self, request):
+        if request.match_info['key_id'] != self.key_id:
+            return web.json_response({'code': 404, 'message': 'Public key not found'}, status=404)
+        return web.json_response({'data': {
+            'id': self.key_id, 'algorithm': 'ECDSA_SHA_256',
+            'publicKey': public_key_b64(self.signing_key),
+        }})
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post('/v1/transfers', self._create)
+        app.router.add_get('/v1/transfers', self._list)
+        app.router.add_get('/v1/transfers/{transfer_id}', self._get)
+        app.router.add_get('/v2/notifications/publicKey/{key_id}', self._public_key)
+        return app
+
+
+class SandboxServer:
+    """Run a CircleSandbox on an ephemeral localhost port: ``async with SandboxServer() as s``"""
+
+    def __init__(self, sandbox: Optional[CircleSandbox] = None):
+        self.sandbox = sandbox or CircleSandbox()
+        self.url = ''
+        self._runner: Optional[web.AppRunner] = None
+
+    async def __aenter__(self) -> 'SandboxServer':
+        self._runner = web.AppRunner(self.sandbox.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/v1"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+
+def main(argv) -> int:
+    port = int(argv[0]) if argv else 8090
+    webhook_url = argv[1] if len(argv) > 1 else None
+    print(f"Circle sandbox stand-in on http://localhost:{port}/v1")
+    if webhook_url:
+        print(f"Sending transfer notifications to {webhook_url}")
+    sandbox = CircleSandbox(complete_after=3, webhook_url=webhook_url,
+                            complete_after_secs=5 if webhook_url else None)
+    web.run_app(sandbox.app(), host='127.0.0.1', port=port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
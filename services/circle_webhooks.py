@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Circle transfer webhook verification and parsing
+
+Circle signs each notification with its own key: ``X-Circle-Signature`` is
+the base64 ECDSA (SHA-256) signature of the raw body, and ``X-Circle-Key-Id``
+names the key, whose public half comes from ``GET /v2/notifications/
+publicKey/{keyId}``. ``PublicKeyCache`` fetches each key once. Circle sends
+no timestamp to check; ``WebhookDeduplicator`` (and chat_service's shared
+claim) drops redeliveries of the same notification so a retried webhook
+never publishes twice.
+
+Signature checks need the ``cryptography`` package, an optional dependency
+loaded only when webhooks are enabled.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple
+
+from services.circle_client import CircleAPIError, Transfer
+
+SIGNATURE_HEADER = 'X-Circle-Signature'
+KEY_ID_HEADER = 'X-Circle-Key-Id'
+KEY_ID_PATTERN = re.compile(r'^[A-Za-z0-9-]{1,64}$')
+
+
+class WebhookError(Exception):
+    """Rejected webhook; ``status`` is the HTTP status to answer with"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def sign(private_key, body: bytes) -> str:
+    """Sign like Circle does (used by the sandbox and tests)"""
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec
+    return base64.b64encode(private_key.sign(body, ec.ECDSA(hashes.SHA256()))).decode()
+
+
+def public_key_b64(private_key) -> str:
+    """The ``publicKey`` field Circle's key endpoint returns: base64 DER SubjectPublicKeyInfo"""
+    from cryptography.hazmat.primitives import serialization
+    der = private_key.public_key().public_bytes(
+        serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+    return base64.b64encode(der).decode()
+
+
+def signed_headers(private_key, key_id: str, body: bytes) -> Dict[str, str]:
+    return {
+        'Content-Type': 'application/json',
+        KEY_ID_HEADER: key_id,
+        SIGNATURE_HEADER: sign(private_key, body),
+    }
+
+
+def verify(public_key: str, body: bytes, signature: Optional[str]):
+    """Check ``signature`` over the raw body against a base64 DER public key"""
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    if not signature:
+        raise WebhookError(401, "Missing signature headers")
+    try:
+        key = serialization.load_der_public_key(base64.b64decode(public_key))
+    except (ValueError, binascii.Error):
+        raise WebhookError(502, "Circle returned an unusable public key")
+    if not isinstance(key, ec.EllipticCurvePublicKey):
+        raise WebhookError(502, "Circle returned an unusable public key")
+    try:
+        key.verify(base64.b64decode(signature, validate=True), body, ec.ECDSA(hashes.SHA256()))
+    except (InvalidSignature, ValueError, binascii.Error):
+        raise WebhookError(401, "Invalid signature")
+
+
+class PublicKeyCache:
+    """
+    Circle's notification public keys by key ID. ``fetch(key_id)`` returns
+    the key endpoint's ``data`` (``{"id", "algorithm", "publicKey", ...}``),
+    e.g. ``CircleClient.get_notification_public_key``.
+    """
+
+    def __init__(self, fetch: Callable[[str], Awaitable[Dict[str, Any]]], max_entries: int = 32):
+        self.fetch = fetch
+        self.max_entries = max_entries
+        self._keys: 'OrderedDict[str, str]' = OrderedDict()
+
+    async def get(self, key_id: str) -> str:
+        if key_id in self._keys:
+            self._keys.move_to_end(key_id)
+            return self._keys[key_id]
+        try:
+            data = await self.fetch(key_id)
+        except CircleAPIError as e:
+            if e.status == 404:
+                raise WebhookError(401, "Unknown signing key")
+            raise WebhookError(503, f"Could not fetch signing key: {e}")
+        public_key = (data or {}).get('publicKey')
+        if not public_key:
+            raise WebhookError(502, "Circle returned no public key")
+        self._keys[key_id] = public_key
+        while len(self._keys) > self.max_entries:
+            self._keys.popitem(last=False)
+        return public_key
+
+
+async def authenticate(keys: PublicKeyCache, body: bytes, headers: Mapping[str, str]):
+    """Verify a notification's signature with the key its headers name"""
+    key_id = headers.get(KEY_ID_HEADER)
+    signature = headers.get(SIGNATURE_HEADER)
+    if not key_id or not signature:
+        raise WebhookError(401, "Missing signature headers")
+    if not KEY_ID_PATTERN.match(key_id):
+        raise WebhookError(401, "Invalid key ID")
+    verify(await keys.get(key_id), body, signature)
+
+
+def parse(body: bytes) -> Tuple[str, Optional[Transfer]]:
+    """Return ``(notification_id, transfer)``; transfer is None for other notification types"""
+    try:
+        payload: Dict[str, Any] = json.loads(body)
+    except ValueError:
+        raise WebhookError(400, "Body is not JSON")
+    notification_id = payload.get('notificationId') or hashlib.sha256(body).hexdigest()
+    if payload.get('notificationType') != 'transfers':
+        return notification_id, None
+    data = payload.get('transfer') or payload.get('notification')
+    if not isinstance(data, dict) or not data.get('id'):
+        raise WebhookError(400, "Transfer notification without a transfer")
+    return notification_id, Transfer.from_api(data)
+
+
+class WebhookDeduplicator:
+    """Remembers recently seen notification IDs (bounded, oldest evicted first)"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._seen: 'OrderedDict[str, float]' = OrderedDict()
+
+    def seen(self, notification_id: str) -> bool:
+        """Record the ID; True if it had already been recorded"""
+        if notification_id in self._seen:
+            self._seen.move_to_end(notification_id)
+            return True
+        self._seen[notification_id] = time.time()
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+        return False
+
+    def forget(self, notification_id: str):
+        """Drop an ID whose processing failed, so Circle's retry is handled"""
+        self._seen.pop(notification_id, None)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Subscription-based WebSocket event gateway
+
+The Rust server broadcasts every proof, verification, transfer and workflow
+event to every client on ``/ws``. The gateway connects to that stream once
+and re-publishes each event only to clients subscribed to one of its topics:
+
+    workflow:<id>   events carrying workflowId / workflow_id
+    proof:<id>      events carrying proofId / proof_id
+    transfer:<id>   events carrying transferId
+    type:<name>     events of that type ("type:*" receives everything)
+
+Clients subscribe in the URL (``/events?workflow=wf_1&type=proof_complete``)
+or with ``{"action": "subscribe", "topics": ["proof:proof_kyc_1"]}`` frames
+(``unsubscribe`` likewise). Each client has a bounded send queue; a client
+that falls ``max_queue`` events behind is disconnected (close code 1013)
+rather than slowing delivery to everyone else. Routing is an index lookup
+per event, so a client's cost follows the events it asked for.
+
+Usage:
+    python -m services.event_gateway [port]
+"""
+
+import asyncio
+import json
+import sys
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import aiohttp
+from aiohttp import web
+
+from services.structured_logging import get_logger
+
+log = get_logger("agentkit.event_gateway")
+
+ID_FIELDS = {
+    'workflow': ('workflowId', 'workflow_id'),
+    'proof': ('proofId', 'proof_id'),
+    'transfer': ('transferId',),
+}
+TOPIC_KINDS = ('workflow', 'proof', 'transfer', 'type')
+SLOW_CONSUMER_CLOSE = 1013
+
+
+def topics_for(event: Dict[str, Any]) -> List[str]:
+    topics = ['type:*']
+    if event.get('type'):
+        topics.append(f"type:{event['type']}")
+    for kind, fields in ID_FIELDS.items():
+        for name in fields:
+            value = event.get(name)
+            if isinstance(value, str) and value:
+                topics.append(f"{kind}:{value}")
+                break
+    return topics
+
+
+class Subscriber:
+    def __init__(self, ws: web.WebSocketResponse, max_queue: int):
+        self.ws = ws
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.topics: Set[str] = set()
+        self.evicted = False
+        self.delivered = 0
+
+
+class EventGateway:
+    def __init__(self, upstream_url: str = 'ws://localhost:8001/ws', max_queue: int = 256,
+                 reconnect_max_secs: float = 30.0):
+        self.upstream_url = upstream_url
+        self.max_queue = max_queue
+        self.reconnect_max_secs = reconnect_max_secs
+        self.index: Dict[str, Set[Subscriber]] = defaultdict(set)
+        self.subscribers: Set[Subscriber] = set()
+        self.stats = {"events": 0, "deliveries": 0, "evicted": 0, "unrouted": 0}
+        self._upstream_task: Optional[asyncio.Task] = None
+
+    # --- subscriptions ---------------------------------------------------
+
+    def subscribe(self, sub: Subscriber, topics: Iterable[str]):
+        for topic in topics:
+            if topic.split(':', 1)[0] not in TOPIC_KINDS:
+                continue
+            sub.topics.add(topic)
+            self.index[topic].add(sub)
+
+    def unsubscribe(self, sub: Subscriber, topics: Iterable[str]):
+        for topic in topics:
+            sub.topics.discard(topic)
+            subs = self.index.get(topic)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self.index[topic]
+
+    def remove(self, sub: Subscriber):
+        self.unsubscribe(sub, list(sub.topics))
+        self.subscribers.discard(sub)
+
+    # --- fan-out ---------------------------------------------------------
+
+    def dispatch(self, raw: str) -> int:
+        """Route one upstream frame; returns the number of clients it was queued for"""
+        self.stats["events"] += 1
+        try:
+            event = json.loads(raw)
+        except ValueError:
+            return 0
+        if not isinstance(event, dict):
+            return 0
+        targets: Set[Subscriber] = set()
+        for topic in topics_for(event):
+            targets |= self.index.get(topic, set())
+        if not targets:
+            self.stats["unrouted"] += 1
+        delivered = 0
+        for sub in targets:
+            try:
+                sub.queue.put_nowait(raw)
+                delivered += 1
+            except asyncio.QueueFull:
+                self.evict(sub)
+        self.stats["deliveries"] += delivered
+        return delivered
+
+    def evict(self, sub: Subscriber):
+        if sub.evicted:
+            return
+        sub.evicted = True
+        log.warning("gateway.slow_consumer", topics=sorted(sub.topics), queued=sub.queue.qsize())
+        self.remove(sub)
+        self.stats["evicted"] += 1
+        asyncio.ensure_future(sub.ws.close(code=SLOW_CONSUMER_CLOSE, message=b'slow consumer'))
+
+    async def _writer(self, sub: Subscriber):
+        while not sub.evicted:
+            raw = await sub.queue.get()
+            try:
+                await sub.ws.send_str(raw)
+            except ConnectionResetError:
+                return
+            sub.delivered += 1
+
+    # --- upstream --------------------------------------------------------
+
+    async def consume_upstream(self):
+        """Read the Rust broadcast stream forever, reconnecting with backoff"""
+        delay = 0.5
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    async with session.ws_connect(self.upstream_url, heartbeat=30) as ws:
+                        log.info("gateway.upstream_connected", url=self.upstream_url)
+                        delay = 0.5
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                self.dispatch(msg.data)
+                            elif msg.type == aiohttp.WSMsgType.ERROR:
+                                break
+                except (aiohttp.ClientError, OSError) as e:
+                    log.warning("gateway.upstream_failed", url=self.upstream_url, error=str(e))
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.reconnect_max_secs)
+
+    # --- HTTP ------------------------------------------------------------
+
+    @staticmethod
+    def query_topics(query) -> List[str]:
+        topics = []
+        for kind in TOPIC_KINDS:
+            for value in query.getall(kind, []):
+                topics.extend(f"{kind}:{v}" for v in value.split(',') if v)
+        return topics
+
+    async def handle_client(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        sub = Subscriber(ws, self.max_queue)
+        self.subscribers.add(sub)
+        self.subscribe(sub, self.query_topics(request.query))
+        writer = asyncio.ensure_future(self._writer(sub))
+        try:
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                try:
+                    command = json.loads(msg.data)
+                except ValueError:
+                    continue
+                if not isinstance(command, dict):
+                    continue
+                topics = command.get('topics') or []
+                if command.get('action') == 'subscribe':
+                    self.subscribe(sub, topics)
+                elif command.get('action') == 'unsubscribe':
+                    self.unsubscribe(sub, topics)
+                await ws.send_json({'type': 'subscriptions', 'topics': sorted(sub.topics)})
+        finally:
+            writer.cancel()
+            self.remove(sub)
+        return ws
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({**self.stats, "clients": len(self.subscribers),
+                                  "topics": len(self.index)})
+
+    async def _start_upstream(self, app):
+        self._upstream_task = asyncio.create_task(self.consume_upstream())
+
+    async def _stop_upstream(self, app):
+        if self._upstream_task:
+            self._upstream_task.cancel()
+
+    def app(self, consume: bool = True) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/events', self.handle_client)
+        app.router.add_get('/stats', self.handle_stats)
+        if consume:
+            app.on_startup.append(self._start_upstream)
+            app.on_cleanup.append(self._stop_upstream)
+        return app
+
+
+def main(argv) -> int:
+    from config import config
+    port = int(argv[0]) if argv else config.event_gateway.port
+    gateway = EventGateway(config.event_gateway.upstream_url, max_queue=config.event_gateway.max_queue)
+    print(f"Event gateway on ws://localhost:{port}/events (upstream {gateway.upstream_url})")
+    web.run_app(gateway.app(), host=config.event_gateway.host, port=port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
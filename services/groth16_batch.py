@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Batch Groth16 verification (BN254) by random linear combination
+
+A Groth16 proof (A, B, C) with public inputs s is valid when
+
+    e(A, B) = e(alpha, beta) · e(L, gamma) · e(C, delta),   L = IC0 + sum s_i·IC_i
+
+Checking n proofs one by one costs 3n Miller loops (e(alpha, beta) is
+cached per key) and n final exponentiations. For proofs sharing a
+verifying key, pick random 128-bit r_j and check the single equation
+
+    prod e(r_j·A_j, B_j) = e(alpha, beta)^(sum r_j) · e(sum r_j·L_j, gamma) · e(sum r_j·C_j, delta)
+
+which is n + 2 Miller loops and one final exponentiation; a batch with an
+invalid proof passes with probability about 2^-128. When the combined check
+fails the batch is bisected, so the invalid proofs are isolated with per-proof
+checks only where needed.
+
+Proofs are read in snarkjs form (``pi_a``/``pi_b``/``pi_c``) or in the
+Solidity-ordered form ``real_snark_prover.js`` returns (``a``/``b``/``c``,
+Fp2 coordinates swapped). Needs the optional ``py_ecc`` package.
+
+Usage:
+    python -m services.groth16_batch <verification_key.json> <proof.json|proof_dir> ...
+"""
+
+import json
+import os
+import secrets
+import sys
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    from py_ecc import optimized_bn128 as bn128
+except ImportError:  # optional dependency
+    bn128 = None
+
+RANDOMIZER_BITS = 128
+
+
+class ProofFormatError(ValueError):
+    pass
+
+
+def _require_py_ecc():
+    if bn128 is None:
+        raise RuntimeError("Groth16 verification needs py_ecc (pip install py_ecc)")
+
+
+def _g1(coords: Sequence[Any]):
+    x, y = (int(v) for v in coords[:2])
+    if not (x < bn128.field_modulus and y < bn128.field_modulus):
+        raise ProofFormatError("G1 coordinate out of range")
+    point = (bn128.FQ(x), bn128.FQ(y), bn128.FQ.one()) if (x, y) != (0, 0) else bn128.Z1
+    if not bn128.is_inf(point) and not bn128.is_on_curve(point, bn128.b):
+        raise ProofFormatError("G1 point not on curve")
+    return point
+
+
+def _g2(coords: Sequence[Sequence[Any]], swapped: bool = False):
+    (x0, x1), (y0, y1) = ((int(v) for v in pair) for pair in coords[:2])
+    if swapped:
+        x0, x1, y0, y1 = x1, x0, y1, y0
+    if any(v >= bn128.field_modulus for v in (x0, x1, y0, y1)):
+        raise ProofFormatError("G2 coordinate out of range")
+    point = (bn128.FQ2([x0, x1]), bn128.FQ2([y0, y1]), bn128.FQ2.one())
+    if not bn128.is_on_curve(point, bn128.b2):
+        raise ProofFormatError("G2 point not on curve")
+    # BN254's G2 has a cofactor; batching is only sound inside the prime-order subgroup
+    if not bn128.is_inf(bn128.multiply(point, bn128.curve_order)):
+        raise ProofFormatError("G2 point not in the prime-order subgroup")
+    return point
+
+
+class VerifyingKey(NamedTuple):
+    alpha: Any
+    beta: Any
+    gamma: Any
+    delta: Any
+    ic: Tuple[Any, ...]
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'VerifyingKey':
+        """snarkjs verification_key.json"""
+        _require_py_ecc()
+        if data.get('protocol', 'groth16') != 'groth16':
+            raise ProofFormatError(f"Not a Groth16 key: {data.get('protocol')}")
+        return cls(_g1(data['vk_alpha_1']), _g2(data['vk_beta_2']), _g2(data['vk_gamma_2']),
+                   _g2(data['vk_delta_2']), tuple(_g1(p) for p in data['IC']))
+
+
+class Proof(NamedTuple):
+    a: Any
+    b: Any
+    c: Any
+    public: Tuple[int, ...]
+
+    @classmethod
+    def from_json(cls, proof: Dict[str, Any], public_signals: Sequence[Any]) -> 'Proof':
+        _require_py_ecc()
+        public = tuple(int(s) for s in public_signals)
+        if any(not 0 <= s < bn128.curve_order for s in public):
+            raise ProofFormatError("Public signal outside the scalar field")
+        if 'pi_a' in proof:
+            return cls(_g1(proof['pi_a']), _g2(proof['pi_b']), _g1(proof['pi_c']), public)
+        return cls(_g1(proof['a']), _g2(proof['b'], swapped=True), _g1(proof['c']), public)
+
+
+def _msm(points: Sequence[Any], scalars: Sequence[int]):
+    acc = bn128.Z1
+    for point, scalar in zip(points, scalars):
+        if scalar:
+            acc = bn128.add(acc, bn128.multiply(point, scalar))
+    return acc
+
+
+class Groth16BatchVerifier:
+    def __init__(self, vk: VerifyingKey):
+        _require_py_ecc()
+        self.vk = vk
+        self.miller_loops = 0
+        self.final_exps = 0
+        # e(alpha, beta) is the same for every proof: one Miller loop per key
+        self._alpha_beta = self._miller(vk.beta, vk.alpha)
+
+    def _miller(self, q, p):
+        self.miller_loops += 1
+        return bn128.pairing(q, p, final_exponentiate=False)
+
+    def _is_one(self, f) -> bool:
+        self.final_exps += 1
+        return bn128.final_exponentiate(f) == bn128.FQ12.one()
+
+    def _input_point(self, proof: Proof):
+        if len(proof.public) != len(self.vk.ic) - 1:
+            raise ProofFormatError(
+                f"Expected {len(self.vk.ic) - 1} public signals, got {len(proof.public)}")
+        return bn128.add(self.vk.ic[0], _msm(self.vk.ic[1:], proof.public))
+
+    def verify(self, proof: Proof) -> bool:
+        """One proof: e(-A, B)·e(alpha, beta)·e(L, gamma)·e(C, delta) = 1"""
+        try:
+            l_point = self._input_point(proof)
+        except ProofFormatError:
+            return False
+        f = (self._miller(proof.b, bn128.neg(proof.a)) * self._alpha_beta
+             * self._miller(self.vk.gamma, l_point) * self._miller(self.vk.delta, proof.c))
+        return self._is_one(f)
+
+    def _combined(self, proofs: Sequence[Proof], inputs: Sequence[Any]) -> bool:
+        r = [secrets.randbits(RANDOMIZER_BITS) | 1 for _ in proofs]
+        f = self._alpha_beta ** (sum(r) % bn128.curve_order)
+        for r_j, proof in zip(r, proofs):
+            f = f * self._miller(proof.b, bn128.neg(bn128.multiply(proof.a, r_j)))
+        f = f * self._miller(self.vk.gamma, _msm(inputs, r))
+        f = f * self._miller(self.vk.delta, _msm([p.c for p in proofs], r))
+        return self._is_one(f)
+
+    def verify_batch(self, proofs: Sequence[Proof]) -> List[bool]:
+        """Validity of each proof, in order"""
+        results: List[Optional[bool]] = [None] * len(proofs)
+        inputs = {}
+        for i, proof in enumerate(proofs):
+            try:
+                inputs[i] = self._input_point(proof)
+            except ProofFormatError:
+                results[i] = False
+
+        def check(indices: List[int]):
+            if not indices:
+                return
+            if len(indices) == 1:
+                results[indices[0]] = self.verify(proofs[indices[0]])
+                return
+            if self._combined([proofs[i] for i in indices], [inputs[i] for i in indices]):
+                for i in indices:
+                    results[i] = True
+                return
+            mid = len(indices) // 2
+            check(indices[:mid])
+            check(indices[mid:])
+
+        check(sorted(inputs))
+        return [bool(r) for r in results]
+
+
+def load_proof(path: str) -> Proof:
+    """A JSON file holding {proof, publicSignals}, or a directory with proof.json and public.json"""
+    if os.path.isdir(path):
+        with open(os.path.join(path, 'proof.json')) as f:
+            proof = json.load(f)
+        with open(os.path.join(path, 'public.json')) as f:
+            public = json.load(f)
+    else:
+        with open(path) as f:
+            data = json.load(f)
+        proof, public = data['proof'], data['publicSignals']
+    return Proof.from_json(proof, public)
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) < 2:
+        print(__doc__)
+        return 1
+    with open(argv[0]) as f:
+        verifier = Groth16BatchVerifier(VerifyingKey.from_json(json.load(f)))
+    paths, proofs, failed = argv[1:], [], []
+    for path in paths:
+        try:
+            proofs.append(load_proof(path))
+        except (OSError, KeyError, ValueError) as e:
+            failed.append(f"{path}: {e}")
+            proofs.append(None)
+    loaded = [(path, proof) for path, proof in zip(paths, proofs) if proof is not None]
+    results = verifier.verify_batch([proof for _, proof in loaded])
+    failed += [path for (path, _), ok in zip(loaded, results) if not ok]
+    print(json.dumps({"proofs": len(paths), "valid": len(paths) - len(failed), "invalid": failed,
+                      "miller_loops": verifier.miller_loops,
+                      "final_exponentiations": verifier.final_exps}, indent=2))
+    return 0 if not failed else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Poseidon hash over the BN254 scalar field, matching circomlib(js)
+
+``poseidon([a, b, ...])`` equals circomlibjs ``buildPoseidon()([a, b, ...])``
+for 1-16 inputs (x^5 S-box, 8 full rounds, circomlib's partial round
+counts). Round constants and MDS matrices come from the Poseidon reference
+Grain LFSR, the same generator circomlib's constants were produced with, and
+are derived once per width and cached.
+
+Partial rounds use the usual sparse-matrix factorisation: the dense MDS
+product is folded into one matrix before the partial rounds, so each partial
+round costs 2t-1 multiplications instead of t^2, and its round constant is
+a single scalar.
+
+``poseidon_batch(rows)`` hashes many inputs at once. The state is kept
+column-wise (one list per state element across the whole batch), so every
+round is a handful of list comprehensions over the batch rather than a
+Python loop per hash.
+
+Usage:
+    python -m services.poseidon <input> [input ...]
+"""
+
+import sys
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Sequence, Tuple, Union
+
+FIELD_MODULUS = 21888242871839275222246405745257275088548364400416034343698204186575808495617
+N_ROUNDS_F = 8
+# circomlib's partial round counts for t = 2..17
+N_ROUNDS_P = (56, 57, 56, 60, 60, 63, 64, 63, 60, 66, 60, 65, 70, 60, 64, 68)
+MAX_INPUTS = len(N_ROUNDS_P)
+
+P = FIELD_MODULUS
+FieldInput = Union[int, str]
+Matrix = List[List[int]]
+
+
+class PoseidonParams(NamedTuple):
+    t: int
+    rounds_f: int
+    rounds_p: int
+    constants: Tuple[Tuple[int, ...], ...]  # per round, as in the reference permutation
+    mds: Tuple[Tuple[int, ...], ...]
+    # Optimised form (see _optimise)
+    pre_partial: Tuple[Tuple[int, ...], ...]  # dense matrix of the last full round before the partial rounds
+    partial_constants: Tuple[int, ...]        # one scalar per partial round after the first
+    first_partial: Tuple[int, ...]            # full constant vector of the first partial round
+    sparse: Tuple[Tuple[int, Tuple[int, ...], Tuple[int, ...]], ...]  # (m00, first row, first column)
+
+
+# --- parameter generation -------------------------------------------------
+
+def _grain(t: int, rounds_f: int, rounds_p: int, field_bits: int = 254):
+    """Bit stream of the Poseidon reference Grain LFSR for a prime field and x^alpha S-box"""
+    init = ''.join(format(value, f'0{width}b') for value, width in (
+        (1, 2), (0, 4), (field_bits, 12), (t, 12), (rounds_f, 10), (rounds_p, 10))) + '1' * 30
+    # Bit i of the int is position i of the reference's bit list
+    state = sum(1 << i for i, bit in enumerate(init) if bit == '1')
+
+    def advance(n: int) -> int:
+        """Clock n <= 18 times; the new bits come back in order from bit 0 up"""
+        nonlocal state
+        # The nearest tap is 62 of 80, so 18 new bits depend only on the current state
+        new = ((state >> 62) ^ (state >> 51) ^ (state >> 38) ^ (state >> 23) ^ (state >> 13) ^ state)
+        new &= (1 << n) - 1
+        state = (state >> n) | (new << (80 - n))
+        return new
+
+    for _ in range(10):
+        advance(16)
+    while True:
+        chunk = advance(18)
+        # Self-shrinking: of each pair of bits, emit the second if the first is 1
+        for i in range(0, 18, 2):
+            if chunk >> i & 1:
+                yield chunk >> (i + 1) & 1
+
+
+def _field_elements(bits, count: int, field_bits: int = 254, reject: bool = True) -> List[int]:
+    out = []
+    while len(out) < count:
+        value = 0
+        for _ in range(field_bits):
+            value = (value << 1) | next(bits)
+        if not reject:
+            out.append(value % P)
+        elif value < P:
+            out.append(value)
+    return out
+
+
+def _inverse(matrix: Matrix) -> Matrix:
+    n = len(matrix)
+    aug = [row[:] + [int(i == j) for j in range(n)] for i, row in enumerate(matrix)]
+    for col in range(n):
+        pivot = next(r for r in range(col, n) if aug[r][col])
+        aug[col], aug[pivot] = aug[pivot], aug[col]
+        inv = pow(aug[col][col], P - 2, P)
+        aug[col] = [v * inv % P for v in aug[col]]
+        for r in range(n):
+            if r != col and aug[r][col]:
+                factor = aug[r][col]
+                aug[r] = [(a - factor * b) % P for a, b in zip(aug[r], aug[col])]
+    return [row[n:] for row in aug]
+
+
+def _matmul(a: Matrix, b: Matrix) -> Matrix:
+    return [[sum(x * y for x, y in zip(row, col)) % P for col in zip(*b)] for row in a]
+
+
+def _matvec(m: Matrix, v: Sequence[int]) -> List[int]:
+    return [sum(x * y for x, y in zip(row, v)) % P for row in m]
+
+
+def _optimise(t: int, rounds_f: int, rounds_p: int, constants: List[List[int]], mds: Matrix):
+    """
+    Rewrite the partial rounds x <- M·S0(x + c_r) so that each one uses a
+    scalar constant and a sparse matrix.
+
+    Constants: for each partial round after the first, the part of c_r that
+    is not along e0 is written as M·v with v0 = 0 and moved before the
+    previous round's S-box (which only touches x0).
+
+    Matrices: walking back from the last partial round, the accumulated
+    dense matrix D is split into sparse(D)·diag(1, D_hat); the diag factor
+    commutes with S0 and a constant on x0, so it moves into the previous
+    round, and finally into the last full round's matrix.
+    """
+    first, last = rounds_f // 2, rounds_f // 2 + rounds_p
+    c = [row[:] for row in constants]
+    m_hat_inv = _inverse([row[1:] for row in mds[1:]])
+    for r in range(last - 1, first, -1):
+        v_rest = _matvec(m_hat_inv, c[r][1:])
+        scalar = (c[r][0] - sum(x * y for x, y in zip(mds[0][1:], v_rest))) % P
+        c[r] = [scalar] + [0] * (t - 1)
+        c[r - 1] = [c[r - 1][0]] + [(a + b) % P for a, b in zip(c[r - 1][1:], v_rest)]
+
+    sparse = []
+    dense = mds
+    d_hat_inv = m_hat_inv
+    for _ in range(rounds_p):
+        d_hat = [row[1:] for row in dense[1:]]
+        row0 = _matvec([list(col) for col in zip(*d_hat_inv)], dense[0][1:])
+        sparse.append((dense[0][0], tuple(row0), tuple(row[0] for row in dense[1:])))
+        diag = [[1] + [0] * (t - 1)] + [[0] + row for row in d_hat]
+        dense = _matmul(diag, mds)
+        # The next D_hat is D_hat·M_hat
+        d_hat_inv = _matmul(m_hat_inv, d_hat_inv)
+    sparse.reverse()
+    # 'diag' is now the factor left over from the first partial round
+    return (tuple(map(tuple, dense)), tuple(c[r][0] for r in range(first + 1, last)),
+            tuple(_matvec(diag, c[first])), tuple(sparse))
+
+
+@lru_cache(maxsize=None)
+def params(t: int) -> PoseidonParams:
+    """Constants for state width t (inputs + 1), generated once per process"""
+    if not 2 <= t <= MAX_INPUTS + 1:
+        raise ValueError(f"Poseidon supports 1-{MAX_INPUTS} inputs, got {t - 1}")
+    rounds_f, rounds_p = N_ROUNDS_F, N_ROUNDS_P[t - 2]
+    bits = _grain(t, rounds_f, rounds_p)
+    flat = _field_elements(bits, (rounds_f + rounds_p) * t)
+    constants = [flat[r * t:(r + 1) * t] for r in range(rounds_f + rounds_p)]
+    while True:
+        points = _field_elements(bits, 2 * t, reject=False)
+        if len(set(points)) == 2 * t:
+            break
+    xs, ys = points[:t], points[t:]
+    mds = [[pow(x + y, P - 2, P) for y in ys] for x in xs]
+    pre_partial, partial_constants, first_partial, sparse = _optimise(
+        t, rounds_f, rounds_p, constants, mds)
+    return PoseidonParams(t, rounds_f, rounds_p, tuple(map(tuple, constants)), tuple(map(tuple, mds)),
+                          pre_partial, partial_constants, first_partial, sparse)
+
+
+# --- hashing --------------------------------------------------------------
+
+def _to_field(value: FieldInput) -> int:
+    if isinstance(value, str):
+        value = int(value, 0)
+    return value % P
+
+
+def _mix(matrix, cols: List[List[int]]) -> List[List[int]]:
+    rows = list(zip(*cols))
+    return [[sum(m * x for m, x in zip(mrow, row)) % P for row in rows] for mrow in matrix]
+
+
+def _permute(cols: List[List[int]], prm: PoseidonParams) -> List[List[int]]:
+    """Optimised permutation over a column-wise batch"""
+    half = prm.rounds_f // 2
+    for r in range(half):
+        cols = [[pow(x + c, 5, P) for x in col] for col, c in zip(cols, prm.constants[r])]
+        cols = _mix(prm.pre_partial if r == half - 1 else prm.mds, cols)
+
+    first = prm.first_partial
+    cols = [[x + first[i] for x in col] for i, col in enumerate(cols)]
+    scalars = (0,) + prm.partial_constants
+    for scalar, (m00, row0, col0) in zip(scalars, prm.sparse):
+        x0 = [pow(x + scalar, 5, P) for x in cols[0]]
+        rest = cols[1:]
+        new0 = [m00 * a for a in x0]
+        for coef, col in zip(row0, rest):
+            new0 = [acc + coef * x for acc, x in zip(new0, col)]
+        cols = [[v % P for v in new0]] + [[(x + coef * a) % P for x, a in zip(col, x0)]
+                                          for coef, col in zip(col0, rest)]
+
+    for r in range(half + prm.rounds_p, prm.rounds_f + prm.rounds_p):
+        cols = [[pow(x + c, 5, P) for x in col] for col, c in zip(cols, prm.constants[r])]
+        cols = _mix(prm.mds, cols)
+    return cols
+
+
+def _permute_reference(state: Sequence[int], prm: PoseidonParams) -> List[int]:
+    """Textbook permutation, one state at a time (used to check the optimised one)"""
+    half = prm.rounds_f // 2
+    state = list(state)
+    for r, constants in enumerate(prm.constants):
+        state = [(x + c) % P for x, c in zip(state, constants)]
+        if r < half or r >= half + prm.rounds_p:
+            state = [pow(x, 5, P) for x in state]
+        else:
+            state[0] = pow(state[0], 5, P)
+        state = _matvec(prm.mds, state)
+    return state
+
+
+def poseidon_batch(rows: Sequence[Sequence[FieldInput]]) -> List[int]:
+    """Hash each row (ints or decimal/0x strings); rows may differ in length"""
+    by_width: Dict[int, List[int]] = {}
+    for index, row in enumerate(rows):
+        by_width.setdefault(len(row) + 1, []).append(index)
+    out = [0] * len(rows)
+    for t, indices in by_width.items():
+        prm = params(t)
+        cols = [[0] * len(indices)] + [[_to_field(rows[i][j]) for i in indices] for j in range(t - 1)]
+        for index, value in zip(indices, _permute(cols, prm)[0]):
+            out[index] = value
+    return out
+
+
+def poseidon(inputs: Sequence[FieldInput]) -> int:
+    return poseidon_batch([inputs])[0]
+
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        print(__doc__)
+        return 1
+    print(poseidon(argv))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
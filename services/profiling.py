@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+On-demand per-request CPU profiling and memory snapshots
+
+Requests are flagged either by an admin header or by a sampling rate. A
+flagged request runs under ``cProfile`` with ``tracemalloc`` enabled and the
+results are written to a rotating local directory that the admin endpoints
+list and serve.
+"""
+
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from services.structured_logging import get_logger
+
+log = get_logger("agentkit.profiling")
+
+PROFILE_HEADER = "X-Profile-Request"
+ADMIN_HEADER = "X-Admin-Token"
+
+_SAFE_NAME = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+class ProfileStore:
+    """Rotating directory of profile captures"""
+
+    def __init__(self, directory: str, max_profiles: int = 50):
+        self.directory = os.path.expanduser(directory)
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def _ensure_dir(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+    def save(self, label: str, profiler: cProfile.Profile, memory_top: List[str],
+             summary: Dict[str, Any]) -> str:
+        """Write one capture and rotate out the oldest ones; returns the capture ID"""
+        self._ensure_dir()
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_') or 'request'
+        capture_id = f"{int(time.time() * 1000)}_{slug}_{uuid.uuid4().hex[:8]}"
+        base = os.path.join(self.directory, capture_id)
+
+        profiler.dump_stats(base + ".prof")
+
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(40)
+        with open(base + ".cpu.txt", 'w') as f:
+            f.write(text.getvalue())
+        with open(base + ".mem.txt", 'w') as f:
+            f.write("\n".join(memory_top) + "\n")
+        with open(base + ".json", 'w') as f:
+            json.dump({"id": capture_id, "label": label, **summary}, f)
+
+        self._rotate()
+        return capture_id
+
+    def _rotate(self):
+        with self._lock:
+            captures = self.list()
+            for stale in captures[self.max_profiles:]:
+                for name in stale["files"]:
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except OSError:
+                        pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Captures newest first, with the files that belong to each"""
+        if not os.path.isdir(self.directory):
+            return []
+        files: Dict[str, List[str]] = {}
+        for name in os.listdir(self.directory):
+            capture_id = name.split('.', 1)[0]
+            files.setdefault(capture_id, []).append(name)
+        captures = []
+        for capture_id, names in files.items():
+            entry: Dict[str, Any] = {"id": capture_id, "files": sorted(names)}
+            summary_path = os.path.join(self.directory, capture_id + ".json")
+            if os.path.exists(summary_path):
+                try:
+                    with open(summary_path) as f:
+                        entry.update(json.load(f))
+                except (OSError, json.JSONDecodeError):
+                    pass
+            captures.append(entry)
+        captures.sort(key=lambda c: c["id"], reverse=True)
+        return captures
+
+    def path_for(self, filename: str) -> Optional[str]:
+        """Resolve a downloadable file name, rejecting anything outside the store"""
+        if not _SAFE_NAME.match(filename) or filename.startswith('.'):
+            return None
+        path = os.path.join(self.directory, filename)
+        return path if os.path.isfile(path) else None
+
+
+class RequestProfiler:
+    """Decides which requests to profile and captures them one at a time"""
+
+    def __init__(self, store: ProfileStore, admin_token: Optional[str] = None,
+                 sample_rate: float = 0.0, paths=("/chat", "/execute_workflow"),
+                 memory_top: int = 25):
+        self.store = store
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.paths = set(paths)
+        self.memory_top = memory_top
+        # cProfile hooks the whole interpreter, so only one capture runs at a time
+        self._busy = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.admin_token) or self.sample_rate > 0
+
+    def is_admin(self, token: Optional[str]) -> bool:
+        if not self.admin_token or not token:
+            return False
+        return hmac.compare_digest(token, self.admin_token)
+
+    def should_profile(self, path: str, headers) -> bool:
+        if path not in self.paths or not self.enabled:
+            return False
+        if self.is_admin(headers.get(PROFILE_HEADER)):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @contextmanager
+    def capture(self, label: str):
+        """Profile the enclosed block; yields a dict that receives the capture ID"""
+        result: Dict[str, Any] = {"id": None}
+        if not self._busy.acquire(blocking=False):
+            yield result
+            return
+
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start(10)
+        before = tracemalloc.take_snapshot()
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield result
+        finally:
+            profiler.disable()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            after = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if started_tracemalloc:
+                tracemalloc.stop()
+            try:
+                top = [str(stat) for stat in after.compare_to(before, 'lineno')[:self.memory_top]]
+                result["id"] = self.store.save(label, profiler, top, {
+                    "captured_at": time.time(),
+                    "wall_ms": round(elapsed_ms, 3),
+                    "traced_current_bytes": current,
+                    "traced_peak_bytes": peak,
+                })
+            except OSError as e:
+                log.warning("profiling.store_failed", label=label, error=str(e))
+            finally:
+                self._busy.release()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Access-aware proof garbage collection under a storage budget
+
+Replaces age-only cleanup. When the artifact store holds more than
+``budget_bytes`` (all tiers), the least recently (``lru``) or least frequently
+(``lfu``) read objects are collected together with every proof that uses
+them, until usage is back under budget. Usage counts objects still referenced
+by a proof. Candidates come straight from the artifact index in policy order,
+already past ``min_age_hours``, and a run examines at most ``scan_limit`` of
+them, so it never walks the whole index or the proofs directory.
+
+A proof is never collected while it is
+  * pinned in the proof store (``on_chain`` is added by the Rust server when
+    on-chain verification data is recorded),
+  * carrying ``on_chain_verifications`` in its metadata.json (pinned on sight),
+  * referenced by a workflow that has not completed or failed, or
+  * read more recently than ``min_age_hours``.
+
+Deletion keeps the stores consistent: the directory is first moved into
+``<proofs_dir>/.gc-trash``, then its proof store row and artifact reference
+are dropped, then the files are removed. An interrupted run is finished by the
+next one.
+
+Usage:
+    python -m services.proof_gc run [--dry-run]
+    python -m services.proof_gc status
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from services.artifact_store import ArtifactStore
+from services.proof_store import ProofStore
+
+HOUR_MS = 60 * 60 * 1000
+TRASH_DIR = '.gc-trash'
+
+POLICY_ORDER = {
+    'lru': ("COALESCE(last_access_ms, created_ms)", "access_count"),
+    'lfu': ("access_count", "COALESCE(last_access_ms, created_ms)"),
+}
+
+
+def _strings(value: Any) -> Iterator[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+
+class ProofGC:
+    def __init__(self, proofs_dir: str, proof_store: ProofStore, artifact_store: ArtifactStore,
+                 budget_bytes: int, history_store=None, policy: str = 'lru',
+                 batch_size: int = 50, min_age_hours: float = 24, inflight_hours: float = 24,
+                 verification_cache=None, scan_limit: int = 1000):
+        if policy not in POLICY_ORDER:
+            raise ValueError(f"Unknown GC policy: {policy} (expected lru or lfu)")
+        self.proofs_dir = os.path.expanduser(proofs_dir)
+        self.proof_store = proof_store
+        self.artifact_store = artifact_store
+        self.budget_bytes = budget_bytes
+        self.history_store = history_store
+        self.policy = policy
+        self.batch_size = batch_size
+        self.min_age_hours = min_age_hours
+        self.inflight_hours = inflight_hours
+        self.verification_cache = verification_cache
+        self.scan_limit = scan_limit
+
+    # --- pins ------------------------------------------------------------
+
+    def in_flight_ids(self, now_ms: int) -> Set[str]:
+        """Every string in a running workflow; proof IDs among them are pinned"""
+        if self.history_store is None:
+            return set()
+        self.history_store.sync()
+        since_ms = now_ms - int(self.inflight_hours * HOUR_MS)
+        ids: Set[str] = set()
+        for workflow in self.history_store.in_flight(since_ms):
+            ids.update(_strings(workflow))
+        return ids
+
+    def _on_chain(self, proof_id: str) -> bool:
+        try:
+            with open(os.path.join(self.proofs_dir, proof_id, 'metadata.json')) as f:
+                metadata = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        return isinstance(metadata, dict) and bool(metadata.get('on_chain_verifications'))
+
+    # --- candidates ------------------------------------------------------
+
+    def candidates(self, cutoff_ms: int, page_size: int = 200) -> Iterator[Dict[str, Any]]:
+        """Stored objects last read before ``cutoff_ms``, in policy order, paged so deletions can run in between"""
+        first, second = POLICY_ORDER[self.policy]
+        conn = self.artifact_store._conn
+        sql = (f"SELECT hash, stored_size, access_count, {first} AS k1, {second} AS k2 FROM artifacts "
+               f"WHERE refcount > 0 AND COALESCE(last_access_ms, created_ms) < ? {{after}} "
+               f"ORDER BY {first}, {second}, hash LIMIT ?")
+        after = None
+        while True:
+            if after is None:
+                rows = conn.execute(sql.format(after=''), (cutoff_ms, page_size)).fetchall()
+            else:
+                rows = conn.execute(sql.format(after=f"AND ({first}, {second}, hash) > (?, ?, ?)"),
+                                    (cutoff_ms, *after, page_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            last = rows[-1]
+            after = (last['k1'], last['k2'], last['hash'])
+
+    def _proof_ids(self, file_hash: str) -> List[str]:
+        return [row[0] for row in self.artifact_store._conn.execute(
+            "SELECT proof_id FROM artifact_refs WHERE hash = ?", (file_hash,))]
+
+    # --- deletion --------------------------------------------------------
+
+    def _trash_path(self, proof_id: str) -> str:
+        return os.path.join(self.proofs_dir, TRASH_DIR, proof_id)
+
+    def delete_proof(self, proof_id: str):
+        """Remove one proof directory, its store row and its artifact reference"""
+        source = os.path.join(self.proofs_dir, proof_id)
+        trash = self._trash_path(proof_id)
+        if os.path.isdir(source):
+            os.makedirs(os.path.dirname(trash), exist_ok=True)
+            shutil.rmtree(trash, ignore_errors=True)
+            os.replace(source, trash)
+        self.proof_store.delete(proof_id)
+        self.artifact_store.release(proof_id)
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def recover(self) -> int:
+        """Finish deletions a previous run was interrupted in"""
+        try:
+            leftovers = os.listdir(os.path.join(self.proofs_dir, TRASH_DIR))
+        except FileNotFoundError:
+            return 0
+        for proof_id in leftovers:
+            self.delete_proof(proof_id)
+        return len(leftovers)
+
+    # --- runs ------------------------------------------------------------
+
+    def usage(self) -> int:
+        """Bytes of objects some proof still uses (released cold objects await the tiering job)"""
+        return self.artifact_store._conn.execute(
+            "SELECT COALESCE(SUM(stored_size), 0) FROM artifacts WHERE refcount > 0").fetchone()[0]
+
+    def run_once(self, dry_run: bool = False, now_ms: Optional[int] = None) -> Dict[str, Any]:
+        """Collect at most ``batch_size`` objects, coldest first, until under budget"""
+        now_ms = now_ms or int(time.time() * 1000)
+        recovered = 0 if dry_run else self.recover()
+        usage = self.usage()
+        result = {"usage_bytes": usage, "budget_bytes": self.budget_bytes, "recovered": recovered,
+                  "deleted": [], "freed_bytes": 0, "skipped_pinned": 0, "scanned": 0, "dry_run": dry_run}
+        if not self.budget_bytes or usage <= self.budget_bytes:
+            return result
+
+        pinned = self.proof_store.pinned_ids() | self.in_flight_ids(now_ms)
+        cutoff = now_ms - int(self.min_age_hours * HOUR_MS)
+        objects = 0
+        for candidate in self.candidates(cutoff):
+            if usage <= self.budget_bytes or objects >= self.batch_size or result["scanned"] >= self.scan_limit:
+                break
+            result["scanned"] += 1
+            proof_ids = self._proof_ids(candidate['hash'])
+            if not proof_ids:
+                continue
+            if any(proof_id in pinned for proof_id in proof_ids):
+                result["skipped_pinned"] += 1
+                continue
+            on_chain = [proof_id for proof_id in proof_ids if self._on_chain(proof_id)]
+            if on_chain:
+                for proof_id in on_chain:
+                    if not dry_run:
+                        self.proof_store.pin(proof_id, 'on_chain')
+                    pinned.add(proof_id)
+                result["skipped_pinned"] += 1
+                continue
+            for proof_id in proof_ids:
+                if not dry_run:
+                    self.delete_proof(proof_id)
+                result["deleted"].append(proof_id)
+            if self.verification_cache is not None and not dry_run:
+                self.verification_cache.invalidate(proof_hash=candidate['hash'])
+            usage -= candidate['stored_size']
+            result["freed_bytes"] += candidate['stored_size']
+            objects += 1
+        result["usage_bytes"] = usage
+        return result
+
+
+def from_config(cfg=None) -> ProofGC:
+    """Build a collector from config.py (GC_* variables)"""
+    if cfg is None:
+        from config import config as cfg
+    from services.verification_cache import VerificationCache
+    from services.workflow_history_store import WorkflowHistoryStore
+    return ProofGC(
+        cfg.zkengine.proofs_dir,
+        ProofStore(cfg.database.proof_store),
+        ArtifactStore(cfg.zkengine.artifact_store_dir),
+        budget_bytes=int(cfg.gc.budget_gb * (1 << 30)),
+        history_store=WorkflowHistoryStore(cfg.database.workflow_history_db,
+                                           cfg.database.workflow_history),
+        policy=cfg.gc.policy,
+        batch_size=cfg.gc.batch_size,
+        min_age_hours=cfg.gc.min_age_hours,
+        inflight_hours=cfg.gc.inflight_hours,
+        verification_cache=VerificationCache(cfg.database.verification_cache),
+        scan_limit=cfg.gc.scan_limit,
+    )
+
+
+def main(argv) -> int:
+    if not argv or argv[0] not in ('run', 'status'):
+        print(__doc__)
+        return 1
+    gc = from_config()
+    if argv[0] == 'status':
+        print(json.dumps({"usage_bytes": gc.usage(), "budget_bytes": gc.budget_bytes,
+                          "policy": gc.policy, "pinned": len(gc.proof_store.pinned_ids())}, indent=2))
+        return 0
+    if not gc.budget_bytes:
+        print("No GC budget configured (set GC_BUDGET_GB)")
+        return 1
+    print(json.dumps(gc.run_once(dry_run='--dry-run' in argv), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+SQLite-backed proof metadata store
+
+Replaces the whole-file rewrites of ``proofs_db.json``. The database runs in
+WAL mode so the Rust server can write while Python readers query, and every
+lookup the services make (by ID, newest first, by function, by status, by
+file hash) is served from an index.
+
+The schema is shared with ``src/proof_store.rs``; bump ``SCHEMA_VERSION`` in
+both places together.
+
+Usage:
+    python -m services.proof_store migrate [proofs_db.json] [proofs_db.sqlite]
+    python -m services.proof_store export  [proofs_db.sqlite] [proofs_db.json]
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS proofs (
+    id          TEXT PRIMARY KEY,
+    timestamp   TEXT NOT NULL,
+    created_ms  INTEGER NOT NULL,
+    function    TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    file_hash   TEXT,
+    file_path   TEXT,
+    metadata    TEXT NOT NULL,
+    metrics     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_proofs_created ON proofs(created_ms);
+CREATE INDEX IF NOT EXISTS idx_proofs_function ON proofs(function, created_ms);
+CREATE INDEX IF NOT EXISTS idx_proofs_status ON proofs(status, created_ms);
+CREATE INDEX IF NOT EXISTS idx_proofs_file_hash ON proofs(file_hash);
+CREATE TABLE IF NOT EXISTS proof_pins (
+    proof_id    TEXT NOT NULL,
+    reason      TEXT NOT NULL,
+    created_ms  INTEGER NOT NULL,
+    PRIMARY KEY (proof_id, reason)
+);
+"""
+
+_FRACTION = re.compile(r'(\.\d{6})\d+')
+
+
+def timestamp_to_ms(timestamp: Optional[str]) -> int:
+    """Parse an RFC 3339 timestamp (nanosecond precision allowed) to epoch ms"""
+    if not timestamp:
+        return 0
+    text = _FRACTION.sub(r'\1', timestamp.strip()).replace('Z', '+00:00')
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return 0
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open a store connection with WAL enabled and the schema in place"""
+    path = os.path.expanduser(path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+class ProofStore:
+    """Indexed proof metadata, one row per proof ID"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = connect(path)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._conn.close()
+
+    def upsert(self, proof_id: str, metadata: Dict[str, Any], metrics: Dict[str, Any],
+               status: str, file_path: Optional[str] = None,
+               timestamp: Optional[str] = None):
+        """Insert or update a proof; an update keeps the original creation time"""
+        timestamp = timestamp or datetime.now(timezone.utc).isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO proofs (id, timestamp, created_ms, function, status,
+                                       file_hash, file_path, metadata, metrics)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET
+                       function = excluded.function,
+                       status = excluded.status,
+                       file_hash = excluded.file_hash,
+                       file_path = excluded.file_path,
+                       metadata = excluded.metadata,
+                       metrics = excluded.metrics""",
+                self._row_values(proof_id, metadata, metrics, status, file_path, timestamp),
+            )
+
+    @staticmethod
+    def _row_values(proof_id, metadata, metrics, status, file_path, timestamp):
+        metadata = metadata or {}
+        metrics = metrics or {}
+        return (
+            proof_id,
+            timestamp,
+            timestamp_to_ms(timestamp),
+            metadata.get('function') or 'unknown',
+            status or 'unknown',
+            metrics.get('file_hash'),
+            file_path or f"./proofs/{proof_id}/proof.bin",
+            json.dumps(metadata),
+            json.dumps(metrics),
+        )
+
+    @staticmethod
+    def _entry(row: sqlite3.Row) -> Dict[str, Any]:
+        """Rebuild the proofs_db.json entry shape from a row"""
+        return {
+            "id": row["id"],
+            "timestamp": row["timestamp"],
+            "metadata": json.loads(row["metadata"]),
+            "metrics": json.loads(row["metrics"]),
+            "status": row["status"],
+            "file_path": row["file_path"],
+        }
+
+    def get(self, proof_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT * FROM proofs WHERE id = ?", (proof_id,)).fetchone()
+        return self._entry(row) if row else None
+
+    def contains(self, proof_id: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM proofs WHERE id = ?", (proof_id,)).fetchone() is not None
+
+    def find_by_hash(self, file_hash: str) -> List[Dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT * FROM proofs WHERE file_hash = ? ORDER BY created_ms DESC", (file_hash,))
+        return [self._entry(row) for row in rows]
+
+    def list(self, limit: int = 20, offset: int = 0, function: Optional[str] = None,
+             status: Optional[str] = None, since_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Newest first, optionally filtered; every filter is index-backed"""
+        clauses, params = [], []
+        if function:
+            clauses.append("function = ?")
+            params.append(function)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if since_ms is not None:
+            clauses.append("created_ms >= ?")
+            params.append(since_ms)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn.execute(
+            f"SELECT * FROM proofs {where} ORDER BY created_ms DESC LIMIT ? OFFSET ?",
+            (*params, limit, offset))
+        return [self._entry(row) for row in rows]
+
+    def count(self, status: Optional[str] = None) -> int:
+        if status:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM proofs WHERE status = ?", (status,)).fetchone()[0]
+        return self._conn.execute("SELECT COUNT(*) FROM proofs").fetchone()[0]
+
+    def delete(self, proof_id: str) -> bool:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM proof_pins WHERE proof_id = ?", (proof_id,))
+            return self._conn.execute("DELETE FROM proofs WHERE id = ?", (proof_id,)).rowcount > 0
+
+    # --- retention pins --------------------------------------------------
+
+    def pin(self, proof_id: str, reason: str):
+        """Exempt a proof from garbage collection (see services/proof_gc.py)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO proof_pins (proof_id, reason, created_ms) VALUES (?, ?, ?)",
+                (proof_id, reason, int(datetime.now(timezone.utc).timestamp() * 1000)))
+
+    def unpin(self, proof_id: str, reason: Optional[str] = None):
+        with self._lock, self._conn:
+            if reason:
+                self._conn.execute("DELETE FROM proof_pins WHERE proof_id = ? AND reason = ?",
+                                   (proof_id, reason))
+            else:
+                self._conn.execute("DELETE FROM proof_pins WHERE proof_id = ?", (proof_id,))
+
+    def pinned_ids(self) -> set:
+        return {row[0] for row in self._conn.execute("SELECT DISTINCT proof_id FROM proof_pins")}
+
+    def import_entries(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Insert legacy entries, keeping any row the store already has"""
+        rows = [
+            self._row_values(entry.get('id'), entry.get('metadata'), entry.get('metrics'),
+                             entry.get('status'), entry.get('file_path'),
+                             entry.get('timestamp') or '')
+            for entry in entries if entry.get('id')
+        ]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                """INSERT OR IGNORE INTO proofs (id, timestamp, created_ms, function, status,
+                                                 file_hash, file_path, metadata, metrics)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", rows)
+            return self._conn.total_changes - before
+
+    def migrate_from_json(self, json_path: str) -> int:
+        """One-shot import of a legacy proofs_db.json; returns rows added"""
+        json_path = os.path.expanduser(json_path)
+        if not os.path.exists(json_path):
+            return 0
+        with open(json_path) as f:
+            db = json.load(f)
+        entries = []
+        for proof_id, entry in db.items():
+            if isinstance(entry, dict):
+                entries.append({**entry, "id": entry.get("id") or proof_id})
+        return self.import_entries(entries)
+
+    def export_json(self, json_path: str) -> int:
+        """Write a proofs_db.json-compatible snapshot atomically; returns entry count"""
+        json_path = os.path.expanduser(json_path)
+        rows = self._conn.execute("SELECT * FROM proofs ORDER BY created_ms")
+        db = {row["id"]: self._entry(row) for row in rows}
+        directory = os.path.dirname(os.path.abspath(json_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(db, f, indent=2)
+            os.replace(tmp_path, json_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return len(db)
+
+
+def main(argv: List[str]) -> int:
+    if not argv or argv[0] not in ('migrate', 'export'):
+        print(__doc__)
+        return 1
+    if argv[0] == 'migrate':
+        json_path = argv[1] if len(argv) > 1 else './proofs_db.json'
+        db_path = argv[2] if len(argv) > 2 else './proofs_db.sqlite'
+        added = ProofStore(db_path).migrate_from_json(json_path)
+        print(f"Imported {added} proofs from {json_path} into {db_path}")
+    else:
+        db_path = argv[1] if len(argv) > 1 else './proofs_db.sqlite'
+        json_path = argv[2] if len(argv) > 2 else './proofs_db.json'
+        written = ProofStore(db_path).export_json(json_path)
+        print(f"Exported {written} proofs from {db_path} to {json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
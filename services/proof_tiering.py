@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Hot/cold tiering for proof artifacts
+
+Objects in the artifact store (``services/artifact_store.py``) that have not
+been read for ``hot_days`` and have fewer than ``hot_access_count`` reads are
+uploaded to an object store and dropped from local disk. The index row stays,
+with ``tier = 'remote'``, so the proof keeps its pointer, hash and refcount;
+reading it again recalls the object first (chat_service exposes
+``POST /internal/artifacts/{hash}/recall`` for the Rust server).
+
+Backends:
+    file:///mnt/cold/proofs          local directory (NFS mount, test stand-in)
+    s3://bucket/prefix               S3 or MinIO via boto3 (TIERING_S3_ENDPOINT)
+
+Usage:
+    python -m services.proof_tiering run [backend_url] [artifact_dir]
+    python -m services.proof_tiering recall <hash> [backend_url] [artifact_dir]
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from services.artifact_store import CHUNK_SIZE, ArtifactStore
+
+try:
+    import boto3
+except ImportError:  # optional dependency
+    boto3 = None
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+class LocalDirectoryBackend:
+    """Object store backed by a directory; keys map to relative paths"""
+
+    def __init__(self, root: str):
+        self.root = os.path.expanduser(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split('/'))
+
+    def put(self, key: str, source_path: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+        with open(source_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                dst.write(chunk)
+            os.fsync(dst.fileno())
+        os.replace(tmp_path, path)
+
+    def get(self, key: str, dest_path: str):
+        with open(self._path(key), 'rb') as src, open(dest_path, 'wb') as dst:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                dst.write(chunk)
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self._path(key))
+        except OSError:
+            return None
+
+    def delete(self, key: str):
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class S3Backend:
+    """S3-compatible object store; pass endpoint_url for MinIO"""
+
+    def __init__(self, bucket: str, prefix: str = '', endpoint_url: Optional[str] = None):
+        if boto3 is None:
+            raise RuntimeError("boto3 is required for s3:// tiering backends (pip install boto3)")
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self._client = boto3.client('s3', endpoint_url=endpoint_url)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put(self, key: str, source_path: str):
+        self._client.upload_file(source_path, self.bucket, self._key(key))
+
+    def get(self, key: str, dest_path: str):
+        self._client.download_file(self.bucket, self._key(key), dest_path)
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return self._client.head_object(Bucket=self.bucket, Key=self._key(key))['ContentLength']
+        except self._client.exceptions.ClientError:
+            return None
+
+    def delete(self, key: str):
+        self._client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+
+def backend_from_url(url: str, endpoint_url: Optional[str] = None):
+    """Build a backend from TIERING_BACKEND; raises ValueError for unknown schemes"""
+    parsed = urlparse(url)
+    if parsed.scheme in ('', 'file'):
+        return LocalDirectoryBackend(parsed.path if parsed.scheme else url)
+    if parsed.scheme == 's3':
+        return S3Backend(parsed.netloc, parsed.path, endpoint_url=endpoint_url)
+    raise ValueError(f"Unsupported tiering backend: {url}")
+
+
+class ProofTiering:
+    """Moves cold artifacts to the backend and recalls them on demand"""
+
+    def __init__(self, store: ArtifactStore, backend, hot_days: float = 7,
+                 hot_access_count: int = 3, local_budget_bytes: int = 0):
+        self.store = store
+        self.backend = backend
+        self.hot_days = hot_days
+        self.hot_access_count = hot_access_count
+        self.local_budget_bytes = local_budget_bytes
+        self._recall_lock = threading.Lock()
+
+    @staticmethod
+    def object_key(file_hash: str, codec: str) -> str:
+        ext = 'zst' if codec == 'zstd' else 'raw'
+        return f"{file_hash[:2]}/{file_hash}.{ext}"
+
+    def candidates(self, now_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Local objects, coldest first, with whether the age policy demotes them"""
+        now_ms = now_ms or int(time.time() * 1000)
+        cutoff = now_ms - int(self.hot_days * DAY_MS)
+        rows = self.store._conn.execute(
+            "SELECT hash, codec, stored_size, access_count, "
+            "COALESCE(last_access_ms, created_ms) AS last_used FROM artifacts "
+            "WHERE tier = 'local' AND refcount > 0 ORDER BY last_used, access_count").fetchall()
+        return [{**dict(row), "expired": row['last_used'] < cutoff
+                 and row['access_count'] < self.hot_access_count} for row in rows]
+
+    def demote(self, file_hash: str) -> bool:
+        """Upload one object, confirm the copy, then free local disk"""
+        artifact = self.store.artifact(file_hash)
+        if not artifact or artifact['tier'] != 'local':
+            return False
+        path = self.store.object_path(file_hash, artifact['codec'])
+        if not os.path.exists(path):
+            return False
+        key = self.object_key(file_hash, artifact['codec'])
+        self.backend.put(key, path)
+        if self.backend.size(key) != artifact['stored_size']:
+            raise IOError(f"Remote copy of {file_hash} does not match the local object")
+        self.store.set_tier(file_hash, 'remote')
+        os.unlink(path)
+        return True
+
+    def recall(self, file_hash: str) -> bool:
+        """Bring a remote object back to local disk; True if it is local afterwards"""
+        with self._recall_lock:
+            artifact = self.store.artifact(file_hash)
+            if not artifact:
+                return False
+            path = self.store.object_path(file_hash, artifact['codec'])
+            if artifact['tier'] == 'local':
+                return os.path.exists(path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+            try:
+                self.backend.get(self.object_key(file_hash, artifact['codec']), tmp_path)
+                if os.path.getsize(tmp_path) != artifact['stored_size']:
+                    raise IOError(f"Recalled object {file_hash} has the wrong size")
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+            self.store.set_tier(file_hash, 'local')
+            self.store.touch(file_hash)
+            # Only one copy is tracked; a later demotion uploads it again
+            self.backend.delete(self.object_key(file_hash, artifact['codec']))
+            return True
+
+    def purge_released(self) -> int:
+        """Delete remote copies of objects no proof references any more"""
+        rows = self.store._conn.execute(
+            "SELECT hash, codec FROM artifacts WHERE tier != 'local' AND refcount <= 0").fetchall()
+        for row in rows:
+            self.backend.delete(self.object_key(row['hash'], row['codec']))
+            with self.store._lock, self.store._conn:
+                self.store._conn.execute(
+                    "DELETE FROM artifacts WHERE hash = ? AND refcount <= 0", (row['hash'],))
+        return len(rows)
+
+    def run_once(self) -> Dict[str, int]:
+        """Demote expired objects, then more of the coldest until under budget"""
+        local_bytes = self.store.stats()['local_bytes']
+        demoted = demoted_bytes = 0
+        for candidate in self.candidates():
+            over_budget = self.local_budget_bytes and local_bytes > self.local_budget_bytes
+            if not candidate['expired'] and not over_budget:
+                continue
+            if self.demote(candidate['hash']):
+                demoted += 1
+                demoted_bytes += candidate['stored_size']
+                local_bytes -= candidate['stored_size']
+        return {"demoted": demoted, "demoted_bytes": demoted_bytes,
+                "purged": self.purge_released(), "local_bytes": local_bytes}
+
+
+def main(argv) -> int:
+    if not argv or argv[0] not in ('run', 'recall') or (argv[0] == 'recall' and len(argv) < 2):
+        print(__doc__)
+        return 1
+    rest = argv[2:] if argv[0] == 'recall' else argv[1:]
+    url = rest[0] if rest else os.getenv('TIERING_BACKEND')
+    if not url:
+        print("No tiering backend configured (set TIERING_BACKEND)")
+        return 1
+    root = rest[1] if len(rest) > 1 else os.getenv('ARTIFACT_STORE_DIR', './artifacts')
+    tiering = ProofTiering(
+        ArtifactStore(root),
+        backend_from_url(url, os.getenv('TIERING_S3_ENDPOINT')),
+        hot_days=float(os.getenv('TIERING_HOT_DAYS', '7')),
+        hot_access_count=int(os.getenv('TIERING_HOT_ACCESS_COUNT', 3)),
+        local_budget_bytes=int(float(os.getenv('TIERING_LOCAL_BUDGET_GB', '0')) * (1 << 30)),
+    )
+    if argv[0] == 'run':
+        print(json.dumps(tiering.run_once(), indent=2))
+        return 0
+    recalled = tiering.recall(argv[1])
+    print(f"{argv[1]}: {'local' if recalled else 'not found'}")
+    return 0 if recalled else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
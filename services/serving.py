@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Multi-process serving for chat_service
+
+Starts ``CHAT_SERVICE_WORKERS`` worker processes, each a fresh interpreter
+running uvicorn on the same port. Where the platform has SO_REUSEPORT every
+worker binds its own listening socket and the kernel spreads connections
+across them; elsewhere the supervisor binds once and hands the socket down.
+The event loop and HTTP parser come from ``SERVER_LOOP`` / ``SERVER_HTTP``
+(uvicorn's "auto" picks uvloop and httptools when they are installed).
+
+The supervisor forwards SIGHUP (config reload) and SIGTERM/SIGINT to the
+workers and restarts a worker that exits unexpectedly. Workers share state
+through ``services.shared_state``; one of them holds the leader lease and
+runs the transfer poller and storage maintenance.
+
+Usage:
+    python -m services.serving [workers]
+"""
+
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+APP = "chat_service:app"
+RESTART_DELAY_SECS = 1.0
+
+
+def listen_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(host: str, port: int, fd: Optional[int] = None):
+    """Serve APP in this process, on an inherited socket or a fresh SO_REUSEPORT one"""
+    import uvicorn
+    from config import config
+
+    sock = socket.socket(fileno=fd) if fd is not None else listen_socket(host, port, reuse_port=True)
+    server = uvicorn.Server(uvicorn.Config(APP, loop=config.server.loop, http=config.server.http,
+                                           log_level="info"))
+    server.run(sockets=[sock])
+
+
+class Supervisor:
+    def __init__(self, workers: int, host: str, port: int):
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.reuse_port = hasattr(socket, 'SO_REUSEPORT')
+        self.shared_socket = None if self.reuse_port else listen_socket(host, port, reuse_port=False)
+        self.procs: List[Optional[subprocess.Popen]] = [None] * workers
+        self.stopping = False
+
+    def spawn(self, index: int) -> subprocess.Popen:
+        cmd = [sys.executable, '-m', 'services.serving', '--worker', self.host, str(self.port)]
+        pass_fds = ()
+        if self.shared_socket is not None:
+            cmd.append(str(self.shared_socket.fileno()))
+            pass_fds = (self.shared_socket.fileno(),)
+        # Own session: a terminal Ctrl-C reaches the supervisor only, which forwards it once
+        proc = subprocess.Popen(cmd, pass_fds=pass_fds, start_new_session=True)
+        print(f"[serving] worker {index} started (pid {proc.pid})")
+        return proc
+
+    def signal_workers(self, signum: int):
+        for proc in self.procs:
+            if proc is not None and proc.poll() is None:
+                proc.send_signal(signum)
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+        self.signal_workers(signum)
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.signal_workers(signum))
+        mode = 'SO_REUSEPORT' if self.reuse_port else 'shared socket'
+        print(f"[serving] {self.workers} workers on {self.host}:{self.port} ({mode})")
+        self.procs = [self.spawn(i) for i in range(self.workers)]
+        while not self.stopping:
+            time.sleep(0.5)
+            for i, proc in enumerate(self.procs):
+                if proc.poll() is not None and not self.stopping:
+                    print(f"[serving] worker {i} exited with {proc.returncode}; restarting")
+                    time.sleep(RESTART_DELAY_SECS)
+                    self.procs[i] = self.spawn(i)
+        for proc in self.procs:
+            proc.wait()
+        return 0
+
+
+def main(argv: List[str]) -> int:
+    if argv and argv[0] == '--worker':
+        host, port = argv[1], int(argv[2])
+        run_worker(host, port, int(argv[3]) if len(argv) > 3 else None)
+        return 0
+
+    from config import config
+    workers = int(argv[0]) if argv else config.server.workers
+    return Supervisor(max(1, workers), config.ai.chat_service_host, config.ai.chat_service_port).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Cross-worker state for chat_service
+
+With several worker processes behind one port, anything kept in module
+globals is per-process: a retry can land on another worker, and every worker
+would poll the same transfers. ``SharedState`` keeps that state in one local
+SQLite file (WAL, so readers never block the writer):
+
+    cache         TTL'd values, e.g. parsed workflows keyed by command text
+    idempotency   claimed request keys and their stored responses
+    jobs          work handed to the leader worker, leased while running
+    transfers     last known Circle transfer status, readable by any worker
+    leases        named, expiring ownership (one leader runs the poller/GC)
+
+Every method is a short transaction, so workers on the same host can share
+one file; it is not meant for workers on different hosts.
+
+Usage:
+    python -m services.shared_state stats [db]
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    value       TEXT NOT NULL,
+    expires_ms  INTEGER NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE TABLE IF NOT EXISTS idempotency (
+    key         TEXT PRIMARY KEY,
+    state       TEXT NOT NULL,
+    response    TEXT,
+    expires_ms  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind        TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    owner       TEXT,
+    lease_ms    INTEGER NOT NULL DEFAULT 0,
+    attempts    INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS transfers (
+    transfer_id TEXT PRIMARY KEY,
+    message     TEXT NOT NULL,
+    updated_ms  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name        TEXT PRIMARY KEY,
+    owner       TEXT NOT NULL,
+    expires_ms  INTEGER NOT NULL
+);
+"""
+
+MAX_JOB_ATTEMPTS = 5
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class Job(NamedTuple):
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class SharedState:
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._conn.close()
+
+    def _write(self, sql: str, params: Iterable[Any] = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params))
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE takes the write lock up front, so a read-then-write cannot race another worker"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    # --- cache -----------------------------------------------------------
+
+    def cache_get(self, namespace: str, key: str) -> Optional[Any]:
+        row = self._conn.execute(
+            "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_ms > ?",
+            (namespace, key, _now_ms())).fetchone()
+        return json.loads(row['value']) if row else None
+
+    def cache_put(self, namespace: str, key: str, value: Any, ttl_secs: float):
+        self._write(
+            "INSERT INTO cache (namespace, key, value, expires_ms) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(namespace, key) DO UPDATE SET value = excluded.value, expires_ms = excluded.expires_ms",
+            (namespace, key, json.dumps(value), _now_ms() + int(ttl_secs * 1000)))
+
+    # --- idempotency -----------------------------------------------------
+
+    def claim(self, key: str, ttl_secs: float) -> Optional[Dict[str, Any]]:
+        """
+        None if this caller now owns the key; otherwise the existing record
+        (state, response). The pending claim lasts ``ttl_secs`` unless renewed,
+        so a crashed owner's key can be claimed again once that runs out.
+        """
+        now = _now_ms()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM idempotency WHERE key = ? AND expires_ms <= ?", (key, now))
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO idempotency (key, state, expires_ms) VALUES (?, 'pending', ?)",
+                (key, now + int(ttl_secs * 1000))).rowcount
+            if inserted:
+                return None
+            row = conn.execute("SELECT state, response FROM idempotency WHERE key = ?", (key,)).fetchone()
+        return {"state": row['state'],
+                "response": json.loads(row['response']) if row['response'] else None}
+
+    def renew(self, key: str, ttl_secs: float):
+        """Extend a pending claim its owner is still working on"""
+        self._write("UPDATE idempotency SET expires_ms = ? WHERE key = ? AND state = 'pending'",
+                    (_now_ms() + int(ttl_secs * 1000), key))
+
+    def complete(self, key: str, response: Any, ttl_secs: Optional[float] = None):
+        """Store the response; it is replayed for ``ttl_secs`` (default: the claim's remaining time)"""
+        if ttl_secs is None:
+            self._write("UPDATE idempotency SET state = 'done', response = ? WHERE key = ?",
+                        (json.dumps(response), key))
+        else:
+            self._write("UPDATE idempotency SET state = 'done', response = ?, expires_ms = ? WHERE key = ?",
+                        (json.dumps(response), _now_ms() + int(ttl_secs * 1000), key))
+
+    def release(self, key: str):
+        """Give up a claim (e.g. the request failed) so a retry can run"""
+        self._write("DELETE FROM idempotency WHERE key = ? AND state = 'pending'", (key,))
+
+    # --- jobs ------------------------------------------------------------
+
+    def enqueue(self, kind: str, payload: Dict[str, Any]) -> int:
+        return self._write("INSERT INTO jobs (kind, payload) VALUES (?, ?)",
+                           (kind, json.dumps(payload))).lastrowid
+
+    def take_jobs(self, owner: str, limit: int = 100, lease_secs: float = 30.0) -> List[Job]:
+        """Lease up to ``limit`` jobs; ones whose lease ran out (owner died) are handed out again"""
+        now = _now_ms()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE lease_ms <= ? AND attempts < ? ORDER BY id LIMIT ?",
+                (now, MAX_JOB_ATTEMPTS, limit)).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET owner = ?, lease_ms = ?, attempts = attempts + 1 WHERE id = ?",
+                [(owner, now + int(lease_secs * 1000), row['id']) for row in rows])
+        return [Job(row['id'], row['kind'], json.loads(row['payload']), row['attempts'] + 1) for row in rows]
+
+    def finish_job(self, job_id: int):
+        self._write("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    # --- transfers -------------------------------------------------------
+
+    def record_transfer(self, message: Dict[str, Any]):
+        self._write(
+            "INSERT INTO transfers (transfer_id, message, updated_ms) VALUES (?, ?, ?) "
+            "ON CONFLICT(transfer_id) DO UPDATE SET message = excluded.message, updated_ms = excluded.updated_ms",
+            (message['transferId'], json.dumps(message), _now_ms()))
+
+    def get_transfer(self, transfer_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT message FROM transfers WHERE transfer_id = ?",
+                                 (transfer_id,)).fetchone()
+        return json.loads(row['message']) if row else None
+
+    # --- leases ----------------------------------------------------------
+
+    def acquire_lease(self, name: str, owner: str, ttl_secs: float) -> bool:
+        """Take or renew ``name``; True while ``owner`` holds it"""
+        now = _now_ms()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO leases (name, owner, expires_ms) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_ms = excluded.expires_ms "
+                "WHERE leases.owner = excluded.owner OR leases.expires_ms <= ?",
+                (name, owner, now + int(ttl_secs * 1000), now))
+            row = conn.execute("SELECT owner FROM leases WHERE name = ?", (name,)).fetchone()
+        return row['owner'] == owner
+
+    def release_lease(self, name: str, owner: str):
+        self._write("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    # --- housekeeping ----------------------------------------------------
+
+    def purge(self, transfer_max_age_secs: float = 86400.0) -> int:
+        """Drop expired cache entries, idempotency records, dead jobs and old transfer rows"""
+        now = _now_ms()
+        with self._transaction() as conn:
+            removed = conn.execute("DELETE FROM cache WHERE expires_ms <= ?", (now,)).rowcount
+            removed += conn.execute("DELETE FROM idempotency WHERE expires_ms <= ?", (now,)).rowcount
+            removed += conn.execute("DELETE FROM jobs WHERE attempts >= ? AND lease_ms <= ?",
+                                    (MAX_JOB_ATTEMPTS, now)).rowcount
+            removed += conn.execute("DELETE FROM transfers WHERE updated_ms <= ?",
+                                    (now - int(transfer_max_age_secs * 1000),)).rowcount
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        counts = {table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ('cache', 'idempotency', 'jobs', 'transfers')}
+        leases = {row['name']: row['owner'] for row in
+                  self._conn.execute("SELECT name, owner FROM leases WHERE expires_ms > ?", (_now_ms(),))}
+        return {**counts, "leases": leases}
+
+
+def main(argv: List[str]) -> int:
+    if not argv or argv[0] != 'stats':
+        print(__doc__)
+        return 1
+    if len(argv) > 1:
+        path = argv[1]
+    else:
+        from config import config
+        path = config.database.shared_state
+    print(json.dumps(SharedState(path).stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Leveled, JSON-structured logging with a queue-backed background writer
+
+Records are handed to a ``QueueHandler`` on the request path and written by a
+``QueueListener`` thread, so slow terminals or pipes never block the event
+loop. Field values may be callables; they are only evaluated when the record
+is actually emitted, which keeps disabled debug payloads free.
+"""
+
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+_correlation_id: ContextVar[Optional[str]] = ContextVar("agentkit_correlation_id", default=None)
+_listener: Optional[logging.handlers.QueueListener] = None
+_sample_rate = 1.0
+
+LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warn': logging.WARNING,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+    'critical': logging.CRITICAL,
+}
+
+
+def new_correlation_id() -> str:
+    return uuid.uuid4().hex
+
+
+def get_correlation_id() -> Optional[str]:
+    return _correlation_id.get()
+
+
+def set_correlation_id(correlation_id: Optional[str]):
+    """Bind a correlation ID to the current context and return the reset token"""
+    return _correlation_id.set(correlation_id)
+
+
+@contextmanager
+def correlation_scope(correlation_id: Optional[str] = None):
+    token = _correlation_id.set(correlation_id or new_correlation_id())
+    try:
+        yield _correlation_id.get()
+    finally:
+        _correlation_id.reset(token)
+
+
+def truncate(text: Optional[str], limit: int = 500, tail: bool = True) -> Optional[str]:
+    """Bound the size of large output blobs before they are logged"""
+    if text is None or len(text) <= limit:
+        return text
+    return text[-limit:] if tail else text[:limit]
+
+
+class CorrelationFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'correlation_id'):
+            record.correlation_id = _correlation_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        correlation_id = getattr(record, 'correlation_id', None)
+        if correlation_id:
+            entry["correlation_id"] = correlation_id
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"[{record.levelname}] {record.getMessage()}"
+        correlation_id = getattr(record, 'correlation_id', None)
+        if correlation_id:
+            line += f" correlation_id={correlation_id}"
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class StructuredLogger:
+    """Thin wrapper that attaches structured fields and resolves lazy values"""
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(name)
+
+    def is_enabled_for(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level: int, event: str, fields: Dict[str, Any], exc_info=None):
+        if not self._logger.isEnabledFor(level):
+            return
+        resolved = {k: (v() if callable(v) else v) for k, v in fields.items()}
+        self._logger.log(level, event, extra={"fields": resolved}, exc_info=exc_info)
+
+    def debug(self, event: str, **fields):
+        self._log(logging.DEBUG, event, fields)
+
+    def verbose(self, event: str, **fields):
+        """Debug event that is additionally subject to the configured sample rate"""
+        if not self._logger.isEnabledFor(logging.DEBUG):
+            return
+        if _sample_rate < 1.0 and random.random() >= _sample_rate:
+            return
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields):
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields):
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, exc_info=None, **fields):
+        self._log(logging.ERROR, event, fields, exc_info=exc_info)
+
+    def exception(self, event: str, **fields):
+        self._log(logging.ERROR, event, fields, exc_info=True)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(name)
+
+
+def configure_logging(level: str = 'info', fmt: str = 'json', debug_mode: bool = False,
+                      debug_sample_rate: float = 1.0, queue_size: int = 10000,
+                      stream=None, logger_name: str = 'agentkit') -> logging.Logger:
+    """Route ``logger_name`` records through a bounded queue to a background writer"""
+    global _listener, _sample_rate
+    shutdown_logging()
+
+    _sample_rate = max(0.0, min(1.0, debug_sample_rate))
+    resolved_level = logging.DEBUG if debug_mode else LEVELS.get(str(level).lower(), logging.INFO)
+
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    queue_handler = _DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(CorrelationFilter())
+
+    logger = logging.getLogger(logger_name)
+    logger.handlers = [queue_handler]
+    logger.setLevel(resolved_level)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, writer, respect_handler_level=False)
+    _listener.start()
+    return logger
+
+
+def update_logging(level: str = 'info', debug_mode: bool = False, debug_sample_rate: float = 1.0,
+                   logger_name: str = 'agentkit'):
+    """Change level and sampling in place (format and queue size need configure_logging)"""
+    global _sample_rate
+    _sample_rate = max(0.0, min(1.0, debug_sample_rate))
+    resolved_level = logging.DEBUG if debug_mode else LEVELS.get(str(level).lower(), logging.INFO)
+    logging.getLogger(logger_name).setLevel(resolved_level)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Drop records instead of blocking when the writer falls behind"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Freeze the message and context here; the writer runs on another thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.correlation_id = getattr(record, 'correlation_id', None) or _correlation_id.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
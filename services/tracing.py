@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Lightweight end-to-end tracing for Agentkit workflows
+
+Trace and span IDs use the W3C trace-context layout so they can travel as
+plain strings through the parsed workflow file, ``additional_context`` and
+WebSocket messages. Finished spans are appended as JSON lines to a local
+collector file and can be folded into a per-step latency waterfall.
+"""
+
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from services.structured_logging import get_logger
+
+log = get_logger("agentkit.tracing")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("agentkit_current_span", default=None)
+
+
+def new_trace_id() -> str:
+    return secrets.token_hex(16)
+
+
+def new_span_id() -> str:
+    return secrets.token_hex(8)
+
+
+def _now_ms() -> float:
+    return time.time() * 1000.0
+
+
+def format_traceparent(trace_id: str, span_id: str) -> str:
+    return f"00-{trace_id}-{span_id}-01"
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Dict[str, str]]:
+    """Parse a ``traceparent`` header into trace and span IDs"""
+    if not header:
+        return None
+    parts = header.strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return {"trace_id": parts[1], "span_id": parts[2]}
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str = field(default_factory=new_span_id)
+    parent_span_id: Optional[str] = None
+    service: str = "chat_service"
+    start_ms: float = field(default_factory=_now_ms)
+    end_ms: Optional[float] = None
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    recorded: bool = field(default=False, repr=False, compare=False)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ms is None:
+            return None
+        return round(self.end_ms - self.start_ms, 3)
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def end(self, status: Optional[str] = None):
+        if self.end_ms is None:
+            self.end_ms = _now_ms()
+        if status:
+            self.status = status
+
+    def context(self) -> Dict[str, str]:
+        """Propagation payload for child processes and messages"""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "traceparent": format_traceparent(self.trace_id, self.span_id),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "service": self.service,
+            "start_ms": self.start_ms,
+            "end_ms": self.end_ms,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Span":
+        return cls(
+            name=data.get("name", "unknown"),
+            trace_id=data["trace_id"],
+            span_id=data.get("span_id") or new_span_id(),
+            parent_span_id=data.get("parent_span_id"),
+            service=data.get("service", "unknown"),
+            start_ms=float(data.get("start_ms") or _now_ms()),
+            end_ms=float(data["end_ms"]) if data.get("end_ms") is not None else None,
+            status=data.get("status", "ok"),
+            attributes=dict(data.get("attributes") or {}),
+        )
+
+
+class SpanExporter:
+    """Appends finished spans to a JSON-lines collector file"""
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+
+    def export(self, spans: Iterable[Span]):
+        lines = [json.dumps(span.to_dict(), separators=(',', ':')) for span in spans]
+        if not lines:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write('\n'.join(lines) + '\n')
+
+
+class Tracer:
+    """Creates spans and groups finished spans by trace until exported"""
+
+    def __init__(self, service: str = "chat_service", exporter: Optional[SpanExporter] = None):
+        self.service = service
+        self.exporter = exporter
+        self._finished: Dict[str, List[Span]] = {}
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, parent: Optional[Span] = None, trace_id: Optional[str] = None,
+                   parent_span_id: Optional[str] = None, **attributes) -> Span:
+        parent = parent if parent is not None else _current_span.get()
+        if parent is not None:
+            trace_id = trace_id or parent.trace_id
+            parent_span_id = parent_span_id or parent.span_id
+        return Span(
+            name=name,
+            trace_id=trace_id or new_trace_id(),
+            parent_span_id=parent_span_id,
+            service=self.service,
+            attributes=dict(attributes),
+        )
+
+    def finish(self, span: Span, status: Optional[str] = None):
+        span.end(status)
+        if span.recorded:
+            return
+        span.recorded = True
+        with self._lock:
+            self._finished.setdefault(span.trace_id, []).append(span)
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, **attributes):
+        """Run a block inside a span that becomes the current span"""
+        span = self.start_span(name, parent=parent, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_attribute("error", str(e))
+            self.finish(span, "error")
+            raise
+        else:
+            self.finish(span)
+        finally:
+            _current_span.reset(token)
+
+    def ingest(self, span_dicts: Iterable[Dict[str, Any]]):
+        """Record spans reported by other processes (Node executor, Rust server)"""
+        for data in span_dicts:
+            if not isinstance(data, dict) or not data.get("trace_id"):
+                continue
+            span = Span.from_dict(data)
+            with self._lock:
+                self._finished.setdefault(span.trace_id, []).append(span)
+
+    def pop_trace(self, trace_id: str) -> List[Span]:
+        """Remove a finished trace, exporting it when an exporter is configured"""
+        with self._lock:
+            spans = self._finished.pop(trace_id, [])
+        if spans and self.exporter is not None:
+            try:
+                self.exporter.export(spans)
+            except OSError as e:
+                log.warning("trace.export_failed", trace_id=trace_id, error=str(e))
+        return spans
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def build_waterfall(spans: Iterable[Span]) -> List[Dict[str, Any]]:
+    """Flatten spans into rows ordered by start time, offsets relative to the trace start"""
+    spans = [s for s in spans if s.start_ms is not None]
+    if not spans:
+        return []
+    origin = min(s.start_ms for s in spans)
+    depth: Dict[str, int] = {}
+    by_id = {s.span_id: s for s in spans}
+
+    def span_depth(span: Span) -> int:
+        if span.span_id in depth:
+            return depth[span.span_id]
+        seen = set()
+        level = 0
+        parent = by_id.get(span.parent_span_id)
+        while parent is not None and parent.span_id not in seen:
+            seen.add(parent.span_id)
+            level += 1
+            parent = by_id.get(parent.parent_span_id)
+        depth[span.span_id] = level
+        return level
+
+    rows = []
+    for span in sorted(spans, key=lambda s: (s.start_ms, span_depth(s))):
+        row = {
+            "name": span.name,
+            "service": span.service,
+            "span_id": span.span_id,
+            "parent_span_id": span.parent_span_id,
+            "depth": span_depth(span),
+            "offset_ms": round(span.start_ms - origin, 3),
+            "duration_ms": span.duration_ms,
+            "status": span.status,
+        }
+        step_id = span.attributes.get("step_id")
+        if step_id:
+            row["step_id"] = step_id
+        rows.append(row)
+    return rows
+
+
+def extract_spans_from_output(output: str, marker: str = "TRACE_SPANS:") -> List[Dict[str, Any]]:
+    """Collect span lists the Node executor prints on marker lines"""
+    spans: List[Dict[str, Any]] = []
+    for line in output.splitlines():
+        line = line.strip()
+        if not line.startswith(marker):
+            continue
+        try:
+            payload = json.loads(line[len(marker):].strip())
+        except json.JSONDecodeError:
+            continue
+        if isinstance(payload, list):
+            spans.extend(p for p in payload if isinstance(p, dict))
+    return spans
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Centralized Circle transfer-status poller
+
+Every browser tab used to poll each pending transfer on its own interval, so
+N viewers cost N times the Circle calls. The poller instead owns the set of
+non-terminal transfers: each is checked on its own schedule (starting at
+``base_interval`` and doubling while nothing changes, up to
+``max_interval``), requests are spread under a ``rate_per_sec`` token bucket,
+and only status changes are pushed to subscribers. Watching a transfer that
+is already watched costs nothing, so call volume scales with transfers, not
+viewers.
+
+When Circle webhooks are configured (``push_grace_secs`` > 0), ``apply``
+feeds notifications in directly and polling becomes a fallback: a transfer
+is only polled once ``push_grace_secs`` pass without a notification for it.
+"""
+
+import asyncio
+import heapq
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services.circle_client import CircleAPIError, CircleClient, Transfer
+from services.structured_logging import get_logger
+
+log = get_logger("agentkit.transfer_poller")
+
+Publisher = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+@dataclass
+class WatchedTransfer:
+    transfer_id: str
+    blockchain: str
+    added_at: float
+    interval: float
+    status: str = 'pending'
+    transaction_hash: Optional[str] = None
+    explorer_link: Optional[str] = None
+    checks: int = 0
+    notified_at: Optional[float] = None
+    due_at: float = 0.0
+    context: Dict[str, Any] = field(default_factory=dict)
+
+    def update_message(self) -> Dict[str, Any]:
+        """Shape expected by the UI's transfer_update handler"""
+        return {
+            "type": "transfer_update",
+            "transferId": self.transfer_id,
+            "status": self.status,
+            "transactionHash": self.transaction_hash,
+            "blockchainTxHash": self.transaction_hash,
+            "explorerLink": self.explorer_link,
+            "blockchain": self.blockchain,
+            **self.context,
+        }
+
+
+class TokenBucket:
+    def __init__(self, rate_per_sec: float, burst: Optional[int] = None):
+        self.rate = rate_per_sec
+        self.capacity = burst or max(1, int(rate_per_sec))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Spend the next ``seconds`` worth of tokens (e.g. after a 429)"""
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class TransferPoller:
+    def __init__(self, client: CircleClient, publish: Publisher, base_interval: float = 2.0,
+                 max_interval: float = 60.0, rate_per_sec: float = 5.0, max_concurrency: int = 5,
+                 max_age_secs: float = 1800.0, push_grace_secs: float = 0.0,
+                 finished_cache_size: int = 1000):
+        self.client = client
+        self.publish = publish
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.max_age_secs = max_age_secs
+        self.push_grace_secs = push_grace_secs
+        self.finished_cache_size = finished_cache_size
+        self.bucket = TokenBucket(rate_per_sec)
+        self.max_concurrency = max_concurrency
+        self.transfers: Dict[str, WatchedTransfer] = {}
+        self.finished: 'OrderedDict[str, WatchedTransfer]' = OrderedDict()
+        self.api_calls = 0
+        self._schedule: List[Tuple[float, str]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # --- subscription ----------------------------------------------------
+
+    def watch(self, transfer_id: str, blockchain: str = 'ETH',
+              context: Optional[Dict[str, Any]] = None) -> WatchedTransfer:
+        """Start tracking a transfer (idempotent); returns its last known state"""
+        watched = self.get(transfer_id)
+        if watched:
+            return watched
+        watched = WatchedTransfer(transfer_id, blockchain, time.monotonic(), self.base_interval,
+                                  context=context or {})
+        self.transfers[transfer_id] = watched
+        self._push(self.push_grace_secs, transfer_id)
+        return watched
+
+    def get(self, transfer_id: str) -> Optional[WatchedTransfer]:
+        return self.transfers.get(transfer_id) or self.finished.get(transfer_id)
+
+    async def apply(self, transfer: Transfer, blockchain: Optional[str] = None) -> bool:
+        """Take a pushed status (webhook); returns True if it changed anything"""
+        watched = self.transfers.get(transfer.id)
+        if watched is None:
+            if transfer.id in self.finished:
+                return False
+            watched = WatchedTransfer(transfer.id, blockchain or transfer.chain or 'ETH',
+                                      time.monotonic(), self.base_interval)
+            self.transfers[transfer.id] = watched
+        watched.notified_at = time.monotonic()
+        changed = await self._update(watched, transfer)
+        if watched.transfer_id in self.transfers:
+            # Push the fallback poll back out now that we have heard about it
+            watched.interval = self.base_interval
+            self._push(self.push_grace_secs or self.base_interval, watched.transfer_id)
+        return changed
+
+    def _finish(self, watched: WatchedTransfer):
+        self.transfers.pop(watched.transfer_id, None)
+        self.finished[watched.transfer_id] = watched
+        while len(self.finished) > self.finished_cache_size:
+            self.finished.popitem(last=False)
+
+    def _push(self, delay: float, transfer_id: str):
+        # Rescheduling leaves the old heap entry behind; due_at marks the live one
+        due_at = time.monotonic() + delay
+        self.transfers[transfer_id].due_at = due_at
+        heapq.heappush(self._schedule, (due_at, transfer_id))
+        self._wakeup.set()
+
+    # --- polling ---------------------------------------------------------
+
+    def _due(self) -> List[str]:
+        now = time.monotonic()
+        due = []
+        while self._schedule and self._schedule[0][0] <= now and len(due) < self.max_concurrency:
+            due_at, transfer_id = heapq.heappop(self._schedule)
+            watched = self.transfers.get(transfer_id)
+            if watched and watched.due_at == due_at:
+                due.append(transfer_id)
+        return due
+
+    async def _check(self, watched: WatchedTransfer):
+        if self.push_grace_secs and watched.notified_at is not None:
+            quiet_for = time.monotonic() - watched.notified_at
+            if quiet_for < self.push_grace_secs:
+                self._push(self.push_grace_secs - quiet_for, watched.transfer_id)
+                return
+        await self.bucket.acquire()
+        self.api_calls += 1
+        watched.checks += 1
+        try:
+            transfer: Transfer = await self.client.get_transfer(watched.transfer_id)
+        except CircleAPIError as e:
+            if e.status == 429:
+                self.bucket.pause(self.base_interval)
+            if e.status == 404 and watched.checks > 3:
+                self.transfers.pop(watched.transfer_id, None)
+                log.warning("transfer.unknown", transfer_id=watched.transfer_id)
+                return
+            self._reschedule(watched, changed=False)
+            return
+        except Exception as e:
+            log.warning("transfer.check_failed", transfer_id=watched.transfer_id, error=str(e))
+            self._reschedule(watched, changed=False)
+            return
+
+        changed = await self._update(watched, transfer)
+        if watched.transfer_id in self.transfers:
+            self._reschedule(watched, changed)
+
+    async def _update(self, watched: WatchedTransfer, transfer: Transfer) -> bool:
+        """Record a fetched or pushed status; publishes on change, retires final transfers"""
+        link = transfer.explorer_link(default_chain=watched.blockchain)
+        if not link and transfer.status == 'complete' and watched.blockchain == 'SOL':
+            # Solana transfers can report complete before the signature is available
+            link = f"Transfer ID: {watched.transfer_id} (Solana tx pending finality)"
+        changed = (transfer.status, transfer.transaction_hash) != (watched.status, watched.transaction_hash)
+        first = watched.checks <= 1 and watched.notified_at is None
+        watched.status = transfer.status
+        watched.transaction_hash = transfer.transaction_hash
+        watched.explorer_link = link
+        if changed or first:
+            try:
+                await self.publish(watched.update_message())
+            except Exception as e:
+                log.warning("transfer.publish_failed", transfer_id=watched.transfer_id, error=str(e))
+        if transfer.is_terminal and (transfer.transaction_hash or transfer.status == 'failed'):
+            self._finish(watched)
+        return changed
+
+    def _reschedule(self, watched: WatchedTransfer, changed: bool):
+        if time.monotonic() - watched.added_at > self.max_age_secs:
+            self.transfers.pop(watched.transfer_id, None)
+            log.info("transfer.watch_expired", transfer_id=watched.transfer_id, status=watched.status)
+            return
+        watched.interval = self.base_interval if changed else min(watched.interval * 2, self.max_interval)
+        self._push(watched.interval, watched.transfer_id)
+
+    async def run_once(self) -> int:
+        """Check every transfer that is due now; returns how many were checked"""
+        due = self._due()
+        if due:
+            await asyncio.gather(*(self._check(self.transfers[transfer_id]) for transfer_id in due))
+        return len(due)
+
+    async def run(self):
+        while True:
+            if await self.run_once():
+                continue
+            self._wakeup.clear()
+            timeout = max(0.0, self._schedule[0][0] - time.monotonic()) if self._schedule else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
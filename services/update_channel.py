@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Persistent, batched update channel to the Rust server
+
+``send_workflow_update`` used to open a new ``ClientSession`` (and TCP
+connection) per update. ``UpdateChannel`` keeps one keep-alive session and a
+bounded send queue: a single sender task waits ``linger_ms`` after the first
+queued update, then POSTs everything queued so far (up to ``max_batch``) as
+one JSON array, which ``/workflow_update`` fans out to WebSocket clients.
+
+A full queue makes ``send`` wait (backpressure) instead of growing without
+bound. Connection failures drop the session and retry the batch with
+backoff, so a restarted Rust server is picked up automatically.
+"""
+
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from services.structured_logging import get_logger
+
+if TYPE_CHECKING:
+    import aiohttp
+
+log = get_logger("agentkit.update_channel")
+
+
+class UpdateChannel:
+    def __init__(self, url: str, linger_ms: float = 5.0, max_batch: int = 100, max_queue: int = 1000,
+                 max_retries: int = 5, backoff_base: float = 0.1, timeout: float = 5.0):
+        self.url = url
+        self.linger = linger_ms / 1000
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.stats = {"sent": 0, "batches": 0, "dropped": 0, "reconnects": 0}
+        self._max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._session: Optional['aiohttp.ClientSession'] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # Created lazily so the channel can be built at import time, outside a loop
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._max_queue)
+        return self._queue
+
+    async def send(self, message: Dict[str, Any]):
+        """Queue an update; waits while the queue is full"""
+        self.start()
+        await self.queue.put(message)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.linger
+        while len(batch) < self.max_batch:
+            remaining = deadline - asyncio.get_running_loop().time()
+            try:
+                batch.append(self.queue.get_nowait() if remaining <= 0 else
+                             await asyncio.wait_for(self.queue.get(), remaining))
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._post(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _get_session(self) -> 'aiohttp.ClientSession':
+        import aiohttp
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=1, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def _post(self, batch: List[Dict[str, Any]]):
+        import aiohttp
+        for attempt in range(self.max_retries + 1):
+            try:
+                session = await self._get_session()
+                async with session.post(self.url, json=batch) as resp:
+                    await resp.read()
+                    if resp.status != 200:
+                        # Rust answers 500 when no WebSocket client is listening; nothing to retry
+                        log.warning("updates.rejected", status=resp.status, count=len(batch))
+                    self.stats["sent"] += len(batch)
+                    self.stats["batches"] += 1
+                    return
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if self._session is not None:
+                    await self._session.close()
+                    self._session = None
+                self.stats["reconnects"] += 1
+                if attempt == self.max_retries:
+                    self.stats["dropped"] += len(batch)
+                    log.warning("updates.dropped", count=len(batch), error=str(e))
+                    return
+                await asyncio.sleep(self.backoff_base * (2 ** attempt))
+
+    async def flush(self):
+        """Wait until everything queued so far has been sent (or dropped)"""
+        if self._task is not None and not self._task.done():
+            await self.queue.join()
+
+    async def close(self):
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._session is not None:
+            await self._session.close()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Persistent verification result cache
+
+Python side of ``src/verification_cache.rs``. Results are keyed by
+(proof hash, public.json hash, step size): the proof hash comes from the
+``proof.ref`` pointer for stored proofs, so a lookup usually hashes only the
+small public.json. Any change to either file is a different key, i.e. a miss.
+
+Usage:
+    python -m services.verification_cache stats [cache_db]
+    python -m services.verification_cache invalidate <proof_id|proof_hash> [cache_db]
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+from services.artifact_store import CHUNK_SIZE, RAW_FILE, read_pointer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS verifications (
+    proof_hash   TEXT NOT NULL,
+    public_hash  TEXT NOT NULL,
+    step_size    INTEGER NOT NULL,
+    valid        INTEGER NOT NULL,
+    proof_id     TEXT,
+    verified_ms  INTEGER NOT NULL,
+    hit_count    INTEGER NOT NULL DEFAULT 0,
+    last_hit_ms  INTEGER,
+    PRIMARY KEY (proof_hash, public_hash, step_size)
+);
+CREATE INDEX IF NOT EXISTS idx_verifications_proof_id ON verifications(proof_id);
+CREATE TABLE IF NOT EXISTS cache_stats (
+    name   TEXT PRIMARY KEY,
+    value  INTEGER NOT NULL
+);
+"""
+
+
+class VerificationKey(NamedTuple):
+    proof_hash: str
+    public_hash: str
+    step_size: int
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def key_for(proof_dir: str, step_size: int = 50) -> VerificationKey:
+    """Raise OSError when the proof or public.json is missing"""
+    pointer = read_pointer(proof_dir)
+    proof_hash = pointer['hash'] if pointer else _sha256_file(os.path.join(proof_dir, RAW_FILE))
+    return VerificationKey(proof_hash, _sha256_file(os.path.join(proof_dir, 'public.json')),
+                           int(step_size))
+
+
+class VerificationCache:
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._conn.close()
+
+    def lookup(self, key: VerificationKey, count: bool = True) -> Optional[Dict[str, Any]]:
+        """Cached result for this exact content; counts a hit or miss unless count=False"""
+        row = self._conn.execute(
+            "SELECT * FROM verifications WHERE proof_hash = ? AND public_hash = ? AND step_size = ?",
+            key).fetchone()
+        if count:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT INTO cache_stats (name, value) VALUES (?, 1) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+                    ('hits' if row else 'misses',))
+                if row:
+                    self._conn.execute(
+                        "UPDATE verifications SET hit_count = hit_count + 1, last_hit_ms = ? "
+                        "WHERE proof_hash = ? AND public_hash = ? AND step_size = ?",
+                        (int(time.time() * 1000), *key))
+        if not row:
+            return None
+        result = dict(row)
+        result['valid'] = bool(result['valid'])
+        return result
+
+    def record(self, key: VerificationKey, proof_id: str, valid: bool):
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO verifications (proof_hash, public_hash, step_size, valid, proof_id, verified_ms)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(proof_hash, public_hash, step_size) DO UPDATE SET
+                       valid = excluded.valid,
+                       proof_id = excluded.proof_id,
+                       verified_ms = excluded.verified_ms""",
+                (*key, int(valid), proof_id, int(time.time() * 1000)))
+
+    def invalidate(self, proof_id: Optional[str] = None, proof_hash: Optional[str] = None) -> int:
+        """Drop cached results for a proof ID and/or proof content hash"""
+        clauses, params = [], []
+        if proof_id:
+            clauses.append("proof_id = ?")
+            params.append(proof_id)
+        if proof_hash:
+            clauses.append("proof_hash = ?")
+            params.append(proof_hash)
+        if not clauses:
+            return 0
+        with self._lock, self._conn:
+            return self._conn.execute(
+                f"DELETE FROM verifications WHERE {' OR '.join(clauses)}", params).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        counters = {row['name']: row['value'] for row in self._conn.execute("SELECT * FROM cache_stats")}
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        entries, valid = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(valid), 0) FROM verifications").fetchone()
+        return {"hits": hits, "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                "entries": entries, "valid_entries": valid}
+
+
+def main(argv) -> int:
+    if not argv or argv[0] not in ('stats', 'invalidate') or (argv[0] == 'invalidate' and len(argv) < 2):
+        print(__doc__)
+        return 1
+    if argv[0] == 'stats':
+        path = argv[1] if len(argv) > 1 else os.getenv('VERIFICATION_CACHE_DB', './verification_cache.sqlite')
+        print(json.dumps(VerificationCache(path).stats(), indent=2))
+        return 0
+    path = argv[2] if len(argv) > 2 else os.getenv('VERIFICATION_CACHE_DB', './verification_cache.sqlite')
+    target = argv[1]
+    cache = VerificationCache(path)
+    removed = cache.invalidate(proof_id=target, proof_hash=target)
+    print(f"Invalidated {removed} cached verifications for {target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Durable per-step checkpoints for in-flight workflows
+
+Each running workflow has one JSON file, created by chat_service with the
+plan and updated by the Node executor (``parsers/workflow/workflowCheckpoint.js``)
+after every step:
+
+    workflowId          chat_service's workflow ID (the file name)
+    command, plan       the request and the parsed plan the executor runs
+    status              running | completed | failed
+    position            index of the first step that has not finished
+    executorWorkflowId  the executor's own ID; transfer idempotency keys are
+                        derived from it, so a resumed transfer step re-sends
+                        the same key and Circle never creates a second one
+    proofResults, verificationResults, stepResults
+                        executor state after ``position`` steps
+    ownerPid, ownerToken, executorPid, executorToken, host, attempts,
+    createdMs, updatedMs
+
+A workflow whose file still says ``running`` while neither its chat_service
+worker nor its executor process is alive was interrupted by a restart; it is
+resumed from ``position`` instead of being started over. A PID alone cannot
+tell: after a container restart the same PID belongs to a new process. Each
+PID is stored with a token (boot ID and process start time, from /proc) and
+a process only counts as alive if its token still matches. Files are
+replaced atomically, so a crash mid-write leaves the previous checkpoint.
+
+Usage:
+    python -m services.workflow_checkpoints list [checkpoint_dir]
+"""
+
+import json
+import os
+import socket
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+RUNNING = 'running'
+BOOT_ID_PATH = '/proc/sys/kernel/random/boot_id'
+
+
+def process_token(pid: int) -> Optional[str]:
+    """Boot ID plus start time of a process; never shared by two processes, unlike its PID"""
+    try:
+        with open(BOOT_ID_PATH) as f:
+            boot_id = f.read().strip()
+        with open(f'/proc/{pid}/stat') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # starttime is field 22; the command name before it may contain spaces
+    return f"{boot_id}:{stat[stat.rindex(')') + 2:].split()[19]}"
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _process_alive(pid: Optional[int], token: Optional[str]) -> bool:
+    """The process recorded as (pid, token) is still running; without a token, only the PID is checked"""
+    if not _pid_alive(pid):
+        return False
+    return token is None or process_token(pid) == token
+
+
+class CheckpointStore:
+    def __init__(self, directory: str):
+        self.directory = os.path.expanduser(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.host = socket.gethostname()
+
+    def path(self, workflow_id: str) -> str:
+        if '/' in workflow_id or workflow_id.startswith('.'):
+            raise ValueError(f"Invalid workflow ID: {workflow_id}")
+        return os.path.join(self.directory, f"{workflow_id}.json")
+
+    def _write(self, checkpoint: Dict[str, Any]):
+        path = self.path(checkpoint['workflowId'])
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def create(self, workflow_id: str, plan: Dict[str, Any], command: str) -> str:
+        """Checkpoint for a workflow about to start; returns its path for the executor"""
+        now = int(time.time() * 1000)
+        self._write({
+            'workflowId': workflow_id, 'command': command, 'plan': plan,
+            'status': RUNNING, 'position': 0,
+            'ownerPid': os.getpid(), 'ownerToken': process_token(os.getpid()),
+            'executorPid': None, 'executorToken': None, 'host': self.host,
+            'attempts': 0, 'createdMs': now, 'updatedMs': now,
+        })
+        return self.path(workflow_id)
+
+    def load(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(workflow_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def update(self, workflow_id: str, **fields) -> Optional[Dict[str, Any]]:
+        checkpoint = self.load(workflow_id)
+        if checkpoint is None:
+            return None
+        checkpoint.update(fields, updatedMs=int(time.time() * 1000))
+        self._write(checkpoint)
+        return checkpoint
+
+    def remove(self, workflow_id: str):
+        try:
+            os.remove(self.path(workflow_id))
+        except OSError:
+            pass
+
+    def all(self) -> List[Dict[str, Any]]:
+        out = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith('.json'):
+                checkpoint = self.load(name[:-len('.json')])
+                if checkpoint:
+                    out.append(checkpoint)
+        return out
+
+    def orphaned(self) -> List[Dict[str, Any]]:
+        """
+        Checkpoints on this host whose worker and executor are both gone:
+        running ones were interrupted, finished ones completed unattended
+        """
+        return [c for c in self.all()
+                if c.get('host') == self.host
+                and not _process_alive(c.get('ownerPid'), c.get('ownerToken'))
+                and not _process_alive(c.get('executorPid'), c.get('executorToken'))]
+
+    def adopt(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        """Take over an orphaned workflow before resuming it"""
+        return self.update(workflow_id, ownerPid=os.getpid(), ownerToken=process_token(os.getpid()),
+                           executorPid=None, executorToken=None, attempts=(self.load(workflow_id) or {}).get('attempts', 0) + 1)
+
+
+def main(argv: List[str]) -> int:
+    if not argv or argv[0] != 'list':
+        print(__doc__)
+        return 1
+    if len(argv) > 1:
+        directory = argv[1]
+    else:
+        from config import config
+        directory = config.workflow.checkpoint_dir
+    store = CheckpointStore(directory)
+    orphaned = {c['workflowId'] for c in store.orphaned() if c.get('status') == RUNNING}
+    for c in store.all():
+        print(json.dumps({
+            'workflowId': c['workflowId'], 'status': c.get('status'),
+            'position': c.get('position'), 'steps': len((c.get('plan') or {}).get('steps', [])),
+            'attempts': c.get('attempts'), 'orphaned': c['workflowId'] in orphaned,
+        }))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Indexed, paginated workflow history
+
+``circle/workflowManager.js`` appends every workflow change to a JSON-lines
+journal next to ``workflow_history.json`` and only rewrites the snapshot when
+it compacts. This store tails that journal into SQLite, indexed by creation
+time, status and step type, so "latest N" and cursor pages cost the same at
+ten workflows or ten million.
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.proof_store import timestamp_to_ms
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workflows (
+    id          TEXT PRIMARY KEY,
+    created_at  TEXT,
+    created_ms  INTEGER NOT NULL,
+    status      TEXT,
+    step_count  INTEGER NOT NULL,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_workflows_created ON workflows(created_ms, id);
+CREATE INDEX IF NOT EXISTS idx_workflows_status ON workflows(status, created_ms, id);
+CREATE TABLE IF NOT EXISTS workflow_step_types (
+    workflow_id TEXT NOT NULL,
+    step_type   TEXT NOT NULL,
+    created_ms  INTEGER NOT NULL,
+    PRIMARY KEY (workflow_id, step_type)
+);
+CREATE INDEX IF NOT EXISTS idx_step_types ON workflow_step_types(step_type, created_ms, workflow_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+MAX_PAGE_SIZE = 100
+
+
+def journal_path_for(snapshot_path: str) -> str:
+    """workflow_history.json -> workflow_history.jsonl (matches workflowManager.js)"""
+    return snapshot_path + 'l'
+
+
+def encode_cursor(created_ms: int, workflow_id: str) -> str:
+    raw = f"{created_ms}:{workflow_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """Raise ValueError for anything that is not a cursor this store issued"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_ms, workflow_id = base64.urlsafe_b64decode(padded).decode().split(':', 1)
+        return int(created_ms), workflow_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class WorkflowHistoryStore:
+    """SQLite index over the workflow snapshot and its append-only journal"""
+
+    def __init__(self, db_path: str, snapshot_path: str):
+        self.db_path = os.path.expanduser(db_path)
+        self.snapshot_path = os.path.expanduser(snapshot_path)
+        self.journal_path = journal_path_for(self.snapshot_path)
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._conn.close()
+
+    # --- ingestion -------------------------------------------------------
+
+    def _state(self, key: str, default: str = '') -> str:
+        row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_state(self, key: str, value):
+        self._conn.execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, str(value)))
+
+    def _upsert(self, workflow: Dict[str, Any]):
+        workflow_id = workflow.get('id')
+        if not workflow_id:
+            return
+        steps = workflow.get('steps') or []
+        created_ms = timestamp_to_ms(workflow.get('createdAt'))
+        self._conn.execute(
+            """INSERT INTO workflows (id, created_at, created_ms, status, step_count, data)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(id) DO UPDATE SET
+                   created_at = excluded.created_at,
+                   created_ms = excluded.created_ms,
+                   status = excluded.status,
+                   step_count = excluded.step_count,
+                   data = excluded.data""",
+            (workflow_id, workflow.get('createdAt'), created_ms, workflow.get('status'),
+             len(steps), json.dumps(workflow)))
+        self._conn.execute("DELETE FROM workflow_step_types WHERE workflow_id = ?", (workflow_id,))
+        step_types = {step.get('type') for step in steps if isinstance(step, dict) and step.get('type')}
+        self._conn.executemany(
+            "INSERT INTO workflow_step_types (workflow_id, step_type, created_ms) VALUES (?, ?, ?)",
+            [(workflow_id, step_type, created_ms) for step_type in step_types])
+
+    def _import_snapshot(self) -> int:
+        try:
+            with open(self.snapshot_path) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return 0
+        # workflowManager.js writes an object keyed by ID; older tools wrote
+        # an array or {"workflows": [...]}
+        if isinstance(data, dict) and isinstance(data.get('workflows'), list):
+            workflows = data['workflows']
+        elif isinstance(data, dict):
+            workflows = [{**wf, 'id': wf.get('id') or wf_id}
+                         for wf_id, wf in data.items() if isinstance(wf, dict)]
+        elif isinstance(data, list):
+            workflows = data
+        else:
+            workflows = []
+        for workflow in workflows:
+            if isinstance(workflow, dict):
+                self._upsert(workflow)
+        return len(workflows)
+
+    def _tail_journal(self, offset: int) -> Tuple[int, int]:
+        """Apply complete journal lines after ``offset``; returns (new offset, applied)"""
+        applied = 0
+        with open(self.journal_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # writer is mid-append; pick it up next time
+                offset += len(line)
+                try:
+                    workflow = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(workflow, dict):
+                    self._upsert(workflow)
+                    applied += 1
+        return offset, applied
+
+    def sync(self) -> int:
+        """Bring the index up to date; cheap (two stats) when nothing changed"""
+        with self._lock, self._conn:
+            applied = 0
+            try:
+                snapshot = os.stat(self.snapshot_path)
+                snapshot_key = f"{snapshot.st_ino}:{snapshot.st_mtime_ns}:{snapshot.st_size}"
+            except OSError:
+                snapshot_key = ''
+            if snapshot_key and snapshot_key != self._state('snapshot'):
+                # New snapshot means the manager compacted; it already holds
+                # everything the truncated journal had
+                applied += self._import_snapshot()
+                self._set_state('snapshot', snapshot_key)
+
+            try:
+                journal = os.stat(self.journal_path)
+            except OSError:
+                return applied
+            offset = int(self._state('journal_offset', '0'))
+            if str(journal.st_ino) != self._state('journal_inode') or journal.st_size < offset:
+                offset = 0
+            if journal.st_size > offset:
+                offset, tailed = self._tail_journal(offset)
+                applied += tailed
+            self._set_state('journal_inode', journal.st_ino)
+            self._set_state('journal_offset', offset)
+            return applied
+
+    # --- queries ---------------------------------------------------------
+
+    def query(self, limit: int = 20, cursor: Optional[str] = None, status: Optional[str] = None,
+              step_type: Optional[str] = None) -> Dict[str, Any]:
+        """One page, newest first; pass ``next_cursor`` back to continue"""
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        if step_type:
+            sql = ("SELECT w.* FROM workflow_step_types s JOIN workflows w ON w.id = s.workflow_id "
+                   "WHERE s.step_type = ?")
+            params: List[Any] = [step_type]
+            time_col, id_col = "s.created_ms", "s.workflow_id"
+            if status:
+                sql += " AND w.status = ?"
+                params.append(status)
+        else:
+            sql, params = "SELECT * FROM workflows WHERE 1 = 1", []
+            time_col, id_col = "created_ms", "id"
+            if status:
+                sql += " AND status = ?"
+                params.append(status)
+        if cursor:
+            created_ms, workflow_id = decode_cursor(cursor)
+            sql += f" AND ({time_col} < ? OR ({time_col} = ? AND {id_col} < ?))"
+            params.extend([created_ms, created_ms, workflow_id])
+        sql += f" ORDER BY {time_col} DESC, {id_col} DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        workflows = []
+        for row in rows[:limit]:
+            workflow = json.loads(row['data'])
+            workflow['stepCount'] = row['step_count']
+            workflows.append(workflow)
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last['created_ms'], last['id'])
+        return {"workflows": workflows, "next_cursor": next_cursor}
+
+    def in_flight(self, since_ms: int) -> List[Dict[str, Any]]:
+        """Workflows created since ``since_ms`` that have not completed or failed"""
+        rows = self._conn.execute(
+            "SELECT data FROM workflows WHERE created_ms >= ? "
+            "AND COALESCE(status, '') NOT IN ('completed', 'failed')", (since_ms,))
+        return [json.loads(row[0]) for row in rows]
+
+    def get(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT data FROM workflows WHERE id = ?", (workflow_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM workflows").fetchone()[0]
@@ -0,0 +1,420 @@
+// Content-addressed, zstd-compressed proof artifact store
+//
+// proof.bin files are ~18 MB and identical proofs were stored once per run.
+// After generation the server moves proof.bin into objects/<hh>/<sha256>.zst,
+// leaves a small proof.ref pointer in the proof directory and counts
+// references per object. Readers either stream the decompressed bytes or, for
+// the zkEngine CLI which needs a path, get a short-lived scratch copy.
+// The layout and index schema are shared with services/artifact_store.py.
+
+use rusqlite::{params, Connection, OptionalExtension};
+use serde_json::json;
+use sha2::{Digest, Sha256};
+use std::fs::File;
+use std::io::{self, BufReader, Read, Write};
+use std::path::{Path, PathBuf};
+use std::sync::Mutex;
+use tracing::{info, warn};
+
+pub const POINTER_FILE: &str = "proof.ref";
+const RAW_FILE: &str = "proof.bin";
+const ZSTD_LEVEL: i32 = 3;
+const CHUNK_SIZE: usize = 1 << 20;
+// Opens of an object the tiering job demoted mid-read, before giving up
+const RECALL_ATTEMPTS: usize = 3;
+
+// Shared with services/artifact_store.py: add a migration in both places and
+// bump SCHEMA_VERSION (PRAGMA user_version) together. Indexes written before
+// versioning report version 0 but may already have some of these changes,
+// so migrations only add columns that are missing.
+const SCHEMA_VERSION: i64 = 3;
+const MIGRATIONS: &[(i64, &[&str])] = &[
+    (1, &[
+        "CREATE TABLE IF NOT EXISTS artifacts (
+            hash         TEXT PRIMARY KEY,
+            codec        TEXT NOT NULL,
+            size         INTEGER NOT NULL,
+            stored_size  INTEGER NOT NULL,
+            refcount     INTEGER NOT NULL DEFAULT 0,
+            created_ms   INTEGER NOT NULL
+        )",
+        "CREATE TABLE IF NOT EXISTS artifact_refs (
+            proof_id  TEXT PRIMARY KEY,
+            hash      TEXT NOT NULL REFERENCES artifacts(hash)
+        )",
+        "CREATE INDEX IF NOT EXISTS idx_artifact_refs_hash ON artifact_refs(hash)",
+    ]),
+    // Access stats for tiering (services/proof_tiering.py)
+    (2, &[
+        "ALTER TABLE artifacts ADD COLUMN tier TEXT NOT NULL DEFAULT 'local'",
+        "ALTER TABLE artifacts ADD COLUMN last_access_ms INTEGER",
+        "ALTER TABLE artifacts ADD COLUMN access_count INTEGER NOT NULL DEFAULT 0",
+        "CREATE INDEX IF NOT EXISTS idx_artifacts_tier_access ON artifacts(tier, last_access_ms)",
+    ]),
+    // Eviction order for services/proof_gc.py
+    (3, &[
+        "CREATE INDEX IF NOT EXISTS idx_artifacts_lru ON artifacts(COALESCE(last_access_ms, created_ms), access_count)",
+        "CREATE INDEX IF NOT EXISTS idx_artifacts_lfu ON artifacts(access_count, COALESCE(last_access_ms, created_ms))",
+    ]),
+];
+
+// Bring an index up to SCHEMA_VERSION in one immediate transaction, so a
+// Python process opening the same index waits instead of migrating twice
+fn migrate(conn: &mut Connection) -> rusqlite::Result<()> {
+    let tx = conn.transaction_with_behavior(rusqlite::TransactionBehavior::Immediate)?;
+    let version: i64 = tx.query_row("PRAGMA user_version", [], |r| r.get(0))?;
+    for (target, statements) in MIGRATIONS {
+        if version >= *target {
+            continue;
+        }
+        for statement in statements.iter() {
+            if let Some(rest) = statement.strip_prefix("ALTER TABLE ") {
+                let mut words = rest.split_whitespace();
+                let (table, column) = (words.next().unwrap_or(""), words.nth(2).unwrap_or(""));
+                let mut stmt = tx.prepare(&format!("PRAGMA table_info({})", table))?;
+                let exists = stmt
+                    .query_map([], |r| r.get::<_, String>(1))?
+                    .filter_map(Result::ok)
+                    .any(|name| name == column);
+                if exists {
+                    continue;
+                }
+            }
+            tx.execute_batch(statement)?;
+        }
+    }
+    if version < SCHEMA_VERSION {
+        tx.pragma_update(None, "user_version", SCHEMA_VERSION)?;
+    }
+    tx.commit()
+}
+
+#[derive(Clone, Debug)]
+pub struct IngestResult {
+    pub hash: String,
+    pub size: u64,
+    pub stored_size: u64,
+    pub deduplicated: bool,
+}
+
+pub struct ArtifactStore {
+    root: PathBuf,
+    scratch: PathBuf,
+    conn: Mutex<Connection>,
+}
+
+// A proof file path that is valid for as long as the guard lives
+pub struct MaterializedProof {
+    pub path: PathBuf,
+    temporary: bool,
+}
+
+impl Drop for MaterializedProof {
+    fn drop(&mut self) {
+        if self.temporary {
+            let _ = std::fs::remove_file(&self.path);
+        }
+    }
+}
+
+fn to_io(e: rusqlite::Error) -> io::Error {
+    io::Error::new(io::ErrorKind::Other, e)
+}
+
+fn epoch_ms() -> i64 {
+    chrono::Utc::now().timestamp_millis()
+}
+
+pub fn has_proof(proof_dir: &Path) -> bool {
+    proof_dir.join(RAW_FILE).exists() || proof_dir.join(POINTER_FILE).exists()
+}
+
+pub fn read_pointer(proof_dir: &Path) -> Option<(String, String)> {
+    let content = std::fs::read_to_string(proof_dir.join(POINTER_FILE)).ok()?;
+    let pointer: serde_json::Value = serde_json::from_str(&content).ok()?;
+    let hash = pointer.get("hash")?.as_str()?.to_string();
+    let codec = pointer.get("codec").and_then(|c| c.as_str()).unwrap_or("zstd").to_string();
+    Some((hash, codec))
+}
+
+impl ArtifactStore {
+    pub fn open(root: &str, scratch: &str) -> rusqlite::Result<Self> {
+        let root = PathBuf::from(root);
+        std::fs::create_dir_all(root.join("objects")).ok();
+        std::fs::create_dir_all(scratch).ok();
+        let mut conn = Connection::open(root.join("index.sqlite"))?;
+        conn.busy_timeout(std::time::Duration::from_secs(10))?;
+        conn.pragma_update_and_check(None, "journal_mode", "WAL", |row| row.get::<_, String>(0))?;
+        migrate(&mut conn)?;
+        Ok(ArtifactStore { root, scratch: PathBuf::from(scratch), conn: Mutex::new(conn) })
+    }
+
+    fn object_path(&self, hash: &str, codec: &str) -> PathBuf {
+        let ext = if codec == "zstd" { "zst" } else { "raw" };
+        self.root.join("objects").join(&hash[..2]).join(format!("{}.{}", hash, ext))
+    }
+
+    // Move proof_dir/proof.bin into the store: hash and compress in one pass,
+    // keep a single object per hash and replace the file with a pointer
+    pub fn ingest(&self, proof_id: &str, proof_dir: &Path) -> io::Result<IngestResult> {
+        let raw_path = proof_dir.join(RAW_FILE);
+        let tmp_path = self.root.join("objects").join(format!("tmp-{}", uuid::Uuid::new_v4()));
+
+        let mut reader = BufReader::with_capacity(CHUNK_SIZE, File::open(&raw_path)?);
+        let mut encoder = zstd::stream::write::Encoder::new(File::create(&tmp_path)?, ZSTD_LEVEL)?;
+        let mut hasher = Sha256::new();
+        let mut buf = vec![0u8; CHUNK_SIZE];
+        let mut size: u64 = 0;
+        let streamed = (|| -> io::Result<()> {
+            loop {
+                let n = reader.read(&mut buf)?;
+                if n == 0 {
+                    break;
+                }
+                hasher.update(&buf[..n]);
+                encoder.write_all(&buf[..n])?;
+                size += n as u64;
+            }
+            encoder.finish()?.sync_all()
+        })();
+        if let Err(e) = streamed {
+            let _ = std::fs::remove_file(&tmp_path);
+            return Err(e);
+        }
+        let hash = hex::encode(hasher.finalize());
+
+        // Reuse an existing object even if it was written with the other codec
+        let codec = self.stored_codec(&hash)
+            .filter(|codec| self.object_path(&hash, codec).exists())
+            .unwrap_or_else(|| "zstd".to_string());
+        let object_path = self.object_path(&hash, &codec);
+        let deduplicated = object_path.exists();
+        if deduplicated {
+            std::fs::remove_file(&tmp_path)?;
+        } else {
+            std::fs::create_dir_all(object_path.parent().unwrap())?;
+            std::fs::rename(&tmp_path, &object_path)?;
+        }
+        let stored_size = std::fs::metadata(&object_path)?.len();
+
+        self.add_ref(proof_id, &hash, &codec, size, stored_size).map_err(to_io)?;
+        if !deduplicated {
+            // A cold object written again locally is hot; the next demotion
+            // overwrites its remote copy under the same key
+            self.conn.lock().unwrap()
+                .execute("UPDATE artifacts SET tier = 'local' WHERE hash = ?1", params![hash])
+                .map_err(to_io)?;
+        }
+
+        // Pointer first, then drop the raw file, so the proof is never missing
+        let pointer = json!({ "hash": hash, "codec": codec, "size": size });
+        let pointer_tmp = proof_dir.join(format!("{}.tmp", POINTER_FILE));
+        std::fs::write(&pointer_tmp, pointer.to_string())?;
+        std::fs::rename(&pointer_tmp, proof_dir.join(POINTER_FILE))?;
+        std::fs::remove_file(&raw_path)?;
+
+        Ok(IngestResult { hash, size, stored_size, deduplicated })
+    }
+
+    fn stored_codec(&self, hash: &str) -> Option<String> {
+        let conn = self.conn.lock().unwrap();
+        conn.query_row("SELECT codec FROM artifacts WHERE hash = ?1", params![hash], |r| r.get(0))
+            .optional()
+            .ok()
+            .flatten()
+    }
+
+    fn add_ref(&self, proof_id: &str, hash: &str, codec: &str, size: u64, stored_size: u64) -> rusqlite::Result<()> {
+        let mut conn = self.conn.lock().unwrap();
+        let tx = conn.transaction()?;
+        tx.execute(
+            "INSERT OR IGNORE INTO artifacts (hash, codec, size, stored_size, refcount, created_ms)
+             VALUES (?1, ?2, ?3, ?4, 0, ?5)",
+            params![hash, codec, size as i64, stored_size as i64, epoch_ms()],
+        )?;
+        let previous: Option<String> = tx.query_row(
+            "SELECT hash FROM artifact_refs WHERE proof_id = ?1", params![proof_id], |r| r.get(0),
+        ).optional()?;
+        if previous.as_deref() != Some(hash) {
+            if let Some(previous) = previous {
+                tx.execute("UPDATE artifacts SET refcount = refcount - 1 WHERE hash = ?1", params![previous])?;
+            }
+            tx.execute(
+                "INSERT OR REPLACE INTO artifact_refs (proof_id, hash) VALUES (?1, ?2)",
+                params![proof_id, hash],
+            )?;
+            tx.execute("UPDATE artifacts SET refcount = refcount + 1 WHERE hash = ?1", params![hash])?;
+        }
+        tx.commit()
+    }
+
+    // Stream the original proof bytes, whether stored raw or in the store
+    pub fn open_reader(&self, proof_dir: &Path) -> io::Result<Box<dyn Read + Send>> {
+        let raw_path = proof_dir.join(RAW_FILE);
+        if raw_path.exists() {
+            return Ok(Box::new(BufReader::new(File::open(raw_path)?)));
+        }
+        let (hash, codec) = read_pointer(proof_dir)
+            .ok_or_else(|| io::Error::new(io::ErrorKind::NotFound, "proof.bin not found"))?;
+        let object = File::open(self.object_path(&hash, &codec))?;
+        self.touch(&hash);
+        if codec == "zstd" {
+            Ok(Box::new(zstd::stream::read::Decoder::new(object)?))
+        } else {
+            Ok(Box::new(BufReader::new(object)))
+        }
+    }
+
+    // Access stats drive tiering (services/proof_tiering.py)
+    fn touch(&self, hash: &str) {
+        let conn = self.conn.lock().unwrap();
+        if let Err(e) = conn.execute(
+            "UPDATE artifacts SET last_access_ms = ?1, access_count = access_count + 1 WHERE hash = ?2",
+            params![epoch_ms(), hash],
+        ) {
+            warn!("Failed to record artifact access for {}: {}", hash, e);
+        }
+    }
+
+    // Count a read that was answered without opening the object (e.g. a
+    // cached verification), so retention still sees the proof as in use
+    pub fn record_access(&self, proof_dir: &Path) {
+        if let Some((hash, _)) = read_pointer(proof_dir) {
+            self.touch(&hash);
+        }
+    }
+
+    // Hash of a stored proof whose object has been moved to the cold tier
+    pub fn cold_object(&self, proof_dir: &Path) -> Option<String> {
+        if proof_dir.join(RAW_FILE).exists() {
+            return None;
+        }
+        let (hash, codec) = read_pointer(proof_dir)?;
+        if self.object_path(&hash, &codec).exists() {
+            None
+        } else {
+            Some(hash)
+        }
+    }
+
+    // A path to the raw proof for tools that only take a file argument. Stored
+    // proofs are decompressed into the scratch directory and removed on drop.
+    pub fn materialize(&self, proof_dir: &Path) -> io::Result<MaterializedProof> {
+        let raw_path = proof_dir.join(RAW_FILE);
+        if raw_path.exists() {
+            return Ok(MaterializedProof { path: raw_path, temporary: false });
+        }
+        let mut reader = self.open_reader(proof_dir)?;
+        let path = self.scratch.join(format!("{}.bin", uuid::Uuid::new_v4()));
+        let guard = MaterializedProof { path, temporary: true };
+        let mut out = File::create(&guard.path)?;
+        io::copy(&mut reader, &mut out)?;
+        Ok(guard)
+    }
+}
+
+// Ingest on a blocking thread; failures leave proof.bin in place
+pub async fn ingest_in_background(store: std::sync::Arc<ArtifactStore>, proof_id: String, proof_dir: PathBuf) -> Option<IngestResult> {
+    let id = proof_id.clone();
+    match tokio::task::spawn_blocking(move || store.ingest(&id, &proof_dir)).await {
+        Ok(Ok(result)) => Some(result),
+        Ok(Err(e)) => {
+            warn!("Failed to store proof artifact for {}: {}", proof_id, e);
+            None
+        }
+        Err(e) => {
+            warn!("Artifact ingest task failed for {}: {}", proof_id, e);
+            None
+        }
+    }
+}
+
+// Bring a cold object back from the object-store tier before it is read.
+// chat_service owns the backend configuration, so recall goes through it.
+pub async fn recall_if_cold(store: &ArtifactStore, chat_service_url: &str, proof_dir: &Path) -> io::Result<()> {
+    let hash = match store.cold_object(proof_dir) {
+        Some(hash) => hash,
+        None => return Ok(()),
+    };
+    info!("Recalling cold proof artifact {} for {}", hash, proof_dir.display());
+    let url = format!("{}/internal/artifacts/{}/recall", chat_service_url, hash);
+    let mut request = reqwest::Client::new()
+        .post(&url)
+        .timeout(std::time::Duration::from_secs(300));
+    // Internal routes require the shared token when one is configured
+    if let Ok(token) = std::env::var("INTERNAL_API_TOKEN") {
+        if !token.is_empty() {
+            request = request.header("X-Internal-Token", token);
+        }
+    }
+    let response = request
+        .send()
+        .await
+        .map_err(|e| io::Error::new(io::ErrorKind::Other, e))?;
+    if !response.status().is_success() {
+        return Err(io::Error::new(
+            io::ErrorKind::NotFound,
+            format!("Recall of artifact {} failed with status {}", hash, response.status()),
+        ));
+    }
+    Ok(())
+}
+
+// Recall the object if it is cold, then run `read` on a blocking thread so
+// decompression never stalls the runtime. The tiering job can demote the
+// object between the recall check and the open; the open then fails with
+// NotFound while the object is cold again, and is retried after another
+// recall.
+pub async fn with_recall<T, F>(
+    store: std::sync::Arc<ArtifactStore>,
+    chat_service_url: &str,
+    proof_dir: &Path,
+    read: F,
+) -> io::Result<T>
+where
+    T: Send + 'static,
+    F: Fn(&ArtifactStore, &Path) -> io::Result<T> + Clone + Send + 'static,
+{
+    let mut attempt = 1;
+    loop {
+        recall_if_cold(&store, chat_service_url, proof_dir).await?;
+        let (task_store, dir, task_read) = (store.clone(), proof_dir.to_path_buf(), read.clone());
+        let result = tokio::task::spawn_blocking(move || task_read(&task_store, &dir))
+            .await
+            .map_err(|e| io::Error::new(io::ErrorKind::Other, e))?;
+        match result {
+            Err(e) if e.kind() == io::ErrorKind::NotFound
+                && attempt < RECALL_ATTEMPTS
+                && store.cold_object(proof_dir).is_some() =>
+            {
+                warn!("Proof artifact for {} was offloaded while opening it; recalling again", proof_dir.display());
+                attempt += 1;
+            }
+            result => return result,
+        }
+    }
+}
+
+// Stream the proof bytes in chunks over a channel, for HTTP download bodies
+pub fn stream_chunks(mut reader: Box<dyn Read + Send>) -> tokio::sync::mpsc::Receiver<io::Result<Vec<u8>>> {
+    let (tx, rx) = tokio::sync::mpsc::channel(4);
+    tokio::task::spawn_blocking(move || {
+        loop {
+            let mut buf = vec![0u8; CHUNK_SIZE];
+            match reader.read(&mut buf) {
+                Ok(0) => break,
+                Ok(n) => {
+                    buf.truncate(n);
+                    if tx.blocking_send(Ok(buf)).is_err() {
+                        break; // client went away
+                    }
+                }
+                Err(e) => {
+                    let _ = tx.blocking_send(Err(e));
+                    break;
+                }
+            }
+        }
+    });
+    rx
+}
@@ -1,7 +1,7 @@
 use axum::{
     extract::{
         ws::{Message, WebSocket},
-        State, WebSocketUpgrade, Json, Path,
+        State, WebSocketUpgrade, Json, Path, Query,
     },
     response::{IntoResponse, Html},
     routing::{get, post},
@@ -17,11 +17,20 @@ use uuid::Uuid;
 use std::process::Stdio;
 use tokio::process::Command;
 use std::path::PathBuf;
+use std::sync::Arc;
 
 mod nova_groth16_converter;
 use nova_groth16_converter::convert_nova_to_groth16;
 mod nova_to_groth16_truly_integrated;
 use nova_to_groth16_truly_integrated::convert_nova_to_groth16_truly_integrated as convert_integrated;
+mod proof_store;
+use proof_store::ProofStore;
+mod proof_catalog;
+use proof_catalog::ProofCatalog;
+mod artifact_store;
+use artifact_store::ArtifactStore;
+mod verification_cache;
+use verification_cache::VerificationCache;
 
 // --- Main State and Data Structures ---
 
@@ -32,6 +41,10 @@ struct AppState {
     zkengine_binary: String,
     proofs_dir: String,
     wasm_dir: String,
+    proof_store: Arc<ProofStore>,
+    proof_catalog: Arc<ProofCatalog>,
+    artifact_store: Arc<ArtifactStore>,
+    verification_cache: Arc<VerificationCache>,
 }
 
 #[derive(serde::Deserialize, serde::Serialize, Clone, Debug)]
@@ -43,6 +56,26 @@ struct ProofMetadata {
     additional_context: Option<serde_json::Value>,
 }
 
+// --- Tracing Helpers ---
+
+// Wall-clock time in epoch milliseconds, comparable across processes
+fn epoch_ms() -> u64 {
+    std::time::SystemTime::now()
+        .duration_since(std::time::UNIX_EPOCH)
+        .map(|d| d.as_millis() as u64)
+        .unwrap_or(0)
+}
+
+// Trace ID propagated by the workflow executor in additional_context.trace
+fn trace_id_of(metadata: &ProofMetadata) -> String {
+    metadata.additional_context.as_ref()
+        .and_then(|ctx| ctx.get("trace"))
+        .and_then(|trace| trace.get("trace_id"))
+        .and_then(|id| id.as_str())
+        .unwrap_or("-")
+        .to_string()
+}
+
 // --- Main Application ---
 
 #[tokio::main]
@@ -61,9 +94,41 @@ async fn main() {
     let wasm_dir = std::env::var("WASM_DIR")
         .unwrap_or_else(|_| "./zkengine_binary".to_string());
     
+    let proof_store_path = std::env::var("PROOF_STORE_DB")
+        .unwrap_or_else(|_| "./proofs_db.sqlite".to_string());
+    let legacy_proofs_db = std::env::var("PROOFS_DB")
+        .unwrap_or_else(|_| "./proofs_db.json".to_string());
+    let artifact_store_dir = std::env::var("ARTIFACT_STORE_DIR")
+        .unwrap_or_else(|_| "./artifacts".to_string());
+    let artifact_scratch_dir = std::env::var("ARTIFACT_SCRATCH_DIR")
+        .unwrap_or_else(|_| std::env::temp_dir().join("agentkit-proofs").to_string_lossy().to_string());
+    let verification_cache_path = std::env::var("VERIFICATION_CACHE_DB")
+        .unwrap_or_else(|_| "./verification_cache.sqlite".to_string());
+    
     // Create proofs directory if it doesn't exist
     std::fs::create_dir_all(&proofs_dir).ok();
     
+    // Open the proof metadata store, importing proofs_db.json on first run
+    let proof_store = Arc::new(
+        ProofStore::open(&proof_store_path, Some(&legacy_proofs_db))
+            .expect("Failed to open proof store")
+    );
+    
+    // Scan the proof directories once; notifications keep the catalog current
+    let proof_catalog = ProofCatalog::start(&proofs_dir);
+    
+    // Content-addressed store that proof.bin files are moved into after generation
+    let artifact_store = Arc::new(
+        ArtifactStore::open(&artifact_store_dir, &artifact_scratch_dir)
+            .expect("Failed to open artifact store")
+    );
+    
+    // Verification results keyed by proof content, shared with chat_service
+    let verification_cache = Arc::new(
+        VerificationCache::open(&verification_cache_path)
+            .expect("Failed to open verification cache")
+    );
+    
     let (tx, _rx) = broadcast::channel(100);
 
     let state = AppState {
@@ -72,6 +137,10 @@ async fn main() {
         zkengine_binary,
         proofs_dir,
         wasm_dir,
+        proof_store,
+        proof_catalog,
+        artifact_store,
+        verification_cache,
     };
 
     let app = Router::new()
@@ -86,6 +155,7 @@ async fn main() {
         .route("/api/proof/:proof_id/solana", get(export_proof_solana))
         .route("/api/proof/:proof_id/update-verification", post(update_proof_verification))
         .route("/api/v1/proof/:proof_id/verify", get(verify_proof_endpoint))
+        .route("/api/v1/proof/:proof_id/download", get(download_proof))
         .nest_service("/static", tower_http::services::ServeDir::new("static"))
         .with_state(state);
 
@@ -104,8 +174,19 @@ async fn workflow_update_handler(
     State(state): State<AppState>,
     Json(payload): Json<serde_json::Value>,
 ) -> impl IntoResponse {
-    // Forward the workflow update to all connected WebSocket clients
-    if state.tx.send(payload.to_string()).is_err() {
+    // Forward the workflow update(s) to all connected WebSocket clients.
+    // chat_service batches updates into a JSON array; each is broadcast on its own.
+    let updates = match payload {
+        serde_json::Value::Array(items) => items,
+        single => vec![single],
+    };
+    let mut failed = false;
+    for update in updates {
+        if state.tx.send(update.to_string()).is_err() {
+            failed = true;
+        }
+    }
+    if failed {
         error!("Failed to broadcast workflow update");
         return (StatusCode::INTERNAL_SERVER_ERROR, "Failed to broadcast");
     }
@@ -115,41 +196,59 @@ async fn workflow_update_handler(
 
 // --- Get Proofs List ---
 
+const PROOF_PAGE_DEFAULT: i64 = 100;
+const PROOF_PAGE_MAX: i64 = 1000;
+
+#[derive(serde::Deserialize)]
+struct ProofListQuery {
+    limit: Option<i64>,
+    offset: Option<i64>,
+    status: Option<String>,
+}
+
 async fn get_proofs(
-    State(_state): State<AppState>,
+    State(state): State<AppState>,
+    Query(query): Query<ProofListQuery>,
 ) -> impl IntoResponse {
-    let proofs_db_path = PathBuf::from("proofs_db.json");
-    
-    if let Ok(content) = std::fs::read_to_string(&proofs_db_path) {
-        if let Ok(db) = serde_json::from_str::<serde_json::Value>(&content) {
-            let proofs: Vec<serde_json::Value> = db.as_object()
-                .map(|obj| {
-                    obj.iter()
-                        .filter_map(|(id, proof)| {
-                            let mut proof = proof.clone();
-                            if let Some(obj) = proof.as_object_mut() {
-                                // Add the ID field
-                                obj.insert("id".to_string(), json!(id));
-                                
-                                // Extract function from metadata if not at top level
-                                if let Some(metadata) = obj.get("metadata") {
-                                    if let Some(function) = metadata.get("function") {
-                                        obj.insert("function".to_string(), function.clone());
-                                    }
-                                }
-                            }
-                            Some(proof)
-                        })
-                        .collect()
+    let limit = query
+        .limit
+        .unwrap_or(PROOF_PAGE_DEFAULT)
+        .clamp(1, PROOF_PAGE_MAX);
+    let offset = query.offset.unwrap_or(0).max(0);
+    match state
+        .proof_store
+        .list(query.status.as_deref(), limit, offset)
+    {
+        Ok(entries) => {
+            let proofs: Vec<serde_json::Value> = entries
+                .into_iter()
+                .map(|mut proof| {
+                    // Extract function from metadata if not at top level
+                    if let Some(function) = proof
+                        .get("metadata")
+                        .and_then(|m| m.get("function"))
+                        .cloned()
+                    {
+                        proof["function"] = function;
+                    }
+                    proof
                 })
-                .unwrap_or_default();
-            
-            return (StatusCode::OK, Json(json!({ "proofs": proofs })));
+                .collect();
+
+            (
+                StatusCode::OK,
+                Json(json!({ "proofs": proofs, "limit": limit, "offset": offset })),
+            )
+        }
+        Err(e) => {
+            error!("Failed to read proof store: {}", e);
+            // Fallback to empty list
+            (
+                StatusCode::OK,
+                Json(json!({ "proofs": [], "limit": limit, "offset": offset })),
+            )
         }
     }
-    
-    // Fallback to empty list
-    (StatusCode::OK, Json(json!({ "proofs": [] })))
 }
 
 // --- Local Proof Verification Endpoint ---
@@ -160,18 +259,11 @@ async fn verify_proof_endpoint(
 ) -> impl IntoResponse {
     info!("Local verification request for proof {}", proof_id);
     
-    // Load proof metadata from database
-    let proofs_db_path = PathBuf::from("proofs_db.json");
-    
-    let metadata = if let Ok(content) = std::fs::read_to_string(&proofs_db_path) {
-        if let Ok(db) = serde_json::from_str::<serde_json::Value>(&content) {
-            db.get(&proof_id).cloned()
-        } else {
-            None
-        }
-    } else {
+    // Load proof metadata from the store
+    let metadata = state.proof_store.get(&proof_id).unwrap_or_else(|e| {
+        error!("Failed to read proof store: {}", e);
         None
-    };
+    });
     
     if metadata.is_none() {
         return (
@@ -215,24 +307,25 @@ async fn verify_proof_endpoint(
     
     // Check if proof files exist
     let proof_dir = PathBuf::from(&state.proofs_dir).join(&proof_id);
-    let proof_path = proof_dir.join("proof.bin");
     let public_path = proof_dir.join("public.json");
     
-    // Check for cached verification
+    // Check for a cached result for exactly these proof and public inputs
     let verified_marker = proof_dir.join(".verified");
-    if verified_marker.exists() {
+    let cache_key = verification_cache::key_in_background(proof_dir.clone(), proof_metadata.step_size).await;
+    if let Some(valid) = cache_key.as_ref().and_then(|key| state.verification_cache.lookup(key)) {
+        state.artifact_store.record_access(&proof_dir);
         return (
             StatusCode::OK,
             Json(json!({
-                "valid": true,
-                "details": "Proof verified (cached result)",
+                "valid": valid,
+                "details": if valid { "Proof verified (cached result)" } else { "Proof verification failed (cached result)" },
                 "proof_id": proof_id,
                 "cached": true
             }))
         );
     }
     
-    if !proof_path.exists() || !public_path.exists() {
+    if !artifact_store::has_proof(&proof_dir) || !public_path.exists() {
         return (
             StatusCode::NOT_FOUND,
             Json(json!({
@@ -242,17 +335,42 @@ async fn verify_proof_endpoint(
         );
     }
     
+    // zkEngine needs a file path; stored proofs are decompressed to scratch,
+    // after recalling them from the cold tier if they were offloaded
+    let proof_file = artifact_store::with_recall(
+        state.artifact_store.clone(), &state.langchain_url, &proof_dir,
+        |store, dir| store.materialize(dir),
+    ).await;
+    let proof_file = match proof_file {
+        Ok(proof_file) => proof_file,
+        Err(e) => {
+            error!("Failed to read proof artifact for {}: {}", proof_id, e);
+            return (
+                StatusCode::INTERNAL_SERVER_ERROR,
+                Json(json!({
+                    "error": "Failed to read proof artifact",
+                    "details": e.to_string()
+                }))
+            );
+        }
+    };
+    
     // Run verification
     let mut cmd = Command::new(&state.zkengine_binary);
     cmd.arg("verify")
         .arg("--step").arg(proof_metadata.step_size.to_string())
-        .arg(&proof_path)
+        .arg(&proof_file.path)
         .arg(&public_path);
     
-    match cmd.output().await {
+    let run = cmd.output().await;
+    if let Some(key) = &cache_key {
+        // Only runs that reached a verdict are cached
+        state.verification_cache.record_run(key, &proof_id, &run);
+    }
+    match run {
         Ok(output) => {
             if output.status.success() {
-                // Create verification marker
+                // The marker still drives the "verified" flag in proof listings
                 std::fs::write(verified_marker, "").ok();
                 
                 (StatusCode::OK, Json(json!({
@@ -281,6 +399,53 @@ async fn verify_proof_endpoint(
     }
 }
 
+// --- Proof Download ---
+
+async fn download_proof(
+    Path(proof_id): Path<String>,
+    State(state): State<AppState>,
+) -> axum::response::Response {
+    let dir_name = state.proof_catalog.resolve(&proof_id)
+        .map(|entry| entry.dir_name)
+        .unwrap_or_else(|| proof_id.clone());
+    let proof_dir = PathBuf::from(&state.proofs_dir).join(&dir_name);
+    if !artifact_store::has_proof(&proof_dir) {
+        return (
+            StatusCode::NOT_FOUND,
+            Json(json!({ "error": "Proof not found", "proof_id": proof_id }))
+        ).into_response();
+    }
+    // Open before answering so a demotion racing the recall is retried;
+    // once open, the bytes stay readable even if the object is offloaded
+    let reader = match artifact_store::with_recall(
+        state.artifact_store.clone(), &state.langchain_url, &proof_dir,
+        |store, dir| store.open_reader(dir),
+    ).await {
+        Ok(reader) => reader,
+        Err(e) => {
+            error!("Failed to recall proof artifact for {}: {}", proof_id, e);
+            return (
+                StatusCode::SERVICE_UNAVAILABLE,
+                Json(json!({ "error": "Proof artifact is offloaded and could not be recalled", "proof_id": proof_id }))
+            ).into_response();
+        }
+    };
+
+    // Decompress while sending instead of buffering the whole proof
+    let chunks = artifact_store::stream_chunks(reader);
+    let body = axum::body::StreamBody::new(futures_util::stream::unfold(chunks, |mut rx| async move {
+        rx.recv().await.map(|chunk| (chunk, rx))
+    }));
+    let disposition = format!("attachment; filename=\"{}.bin\"", proof_id);
+    (
+        [
+            (axum::http::header::CONTENT_TYPE, "application/octet-stream".to_string()),
+            (axum::http::header::CONTENT_DISPOSITION, disposition),
+        ],
+        body,
+    ).into_response()
+}
+
 // --- Update Proof Verification Data ---
 
 async fn update_proof_verification(
@@ -313,6 +478,11 @@ async fn update_proof_verification(
     
     // Update with on-chain verification data
     metadata["on_chain_verifications"] = verification_data;
+
+    // Proofs referenced on-chain are never garbage collected
+    if let Err(e) = state.proof_store.pin(&proof_id, "on_chain") {
+        error!("Failed to pin proof {}: {}", proof_id, e);
+    }
     
     // Write updated metadata back
     match std::fs::write(&metadata_path, serde_json::to_string_pretty(&metadata).unwrap()) {
@@ -757,7 +927,8 @@ async fn process_user_command(state: AppState, message: String) {
         }
         
         // Handle workflow update messages (from executor)
-        if msg_type == "workflow_started" || msg_type == "workflow_step_update" || msg_type == "workflow_completed" {
+        if matches!(msg_type, "workflow_started" | "workflow_step_update" | "workflow_completed"
+            | "workflow_delta" | "workflow_snapshot" | "workflow_snapshot_request") {
             info!("Broadcasting workflow update: {}", msg_type);
             
             // Log workflow_completed details to debug the "Hello!" loop
@@ -1004,41 +1175,28 @@ async fn process_user_command(state: AppState, message: String) {
 }
 
 // Helper function to update proofs database
-fn update_proofs_db(proof_id: &str, metadata: &ProofMetadata, metrics: serde_json::Value, status: &str) -> Result<(), Box<dyn std::error::Error>> {
-    let db_path = PathBuf::from("./proofs_db.json");
-    
-    // Read existing database or create new one
-    let mut db: serde_json::Map<String, serde_json::Value> = if db_path.exists() {
-        let content = std::fs::read_to_string(&db_path)?;
-        serde_json::from_str(&content).unwrap_or_default()
-    } else {
-        serde_json::Map::new()
-    };
-    
-    // Create proof entry
-    let proof_entry = json!({
-        "id": proof_id,
-        "timestamp": chrono::Utc::now().to_rfc3339(),
-        "metadata": metadata,
-        "metrics": metrics,
-        "status": status,
-        "file_path": format!("./proofs/{}/proof.bin", proof_id)
-    });
-    
-    // Add or update entry
-    db.insert(proof_id.to_string(), proof_entry);
-    
-    // Write back to file
-    let json_string = serde_json::to_string_pretty(&db)?;
-    std::fs::write(&db_path, json_string)?;
-    
+fn update_proofs_db(store: &ProofStore, proof_id: &str, metadata: &ProofMetadata, metrics: serde_json::Value, status: &str) -> Result<(), Box<dyn std::error::Error>> {
+    let metadata = serde_json::to_value(metadata)?;
+    let file_path = format!("./proofs/{}/proof.bin", proof_id);
+    store.upsert(proof_id, &metadata, &metrics, status, &file_path)?;
     Ok(())
 }
 
+// SHA-256 of a proof file, streamed so large proofs are not held in memory
+fn file_sha256(path: &std::path::Path) -> Option<String> {
+    use sha2::{Digest, Sha256};
+    let mut file = std::fs::File::open(path).ok()?;
+    let mut hasher = Sha256::new();
+    std::io::copy(&mut file, &mut hasher).ok()?;
+    Some(hex::encode(hasher.finalize()))
+}
+
 // --- FIXED Proof Generation with Correct WASM Files ---
 
 async fn generate_proof(state: AppState, proof_id: String, metadata: ProofMetadata) {
-    info!("Starting proof generation for {}", proof_id);
+    let received_ms = epoch_ms();
+    let trace_id = trace_id_of(&metadata);
+    info!("Starting proof generation for {} (trace_id={})", proof_id, trace_id);
     
     // Send status update with workflow context
     let status_msg = json!({
@@ -1115,17 +1273,20 @@ async fn generate_proof(state: AppState, proof_id: String, metadata: ProofMetada
     cmd.stdout(Stdio::piped())
         .stderr(Stdio::piped());
     
-    info!("Executing zkEngine command: {:?}", cmd);
+    info!("Executing zkEngine command: {:?} (trace_id={})", cmd, trace_id);
     let start_time = std::time::Instant::now();
+    let zkengine_start_ms = epoch_ms();
     
     match cmd.spawn() {
         Ok(child) => {
             match child.wait_with_output().await {
                 Ok(output) => {
                     let duration = start_time.elapsed();
+                    let zkengine_end_ms = epoch_ms();
                     
                     if output.status.success() {
-                        info!("Proof generated successfully for {}", proof_id);
+                        info!("Proof generated successfully for {} (trace_id={}, zkengine_ms={})",
+                            proof_id, trace_id, zkengine_end_ms.saturating_sub(zkengine_start_ms));
                         
                         // Read proof size
                         let proof_path = proof_dir.join("proof.bin");
@@ -1146,14 +1307,29 @@ async fn generate_proof(state: AppState, proof_id: String, metadata: ProofMetada
                             }
                         }
                         
+                        // Move proof.bin into the artifact store; the hash
+                        // computed there doubles as the proof's file_hash
+                        let artifact = artifact_store::ingest_in_background(
+                            state.artifact_store.clone(), proof_id.clone(), proof_dir.clone()
+                        ).await;
+                        let file_hash = match &artifact {
+                            Some(artifact) => Some(artifact.hash.clone()),
+                            None => file_sha256(&proof_path),
+                        };
+                        
                         // Update proofs database
-                        let metrics = json!({
+                        let mut metrics = json!({
                             "time_ms": duration.as_millis(),
                             "proof_size": proof_size,
-                            "generation_time_secs": duration.as_secs_f64()
+                            "generation_time_secs": duration.as_secs_f64(),
+                            "file_hash": file_hash
                         });
+                        if let Some(artifact) = &artifact {
+                            metrics["stored_size"] = json!(artifact.stored_size);
+                            metrics["deduplicated"] = json!(artifact.deduplicated);
+                        }
                         
-                        if let Err(e) = update_proofs_db(&proof_id, &metadata, metrics.clone(), "complete") {
+                        if let Err(e) = update_proofs_db(&state.proof_store, &proof_id, &metadata, metrics.clone(), "complete") {
                             error!("Failed to update proofs database: {}", e);
                         }
                         
@@ -1166,7 +1342,14 @@ async fn generate_proof(state: AppState, proof_id: String, metadata: ProofMetada
                             "workflowId": metadata.additional_context.as_ref()
                                 .and_then(|ctx| ctx.get("workflow_id"))
                                 .and_then(|id| id.as_str()),
-                            "additional_context": metadata.additional_context.clone()
+                            "additional_context": metadata.additional_context.clone(),
+                            "trace": {
+                                "trace_id": trace_id,
+                                "received_ms": received_ms,
+                                "zkengine_start_ms": zkengine_start_ms,
+                                "zkengine_end_ms": zkengine_end_ms,
+                                "completed_ms": epoch_ms()
+                            }
                         });
                         let _ = state.tx.send(success_msg.to_string());
                         
@@ -1180,7 +1363,7 @@ async fn generate_proof(state: AppState, proof_id: String, metadata: ProofMetada
                             "error": String::from_utf8_lossy(&output.stderr).to_string()
                         });
                         
-                        if let Err(e) = update_proofs_db(&proof_id, &metadata, metrics, "failed") {
+                        if let Err(e) = update_proofs_db(&state.proof_store, &proof_id, &metadata, metrics, "failed") {
                             error!("Failed to update proofs database: {}", e);
                         }
                         
@@ -1218,7 +1401,9 @@ async fn generate_proof(state: AppState, proof_id: String, metadata: ProofMetada
 // --- Proof Verification ---
 
 async fn verify_proof(state: AppState, proof_id: String, metadata: ProofMetadata) {
-    info!("Starting proof verification for {}", proof_id);
+    let received_ms = epoch_ms();
+    let trace_id = trace_id_of(&metadata);
+    info!("Starting proof verification for {} (trace_id={})", proof_id, trace_id);
     
     // Send status update with workflow context
     let status_msg = json!({
@@ -1259,32 +1444,37 @@ async fn verify_proof(state: AppState, proof_id: String, metadata: ProofMetadata
         }
     }
     
-    let proof_path = proof_dir.join("proof.bin");
     let public_path = proof_dir.join("public.json");
     
-    // Check for cached verification result
-    let verified_marker = proof_dir.join(".verified");
-    if verified_marker.exists() {
-        info!("Using cached verification for {} (already verified)", proof_id);
+    // Check for a cached result for exactly these proof and public inputs
+    let cache_key = verification_cache::key_in_background(proof_dir.clone(), metadata.step_size).await;
+    if let Some(valid) = cache_key.as_ref().and_then(|key| state.verification_cache.lookup(key)) {
+        info!("Using cached verification for {} (valid={})", proof_id, valid);
+        state.artifact_store.record_access(&proof_dir);
         
         let success_msg = json!({
             "type": "verification_complete",
             "proof_id": proof_id,
-            "status": "verified",
-            "result": "VALID",
+            "status": if valid { "verified" } else { "invalid" },
+            "result": if valid { "VALID" } else { "INVALID" },
             "cached": true,
             "metadata": &metadata,
             "workflowId": metadata.additional_context.as_ref()
                 .and_then(|ctx| ctx.get("workflow_id"))
                 .and_then(|id| id.as_str()),
-            "additional_context": metadata.additional_context.clone()
+            "additional_context": metadata.additional_context.clone(),
+            "trace": {
+                "trace_id": trace_id,
+                "received_ms": received_ms,
+                "completed_ms": epoch_ms()
+            }
         });
         let _ = state.tx.send(success_msg.to_string());
         return;
     }
     
     // Check if proof files exist
-    if !proof_path.exists() || !public_path.exists() {
+    if !artifact_store::has_proof(&proof_dir) || !public_path.exists() {
         error!("Proof files not found for {}", proof_id);
         let err_msg = json!({
             "type": "verification_error",
@@ -1295,22 +1485,55 @@ async fn verify_proof(state: AppState, proof_id: String, metadata: ProofMetadata
         return;
     }
     
+    // zkEngine needs a file path; stored proofs are decompressed to scratch,
+    // after recalling them from the cold tier if they were offloaded
+    let proof_file = artifact_store::with_recall(
+        state.artifact_store.clone(), &state.langchain_url, &proof_dir,
+        |store, dir| store.materialize(dir),
+    ).await;
+    let proof_file = match proof_file {
+        Ok(proof_file) => proof_file,
+        Err(e) => {
+            error!("Failed to read proof artifact for {}: {}", proof_id, e);
+            let err_msg = json!({
+                "type": "verification_error",
+                "proof_id": proof_id,
+                "error": format!("Failed to read proof artifact: {}", e)
+            });
+            let _ = state.tx.send(err_msg.to_string());
+            return;
+        }
+    };
+    
     // Build verification command
     let mut cmd = Command::new(&state.zkengine_binary);
     cmd.arg("verify")
         .arg("--step").arg(metadata.step_size.to_string())
-        .arg(&proof_path)
+        .arg(&proof_file.path)
         .arg(&public_path);
     
     cmd.stdout(Stdio::piped())
         .stderr(Stdio::piped());
     
+    let zkengine_start_ms = epoch_ms();
     match cmd.spawn() {
         Ok(child) => {
-            match child.wait_with_output().await {
+            let run = child.wait_with_output().await;
+            if let Some(key) = &cache_key {
+                state.verification_cache.record_run(key, &proof_id, &run);
+            }
+            match run {
                 Ok(output) => {
+                    let trace = json!({
+                        "trace_id": trace_id,
+                        "received_ms": received_ms,
+                        "zkengine_start_ms": zkengine_start_ms,
+                        "zkengine_end_ms": epoch_ms(),
+                        "completed_ms": epoch_ms()
+                    });
+                    
                     if output.status.success() {
-                        info!("Proof verified successfully for {}", proof_id);
+                        info!("Proof verified successfully for {} (trace_id={})", proof_id, trace_id);
                         
                         // Create .verified marker file
                         std::fs::write(proof_dir.join(".verified"), "").ok();
@@ -1324,7 +1547,8 @@ async fn verify_proof(state: AppState, proof_id: String, metadata: ProofMetadata
                             "workflowId": metadata.additional_context.as_ref()
                                 .and_then(|ctx| ctx.get("workflow_id"))
                                 .and_then(|id| id.as_str()),
-                            "additional_context": metadata.additional_context.clone()
+                            "additional_context": metadata.additional_context.clone(),
+                            "trace": trace
                         });
                         let _ = state.tx.send(success_msg.to_string());
                         
@@ -1338,7 +1562,8 @@ async fn verify_proof(state: AppState, proof_id: String, metadata: ProofMetadata
                             "workflowId": metadata.additional_context.as_ref()
                                 .and_then(|ctx| ctx.get("workflow_id"))
                                 .and_then(|id| id.as_str()),
-                            "additional_context": metadata.additional_context.clone()
+                            "additional_context": metadata.additional_context.clone(),
+                            "trace": trace
                         });
                         let _ = state.tx.send(err_msg.to_string());
                     }
@@ -1370,207 +1595,164 @@ async fn verify_proof(state: AppState, proof_id: String, metadata: ProofMetadata
 
 async fn list_proofs(state: AppState, metadata: ProofMetadata) {
     info!("Listing proofs");
-    
-    let list_type = metadata.arguments.get(0)
+
+    let list_type = metadata
+        .arguments
+        .get(0)
         .map(|s| s.as_str())
         .unwrap_or("proofs");
-    
-    let proofs_dir = PathBuf::from(&state.proofs_dir);
-    let db_path = PathBuf::from("./proofs_db.json");
-    
+
     let mut proofs = Vec::new();
-    let mut seen_ids = std::collections::HashSet::<String>::new();
-    
-    // First, read from proofs database
-    if db_path.exists() {
-        if let Ok(content) = std::fs::read_to_string(&db_path) {
-            if let Ok(db) = serde_json::from_str::<serde_json::Map<String, serde_json::Value>>(&content) {
-                for (proof_id, entry) in db {
-                    seen_ids.insert(proof_id.clone());
-                    
-                    // Extract relevant fields from database entry
-                    let timestamp = entry.get("timestamp")
-                        .and_then(|t| t.as_str())
-                        .and_then(|t| chrono::DateTime::parse_from_rfc3339(t).ok())
-                        .map(|t| t.timestamp() as u64)
-                        .unwrap_or(0);
-                    
-                    let function = entry.get("metadata")
-                        .and_then(|m| m.get("function"))
-                        .and_then(|f| f.as_str())
-                        .unwrap_or("unknown")
-                        .to_string();
-                    
-                    let metrics = entry.get("metrics")
-                        .cloned()
-                        .unwrap_or(json!({}));
-                    
-                    let status = entry.get("status")
-                        .and_then(|s| s.as_str())
-                        .unwrap_or("unknown");
-                    
-                    // Check if proof file still exists
-                    let mut proof_path = PathBuf::from(&state.proofs_dir).join(&proof_id);
-                    
-                    // If directory doesn't exist, try alternative naming patterns
-                    if !proof_path.exists() {
-                        if proof_id.starts_with("proof_") {
-                            let alt_id = proof_id.replacen("proof_", "prove_", 1);
-                            let alt_path = PathBuf::from(&state.proofs_dir).join(&alt_id);
-                            if alt_path.exists() {
-                                proof_path = alt_path;
-                            }
-                        } else if proof_id.starts_with("prove_") {
-                            let alt_id = proof_id.replacen("prove_", "proof_", 1);
-                            let alt_path = PathBuf::from(&state.proofs_dir).join(&alt_id);
-                            if alt_path.exists() {
-                                proof_path = alt_path;
-                            }
-                        }
-                    }
-                    
-                    let exists = proof_path.join("proof.bin").exists();
-                    let verified = proof_path.join(".verified").exists();
-                    
-                    // Check for on-chain verifications
-                    let metadata_path = proof_path.join("metadata.json");
-                    let on_chain_verifications = if let Ok(metadata_content) = std::fs::read_to_string(&metadata_path) {
-                        if let Ok(metadata_json) = serde_json::from_str::<serde_json::Value>(&metadata_content) {
-                            metadata_json.get("on_chain_verifications").cloned().unwrap_or(serde_json::Value::Null)
-                        } else {
-                            serde_json::Value::Null
-                        }
-                    } else {
-                        serde_json::Value::Null
-                    };
-                    
-                    // Only include if it matches the filter
-                    if list_type == "verifications" && !verified && on_chain_verifications.is_null() {
-                        continue;
-                    }
-                    
-                    if exists && status == "complete" {
-                        let mut proof_json = json!({
-                            "proof_id": proof_id,
-                            "timestamp": timestamp,
-                            "verified": verified,
-                            "function": function,
-                            "metrics": metrics,
-                            "from_db": true
-                        });
-                        
-                        // Add on-chain verifications if available
-                        if !on_chain_verifications.is_null() {
-                            proof_json["on_chain_verifications"] = on_chain_verifications;
-                        }
-                        
-                        proofs.push(proof_json);
-                    }
+    const LIST_LIMIT: usize = 20;
+    const PAGE_SIZE: i64 = 100;
+
+    // First, read completed proofs from the store, newest first, until the
+    // page is full; older rows can never make it into the response
+    let mut offset = 0;
+    'store: loop {
+        let page = match state.proof_store.list(Some("complete"), PAGE_SIZE, offset) {
+            Ok(page) => page,
+            Err(e) => {
+                error!("Failed to read proof store: {}", e);
+                break;
+            }
+        };
+        if page.is_empty() {
+            break;
+        }
+        offset += page.len() as i64;
+
+        for entry in page {
+            let proof_id = match entry.get("id").and_then(|id| id.as_str()) {
+                Some(id) => id.to_string(),
+                None => continue,
+            };
+
+            // Extract relevant fields from database entry
+            let timestamp = entry
+                .get("timestamp")
+                .and_then(|t| t.as_str())
+                .and_then(|t| chrono::DateTime::parse_from_rfc3339(t).ok())
+                .map(|t| t.timestamp() as u64)
+                .unwrap_or(0);
+
+            let function = entry
+                .get("metadata")
+                .and_then(|m| m.get("function"))
+                .and_then(|f| f.as_str())
+                .unwrap_or("unknown")
+                .to_string();
+
+            let metrics = entry.get("metrics").cloned().unwrap_or(json!({}));
+
+            let status = entry
+                .get("status")
+                .and_then(|s| s.as_str())
+                .unwrap_or("unknown");
+
+            // Proof directory state comes from the catalog, which also
+            // resolves the proof_/prove_ alternate directory names
+            let (exists, verified, on_chain_verifications) =
+                match state.proof_catalog.resolve(&proof_id) {
+                    Some(entry) => (
+                        entry.proof_exists,
+                        entry.verified,
+                        entry.on_chain_verifications,
+                    ),
+                    None => (false, false, serde_json::Value::Null),
+                };
+
+            // Only include if it matches the filter
+            if list_type == "verifications" && !verified && on_chain_verifications.is_null() {
+                continue;
+            }
+
+            if exists && status == "complete" {
+                let mut proof_json = json!({
+                    "proof_id": proof_id,
+                    "timestamp": timestamp,
+                    "verified": verified,
+                    "function": function,
+                    "metrics": metrics,
+                    "from_db": true
+                });
+
+                // Add on-chain verifications if available
+                if !on_chain_verifications.is_null() {
+                    proof_json["on_chain_verifications"] = on_chain_verifications;
+                }
+
+                proofs.push(proof_json);
+                if proofs.len() >= LIST_LIMIT {
+                    break 'store;
                 }
             }
         }
     }
-    
-    // Then read all proof directories not in database
-    if let Ok(entries) = std::fs::read_dir(&proofs_dir) {
-        for entry in entries.flatten() {
-            if let Ok(file_name) = entry.file_name().into_string() {
-                if file_name.starts_with("proof_") && !seen_ids.contains(&file_name) {
-                    let proof_path = entry.path();
-                    
-                    // Check if this is a valid proof directory
-                    if proof_path.join("proof.bin").exists() {
-                        // Get creation time
-                        let timestamp = entry.metadata()
-                            .ok()
-                            .and_then(|m| m.created().ok())
-                            .and_then(|t| t.duration_since(std::time::UNIX_EPOCH).ok())
-                            .map(|d| d.as_secs())
-                            .unwrap_or(0);
-                        
-                        let verified = proof_path.join(".verified").exists();
-                        
-                        // Try to read metadata file to get function name and verification data
-                        let function;
-                        let mut on_chain_verifications = serde_json::Value::Null;
-                        let mut time_ms: Option<u64> = None;
-                        
-                        if let Ok(metadata_content) = std::fs::read_to_string(proof_path.join("metadata.json")) {
-                            if let Ok(metadata_json) = serde_json::from_str::<serde_json::Value>(&metadata_content) {
-                                function = metadata_json.get("function")
-                                    .and_then(|f| f.as_str())
-                                    .unwrap_or("unknown")
-                                    .to_string();
-                                
-                                // Get on-chain verification data if present
-                                if let Some(verif_data) = metadata_json.get("on_chain_verifications") {
-                                    on_chain_verifications = verif_data.clone();
-                                }
-                                
-                                // Get time_ms if present
-                                time_ms = metadata_json.get("time_ms")
-                                    .and_then(|t| t.as_u64());
-                            } else {
-                                function = infer_function_from_filename(&file_name);
-                            }
-                        } else {
-                            function = infer_function_from_filename(&file_name);
-                        }
-                        
-                        // Get proof size
-                        let proof_size = std::fs::metadata(proof_path.join("proof.bin"))
-                            .map(|m| m.len())
-                            .unwrap_or(0);
-                        
-                        // Only include if it matches the filter
-                        if list_type == "verifications" && !verified && on_chain_verifications.is_null() {
-                            continue;
-                        }
-                        
-                        let mut proof_json = json!({
-                            "proof_id": file_name,
-                            "timestamp": timestamp,
-                            "verified": verified,
-                            "function": function,
-                            "metrics": {
-                                "proof_size": proof_size
-                            }
-                        });
-                        
-                        // Add time_ms if available
-                        if let Some(time) = time_ms {
-                            proof_json["metrics"]["time_ms"] = json!(time);
-                        }
-                        
-                        // Add on-chain verifications if available
-                        if !on_chain_verifications.is_null() {
-                            proof_json["on_chain_verifications"] = on_chain_verifications;
-                        }
-                        
-                        proofs.push(proof_json);
-                    }
-                }
+
+    // Then proof directories not in the database, newest first, from the catalog
+    let untracked = state.proof_catalog.newest(|entry| {
+        entry.dir_name.starts_with("proof_")
+            && entry.proof_exists
+            && (list_type != "verifications"
+                || entry.verified
+                || !entry.on_chain_verifications.is_null())
+    });
+    let mut untracked_added = 0;
+    for entry in untracked {
+        if untracked_added >= LIST_LIMIT {
+            break;
+        }
+        if state.proof_store.contains(&entry.dir_name).unwrap_or(false) {
+            continue;
+        }
+
+        let function = entry
+            .function
+            .clone()
+            .unwrap_or_else(|| infer_function_from_filename(&entry.dir_name));
+
+        let mut proof_json = json!({
+            "proof_id": entry.dir_name,
+            "timestamp": entry.created_secs,
+            "verified": entry.verified,
+            "function": function,
+            "metrics": {
+                "proof_size": entry.proof_size
             }
+        });
+
+        // Add time_ms if available
+        if let Some(time) = entry.time_ms {
+            proof_json["metrics"]["time_ms"] = json!(time);
+        }
+
+        // Add on-chain verifications if available
+        if !entry.on_chain_verifications.is_null() {
+            proof_json["on_chain_verifications"] = entry.on_chain_verifications;
         }
+
+        proofs.push(proof_json);
+        untracked_added += 1;
     }
-    
+
     // Sort by timestamp (newest first)
     proofs.sort_by(|a, b| {
         let ts_a = a.get("timestamp").and_then(|v| v.as_u64()).unwrap_or(0);
         let ts_b = b.get("timestamp").and_then(|v| v.as_u64()).unwrap_or(0);
         ts_b.cmp(&ts_a)
     });
-    
+
     // Limit to 20 most recent
-    proofs.truncate(20);
-    
+    proofs.truncate(LIST_LIMIT);
+
     let response_msg = json!({
         "type": "list_response",
         "list_type": list_type,
         "proofs": proofs,
         "count": proofs.len()
     });
-    
+
     let _ = state.tx.send(response_msg.to_string());
 }
 
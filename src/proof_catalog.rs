@@ -0,0 +1,266 @@
+// In-memory catalog of proof directories under PROOFS_DIR
+//
+// list_proofs used to stat proof.bin and .verified, probe the proof_/prove_
+// alternate names and parse metadata.json for every proof on every request.
+// The catalog builds that view once and then re-reads only the directory a
+// filesystem notification points at, so listing costs no disk I/O.
+
+use notify::{Event, RecommendedWatcher, RecursiveMode, Watcher};
+use serde_json::Value;
+use std::collections::HashMap;
+use std::path::{Path, PathBuf};
+use std::sync::{Arc, Mutex, RwLock, Weak};
+use tracing::{info, warn};
+
+#[derive(Clone, Debug)]
+pub struct CatalogEntry {
+    pub dir_name: String,
+    pub created_secs: u64,
+    pub proof_exists: bool,
+    pub proof_size: u64,
+    pub verified: bool,
+    pub function: Option<String>,
+    pub time_ms: Option<u64>,
+    pub on_chain_verifications: Value,
+}
+
+#[derive(Default)]
+struct CatalogIndex {
+    entries: HashMap<String, CatalogEntry>,
+    // proof_<id> <-> prove_<id>, for IDs whose directory uses the other prefix
+    aliases: HashMap<String, String>,
+}
+
+pub struct ProofCatalog {
+    root: PathBuf,
+    index: RwLock<CatalogIndex>,
+    watcher: Mutex<Option<RecommendedWatcher>>,
+}
+
+fn alternate_name(name: &str) -> Option<String> {
+    if let Some(rest) = name.strip_prefix("proof_") {
+        Some(format!("prove_{}", rest))
+    } else {
+        name.strip_prefix("prove_").map(|rest| format!("proof_{}", rest))
+    }
+}
+
+fn read_entry(dir: &Path, dir_name: &str) -> Option<CatalogEntry> {
+    let dir_meta = std::fs::metadata(dir).ok()?;
+    if !dir_meta.is_dir() {
+        return None;
+    }
+    let created_secs = dir_meta.created()
+        .or_else(|_| dir_meta.modified())
+        .ok()
+        .and_then(|t| t.duration_since(std::time::UNIX_EPOCH).ok())
+        .map(|d| d.as_secs())
+        .unwrap_or(0);
+    // proof.bin, or the pointer left behind once it moved to the artifact store
+    let raw_size = std::fs::metadata(dir.join("proof.bin")).ok().map(|m| m.len());
+    let stored_size = std::fs::read_to_string(dir.join(crate::artifact_store::POINTER_FILE)).ok()
+        .and_then(|content| serde_json::from_str::<Value>(&content).ok())
+        .and_then(|pointer| pointer.get("size").and_then(|s| s.as_u64()));
+    let proof_size = raw_size.or(stored_size);
+
+    let mut entry = CatalogEntry {
+        dir_name: dir_name.to_string(),
+        created_secs,
+        proof_exists: proof_size.is_some(),
+        proof_size: proof_size.unwrap_or(0),
+        verified: dir.join(".verified").exists(),
+        function: None,
+        time_ms: None,
+        on_chain_verifications: Value::Null,
+    };
+    if let Ok(content) = std::fs::read_to_string(dir.join("metadata.json")) {
+        if let Ok(metadata_json) = serde_json::from_str::<Value>(&content) {
+            entry.function = metadata_json.get("function").and_then(|f| f.as_str()).map(String::from);
+            entry.time_ms = metadata_json.get("time_ms").and_then(|t| t.as_u64());
+            entry.on_chain_verifications = metadata_json.get("on_chain_verifications")
+                .cloned()
+                .unwrap_or(Value::Null);
+        }
+    }
+    Some(entry)
+}
+
+impl CatalogIndex {
+    fn insert(&mut self, entry: CatalogEntry) {
+        let name = entry.dir_name.clone();
+        self.aliases.remove(&name);
+        if let Some(alt) = alternate_name(&name) {
+            if !self.entries.contains_key(&alt) {
+                self.aliases.insert(alt, name.clone());
+            }
+        }
+        self.entries.insert(name, entry);
+    }
+
+    fn remove(&mut self, name: &str) {
+        if self.entries.remove(name).is_none() {
+            return;
+        }
+        if let Some(alt) = alternate_name(name) {
+            if self.aliases.get(&alt).map(|target| target == name).unwrap_or(false) {
+                self.aliases.remove(&alt);
+            }
+            // The alternate directory, if present, now answers for this name
+            if self.entries.contains_key(&alt) {
+                self.aliases.insert(name.to_string(), alt);
+            }
+        }
+    }
+}
+
+impl ProofCatalog {
+    // Scan PROOFS_DIR once and start watching it; falls back to rescanning on
+    // every query when notifications are unavailable
+    pub fn start(root: &str) -> Arc<Self> {
+        let catalog = Arc::new(ProofCatalog {
+            root: PathBuf::from(root),
+            index: RwLock::new(CatalogIndex::default()),
+            watcher: Mutex::new(None),
+        });
+        catalog.rescan();
+        match catalog.watch() {
+            Ok(watcher) => {
+                *catalog.watcher.lock().unwrap() = Some(watcher);
+                info!("Proof catalog watching {} ({} proofs)", root, catalog.len());
+            }
+            Err(e) => warn!("Proof catalog cannot watch {} ({}); rescanning per request", root, e),
+        }
+        catalog
+    }
+
+    fn watch(self: &Arc<Self>) -> notify::Result<RecommendedWatcher> {
+        let weak: Weak<ProofCatalog> = Arc::downgrade(self);
+        let mut watcher = notify::recommended_watcher(move |res: notify::Result<Event>| {
+            let catalog = match weak.upgrade() {
+                Some(catalog) => catalog,
+                None => return,
+            };
+            match res {
+                Ok(event) if event.need_rescan() => catalog.rescan(),
+                Ok(event) => {
+                    for path in &event.paths {
+                        if let Some(name) = catalog.dir_name_for(path) {
+                            catalog.refresh(&name);
+                        }
+                    }
+                }
+                Err(e) => {
+                    warn!("Proof catalog watch error ({}); rescanning", e);
+                    catalog.rescan();
+                }
+            }
+        })?;
+        watcher.watch(&self.root, RecursiveMode::Recursive)?;
+        Ok(watcher)
+    }
+
+    pub fn is_live(&self) -> bool {
+        self.watcher.lock().map(|w| w.is_some()).unwrap_or(false)
+    }
+
+    pub fn len(&self) -> usize {
+        self.index.read().unwrap().entries.len()
+    }
+
+    // Top-level proof directory that a changed path belongs to
+    fn dir_name_for(&self, path: &Path) -> Option<String> {
+        let relative = path.strip_prefix(&self.root).ok()?;
+        relative.components().next()
+            .and_then(|c| c.as_os_str().to_str())
+            .map(String::from)
+    }
+
+    pub fn rescan(&self) {
+        let mut index = CatalogIndex::default();
+        if let Ok(entries) = std::fs::read_dir(&self.root) {
+            for dir_entry in entries.flatten() {
+                if let Ok(name) = dir_entry.file_name().into_string() {
+                    if let Some(entry) = read_entry(&dir_entry.path(), &name) {
+                        index.insert(entry);
+                    }
+                }
+            }
+        }
+        *self.index.write().unwrap() = index;
+    }
+
+    // Re-read one proof directory after a change notification
+    pub fn refresh(&self, name: &str) {
+        let entry = read_entry(&self.root.join(name), name);
+        let mut index = self.index.write().unwrap();
+        match entry {
+            Some(entry) => index.insert(entry),
+            None => index.remove(name),
+        }
+    }
+
+    // Look up a proof by ID, following the proof_/prove_ alias index
+    pub fn resolve(&self, proof_id: &str) -> Option<CatalogEntry> {
+        if !self.is_live() {
+            self.refresh(proof_id);
+            if let Some(alt) = alternate_name(proof_id) {
+                self.refresh(&alt);
+            }
+        }
+        let index = self.index.read().unwrap();
+        index.entries.get(proof_id)
+            .or_else(|| index.aliases.get(proof_id).and_then(|name| index.entries.get(name)))
+            .cloned()
+    }
+
+    // Directories matching the filter, newest first
+    pub fn newest<F: Fn(&CatalogEntry) -> bool>(&self, filter: F) -> Vec<CatalogEntry> {
+        if !self.is_live() {
+            self.rescan();
+        }
+        let index = self.index.read().unwrap();
+        let mut entries: Vec<CatalogEntry> = index.entries.values()
+            .filter(|entry| filter(entry))
+            .cloned()
+            .collect();
+        entries.sort_by(|a, b| b.created_secs.cmp(&a.created_secs));
+        entries
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn entry(name: &str) -> CatalogEntry {
+        CatalogEntry {
+            dir_name: name.to_string(),
+            created_secs: 0,
+            proof_exists: true,
+            proof_size: 0,
+            verified: false,
+            function: None,
+            time_ms: None,
+            on_chain_verifications: Value::Null,
+        }
+    }
+
+    #[test]
+    fn test_alias_follows_alternate_prefix() {
+        let mut index = CatalogIndex::default();
+        index.insert(entry("prove_kyc_1"));
+        assert_eq!(index.aliases.get("proof_kyc_1").map(String::as_str), Some("prove_kyc_1"));
+
+        // A real directory under the alias name takes precedence
+        index.insert(entry("proof_kyc_1"));
+        index.insert(entry("prove_kyc_1"));
+        assert!(!index.aliases.contains_key("proof_kyc_1"));
+
+        // Removing one side lets the other answer for it
+        index.remove("proof_kyc_1");
+        assert_eq!(index.aliases.get("proof_kyc_1").map(String::as_str), Some("prove_kyc_1"));
+        index.remove("prove_kyc_1");
+        assert!(index.aliases.is_empty());
+        assert!(index.entries.is_empty());
+    }
+}
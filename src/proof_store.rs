@@ -0,0 +1,204 @@
+// SQLite-backed proof metadata store
+//
+// Replaces the read-modify-write cycle on proofs_db.json. The database runs in
+// WAL mode with indexes on timestamp, function, status and file hash, so the
+// API handlers never have to load every proof to answer a request. The schema
+// is shared with services/proof_store.py.
+
+use rusqlite::{params, Connection, OptionalExtension, Row};
+use serde_json::{json, Value};
+use std::path::Path;
+use std::sync::Mutex;
+use tracing::{info, warn};
+
+const SCHEMA_VERSION: i64 = 1;
+
+const SCHEMA: &str = "
+CREATE TABLE IF NOT EXISTS proofs (
+    id          TEXT PRIMARY KEY,
+    timestamp   TEXT NOT NULL,
+    created_ms  INTEGER NOT NULL,
+    function    TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    file_hash   TEXT,
+    file_path   TEXT,
+    metadata    TEXT NOT NULL,
+    metrics     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_proofs_created ON proofs(created_ms);
+CREATE INDEX IF NOT EXISTS idx_proofs_function ON proofs(function, created_ms);
+CREATE INDEX IF NOT EXISTS idx_proofs_status ON proofs(status, created_ms);
+CREATE INDEX IF NOT EXISTS idx_proofs_file_hash ON proofs(file_hash);
+CREATE TABLE IF NOT EXISTS proof_pins (
+    proof_id    TEXT NOT NULL,
+    reason      TEXT NOT NULL,
+    created_ms  INTEGER NOT NULL,
+    PRIMARY KEY (proof_id, reason)
+);
+";
+
+pub struct ProofStore {
+    conn: Mutex<Connection>,
+}
+
+fn timestamp_to_ms(timestamp: &str) -> i64 {
+    chrono::DateTime::parse_from_rfc3339(timestamp)
+        .map(|t| t.timestamp_millis())
+        .unwrap_or(0)
+}
+
+// Rebuild the proofs_db.json entry shape from a row
+fn row_to_entry(row: &Row) -> rusqlite::Result<Value> {
+    let metadata: String = row.get("metadata")?;
+    let metrics: String = row.get("metrics")?;
+    Ok(json!({
+        "id": row.get::<_, String>("id")?,
+        "timestamp": row.get::<_, String>("timestamp")?,
+        "metadata": serde_json::from_str::<Value>(&metadata).unwrap_or(json!({})),
+        "metrics": serde_json::from_str::<Value>(&metrics).unwrap_or(json!({})),
+        "status": row.get::<_, String>("status")?,
+        "file_path": row.get::<_, Option<String>>("file_path")?,
+    }))
+}
+
+impl ProofStore {
+    // Open (or create) the store; imports legacy_json once when the store is empty
+    pub fn open(path: &str, legacy_json: Option<&str>) -> rusqlite::Result<Self> {
+        if let Some(parent) = Path::new(path).parent() {
+            std::fs::create_dir_all(parent).ok();
+        }
+        let conn = Connection::open(path)?;
+        conn.busy_timeout(std::time::Duration::from_secs(10))?;
+        // journal_mode reports the resulting mode as a row
+        conn.pragma_update_and_check(None, "journal_mode", "WAL", |row| row.get::<_, String>(0))?;
+        conn.pragma_update(None, "synchronous", "NORMAL")?;
+        conn.execute_batch(SCHEMA)?;
+        let version: i64 = conn.query_row("PRAGMA user_version", [], |r| r.get(0))?;
+        if version < SCHEMA_VERSION {
+            conn.pragma_update(None, "user_version", SCHEMA_VERSION)?;
+        }
+
+        let store = ProofStore { conn: Mutex::new(conn) };
+        if let Some(json_path) = legacy_json {
+            if store.count()? == 0 && Path::new(json_path).exists() {
+                match store.migrate_from_json(json_path) {
+                    Ok(added) => info!("Migrated {} proofs from {} into {}", added, json_path, path),
+                    Err(e) => warn!("Failed to migrate {}: {}", json_path, e),
+                }
+            }
+        }
+        Ok(store)
+    }
+
+    pub fn count(&self) -> rusqlite::Result<i64> {
+        let conn = self.conn.lock().unwrap();
+        conn.query_row("SELECT COUNT(*) FROM proofs", [], |r| r.get(0))
+    }
+
+    // Insert or update a proof; an update keeps the original creation time
+    // so the proof does not jump to the top of newest-first listings
+    pub fn upsert(&self, proof_id: &str, metadata: &Value, metrics: &Value, status: &str, file_path: &str) -> rusqlite::Result<()> {
+        let timestamp = chrono::Utc::now().to_rfc3339();
+        let function = metadata.get("function").and_then(|f| f.as_str()).unwrap_or("unknown");
+        let file_hash = metrics.get("file_hash").and_then(|h| h.as_str());
+        let conn = self.conn.lock().unwrap();
+        conn.execute(
+            "INSERT INTO proofs (id, timestamp, created_ms, function, status, file_hash, file_path, metadata, metrics)
+             VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9)
+             ON CONFLICT(id) DO UPDATE SET
+                 function = excluded.function,
+                 status = excluded.status,
+                 file_hash = excluded.file_hash,
+                 file_path = excluded.file_path,
+                 metadata = excluded.metadata,
+                 metrics = excluded.metrics",
+            params![
+                proof_id,
+                timestamp,
+                timestamp_to_ms(&timestamp),
+                function,
+                status,
+                file_hash,
+                file_path,
+                metadata.to_string(),
+                metrics.to_string(),
+            ],
+        )?;
+        Ok(())
+    }
+
+    // Exempt a proof from garbage collection (services/proof_gc.py)
+    pub fn pin(&self, proof_id: &str, reason: &str) -> rusqlite::Result<()> {
+        let conn = self.conn.lock().unwrap();
+        conn.execute(
+            "INSERT OR IGNORE INTO proof_pins (proof_id, reason, created_ms) VALUES (?1, ?2, ?3)",
+            params![proof_id, reason, chrono::Utc::now().timestamp_millis()],
+        )?;
+        Ok(())
+    }
+
+    pub fn get(&self, proof_id: &str) -> rusqlite::Result<Option<Value>> {
+        let conn = self.conn.lock().unwrap();
+        conn.query_row("SELECT * FROM proofs WHERE id = ?1", params![proof_id], row_to_entry)
+            .optional()
+    }
+
+    pub fn contains(&self, proof_id: &str) -> rusqlite::Result<bool> {
+        let conn = self.conn.lock().unwrap();
+        conn.query_row("SELECT 1 FROM proofs WHERE id = ?1", params![proof_id], |_| Ok(()))
+            .optional()
+            .map(|found| found.is_some())
+    }
+
+    // Newest first, optionally restricted to one status
+    pub fn list(&self, status: Option<&str>, limit: i64, offset: i64) -> rusqlite::Result<Vec<Value>> {
+        let conn = self.conn.lock().unwrap();
+        match status {
+            Some(status) => {
+                let mut stmt = conn.prepare_cached(
+                    "SELECT * FROM proofs WHERE status = ?1 ORDER BY created_ms DESC LIMIT ?2 OFFSET ?3")?;
+                let rows = stmt.query_map(params![status, limit, offset], row_to_entry)?;
+                rows.collect()
+            }
+            None => {
+                let mut stmt = conn.prepare_cached(
+                    "SELECT * FROM proofs ORDER BY created_ms DESC LIMIT ?1 OFFSET ?2")?;
+                let rows = stmt.query_map(params![limit, offset], row_to_entry)?;
+                rows.collect()
+            }
+        }
+    }
+
+    // One-shot import of a legacy proofs_db.json, keeping rows already present
+    pub fn migrate_from_json(&self, json_path: &str) -> Result<usize, Box<dyn std::error::Error>> {
+        let content = std::fs::read_to_string(json_path)?;
+        let db: serde_json::Map<String, Value> = serde_json::from_str(&content)?;
+        let mut conn = self.conn.lock().unwrap();
+        let tx = conn.transaction()?;
+        let mut added = 0;
+        {
+            let mut stmt = tx.prepare(
+                "INSERT OR IGNORE INTO proofs (id, timestamp, created_ms, function, status, file_hash, file_path, metadata, metrics)
+                 VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9)")?;
+            for (proof_id, entry) in db.iter() {
+                let timestamp = entry.get("timestamp").and_then(|t| t.as_str()).unwrap_or("");
+                let metadata = entry.get("metadata").cloned().unwrap_or(json!({}));
+                let metrics = entry.get("metrics").cloned().unwrap_or(json!({}));
+                let default_path = format!("./proofs/{}/proof.bin", proof_id);
+                added += stmt.execute(params![
+                    proof_id,
+                    timestamp,
+                    timestamp_to_ms(timestamp),
+                    metadata.get("function").and_then(|f| f.as_str()).unwrap_or("unknown"),
+                    entry.get("status").and_then(|s| s.as_str()).unwrap_or("unknown"),
+                    metrics.get("file_hash").and_then(|h| h.as_str()),
+                    entry.get("file_path").and_then(|p| p.as_str()).unwrap_or(&default_path),
+                    metadata.to_string(),
+                    metrics.to_string(),
+                ])?;
+            }
+        }
+        tx.commit()?;
+        Ok(added)
+    }
+}
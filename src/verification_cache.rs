@@ -1,54 +1,257 @@
-use std::collections::HashMap;
-use std::sync::{Arc, Mutex};
-use std::time::{Duration, Instant};
-use serde_json::json;
+// Persistent verification result cache keyed by proof content
+//
+// A zero-byte .verified marker said nothing about which bytes were verified,
+// and proofs without it always re-ran zkEngine. Results are now stored in
+// SQLite under (proof hash, public.json hash, step size), so they survive
+// restarts, stay valid when a proof is re-ingested or renamed, and miss as
+// soon as either file changes. Hit/miss counters live in the same database.
+// The schema is shared with services/verification_cache.py.
 
-#[derive(Clone, Debug)]
-pub struct CachedVerification {
-    pub result: String,
-    pub timestamp: Instant,
-    pub proof_size: u64,
+use rusqlite::{params, Connection, OptionalExtension};
+use sha2::{Digest, Sha256};
+use std::io;
+use std::path::{Path, PathBuf};
+use std::process::Output;
+use std::sync::Mutex;
+use tracing::warn;
+
+const SCHEMA: &str = "
+CREATE TABLE IF NOT EXISTS verifications (
+    proof_hash   TEXT NOT NULL,
+    public_hash  TEXT NOT NULL,
+    step_size    INTEGER NOT NULL,
+    valid        INTEGER NOT NULL,
+    proof_id     TEXT,
+    verified_ms  INTEGER NOT NULL,
+    hit_count    INTEGER NOT NULL DEFAULT 0,
+    last_hit_ms  INTEGER,
+    PRIMARY KEY (proof_hash, public_hash, step_size)
+);
+CREATE INDEX IF NOT EXISTS idx_verifications_proof_id ON verifications(proof_id);
+CREATE TABLE IF NOT EXISTS cache_stats (
+    name   TEXT PRIMARY KEY,
+    value  INTEGER NOT NULL
+);
+";
+
+#[derive(Clone, Debug, PartialEq, Eq)]
+pub struct VerificationKey {
+    pub proof_hash: String,
+    pub public_hash: String,
+    pub step_size: u64,
 }
 
 pub struct VerificationCache {
-    cache: Arc<Mutex<HashMap<String, CachedVerification>>>,
-    ttl: Duration,
+    conn: Mutex<Connection>,
+}
+
+fn sha256_file(path: &Path) -> io::Result<String> {
+    let mut file = std::fs::File::open(path)?;
+    let mut hasher = Sha256::new();
+    io::copy(&mut file, &mut hasher)?;
+    Ok(hex::encode(hasher.finalize()))
+}
+
+fn epoch_ms() -> i64 {
+    chrono::Utc::now().timestamp_millis()
+}
+
+// Stored proofs already carry their hash in proof.ref; only raw proof.bin
+// files (and the small public.json) are hashed here
+pub fn key_for(proof_dir: &Path, step_size: u64) -> io::Result<VerificationKey> {
+    let proof_hash = match crate::artifact_store::read_pointer(proof_dir) {
+        Some((hash, _)) => hash,
+        None => sha256_file(&proof_dir.join("proof.bin"))?,
+    };
+    Ok(VerificationKey {
+        proof_hash,
+        public_hash: sha256_file(&proof_dir.join("public.json"))?,
+        step_size,
+    })
+}
+
+// zkEngine output that means the proof itself was rejected
+const REJECTION_MARKERS: &[&str] = &[
+    "proofverifyerror",
+    "verification failed",
+    "invalid proof",
+    "proof is invalid",
+    "failed to verify",
+];
+
+// Output that means the run never got to a decision: the proof or public
+// inputs could not be read, or the machine ran out of memory
+const ENVIRONMENT_MARKERS: &[&str] = &[
+    "no such file",
+    "os error",
+    "permission denied",
+    "failed to read",
+    "failed to open",
+    "out of memory",
+    "memory allocation",
+    "cannot allocate",
+];
+
+// What a finished zkEngine run decided about the proof. A clean exit is a
+// pass; a non-zero exit is a rejection only when zkEngine says so. Signals
+// (timeouts, OOM kills), I/O errors and anything unrecognized return None
+// and must not be cached, or a transient failure becomes a permanent INVALID.
+pub fn verdict(output: &Output) -> Option<bool> {
+    if output.status.success() {
+        return Some(true);
+    }
+    output.status.code()?;
+    let text = format!(
+        "{}\n{}",
+        String::from_utf8_lossy(&output.stdout),
+        String::from_utf8_lossy(&output.stderr)
+    ).to_lowercase();
+    if ENVIRONMENT_MARKERS.iter().any(|m| text.contains(m)) {
+        return None;
+    }
+    if REJECTION_MARKERS.iter().any(|m| text.contains(m)) {
+        return Some(false);
+    }
+    None
+}
+
+// Hash on a blocking thread; None when the proof files are missing
+pub async fn key_in_background(proof_dir: PathBuf, step_size: u64) -> Option<VerificationKey> {
+    tokio::task::spawn_blocking(move || key_for(&proof_dir, step_size).ok())
+        .await
+        .ok()
+        .flatten()
 }
 
 impl VerificationCache {
-    pub fn new(ttl_seconds: u64) -> Self {
-        VerificationCache {
-            cache: Arc::new(Mutex::new(HashMap::new())),
-            ttl: Duration::from_secs(ttl_seconds),
+    pub fn open(path: &str) -> rusqlite::Result<Self> {
+        if let Some(parent) = Path::new(path).parent() {
+            std::fs::create_dir_all(parent).ok();
         }
+        let conn = Connection::open(path)?;
+        conn.busy_timeout(std::time::Duration::from_secs(10))?;
+        conn.pragma_update_and_check(None, "journal_mode", "WAL", |row| row.get::<_, String>(0))?;
+        conn.execute_batch(SCHEMA)?;
+        Ok(VerificationCache { conn: Mutex::new(conn) })
     }
 
-    pub fn get(&self, proof_id: &str) -> Option<CachedVerification> {
-        if let Ok(cache) = self.cache.lock() {
-            if let Some(cached) = cache.get(proof_id) {
-                if cached.timestamp.elapsed() < self.ttl {
-                    println!("[CACHE HIT] Using cached verification for {}", proof_id);
-                    return Some(cached.clone());
-                }
+    // Cached validity for this exact content, counting the hit or miss
+    pub fn lookup(&self, key: &VerificationKey) -> Option<bool> {
+        let conn = self.conn.lock().unwrap();
+        let found = conn.query_row(
+            "SELECT valid FROM verifications WHERE proof_hash = ?1 AND public_hash = ?2 AND step_size = ?3",
+            params![key.proof_hash, key.public_hash, key.step_size as i64],
+            |r| r.get::<_, bool>(0),
+        ).optional();
+        let valid = match found {
+            Ok(valid) => valid,
+            Err(e) => {
+                warn!("Verification cache lookup failed: {}", e);
+                return None;
             }
+        };
+        let counter = if valid.is_some() { "hits" } else { "misses" };
+        let counted = conn.execute(
+            "INSERT INTO cache_stats (name, value) VALUES (?1, 1)
+             ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            params![counter],
+        ).and_then(|_| {
+            if valid.is_some() {
+                conn.execute(
+                    "UPDATE verifications SET hit_count = hit_count + 1, last_hit_ms = ?1
+                     WHERE proof_hash = ?2 AND public_hash = ?3 AND step_size = ?4",
+                    params![epoch_ms(), key.proof_hash, key.public_hash, key.step_size as i64],
+                )
+            } else {
+                Ok(0)
+            }
+        });
+        if let Err(e) = counted {
+            warn!("Failed to update verification cache stats: {}", e);
         }
-        None
+        valid
     }
 
-    pub fn set(&self, proof_id: String, result: String, proof_size: u64) {
-        if let Ok(mut cache) = self.cache.lock() {
-            cache.insert(proof_id.clone(), CachedVerification {
-                result,
-                timestamp: Instant::now(),
-                proof_size,
-            });
-            println!("[CACHE SET] Cached verification for {}", proof_id);
+    // Remember a completed zkEngine verification (valid or not)
+    pub fn record(&self, key: &VerificationKey, proof_id: &str, valid: bool) {
+        let conn = self.conn.lock().unwrap();
+        if let Err(e) = conn.execute(
+            "INSERT INTO verifications (proof_hash, public_hash, step_size, valid, proof_id, verified_ms)
+             VALUES (?1, ?2, ?3, ?4, ?5, ?6)
+             ON CONFLICT(proof_hash, public_hash, step_size) DO UPDATE SET
+                 valid = excluded.valid,
+                 proof_id = excluded.proof_id,
+                 verified_ms = excluded.verified_ms",
+            params![key.proof_hash, key.public_hash, key.step_size as i64, valid, proof_id, epoch_ms()],
+        ) {
+            warn!("Failed to cache verification for {}: {}", proof_id, e);
         }
     }
 
-    pub fn clear_expired(&self) {
-        if let Ok(mut cache) = self.cache.lock() {
-            cache.retain(|_, v| v.timestamp.elapsed() < self.ttl);
-        }
+    // Record a zkEngine run if it reached a verdict; returns that verdict.
+    // Runs that failed to spawn or never decided leave the cache untouched.
+    pub fn record_run(&self, key: &VerificationKey, proof_id: &str, run: &io::Result<Output>) -> Option<bool> {
+        let valid = verdict(run.as_ref().ok()?)?;
+        self.record(key, proof_id, valid);
+        Some(valid)
     }
-}
\ No newline at end of file
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use std::os::unix::process::ExitStatusExt;
+    use std::process::ExitStatus;
+
+    fn output(status: i32, stderr: &str) -> Output {
+        Output { status: ExitStatus::from_raw(status), stdout: Vec::new(), stderr: stderr.as_bytes().to_vec() }
+    }
+
+    fn exited(code: i32, stderr: &str) -> Output {
+        output(code << 8, stderr)
+    }
+
+    fn temp_cache(name: &str) -> (VerificationCache, PathBuf) {
+        let path = std::env::temp_dir().join(format!("verification_cache_{}_{}.db", name, std::process::id()));
+        let _ = std::fs::remove_file(&path);
+        (VerificationCache::open(path.to_str().unwrap()).unwrap(), path)
+    }
+
+    fn key() -> VerificationKey {
+        VerificationKey { proof_hash: "a".repeat(64), public_hash: "b".repeat(64), step_size: 50 }
+    }
+
+    fn cached(cache: &VerificationCache) -> i64 {
+        cache.conn.lock().unwrap()
+            .query_row("SELECT COUNT(*) FROM verifications", [], |r| r.get(0))
+            .unwrap()
+    }
+
+    #[test]
+    fn verdicts() {
+        assert_eq!(verdict(&exited(0, "")), Some(true));
+        assert_eq!(verdict(&exited(1, "Error: ProofVerifyError")), Some(false));
+        assert_eq!(verdict(&exited(1, "Verification failed: invalid proof")), Some(false));
+        // Killed by SIGKILL (OOM killer, timeout)
+        assert_eq!(verdict(&output(9, "")), None);
+        assert_eq!(verdict(&exited(1, "failed to read proof: No such file or directory (os error 2)")), None);
+        assert_eq!(verdict(&exited(101, "memory allocation of 4294967296 bytes failed")), None);
+        assert_eq!(verdict(&exited(2, "")), None);
+    }
+
+    #[test]
+    fn spawn_and_io_failures_are_not_cached() {
+        let (cache, path) = temp_cache("failures");
+        let spawn_error: io::Result<Output> = Err(io::Error::new(io::ErrorKind::NotFound, "zkEngine not found"));
+        assert_eq!(cache.record_run(&key(), "proof_kyc_1", &spawn_error), None);
+        assert_eq!(cache.record_run(&key(), "proof_kyc_1", &Ok(exited(1, "failed to open proof.bin: os error 2"))), None);
+        assert_eq!(cache.record_run(&key(), "proof_kyc_1", &Ok(output(9, ""))), None);
+        assert_eq!(cached(&cache), 0);
+        assert_eq!(cache.lookup(&key()), None);
+
+        assert_eq!(cache.record_run(&key(), "proof_kyc_1", &Ok(exited(1, "ProofVerifyError"))), Some(false));
+        assert_eq!(cache.lookup(&key()), Some(false));
+        drop(cache);
+        let _ = std::fs::remove_file(path);
+    }
+}
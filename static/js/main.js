@@ -20,8 +20,8 @@ let pendingAIResponses = new Map();
 const wsManager = new WebSocketManager();
 const uiManager = new UIManager();
 const proofManager = new ProofManager(uiManager);
-const transferManager = new TransferManager(uiManager);
-const workflowManager = new WorkflowManager(uiManager, transferManager);
+const transferManager = new TransferManager(uiManager, wsManager);
+const workflowManager = new WorkflowManager(uiManager, transferManager, wsManager);
 const blockchainVerifier = new BlockchainVerifier(uiManager, proofManager);
 
 // Make some functions globally accessible for onclick handlers
@@ -294,6 +294,20 @@ function setupMessageHandlers() {
         workflowManager.updateWorkflowStep(data.workflow_id, data.step_id, data.updates);
     });
     
+    // Coalesced step changes: only fields that changed since the last frame
+    wsManager.on('workflow_delta', (data) => {
+        debugLog(`Workflow delta: ${data.workflowId} #${data.seq}`, 'info');
+        workflowManager.applyWorkflowDelta(data.workflowId, data.seq, data.steps);
+    });
+    
+    // Periodic full state, lets a client that joined mid-workflow build the card
+    wsManager.on('workflow_snapshot', (data) => {
+        const workflowCard = workflowManager.applyWorkflowSnapshot(data);
+        if (workflowCard) {
+            uiManager.addMessage(workflowCard, 'assistant');
+        }
+    });
+    
     wsManager.on('workflow_completed', (data) => {
         // Handle both workflow_id and workflowId formats
         data.workflow_id = data.workflow_id || data.workflowId;
@@ -187,7 +187,7 @@ export class ProofManager {
             const a = document.createElement('a');
             a.style.display = 'none';
             a.href = url;
-            a.download = `proof_${proofId}.json`;
+            a.download = `${proofId}.bin`;
             document.body.appendChild(a);
             a.click();
             window.URL.revokeObjectURL(url);
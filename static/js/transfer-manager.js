@@ -1,11 +1,11 @@
 // Transfer Manager - Handles transfer operations and status updates
 import { debugLog, createExplorerLink } from './utils.js';
-import { config } from './config.js';
 
 export class TransferManager {
-    constructor(uiManager) {
+    constructor(uiManager, wsManager) {
         this.uiManager = uiManager;
-        this.transferPollingIntervals = new Map();
+        this.wsManager = wsManager;
+        this.watchedTransfers = new Set();
         this.transferStates = new Map();
     }
 
@@ -117,80 +117,47 @@ export class TransferManager {
             }
         }
         
-        // Stop polling if transfer is complete
+        // Stop watching once the transfer is final
         if (data.status === 'complete' || data.status === 'failed') {
+            if (this.watchedTransfers.has(transferId) && currentState.status !== data.status) {
+                if (data.status === 'complete') {
+                    this.uiManager.showToast('Transfer completed successfully!', 'success');
+                } else {
+                    this.uiManager.showToast('Transfer failed', 'error');
+                }
+            }
             this.stopTransferPolling(transferId);
         }
     }
 
     async startTransferPolling(transferId, blockchain) {
-        debugLog(`Starting transfer polling for ${transferId} on ${blockchain}`, 'info');
-        
-        // Clear any existing polling
-        this.stopTransferPolling(transferId);
-        
-        const pollTransfer = async () => {
-            try {
-                const response = await fetch(`/api/v1/transfer/${transferId}/status?blockchain=${blockchain}`);
-                if (!response.ok) {
-                    throw new Error(`HTTP error! status: ${response.status}`);
-                }
-                
-                const data = await response.json();
-                
-                // Update UI if status changed
-                const currentState = this.transferStates.get(transferId);
-                if (!currentState || 
-                    currentState.status !== data.status || 
-                    (!currentState.blockchainTxHash && data.blockchainTxHash)) {
-                    
-                    this.updateTransferStatus(transferId, data);
-                }
-                
-                // Stop polling if transfer is complete
-                if (data.status === 'complete' || data.status === 'failed') {
-                    this.stopTransferPolling(transferId);
-                    
-                    // Show notification
-                    if (data.status === 'complete') {
-                        this.uiManager.showToast('Transfer completed successfully!', 'success');
-                    } else {
-                        this.uiManager.showToast('Transfer failed', 'error');
-                    }
-                }
-                
-            } catch (error) {
-                debugLog(`Error polling transfer ${transferId}: ${error.message}`, 'error');
-            }
-        };
-        
-        // Initial poll
-        await pollTransfer();
-        
-        // Set up interval
-        const intervalId = setInterval(pollTransfer, config.polling.transferInterval);
-        this.transferPollingIntervals.set(transferId, intervalId);
+        // Status is polled once server-side for every viewer; this tab just subscribes
+        // and receives transfer_update pushes over the WebSocket.
+        if (this.watchedTransfers.has(transferId)) {
+            return;
+        }
+        debugLog(`Watching transfer ${transferId} on ${blockchain}`, 'info');
+        this.watchedTransfers.add(transferId);
         
-        // Stop polling after max duration
-        setTimeout(() => {
-            this.stopTransferPolling(transferId);
-        }, config.polling.maxPollingDuration);
+        const sent = this.wsManager && this.wsManager.send({
+            type: 'poll_transfer',
+            transferId,
+            blockchain
+        });
+        if (!sent) {
+            debugLog(`Could not subscribe to transfer ${transferId}: WebSocket not connected`, 'error');
+            this.watchedTransfers.delete(transferId);
+        }
     }
 
     stopTransferPolling(transferId) {
-        const intervalId = this.transferPollingIntervals.get(transferId);
-        if (intervalId) {
-            clearInterval(intervalId);
-            this.transferPollingIntervals.delete(transferId);
-            debugLog(`Stopped transfer polling for ${transferId}`, 'info');
+        if (this.watchedTransfers.delete(transferId)) {
+            debugLog(`Stopped watching transfer ${transferId}`, 'info');
         }
     }
 
     stopAllPolling() {
-        this.transferPollingIntervals.forEach((intervalId, transferId) => {
-            clearInterval(intervalId);
-        });
-        this.transferPollingIntervals.clear();
+        this.watchedTransfers.clear();
     }
 
     addTransactionCard(data) {
@@ -3,9 +3,10 @@ import { debugLog, getStepIcon, getStatusText } from './utils.js';
 import { config } from './config.js';
 
 export class WorkflowManager {
-    constructor(uiManager, transferManager) {
+    constructor(uiManager, transferManager, wsManager) {
         this.uiManager = uiManager;
         this.transferManager = transferManager;
+        this.wsManager = wsManager;
         this.workflowPollingIntervals = new Map();
         this.workflowStates = new Map();
     }
@@ -167,6 +168,68 @@ export class WorkflowManager {
         }
     }
 
+    applyWorkflowDelta(workflowId, seq, steps) {
+        const state = this.workflowStates.get(workflowId);
+        if (!state) return;
+        const last = state.seq ?? 0;
+        // A snapshot newer than this delta already contains it
+        if (seq <= last) return;
+        if (seq !== last + 1) {
+            // Missed a delta: apply this one, and ask for the full state to
+            // fill in the fields the missing ones changed
+            debugLog(`Workflow ${workflowId}: delta #${seq} after #${last}, requesting snapshot`, 'warning');
+            this.requestSnapshot(workflowId);
+        }
+        state.seq = seq;
+        state.stepStates = state.stepStates || {};
+        
+        Object.entries(steps).forEach(([stepId, delta]) => {
+            const merged = { ...(state.stepStates[stepId] || {}), ...delta };
+            state.stepStates[stepId] = merged;
+            // Timing is rendered from both ends, but an unchanged startTime is not resent
+            const updates = delta.endTime && !delta.startTime ? { ...delta, startTime: merged.startTime } : delta;
+            this.updateWorkflowStep(workflowId, stepId, updates);
+        });
+    }
+
+    applyWorkflowSnapshot(snapshot) {
+        const workflowId = snapshot.workflowId;
+        const state = this.workflowStates.get(workflowId);
+        if (!state) {
+            // Joined after workflow_started: build the card from the snapshot
+            const steps = snapshot.steps.map(step => ({ ...step, type: step.action }));
+            const workflowCard = this.addWorkflowCard({ workflow_id: workflowId, steps });
+            this.workflowStates.get(workflowId).seq = snapshot.seq;
+            steps.forEach(step => {
+                if (step.transferData && step.transferData.id && step.transferData.blockchain) {
+                    this.transferManager.startTransferPolling(step.transferData.id, step.transferData.blockchain);
+                }
+            });
+            return workflowCard;
+        }
+        // After a gap, a snapshot at the current seq still fills in what was missed
+        const last = state.seq ?? 0;
+        if (snapshot.seq < last || (snapshot.seq === last && !state.awaitingSnapshot)) return null;
+        state.awaitingSnapshot = false;
+        
+        // Missed one or more deltas: re-apply the full state of each step
+        const steps = {};
+        snapshot.steps.forEach(({ id, action, description, proofType, ...fields }) => {
+            steps[id] = fields;
+        });
+        state.seq = snapshot.seq - 1;
+        this.applyWorkflowDelta(workflowId, snapshot.seq, steps);
+        return null;
+    }
+
+    requestSnapshot(workflowId) {
+        const state = this.workflowStates.get(workflowId);
+        if (state) state.awaitingSnapshot = true;
+        if (this.wsManager) {
+            this.wsManager.send({ type: 'workflow_snapshot_request', workflowId });
+        }
+    }
+
     updateWorkflowStatus(workflowId, status) {
         const workflowCard = document.querySelector(`[data-workflow-id="${workflowId}"]`);
         if (!workflowCard) return;
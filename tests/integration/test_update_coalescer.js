@@ -0,0 +1,119 @@
+// Coalesced workflow updates: executor-side deltas and snapshots, and the
+// UI applying them with gap detection. Runs without the servers.
+import assert from 'assert';
+import UpdateCoalescer from '../../parsers/workflow/updateCoalescer.js';
+import { WorkflowManager } from '../../static/js/workflow-manager.js';
+
+// debugLog writes to the page's debug panel; there is none here
+globalThis.document = { getElementById: () => null };
+
+const tests = [];
+const test = (name, fn) => tests.push({ name, fn });
+
+function coalescer() {
+    const sent = [];
+    const updates = new UpdateCoalescer((type, data) => sent.push({ type, ...data }),
+        { windowMs: 1000, snapshotIntervalMs: 0 });
+    updates.push('workflow_started', {
+        workflowId: 'wf_1',
+        steps: [{ id: 'step_1', status: 'pending' }, { id: 'step_2', status: 'pending' }]
+    });
+    sent.length = 0;
+    return { updates, sent };
+}
+
+function stepUpdate(stepId, updates) {
+    return { workflowId: 'wf_1', stepId, updates };
+}
+
+test('updates in one window become one delta of changed fields', () => {
+    const { updates, sent } = coalescer();
+    updates.push('workflow_step_update', stepUpdate('step_1', { status: 'executing', startTime: 1 }));
+    updates.push('workflow_step_update', stepUpdate('step_1', { status: 'completed', endTime: 2 }));
+    updates.push('workflow_step_update', stepUpdate('step_2', { status: 'pending' }));
+    assert.strictEqual(sent.length, 0);
+    updates.flush('wf_1');
+    assert.deepStrictEqual(sent, [{
+        type: 'workflow_delta', workflowId: 'wf_1', seq: 1,
+        steps: { step_1: { status: 'completed', startTime: 1, endTime: 2 } }
+    }]);
+    updates.close();
+});
+
+test('completion flushes pending deltas first', () => {
+    const { updates, sent } = coalescer();
+    updates.push('workflow_step_update', stepUpdate('step_1', { status: 'completed' }));
+    updates.push('workflow_completed', { workflowId: 'wf_1', success: true });
+    assert.deepStrictEqual(sent.map(m => m.type), ['workflow_delta', 'workflow_completed']);
+    assert.strictEqual(updates.workflows.size, 0);
+});
+
+test('snapshot requests are answered once per window', () => {
+    const { updates, sent } = coalescer();
+    updates.push('workflow_step_update', stepUpdate('step_1', { status: 'executing' }));
+    assert.strictEqual(updates.requestSnapshot('wf_1'), true);
+    assert.strictEqual(updates.requestSnapshot('wf_1'), false);
+    assert.strictEqual(updates.requestSnapshot('wf_unknown'), false);
+    const snapshot = sent.find(m => m.type === 'workflow_snapshot');
+    assert.strictEqual(snapshot.seq, 1);
+    assert.deepStrictEqual(snapshot.steps[0], { id: 'step_1', status: 'executing' });
+    updates.close();
+});
+
+test('messages keep their span; deltas go out under the workflow span', () => {
+    const sent = [];
+    const updates = new UpdateCoalescer((type, data, span) => sent.push({ type, span }),
+        { windowMs: 1000, snapshotIntervalMs: 0 });
+    updates.push('workflow_started', { workflowId: 'wf_1', steps: [{ id: 'step_1' }] }, 'workflow');
+    updates.push('workflow_step_update', stepUpdate('step_1', { status: 'executing' }), 'step_1');
+    updates.push('blockchain_verification_request', { workflowId: 'wf_1' }, 'step_2');
+    updates.push('workflow_completed', { workflowId: 'wf_1', success: true }, 'workflow');
+    assert.deepStrictEqual(sent, [
+        { type: 'workflow_started', span: 'workflow' },
+        { type: 'workflow_delta', span: 'workflow' },
+        { type: 'blockchain_verification_request', span: 'step_2' },
+        { type: 'workflow_completed', span: 'workflow' }
+    ]);
+});
+
+function workflowManager() {
+    const requests = [];
+    const manager = new WorkflowManager(null, null, { send: (message) => requests.push(message) });
+    const applied = [];
+    manager.updateWorkflowStep = (workflowId, stepId, updates) => applied.push({ stepId, ...updates });
+    manager.workflowStates.set('wf_1', { stepStates: {} });
+    return { manager, requests, applied };
+}
+
+test('UI requests a snapshot when a delta is missing', () => {
+    const { manager, requests, applied } = workflowManager();
+    manager.applyWorkflowDelta('wf_1', 1, { step_1: { status: 'executing' } });
+    assert.strictEqual(requests.length, 0);
+    manager.applyWorkflowDelta('wf_1', 3, { step_2: { status: 'executing' } });
+    assert.deepStrictEqual(requests, [{ type: 'workflow_snapshot_request', workflowId: 'wf_1' }]);
+    // Stale and duplicate deltas are ignored
+    manager.applyWorkflowDelta('wf_1', 2, { step_1: { status: 'completed' } });
+    assert.deepStrictEqual(applied.map(a => a.stepId), ['step_1', 'step_2']);
+
+    // The snapshot answering the request has the same seq and is still applied
+    manager.applyWorkflowSnapshot({
+        workflowId: 'wf_1', seq: 3,
+        steps: [{ id: 'step_1', status: 'completed' }, { id: 'step_2', status: 'executing' }]
+    });
+    assert.deepStrictEqual(applied[2], { stepId: 'step_1', status: 'completed' });
+    // Once caught up, a repeat of that snapshot changes nothing
+    manager.applyWorkflowSnapshot({ workflowId: 'wf_1', seq: 3, steps: [{ id: 'step_1', status: 'failed' }] });
+    assert.strictEqual(applied.length, 4);
+});
+
+let failed = 0;
+for (const { name, fn } of tests) {
+    try {
+        fn();
+        console.log(`✓ ${name}`);
+    } catch (error) {
+        failed++;
+        console.log(`✗ ${name}: ${error.message}`);
+    }
+}
+process.exit(failed ? 1 : 0);
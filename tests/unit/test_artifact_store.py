@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Test deduplicated proof artifact storage, streaming reads and reference counting"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+
+from services.artifact_store import SCHEMA_VERSION, ArtifactStore, has_proof, read_pointer
+
+
+def _proof_dir(proofs, proof_id, payload):
+    path = os.path.join(proofs, proof_id)
+    os.makedirs(path)
+    with open(os.path.join(path, "proof.bin"), "wb") as f:
+        f.write(payload)
+    return path
+
+
+def test_identical_proofs_share_one_object():
+    payload = os.urandom(1024) * 3000
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ArtifactStore(os.path.join(tmp, "artifacts"))
+        first = store.ingest("proof_a", _proof_dir(tmp, "proof_a", payload))
+        second = store.ingest("proof_b", _proof_dir(tmp, "proof_b", payload))
+
+        assert first["hash"] == second["hash"] == hashlib.sha256(payload).hexdigest()
+        assert not first["deduplicated"] and second["deduplicated"]
+        assert store.stats()["objects"] == 1
+        assert store.stats()["logical_bytes"] == 2 * len(payload)
+        for proof_id in ("proof_a", "proof_b"):
+            proof_dir = os.path.join(tmp, proof_id)
+            assert not os.path.exists(os.path.join(proof_dir, "proof.bin"))
+            assert has_proof(proof_dir)
+            assert read_pointer(proof_dir)["size"] == len(payload)
+
+
+def test_reads_return_original_bytes():
+    payload = b"nova proof " * 50000
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ArtifactStore(os.path.join(tmp, "artifacts"), os.path.join(tmp, "scratch"))
+        proof_dir = _proof_dir(tmp, "proof_a", payload)
+        store.ingest("proof_a", proof_dir)
+
+        with store.open(proof_dir) as stream:
+            assert stream.read() == payload
+        with store.materialize(proof_dir) as path:
+            with open(path, "rb") as f:
+                assert f.read() == payload
+        assert not os.path.exists(path)
+
+
+def test_object_removed_with_last_reference():
+    payload = os.urandom(4096)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ArtifactStore(os.path.join(tmp, "artifacts"))
+        result = store.ingest("proof_a", _proof_dir(tmp, "proof_a", payload))
+        store.ingest("proof_b", _proof_dir(tmp, "proof_b", payload))
+        codec = read_pointer(os.path.join(tmp, "proof_a"))["codec"]
+        object_path = store.object_path(result["hash"], codec)
+
+        os.remove(os.path.join(tmp, "proof_a", "proof.ref"))
+        assert store.sweep(tmp) == 1
+        assert os.path.exists(object_path)
+        assert store.release("proof_b")
+        assert not os.path.exists(object_path)
+        assert store.stats()["objects"] == 0
+
+
+def test_unversioned_index_is_migrated():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "artifacts")
+        os.makedirs(root)
+        # An index from before the tiering columns and before user_version
+        conn = sqlite3.connect(os.path.join(root, "index.sqlite"))
+        conn.executescript("""
+            CREATE TABLE artifacts (hash TEXT PRIMARY KEY, codec TEXT NOT NULL, size INTEGER NOT NULL,
+                                    stored_size INTEGER NOT NULL, refcount INTEGER NOT NULL DEFAULT 0,
+                                    created_ms INTEGER NOT NULL);
+            CREATE TABLE artifact_refs (proof_id TEXT PRIMARY KEY, hash TEXT NOT NULL);
+            INSERT INTO artifacts VALUES ('%s', 'raw', 10, 10, 1, 1);
+        """ % ("ab" * 32))
+        conn.close()
+
+        store = ArtifactStore(root)
+        row = store._conn.execute("SELECT tier, access_count FROM artifacts").fetchone()
+        assert tuple(row) == ("local", 0)
+        assert store._conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        store.close()
+        # Reopening at the current version is a no-op
+        ArtifactStore(root).close()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Test the pooled Circle client against the local sandbox stand-in"""
+
+import asyncio
+
+from services.circle_client import CircleAPIError, CircleClient
+from services.circle_sandbox import CircleSandbox, SandboxServer
+
+
+def test_status_check_reuses_one_connection():
+    async def scenario():
+        sandbox = CircleSandbox(api_key="test-key", complete_after=2)
+        sandbox.add_transfer("tr_1", chain="ETH")
+        async with SandboxServer(sandbox) as server:
+            async with CircleClient("test-key", server.url) as client:
+                first = await client.get_transfer("tr_1")
+                second = await client.get_transfer("tr_1")
+                connector = client._session.connector
+                return first, second, len(connector._conns)
+
+    first, second, pooled_hosts = asyncio.run(scenario())
+    assert first.status == "pending" and first.transaction_hash is None
+    assert second.status == "complete" and second.is_terminal
+    assert second.explorer_link().startswith("https://sepolia.etherscan.io/tx/0x")
+    assert second.amount.amount == "1.00"
+    assert pooled_hosts == 1
+
+
+def test_retries_transient_errors_then_raises():
+    async def scenario():
+        sandbox = CircleSandbox()
+        sandbox.add_transfer("tr_1", status="complete")
+        async with SandboxServer(sandbox) as server:
+            async with CircleClient(None, server.url, max_retries=2, backoff_base=0) as client:
+                sandbox.fail_next(2, status=503)
+                recovered = await client.get_transfer("tr_1")
+                sandbox.fail_next(3, status=429)
+                try:
+                    await client.get_transfer("tr_1")
+                except CircleAPIError as e:
+                    exhausted = e.status
+                try:
+                    await client.get_transfer("missing")
+                except CircleAPIError as e:
+                    not_found = (e.status, sandbox.requests)
+                return recovered, exhausted, not_found
+
+    recovered, exhausted, (not_found, requests) = asyncio.run(scenario())
+    assert recovered.status == "complete"
+    assert exhausted == 429
+    # 3 + 3 attempts for the first two calls, a single one for the 404
+    assert not_found == 404 and requests == 7
+
+
+def test_idempotency_key_creates_one_transfer():
+    async def scenario():
+        sandbox = CircleSandbox()
+        async with SandboxServer(sandbox) as server:
+            async with CircleClient(None, server.url) as client:
+                first = await client.create_transfer("w1", "0xabc", "ETH", "2.50", idempotency_key="k1")
+                again = await client.create_transfer("w1", "0xabc", "ETH", "2.50", idempotency_key="k1")
+                return first, again, len(sandbox.transfers)
+
+    first, again, count = asyncio.run(scenario())
+    assert first.id == again.id and count == 1
+    assert first.chain == "ETH" and first.amount.amount == "2.50"
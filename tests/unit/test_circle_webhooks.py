@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Test Circle webhook signing, deduplication and push-then-poll-fallback delivery"""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+
+from services import circle_webhooks
+from services.circle_client import CircleAPIError, CircleClient
+from services.circle_sandbox import CircleSandbox, SandboxServer
+from services.shared_state import SharedState
+from services.transfer_poller import TransferPoller
+
+
+def _key():
+    ec = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.ec")
+    return ec.generate_private_key(ec.SECP256R1())
+
+
+def test_signature_verification():
+    key, other = _key(), _key()
+    body = b'{"notificationType": "transfers"}'
+    published = {"key-1": circle_webhooks.public_key_b64(key)}
+    fetched = []
+
+    async def fetch(key_id):
+        fetched.append(key_id)
+        if key_id not in published:
+            raise CircleAPIError(404, "Public key not found")
+        return {"id": key_id, "algorithm": "ECDSA_SHA_256", "publicKey": published[key_id]}
+
+    async def check(body, headers):
+        try:
+            await circle_webhooks.authenticate(keys, body, headers)
+        except circle_webhooks.WebhookError as e:
+            return e.status
+        return 200
+
+    keys = circle_webhooks.PublicKeyCache(fetch)
+    headers = circle_webhooks.signed_headers(key, "key-1", body)
+    async def scenario():
+        return [await check(*args) for args in [
+            (body, headers),
+            (body + b" ", headers),
+            (body, circle_webhooks.signed_headers(other, "key-1", body)),
+            (body, circle_webhooks.signed_headers(key, "key-2", body)),
+            (body, circle_webhooks.signed_headers(key, "../key-1", body)),
+            (body, {"X-Circle-Key-Id": "key-1"}),
+        ]]
+
+    assert asyncio.run(scenario()) == [200, 401, 401, 401, 401, 401]
+    # Each key is fetched once
+    assert sorted(fetched) == ["key-1", "key-2"]
+
+
+def test_deduplicator_is_bounded():
+    dedup = circle_webhooks.WebhookDeduplicator(max_entries=2)
+    assert not dedup.seen("a") and dedup.seen("a")
+    dedup.seen("b")
+    dedup.seen("c")
+    assert not dedup.seen("a")
+    dedup.forget("a")
+    assert not dedup.seen("a")
+
+
+def _receiver(poller, keys, state):
+    # Same flow as chat_service's /webhooks/circle
+    async def handle(request):
+        body = await request.read()
+        try:
+            await circle_webhooks.authenticate(keys, body, request.headers)
+            notification_id, transfer = circle_webhooks.parse(body)
+        except circle_webhooks.WebhookError as e:
+            return web.json_response({"error": str(e)}, status=e.status)
+        claim_key = f"webhook:{notification_id}"
+        existing = state.claim(claim_key, 3600)
+        if existing:
+            return web.json_response({"duplicate": True}, status=409 if existing["state"] == "pending" else 200)
+        try:
+            result = {"changed": await poller.apply(transfer)}
+        except Exception as e:
+            state.release(claim_key)
+            return web.json_response({"error": str(e)}, status=500)
+        state.complete(claim_key, result)
+        return web.json_response(result)
+
+    app = web.Application()
+    app.router.add_post("/webhooks/circle", handle)
+    return app
+
+
+async def _serve(app):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/webhooks/circle"
+
+
+def test_failed_notification_is_processed_on_retry():
+    pytest.importorskip("cryptography")
+
+    class FlakyPoller:
+        def __init__(self):
+            self.applied = []
+
+        async def apply(self, transfer):
+            if not self.applied:
+                self.applied.append(None)
+                raise RuntimeError("subscriber unavailable")
+            self.applied.append(transfer.id)
+            return True
+
+    async def scenario(tmp):
+        sandbox = CircleSandbox()
+        poller = FlakyPoller()
+        async with SandboxServer(sandbox) as server:
+            async with CircleClient(None, server.url) as client:
+                keys = circle_webhooks.PublicKeyCache(client.get_notification_public_key)
+                runner, sandbox.webhook_url = await _serve(
+                    _receiver(poller, keys, SharedState(str(Path(tmp) / "state.sqlite"))))
+                sandbox.add_transfer("tr_1", status="complete")
+                statuses = [await sandbox.notify("tr_1", notification_id="n1") for _ in range(3)]
+                await runner.cleanup()
+        return statuses, poller.applied
+
+    with tempfile.TemporaryDirectory() as tmp:
+        statuses, applied = asyncio.run(scenario(tmp))
+    # The failed delivery left no claim behind; the retry after it is the duplicate
+    assert statuses == [500, 200, 200]
+    assert applied == [None, "tr_1"]
+
+
+def test_webhook_pushes_without_polling_and_falls_back_when_quiet():
+    pytest.importorskip("cryptography")
+
+    async def scenario(tmp):
+        published = []
+
+        async def publish(message):
+            published.append(message)
+
+        sandbox = CircleSandbox(complete_after=1)
+        async with SandboxServer(sandbox) as server:
+            async with CircleClient(None, server.url) as client:
+                poller = TransferPoller(client, publish, base_interval=0.01, rate_per_sec=1000,
+                                        push_grace_secs=0.3)
+                keys = circle_webhooks.PublicKeyCache(client.get_notification_public_key)
+                runner, sandbox.webhook_url = await _serve(
+                    _receiver(poller, keys, SharedState(str(Path(tmp) / "state.sqlite"))))
+
+                sandbox.add_transfer("tr_pushed")
+                sandbox.add_transfer("tr_quiet")
+                poller.watch("tr_pushed")
+                poller.watch("tr_quiet")
+                poller.start()
+
+                sandbox.complete("tr_pushed")
+                first = await sandbox.notify("tr_pushed", notification_id="n1")
+                again = await sandbox.notify("tr_pushed", notification_id="n1")
+                pushed_reads = dict(sandbox.reads)
+
+                for _ in range(100):
+                    if not poller.transfers:
+                        break
+                    await asyncio.sleep(0.01)
+                await poller.stop()
+                await runner.cleanup()
+                return first, again, pushed_reads, dict(sandbox.reads), published
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first, again, pushed_reads, reads, published = asyncio.run(scenario(tmp))
+    assert first == 200 and again == 200
+    # The notified transfer completed with no status call at all
+    assert pushed_reads == {} and "tr_pushed" not in reads
+    # The quiet one was polled once its grace period ran out
+    assert reads == {"tr_quiet": 1}
+    assert [(m["transferId"], m["status"]) for m in published] == [
+        ("tr_pushed", "complete"), ("tr_quiet", "complete")]
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Test runtime config snapshots: atomic reload, change listeners and the file watcher"""
+
+import asyncio
+import dataclasses
+import os
+import tempfile
+from pathlib import Path
+
+from config import Config, RuntimeConfig, diff_config
+
+
+def _with_env(**values):
+    previous = {name: os.environ.get(name) for name in values}
+    for name, value in values.items():
+        os.environ[name] = value
+
+    def restore():
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    return restore
+
+
+def test_reload_swaps_snapshot_and_notifies():
+    runtime = RuntimeConfig()
+    seen = []
+    runtime.on_change(lambda old, new, changes: seen.append((old, new, changes)))
+    before = runtime.snapshot()
+
+    restore = _with_env(OPENAI_CHAT_MODEL="gpt-test", WORKFLOW_PARSE_TIMEOUT_SECS="12.5")
+    try:
+        changes = runtime.reload()
+    finally:
+        restore()
+
+    assert set(changes) == {"ai.chat_model", "workflow.parse_timeout_secs"}
+    assert changes["workflow.parse_timeout_secs"][1] == 12.5
+    assert runtime.ai.chat_model == "gpt-test" and runtime.version == 2
+    # Holders of the old snapshot keep a consistent view
+    assert before.ai.chat_model != "gpt-test"
+    assert len(seen) == 1 and seen[0][0] is before and seen[0][1] is runtime.snapshot()
+    assert runtime.reload() and runtime.reload() == {}
+
+
+def test_snapshots_are_immutable_and_bad_values_keep_the_current_one():
+    runtime = RuntimeConfig()
+    try:
+        runtime.snapshot().server.port = 1
+    except dataclasses.FrozenInstanceError:
+        pass
+    else:
+        raise AssertionError("snapshot should be frozen")
+
+    current = runtime.snapshot()
+    restore = _with_env(PORT="not-a-port")
+    try:
+        assert runtime.try_reload() is None
+    finally:
+        restore()
+    assert runtime.snapshot() is current and runtime.version == 1
+    assert diff_config(Config(), Config()) == {}
+
+
+def test_watch_reloads_when_file_changes():
+    async def scenario(path):
+        runtime = RuntimeConfig()
+        reloads = []
+        runtime.try_reload = lambda: reloads.append(1)
+        task = asyncio.create_task(runtime.watch(0.01, path))
+        await asyncio.sleep(0.05)
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return reloads
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / ".env"
+        path.write_text("LOG_LEVEL=debug\n")
+        assert asyncio.run(scenario(path)) == [1]
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Test the event gateway: topic routing from the upstream stream and slow-consumer eviction"""
+
+import asyncio
+import json
+
+import aiohttp
+from aiohttp import web
+
+from services.event_gateway import EventGateway, Subscriber, topics_for
+
+
+async def _serve(app):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+class FakeBroadcast:
+    """Stands in for the Rust /ws endpoint: pushes every event to every socket"""
+
+    def __init__(self):
+        self.sockets = []
+        self.connected = asyncio.Event()
+
+    async def handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.append(ws)
+        self.connected.set()
+        async for _ in ws:
+            pass
+        return ws
+
+    async def publish(self, event):
+        for ws in self.sockets:
+            await ws.send_str(json.dumps(event))
+
+
+def test_topics_for_event_shapes():
+    assert topics_for({"type": "proof_complete", "proof_id": "p1"}) == [
+        "type:*", "type:proof_complete", "proof:p1"]
+    assert topics_for({"type": "workflow_delta", "workflowId": "wf_1"})[-1] == "workflow:wf_1"
+    assert topics_for({"type": "transfer_update", "transferId": "t1"})[-1] == "transfer:t1"
+
+
+def test_clients_receive_only_subscribed_events():
+    async def scenario():
+        upstream = FakeBroadcast()
+        upstream_app = web.Application()
+        upstream_app.router.add_get("/ws", upstream.handle)
+        upstream_runner, upstream_port = await _serve(upstream_app)
+
+        gateway = EventGateway(f"ws://127.0.0.1:{upstream_port}/ws")
+        gateway_runner, port = await _serve(gateway.app())
+        await asyncio.wait_for(upstream.connected.wait(), 5)
+
+        base = f"ws://127.0.0.1:{port}/events"
+        async with aiohttp.ClientSession() as session:
+            wf_client = await session.ws_connect(f"{base}?workflow=wf_a")
+            proof_client = await session.ws_connect(base)
+            await proof_client.send_json({"action": "subscribe", "topics": ["proof:p1", "bogus"]})
+            ack = await proof_client.receive_json()
+
+            await upstream.publish({"type": "workflow_delta", "workflowId": "wf_b", "seq": 1})
+            await upstream.publish({"type": "workflow_delta", "workflowId": "wf_a", "seq": 1})
+            await upstream.publish({"type": "proof_complete", "proof_id": "p2"})
+            await upstream.publish({"type": "proof_complete", "proof_id": "p1"})
+
+            wf_event = await asyncio.wait_for(wf_client.receive_json(), 5)
+            proof_event = await asyncio.wait_for(proof_client.receive_json(), 5)
+            await asyncio.sleep(0.05)
+            stats = dict(gateway.stats)
+            await wf_client.close()
+            await proof_client.close()
+
+        await gateway_runner.cleanup()
+        await upstream_runner.cleanup()
+        return ack, wf_event, proof_event, stats
+
+    ack, wf_event, proof_event, stats = asyncio.run(scenario())
+    assert ack == {"type": "subscriptions", "topics": ["proof:p1"]}
+    assert wf_event["workflowId"] == "wf_a"
+    assert proof_event["proof_id"] == "p1"
+    assert stats["events"] == 4 and stats["deliveries"] == 2 and stats["unrouted"] == 2
+
+
+def test_slow_consumer_is_evicted_without_affecting_others():
+    class FakeSocket:
+        closed_with = None
+
+        async def close(self, code, message):
+            self.closed_with = code
+
+    async def scenario():
+        gateway = EventGateway(max_queue=2)
+        slow, fast = Subscriber(FakeSocket(), 2), Subscriber(FakeSocket(), 10)
+        for sub in (slow, fast):
+            gateway.subscribers.add(sub)
+            gateway.subscribe(sub, ["type:*"])
+        counts = [gateway.dispatch(json.dumps({"type": "tick", "n": i})) for i in range(4)]
+        await asyncio.sleep(0)
+        return gateway, slow, fast, counts
+
+    gateway, slow, fast, counts = asyncio.run(scenario())
+    assert counts == [2, 2, 1, 1]
+    assert slow.evicted and slow.ws.closed_with == 1013 and slow not in gateway.subscribers
+    assert fast.queue.qsize() == 4 and gateway.stats["evicted"] == 1
+    assert "type:*" in gateway.index and gateway.index["type:*"] == {fast}
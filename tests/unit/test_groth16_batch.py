@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test batch Groth16 verification on proofs built from a known trapdoor.
+
+With alpha, beta, gamma, delta and the IC scalars known, any (a, b) gives a
+valid proof: c = (a·b - alpha·beta - l·gamma) / delta, l = ic0 + sum s_i·ic_i.
+"""
+
+import random
+
+import pytest
+
+pytest.importorskip("py_ecc")
+
+from services.groth16_batch import Groth16BatchVerifier, Proof, VerifyingKey, bn128
+
+
+def _g1_json(scalar):
+    x, y = bn128.normalize(bn128.multiply(bn128.G1, scalar))
+    return [str(x.n), str(y.n), "1"]
+
+
+def _g2_json(scalar):
+    x, y = bn128.normalize(bn128.multiply(bn128.G2, scalar))
+    return [[str(c) for c in x.coeffs], [str(c) for c in y.coeffs], ["1", "0"]]
+
+
+class Trapdoor:
+    def __init__(self, n_public, seed=1):
+        self.rng = random.Random(seed)
+        self.order = bn128.curve_order
+        self.alpha, self.beta, self.gamma, self.delta = (self.rng.randrange(1, self.order) for _ in range(4))
+        self.ic = [self.rng.randrange(1, self.order) for _ in range(n_public + 1)]
+        self.vk_json = {
+            "protocol": "groth16", "curve": "bn128", "nPublic": n_public,
+            "vk_alpha_1": _g1_json(self.alpha), "vk_beta_2": _g2_json(self.beta),
+            "vk_gamma_2": _g2_json(self.gamma), "vk_delta_2": _g2_json(self.delta),
+            "IC": [_g1_json(s) for s in self.ic],
+        }
+
+    def proof(self, public, valid=True):
+        a, b = self.rng.randrange(1, self.order), self.rng.randrange(1, self.order)
+        l = (self.ic[0] + sum(int(s) * k for s, k in zip(public, self.ic[1:]))) % self.order
+        c = (a * b - self.alpha * self.beta - l * self.gamma) * pow(self.delta, -1, self.order) % self.order
+        if not valid:
+            c = (c + 1) % self.order
+        return {"pi_a": _g1_json(a), "pi_b": _g2_json(b), "pi_c": _g1_json(c), "protocol": "groth16"}
+
+
+def _setup(n_proofs, invalid=(), n_public=2):
+    trapdoor = Trapdoor(n_public)
+    verifier = Groth16BatchVerifier(VerifyingKey.from_json(trapdoor.vk_json))
+    proofs = []
+    for i in range(n_proofs):
+        public = [str(i + 1), str(7 * i)]
+        proofs.append(Proof.from_json(trapdoor.proof(public, valid=i not in invalid), public))
+    verifier.miller_loops = 0
+    return verifier, proofs
+
+
+def test_single_and_batch_accept_valid_proofs():
+    verifier, proofs = _setup(4)
+    assert verifier.verify(proofs[0])
+    verifier.miller_loops = 0
+    assert verifier.verify_batch(proofs) == [True] * 4
+    # n + 2 Miller loops and one final exponentiation instead of 3n and n
+    assert verifier.miller_loops == 4 + 2
+
+
+def test_batch_isolates_invalid_proofs():
+    verifier, proofs = _setup(4, invalid={2})
+    assert not verifier.verify(proofs[2])
+    assert verifier.verify_batch(proofs) == [True, True, False, True]
+
+
+def test_solidity_ordered_proof_and_wrong_signal_count():
+    trapdoor = Trapdoor(2)
+    verifier = Groth16BatchVerifier(VerifyingKey.from_json(trapdoor.vk_json))
+    raw = trapdoor.proof(["5", "6"])
+    # real_snark_prover.js output: G2 coordinates in (c1, c0) order
+    solidity = {"a": raw["pi_a"][:2], "b": [raw["pi_b"][0][::-1], raw["pi_b"][1][::-1]], "c": raw["pi_c"][:2]}
+    assert verifier.verify(Proof.from_json(solidity, ["5", "6"]))
+    assert verifier.verify_batch([Proof.from_json(raw, ["5"]), Proof.from_json(raw, ["5", "6"])]) == [False, True]
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Test request profile selection, capture and rotation"""
+
+import os
+import tempfile
+
+from services.profiling import PROFILE_HEADER, ProfileStore, RequestProfiler
+
+
+def _work():
+    return sorted(str(i) * 3 for i in range(5000))
+
+
+def test_only_admin_flagged_requests_are_profiled():
+    profiler = RequestProfiler(ProfileStore(tempfile.mkdtemp()), admin_token="secret")
+    assert profiler.should_profile("/chat", {PROFILE_HEADER: "secret"})
+    assert not profiler.should_profile("/chat", {PROFILE_HEADER: "wrong"})
+    assert not profiler.should_profile("/chat", {})
+    assert not profiler.should_profile("/workflow_history", {PROFILE_HEADER: "secret"})
+    assert not RequestProfiler(ProfileStore(tempfile.mkdtemp())).should_profile("/chat", {})
+
+
+def test_capture_writes_cpu_and_memory_reports():
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = RequestProfiler(ProfileStore(tmp), admin_token="secret")
+        with profiler.capture("/execute_workflow") as capture:
+            _work()
+        captures = profiler.store.list()
+        assert len(captures) == 1
+        assert captures[0]["id"] == capture["id"]
+        assert captures[0]["label"] == "/execute_workflow"
+        suffixes = {name[len(capture["id"]):] for name in captures[0]["files"]}
+        assert suffixes == {".prof", ".cpu.txt", ".mem.txt", ".json"}
+        with open(os.path.join(tmp, capture["id"] + ".cpu.txt")) as f:
+            assert "_work" in f.read()
+
+
+def test_store_rotates_and_rejects_unsafe_names():
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = RequestProfiler(ProfileStore(tmp, max_profiles=2), sample_rate=1.0)
+        ids = []
+        for _ in range(3):
+            with profiler.capture("/chat") as capture:
+                _work()
+            ids.append(capture["id"])
+        kept = [c["id"] for c in profiler.store.list()]
+        assert len(kept) == 2
+        assert ids[-1] in kept
+        assert profiler.store.path_for(ids[-1] + ".prof")
+        assert profiler.store.path_for("../" + ids[-1] + ".prof") is None
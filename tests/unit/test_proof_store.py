@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Test the SQLite proof metadata store and its JSON migration"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from services.proof_store import ProofStore, timestamp_to_ms
+
+LEGACY_DB = Path(__file__).resolve().parents[2] / "static" / "proofs_db.json"
+
+
+def test_upsert_keeps_creation_time_and_lists_newest_first():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ProofStore(os.path.join(tmp, "proofs.sqlite"))
+        store.upsert("proof_a", {"function": "prove_kyc"}, {"time_ms": 10}, "complete",
+                     timestamp="2025-01-01T00:00:00Z")
+        store.upsert("proof_b", {"function": "prove_location"}, {"time_ms": 20}, "failed",
+                     timestamp="2025-01-02T00:00:00Z")
+        store.upsert("proof_a", {"function": "prove_kyc"}, {"time_ms": 30}, "complete",
+                     timestamp="2025-01-03T00:00:00Z")
+
+        assert store.count() == 2
+        # Updating proof_a keeps its creation time, so it stays behind proof_b
+        assert [p["id"] for p in store.list()] == ["proof_b", "proof_a"]
+        assert [p["id"] for p in store.list(limit=1, offset=1)] == ["proof_a"]
+        assert store.get("proof_a")["metrics"] == {"time_ms": 30}
+        assert store.get("proof_a")["timestamp"] == "2025-01-01T00:00:00Z"
+        assert [p["id"] for p in store.list(status="failed")] == ["proof_b"]
+        assert [p["id"] for p in store.list(function="prove_kyc")] == ["proof_a"]
+        assert store.get("missing") is None
+
+
+def test_lookups_use_indexes():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ProofStore(os.path.join(tmp, "proofs.sqlite"))
+        plans = {
+            "status": "SELECT * FROM proofs WHERE status = 'complete' ORDER BY created_ms DESC LIMIT 20",
+            "hash": "SELECT * FROM proofs WHERE file_hash = 'x'",
+            "function": "SELECT * FROM proofs WHERE function = 'prove_kyc' ORDER BY created_ms DESC",
+        }
+        for name, sql in plans.items():
+            detail = " ".join(row[3] for row in store._conn.execute("EXPLAIN QUERY PLAN " + sql))
+            assert "USING INDEX" in detail, (name, detail)
+
+
+def test_migration_and_export_round_trip():
+    with open(LEGACY_DB) as f:
+        legacy = json.load(f)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ProofStore(os.path.join(tmp, "proofs.sqlite"))
+        assert store.migrate_from_json(str(LEGACY_DB)) == len(legacy)
+        assert store.migrate_from_json(str(LEGACY_DB)) == 0
+
+        proof_id, entry = next(iter(legacy.items()))
+        assert store.get(proof_id) == entry
+        assert store.find_by_hash(entry["metrics"]["file_hash"])[0]["id"] == proof_id
+
+        export_path = os.path.join(tmp, "proofs_db.json")
+        assert store.export_json(export_path) == len(legacy)
+        with open(export_path) as f:
+            assert json.load(f) == legacy
+
+
+def test_nanosecond_timestamps_parse():
+    assert timestamp_to_ms("2025-06-15T09:43:42.825188679Z") == 1749980622825
+    assert timestamp_to_ms("not a time") == 0
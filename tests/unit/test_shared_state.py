@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Test the cross-worker state store: two connections to one file stand in for two workers"""
+
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from services.shared_state import SharedState
+
+
+def _workers(tmp):
+    path = str(Path(tmp) / "state.sqlite")
+    return SharedState(path), SharedState(path)
+
+
+def test_cache_and_idempotency_are_shared():
+    with tempfile.TemporaryDirectory() as tmp:
+        a, b = _workers(tmp)
+        a.cache_put("workflow_parse", "k", {"steps": [1, 2]}, ttl_secs=60)
+        a.cache_put("workflow_parse", "old", {"steps": []}, ttl_secs=-1)
+        assert b.cache_get("workflow_parse", "k") == {"steps": [1, 2]}
+        assert b.cache_get("workflow_parse", "old") is None
+
+        assert a.claim("workflow:req-1", ttl_secs=60) is None
+        assert b.claim("workflow:req-1", ttl_secs=60) == {"state": "pending", "response": None}
+        a.complete("workflow:req-1", {"success": True})
+        assert b.claim("workflow:req-1", ttl_secs=60) == {"state": "done", "response": {"success": True}}
+
+        # A released (failed) claim can be retried elsewhere
+        assert a.claim("workflow:req-2", ttl_secs=60) is None
+        a.release("workflow:req-2")
+        assert b.claim("workflow:req-2", ttl_secs=60) is None
+
+
+def test_pending_claims_lapse_unless_renewed():
+    with tempfile.TemporaryDirectory() as tmp:
+        a, b = _workers(tmp)
+        assert a.claim("workflow:req-1", ttl_secs=0.2) is None
+        assert a.claim("workflow:req-2", ttl_secs=0.2) is None
+        time.sleep(0.1)
+        a.renew("workflow:req-1", ttl_secs=60)
+        time.sleep(0.15)
+        # Still being worked on by a, while req-2's owner stopped renewing (crashed)
+        assert b.claim("workflow:req-1", ttl_secs=60)["state"] == "pending"
+        assert b.claim("workflow:req-2", ttl_secs=60) is None
+        # A finished response outlives the short pending lease
+        b.complete("workflow:req-2", {"success": True}, ttl_secs=60)
+        b.renew("workflow:req-2", ttl_secs=0)
+        assert a.claim("workflow:req-2", ttl_secs=60) == {"state": "done", "response": {"success": True}}
+
+
+def test_concurrent_claims_have_one_winner():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "state.sqlite")
+        stores = [SharedState(path) for _ in range(8)]
+        results = []
+        barrier = threading.Barrier(len(stores))
+
+        def claim(store):
+            barrier.wait()
+            results.append(store.claim("webhook:n1", ttl_secs=60))
+
+        threads = [threading.Thread(target=claim, args=(s,)) for s in stores]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results.count(None) == 1
+
+
+def test_jobs_are_leased_and_redelivered_after_lease_expiry():
+    with tempfile.TemporaryDirectory() as tmp:
+        a, b = _workers(tmp)
+        first = b.enqueue("watch_transfer", {"transferId": "t1"})
+        b.enqueue("watch_transfer", {"transferId": "t2"})
+
+        taken = a.take_jobs("leader-1", lease_secs=0.05)
+        assert [j.payload["transferId"] for j in taken] == ["t1", "t2"]
+        assert a.take_jobs("leader-1") == []
+        a.finish_job(first)
+
+        time.sleep(0.06)
+        retried = b.take_jobs("leader-2")
+        assert [(j.payload["transferId"], j.attempts) for j in retried] == [("t2", 2)]
+
+
+def test_leader_lease_is_exclusive_until_it_expires():
+    with tempfile.TemporaryDirectory() as tmp:
+        a, b = _workers(tmp)
+        assert a.acquire_lease("leader", "w1", ttl_secs=0.05)
+        assert not b.acquire_lease("leader", "w2", ttl_secs=0.05)
+        assert a.acquire_lease("leader", "w1", ttl_secs=0.05)
+        time.sleep(0.06)
+        assert b.acquire_lease("leader", "w2", ttl_secs=60)
+        assert b.stats()["leases"] == {"leader": "w2"}
+
+        a.record_transfer({"transferId": "t1", "status": "complete"})
+        assert b.get_transfer("t1")["status"] == "complete"
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""What chat_service startup imports: heavy clients must stay lazy"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Everything chat_service imports from this repo at module level
+STARTUP_MODULES = [
+    "config",
+    "services.structured_logging",
+    "services.tracing",
+    "services.profiling",
+    "services.workflow_history_store",
+    "services.circle_client",
+    "services.transfer_poller",
+    "services.circle_webhooks",
+    "services.artifact_store",
+    "services.verification_cache",
+    "services.proof_tiering",
+    "services.update_channel",
+    "services.shared_state",
+    "services.workflow_checkpoints",
+    "parsers.workflow.workflowPlanOptimizer",
+    "parsers.workflow.workflowConditionEvaluator",
+]
+# Loaded on first use, never at import
+LAZY_MODULES = ["aiohttp", "openai", "uvicorn", "boto3", "parsers.workflow.openaiWorkflowParserEnhanced"]
+# The only third-party packages the startup modules may import eagerly
+EAGER_THIRD_PARTY = {"dotenv", "zstandard"}
+REPO_PACKAGES = {"config", "services", "parsers"}
+# Cumulative -X importtime of `import chat_service`, fastapi and pydantic included
+CHAT_SERVICE_IMPORT_BUDGET_MS = 1500
+
+
+def _imported(modules):
+    """Import modules in a fresh interpreter; returns the names left in sys.modules"""
+    code = ("import sys\n" + "".join(f"import {m}\n" for m in modules)
+            + "print(','.join(sorted(sys.modules)))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return set(result.stdout.strip().split(","))
+
+
+def test_startup_modules_defer_heavy_imports():
+    imported = _imported(STARTUP_MODULES)
+    loaded = [m for m in LAZY_MODULES if m in imported]
+    assert loaded == [], f"imported eagerly: {loaded}"
+
+
+def test_startup_modules_import_only_stdlib_and_light_packages():
+    imported = _imported(STARTUP_MODULES)
+    third_party = {m.split(".")[0] for m in imported} - set(sys.stdlib_module_names) - REPO_PACKAGES
+    # Interpreter and site hooks (_distutils_hack, __main__) are not imports of ours
+    third_party = {m for m in third_party if not m.startswith("_")}
+    assert third_party <= EAGER_THIRD_PARTY, f"imported eagerly: {sorted(third_party - EAGER_THIRD_PARTY)}"
+
+
+@pytest.mark.skipif(importlib.util.find_spec("fastapi") is None, reason="fastapi not installed")
+def test_chat_service_import_is_lazy():
+    imported = _imported(["chat_service"])
+    loaded = [m for m in LAZY_MODULES if m in imported]
+    assert loaded == [], f"chat_service imported eagerly: {loaded}"
+
+
+def _importtime(module, cwd=ROOT, env=None):
+    """Import module in a fresh interpreter; returns its cumulative -X importtime in ms"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=cwd,
+                            env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr[-2000:]
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and line.rsplit("|", 1)[-1].strip() == module:
+            return int(line.split("|")[1]) / 1000
+    raise AssertionError(f"no importtime line for {module}")
+
+
+@pytest.mark.skipif(importlib.util.find_spec("fastapi") is None, reason="fastapi not installed")
+def test_chat_service_import_budget():
+    elapsed_ms = _importtime("chat_service")
+    assert elapsed_ms < CHAT_SERVICE_IMPORT_BUDGET_MS, f"import chat_service took {elapsed_ms:.0f}ms"
+
+
+@pytest.mark.skipif(importlib.util.find_spec("fastapi") is None, reason="fastapi not installed")
+def test_chat_service_import_touches_no_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        # Relative and ~ store paths resolve under tmp; nothing may be created there
+        env = {**os.environ, "HOME": tmp, "PYTHONPATH": str(ROOT)}
+        _importtime("chat_service", cwd=tmp, env=env)
+        assert os.listdir(tmp) == []
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Test the queue-backed structured logger"""
+
+import io
+import json
+
+from services.structured_logging import (
+    configure_logging, correlation_scope, get_logger, shutdown_logging,
+)
+
+
+def _records(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines() if line.strip()]
+
+
+def test_json_records_carry_fields_and_correlation_id():
+    stream = io.StringIO()
+    configure_logging(level='info', fmt='json', stream=stream)
+    log = get_logger("agentkit.test")
+    with correlation_scope("req-123"):
+        log.info("workflow.request", command="Generate KYC proof")
+    shutdown_logging()
+
+    records = _records(stream)
+    assert len(records) == 1
+    assert records[0]["event"] == "workflow.request"
+    assert records[0]["command"] == "Generate KYC proof"
+    assert records[0]["correlation_id"] == "req-123"
+    assert records[0]["level"] == "info"
+
+
+def test_disabled_debug_payload_is_never_evaluated():
+    stream = io.StringIO()
+    configure_logging(level='info', fmt='json', stream=stream)
+    log = get_logger("agentkit.test")
+    calls = []
+    log.debug("workflow.parsed", workflow=lambda: calls.append(1) or "big payload")
+    log.verbose("workflow.parsed", workflow=lambda: calls.append(1) or "big payload")
+    shutdown_logging()
+    assert calls == []
+    assert _records(stream) == []
+
+
+def test_verbose_events_are_sampled():
+    stream = io.StringIO()
+    configure_logging(level='debug', fmt='json', debug_sample_rate=0.0, stream=stream)
+    log = get_logger("agentkit.test")
+    for _ in range(50):
+        log.verbose("workflow.executor_output", stdout="...")
+    log.debug("workflow.parse_ok", step_count=2)
+    shutdown_logging()
+    records = _records(stream)
+    assert [r["event"] for r in records] == ["workflow.parse_ok"]
+
+
+def test_exceptions_are_serialized():
+    stream = io.StringIO()
+    configure_logging(level='info', fmt='json', stream=stream)
+    log = get_logger("agentkit.test")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        log.exception("workflow.error", error="boom")
+    shutdown_logging()
+    record = _records(stream)[0]
+    assert "ValueError: boom" in record["exception"]
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Test span propagation, collector export and latency waterfalls"""
+
+import json
+import os
+import tempfile
+
+from services.tracing import (
+    SpanExporter, Tracer, build_waterfall, extract_spans_from_output, parse_traceparent,
+)
+
+
+def test_child_spans_share_trace():
+    tracer = Tracer()
+    root = tracer.start_span("workflow.execute")
+    with tracer.span("workflow.parse", parent=root) as parse_span:
+        with tracer.span("openai.request") as request_span:
+            pass
+    assert parse_span.trace_id == root.trace_id
+    assert parse_span.parent_span_id == root.span_id
+    assert request_span.parent_span_id == parse_span.span_id
+
+
+def test_traceparent_round_trip():
+    tracer = Tracer()
+    span = tracer.start_span("workflow.execute")
+    parsed = parse_traceparent(span.context()["traceparent"])
+    assert parsed == {"trace_id": span.trace_id, "span_id": span.span_id}
+    assert parse_traceparent("garbage") is None
+
+
+def test_executor_spans_are_ingested_into_waterfall():
+    tracer = Tracer()
+    root = tracer.start_span("workflow.execute")
+    node_spans = [
+        {"name": "step.generate_proof", "trace_id": root.trace_id, "span_id": "a" * 16,
+         "parent_span_id": root.span_id, "service": "workflow_executor",
+         "start_ms": root.start_ms + 10, "end_ms": root.start_ms + 510,
+         "attributes": {"step_id": "step_1"}},
+        {"name": "zkengine.prove", "trace_id": root.trace_id, "span_id": "b" * 16,
+         "parent_span_id": "a" * 16, "service": "zkengine",
+         "start_ms": root.start_ms + 20, "end_ms": root.start_ms + 500},
+    ]
+    output = "some log line\nTRACE_SPANS: " + json.dumps(node_spans) + "\nsummary"
+    tracer.ingest(extract_spans_from_output(output))
+    tracer.finish(root)
+
+    rows = build_waterfall(tracer.pop_trace(root.trace_id))
+    assert [r["name"] for r in rows] == ["workflow.execute", "step.generate_proof", "zkengine.prove"]
+    assert rows[1]["step_id"] == "step_1"
+    assert rows[1]["duration_ms"] == 500
+    assert rows[2]["depth"] == 2
+    assert rows[0]["offset_ms"] == 0
+
+
+def test_exporter_writes_json_lines():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "traces", "spans.jsonl")
+        tracer = Tracer(exporter=SpanExporter(path))
+        with tracer.span("workflow.execute") as root:
+            pass
+        tracer.finish(root)  # a second finish must not duplicate the span
+        tracer.pop_trace(root.trace_id)
+        with open(path) as f:
+            lines = [json.loads(line) for line in f]
+        assert len(lines) == 1
+        assert lines[0]["trace_id"] == root.trace_id
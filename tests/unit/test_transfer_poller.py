@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Test the shared transfer poller: one Circle call per transfer, backoff, push on change"""
+
+import asyncio
+
+from services.circle_client import CircleClient
+from services.circle_sandbox import CircleSandbox, SandboxServer
+from services.transfer_poller import TransferPoller
+
+
+def test_many_watchers_share_one_poll():
+    async def scenario():
+        sandbox = CircleSandbox(complete_after=3)
+        for i in range(3):
+            sandbox.add_transfer(f"tr_{i}")
+        published = []
+
+        async def publish(message):
+            published.append(message)
+
+        async with SandboxServer(sandbox) as server:
+            async with CircleClient(None, server.url) as client:
+                poller = TransferPoller(client, publish, base_interval=0.01, rate_per_sec=1000)
+                # 10 viewers per transfer subscribe before the first check
+                for _ in range(10):
+                    for i in range(3):
+                        poller.watch(f"tr_{i}", "ETH")
+                poller.start()
+                for _ in range(200):
+                    if not poller.transfers:
+                        break
+                    await asyncio.sleep(0.01)
+                await poller.stop()
+                return published, dict(sandbox.reads), poller
+
+    published, reads, poller = asyncio.run(scenario())
+    assert reads == {"tr_0": 3, "tr_1": 3, "tr_2": 3}
+    assert poller.api_calls == 9 and not poller.transfers
+    # First sighting (pending) and the completion, nothing for unchanged reads
+    for i in range(3):
+        updates = [m for m in published if m["transferId"] == f"tr_{i}"]
+        assert [m["status"] for m in updates] == ["pending", "complete"]
+        assert updates[-1]["type"] == "transfer_update"
+        assert updates[-1]["blockchainTxHash"].startswith("0x")
+        assert updates[-1]["explorerLink"].startswith("https://sepolia.etherscan.io/tx/")
+
+
+def test_backoff_doubles_while_unchanged_and_caps():
+    async def scenario():
+        sandbox = CircleSandbox(complete_after=100)
+        sandbox.add_transfer("tr_slow")
+
+        async def publish(message):
+            pass
+
+        async with SandboxServer(sandbox) as server:
+            async with CircleClient(None, server.url) as client:
+                poller = TransferPoller(client, publish, base_interval=1, max_interval=4,
+                                        rate_per_sec=1000)
+                watched = poller.watch("tr_slow")
+                intervals = []
+                for _ in range(4):
+                    await poller._check(watched)
+                    intervals.append(watched.interval)
+                sandbox.complete("tr_slow")
+                await poller._check(watched)
+                return intervals, poller.transfers
+
+    intervals, remaining = asyncio.run(scenario())
+    assert intervals == [2, 4, 4, 4]
+    assert remaining == {}
+
+
+def test_errors_back_off_and_unknown_transfers_are_dropped():
+    async def scenario():
+        sandbox = CircleSandbox()
+        published = []
+
+        async def publish(message):
+            published.append(message)
+
+        async with SandboxServer(sandbox) as server:
+            async with CircleClient(None, server.url, max_retries=0) as client:
+                poller = TransferPoller(client, publish, base_interval=1, rate_per_sec=1000)
+                watched = poller.watch("missing")
+                for _ in range(3):
+                    await poller._check(watched)
+                backed_off = (watched.interval, "missing" in poller.transfers)
+                await poller._check(watched)
+                return backed_off, poller.transfers, published
+
+    (interval, still_watched), remaining, published = asyncio.run(scenario())
+    assert interval == 8 and still_watched
+    assert remaining == {} and published == []
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Test the batched chat_service -> Rust update channel against a stand-in endpoint"""
+
+import asyncio
+
+from aiohttp import web
+
+from services.update_channel import UpdateChannel
+
+
+class FakeRustServer:
+    """Accepts /workflow_update like src/main.rs: one object or an array of them"""
+
+    def __init__(self):
+        self.posts = []
+        self.peers = set()
+        self.runner = None
+        self.port = None
+
+    async def handle(self, request):
+        self.peers.add(request.transport.get_extra_info("peername"))
+        payload = await request.json()
+        self.posts.append(payload if isinstance(payload, list) else [payload])
+        return web.Response(text="Update sent")
+
+    async def start(self, port=0):
+        app = web.Application()
+        app.router.add_post("/workflow_update", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{self.port}/workflow_update"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    @property
+    def updates(self):
+        return [u for post in self.posts for u in post]
+
+
+def test_bursts_are_batched_over_one_connection():
+    async def scenario():
+        server = FakeRustServer()
+        url = await server.start()
+        channel = UpdateChannel(url, linger_ms=20, max_batch=50)
+        for i in range(120):
+            await channel.send({"type": "workflow_step_update", "n": i})
+        await channel.flush()
+        await asyncio.sleep(0.05)
+        await channel.send({"type": "workflow_completed"})
+        await channel.close()
+        await server.stop()
+        return server, channel.stats
+
+    server, stats = asyncio.run(scenario())
+    assert [u.get("n") for u in server.updates[:120]] == list(range(120))
+    assert server.updates[-1]["type"] == "workflow_completed"
+    assert [len(p) for p in server.posts] == [50, 50, 20, 1]
+    assert len(server.peers) == 1
+    assert stats["sent"] == 121 and stats["batches"] == 4 and stats["dropped"] == 0
+
+
+def test_full_queue_applies_backpressure():
+    async def scenario():
+        channel = UpdateChannel("http://127.0.0.1:9/workflow_update", max_queue=2)
+        # Fill the queue without a sender running; a third send must wait
+        channel.queue.put_nowait({"n": 0})
+        channel.queue.put_nowait({"n": 1})
+        blocked = asyncio.ensure_future(channel.queue.put({"n": 2}))
+        await asyncio.sleep(0.01)
+        waiting = not blocked.done()
+        channel.queue.get_nowait()
+        await asyncio.sleep(0.01)
+        return waiting, blocked.done()
+
+    waiting, released = asyncio.run(scenario())
+    assert waiting and released
+
+
+def test_reconnects_when_server_comes_back():
+    async def scenario():
+        server = FakeRustServer()
+        url = await server.start()
+        port = server.port
+        channel = UpdateChannel(url, linger_ms=1, backoff_base=0.05, max_retries=10)
+        await channel.send({"n": 1})
+        await channel.flush()
+        await server.stop()
+
+        await channel.send({"n": 2})
+        await asyncio.sleep(0.1)
+        restarted = FakeRustServer()
+        await restarted.start(port)
+        await channel.flush()
+        await channel.close()
+        await restarted.stop()
+        return server.updates, restarted.updates, channel.stats
+
+    before, after, stats = asyncio.run(scenario())
+    assert before == [{"n": 1}] and after == [{"n": 2}]
+    assert stats["reconnects"] >= 1 and stats["dropped"] == 0
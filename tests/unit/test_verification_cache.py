@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Test the content-keyed verification cache: hits, misses on change, invalidation"""
+
+import json
+import os
+import tempfile
+
+from services.artifact_store import ArtifactStore
+from services.verification_cache import VerificationCache, key_for
+
+
+def _proof_dir(root, proof_id, payload=b"proof bytes", public=None):
+    path = os.path.join(root, proof_id)
+    os.makedirs(path)
+    with open(os.path.join(path, "proof.bin"), "wb") as f:
+        f.write(payload)
+    with open(os.path.join(path, "public.json"), "w") as f:
+        json.dump(public or {"inputs": [1, 2]}, f)
+    return path
+
+
+def test_hit_after_record_and_stats():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = VerificationCache(os.path.join(tmp, "cache.sqlite"))
+        key = key_for(_proof_dir(tmp, "proof_a"), 50)
+
+        assert cache.lookup(key) is None
+        cache.record(key, "proof_a", True)
+        assert cache.lookup(key)["valid"] is True
+        assert cache.lookup(key._replace(step_size=10)) is None
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+        assert stats["hit_rate"] == round(1 / 3, 4)
+
+
+def test_key_follows_content_not_location():
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_dir = _proof_dir(tmp, "proof_raw", payload=b"x" * 10000)
+        raw_key = key_for(raw_dir)
+        # Ingesting into the artifact store keeps the same key via proof.ref
+        stored_dir = _proof_dir(tmp, "proof_stored", payload=b"x" * 10000)
+        ArtifactStore(os.path.join(tmp, "artifacts")).ingest("proof_stored", stored_dir)
+        assert key_for(stored_dir) == raw_key
+
+        with open(os.path.join(raw_dir, "public.json"), "w") as f:
+            json.dump({"inputs": [9]}, f)
+        assert key_for(raw_dir) != raw_key
+
+
+def test_invalidate_by_proof_id_or_hash():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = VerificationCache(os.path.join(tmp, "cache.sqlite"))
+        key_a = key_for(_proof_dir(tmp, "proof_a", payload=b"a"))
+        key_b = key_for(_proof_dir(tmp, "proof_b", payload=b"b"))
+        cache.record(key_a, "proof_a", True)
+        cache.record(key_b, "proof_b", False)
+
+        assert cache.invalidate(proof_id="proof_a") == 1
+        assert cache.lookup(key_a, count=False) is None
+        assert cache.invalidate(proof_hash=key_b.proof_hash) == 1
+        assert cache.stats()["entries"] == 0
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Test workflow checkpoints: progress survives, and only abandoned workflows are picked up"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from services.workflow_checkpoints import RUNNING, CheckpointStore, process_token
+
+
+def _dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+PLAN = {"description": "kyc then pay", "steps": [{"type": "generate_proof", "proof_type": "kyc"},
+                                                 {"type": "transfer", "amount": "0.1", "recipient": "alice"}]}
+
+
+def test_create_update_and_reload():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CheckpointStore(tmp)
+        path = store.create("wf_1_abc", PLAN, "kyc then pay")
+        assert Path(path).name == "wf_1_abc.json"
+        # What the executor writes after the first step
+        store.update("wf_1_abc", position=1, executorWorkflowId="wf_exec",
+                     proofResults={"kyc": {"proofId": "proof_kyc_1"}})
+        reloaded = CheckpointStore(tmp).load("wf_1_abc")
+        assert (reloaded["status"], reloaded["position"], reloaded["plan"]) == (RUNNING, 1, PLAN)
+        assert reloaded["proofResults"]["kyc"]["proofId"] == "proof_kyc_1"
+        assert not list(Path(tmp).glob("*.tmp"))
+        try:
+            store.path("../escape")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("path traversal should be rejected")
+
+
+def test_only_workflows_without_a_live_process_are_orphaned():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CheckpointStore(tmp)
+        dead = _dead_pid()
+        for workflow_id in ("wf_live_owner", "wf_live_executor", "wf_orphan", "wf_done", "wf_reused_pid"):
+            store.create(workflow_id, PLAN, "cmd")
+        store.update("wf_live_executor", ownerPid=dead, executorPid=os.getpid(),
+                     executorToken=process_token(os.getpid()))
+        store.update("wf_orphan", ownerPid=dead, executorPid=dead, position=1)
+        store.update("wf_done", ownerPid=dead, executorPid=dead, status="completed")
+        # Before a container restart: the PID now belongs to a live, unrelated process
+        store.update("wf_reused_pid", ownerToken="0805af61-old-boot:4242", executorPid=dead)
+        # Some other host's workflows are not ours to resume
+        (Path(tmp) / "wf_remote.json").write_text(json.dumps(
+            {"workflowId": "wf_remote", "status": RUNNING, "host": "elsewhere", "ownerPid": dead}))
+
+        orphaned = {c["workflowId"]: c["status"] for c in store.orphaned()}
+        assert orphaned == {"wf_orphan": RUNNING, "wf_done": "completed", "wf_reused_pid": RUNNING}
+
+        adopted = store.adopt("wf_orphan")
+        assert adopted["attempts"] == 1 and adopted["position"] == 1
+        assert adopted["ownerToken"] == process_token(os.getpid())
+        assert "wf_orphan" not in {c["workflowId"] for c in store.orphaned()}
+        store.remove("wf_orphan")
+        assert store.load("wf_orphan") is None
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Test pre-execution pruning of conditional transfers that cannot pass"""
+
+
+from parsers.workflow.workflowConditionEvaluator import evaluate_conditions, required_types
+
+
+def _plan(*steps):
+    return {"description": "test", "steps": [dict(step, index=i) for i, step in enumerate(steps)]}
+
+
+def _types(plan):
+    return [step['type'] for step in plan['steps']]
+
+
+def test_unapproved_kyc_skips_the_proofs_and_fails_the_transfer_in_place():
+    plan = evaluate_conditions(_plan(
+        {"type": "generate_proof", "proof_type": "kyc", "person": "alice", "parameters": {"kyc_approved": 0}},
+        {"type": "verify_proof", "proof_type": "kyc", "person": "alice"},
+        {"type": "verify_on_ethereum", "proof_type": "kyc", "person": "alice"},
+        {"type": "transfer", "amount": "0.1", "recipient": "alice", "condition": "kyc_verified"},
+        {"type": "generate_proof", "proof_type": "location"},
+    ))
+    assert _types(plan) == ["transfer", "generate_proof"]
+    # The executor fails the transfer without checking; being critical, it still stops the workflow
+    transfer = plan['steps'][0]
+    assert transfer['index'] == 0 and "kyc_approved=0" in transfer['precondition_failed']
+    assert plan['steps'][1] == {"type": "generate_proof", "proof_type": "location", "index": 1}
+    [branch] = plan['skippedBranches']
+    assert branch['transfer'] == {"index": 3, "recipient": "alice", "amount": "0.1", "critical": True}
+    assert [s['index'] for s in branch['skippedSteps']] == [0, 1, 2]
+    assert branch['reason'] == transfer['precondition_failed']
+
+
+def test_cached_invalid_proof_and_missing_verification():
+    cache = {"proof_kyc_1752343501908": False, "proof_location_1752343501999": True}
+    plan = evaluate_conditions(_plan(
+        {"type": "verify_proof", "proof_id": "proof_kyc_1752343501908"},
+        {"type": "transfer", "amount": "1", "recipient": "bob", "condition": "kyc_verified", "critical": False},
+        {"type": "verify_proof", "proof_id": "proof_location_1752343501999"},
+        {"type": "transfer", "amount": "2", "recipient": "carol", "condition": "location_verified"},
+        {"type": "transfer", "amount": "3", "recipient": "dave", "condition": "ai_content_verified"},
+    ), cached_validity=cache.get)
+    assert [(s['type'], s.get('recipient'), s.get('precondition_failed')) for s in plan['steps']] == [
+        ("transfer", "bob", "proof_kyc_1752343501908 is cached as invalid"),
+        ("verify_proof", None, None),
+        ("transfer", "carol", None),
+        ("transfer", "dave", "no ai_content verification before it"),
+    ]
+    assert [(b['transfer']['recipient'], b['transfer']['critical']) for b in plan['skippedBranches']] == [
+        ("bob", False), ("dave", True)]
+
+
+def test_unknown_outcomes_and_shared_proofs_are_left_to_the_executor():
+    workflow = _plan(
+        {"type": "generate_proof", "proof_type": "kyc", "person": "alice", "parameters": {"kyc_approved": "0"}},
+        {"type": "generate_proof", "proof_type": "kyc", "person": "bob"},
+        {"type": "verify_proof", "proof_type": "kyc", "person": "alice"},
+        {"type": "verify_proof", "proof_type": "kyc", "person": "bob"},
+        {"type": "transfer", "amount": "1", "recipient": "bob", "condition": "kyc_verified"},
+        {"type": "transfer", "amount": "1", "recipient": "bob", "condition": "after lunch"},
+    )
+    plan = evaluate_conditions(workflow)
+    # Bob's KYC can still pass, and any passing KYC verification satisfies the condition
+    assert plan['steps'] == workflow['steps'] and plan['skippedBranches'] == []
+    assert required_types("if KYC compliant") == {"kyc"}
+    assert required_types("if verified") == set()
+    assert required_types("after lunch") is None
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Test the journal-backed workflow history index and its cursor pagination"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from services.workflow_history_store import WorkflowHistoryStore
+
+FIXTURE = Path(__file__).resolve().parents[2] / "circle" / "workflow_history.json"
+
+
+def _workflow(i, status="completed", step_types=("kyc_proof", "transfer")):
+    return {
+        "id": f"wf_{i:04d}",
+        "description": f"workflow {i}",
+        "steps": [{"type": t} for t in step_types],
+        "status": status,
+        "createdAt": f"2025-07-01T00:{i // 60:02d}:{i % 60:02d}.000Z",
+    }
+
+
+def _store(tmp):
+    snapshot = os.path.join(tmp, "workflow_history.json")
+    return WorkflowHistoryStore(os.path.join(tmp, "history.sqlite"), snapshot), snapshot
+
+
+def _append(snapshot, *workflows):
+    with open(snapshot + "l", "a") as f:
+        for wf in workflows:
+            f.write(json.dumps(wf) + "\n")
+
+
+def _fresh(tmp):
+    path = os.path.join(tmp, "journal.tmp")
+    open(path, "w").close()
+    return path
+
+
+def test_snapshot_import_matches_legacy_ordering():
+    with tempfile.TemporaryDirectory() as tmp:
+        store, snapshot = _store(tmp)
+        shutil.copy(FIXTURE, snapshot)
+        with open(FIXTURE) as f:
+            legacy = list(json.load(f).values())
+        assert store.sync() == len(legacy)
+        assert store.sync() == 0
+
+        expected = sorted(legacy, key=lambda wf: wf.get("createdAt", ""), reverse=True)[:20]
+        page = store.query(limit=20)
+        assert [wf["id"] for wf in page["workflows"]] == [wf["id"] for wf in expected]
+        assert page["workflows"][0]["stepCount"] == len(expected[0]["steps"])
+
+
+def test_cursor_pages_cover_everything_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        store, snapshot = _store(tmp)
+        _append(snapshot, *[_workflow(i) for i in range(45)])
+        store.sync()
+        seen, cursor = [], None
+        while True:
+            page = store.query(limit=20, cursor=cursor)
+            seen.extend(wf["id"] for wf in page["workflows"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        assert seen == [f"wf_{i:04d}" for i in reversed(range(45))]
+
+
+def test_journal_tail_updates_and_filters():
+    with tempfile.TemporaryDirectory() as tmp:
+        store, snapshot = _store(tmp)
+        _append(snapshot, _workflow(1, "created"), _workflow(2, "created", ("transfer",)))
+        store.sync()
+        _append(snapshot, _workflow(1, "failed"))
+        with open(snapshot + "l", "a") as f:
+            f.write('{"id": "wf_torn"')  # half-written line is left for the next sync
+        assert store.sync() == 1
+
+        assert [wf["id"] for wf in store.query(status="failed")["workflows"]] == ["wf_0001"]
+        assert [wf["id"] for wf in store.query(step_type="kyc_proof")["workflows"]] == ["wf_0001"]
+        assert [wf["id"] for wf in store.query(step_type="transfer", status="created")["workflows"]] == ["wf_0002"]
+        assert store.count() == 2
+
+
+def test_compaction_replaces_journal():
+    with tempfile.TemporaryDirectory() as tmp:
+        store, snapshot = _store(tmp)
+        _append(snapshot, _workflow(1), _workflow(2))
+        store.sync()
+        # What workflowManager.js does on compaction: new snapshot, fresh journal
+        with open(snapshot, "w") as f:
+            json.dump({"wf_0001": _workflow(1), "wf_0002": _workflow(2), "wf_0003": _workflow(3)}, f)
+        os.replace(_fresh(tmp), snapshot + "l")
+        _append(snapshot, _workflow(4))
+        store.sync()
+        assert [wf["id"] for wf in store.query()["workflows"]] == ["wf_0004", "wf_0003", "wf_0002", "wf_0001"]
+
+
+def test_latest_page_is_index_backed():
+    with tempfile.TemporaryDirectory() as tmp:
+        store, _ = _store(tmp)
+        plan = " ".join(row[3] for row in store._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM workflows WHERE status = 'completed' "
+            "ORDER BY created_ms DESC, id DESC LIMIT 21"))
+        assert "USING INDEX" in plan and "TEMP B-TREE" not in plan
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Test plan optimization on workflows shaped like EnhancedOpenAIWorkflowParser output"""
+
+
+from parsers.workflow.workflowPlanOptimizer import optimize_plan
+
+
+def _plan(*steps):
+    steps = [dict(step, index=i) for i, step in enumerate(steps)]
+    for step in steps:
+        if step['type'] in ('verify_proof', 'verify_on_ethereum', 'verify_on_solana') and 'proof_id' not in step:
+            step['proof_id'] = f"pending_{step.get('proof_type', 'unknown')}_{step.get('person', 'user')}"
+    return {"description": "test", "steps": steps}
+
+
+def _types(plan):
+    return [step['type'] for step in plan['steps']]
+
+
+def test_duplicate_generation_is_removed_and_placeholders_rewritten():
+    workflow = _plan(
+        {"type": "generate_proof", "proof_type": "ai_content", "person": "alice"},
+        {"type": "generate_proof", "proof_type": "ai", "person": "Alice"},
+        {"type": "verify_proof", "proof_type": "ai", "person": "Alice"},
+        {"type": "transfer", "amount": "0.1", "recipient": "alice", "condition": "ai_content_verified"},
+    )
+    plan = optimize_plan(workflow)
+    assert _types(plan) == ["generate_proof", "verify_proof", "transfer"]
+    verify = plan['steps'][1]
+    assert (verify['proof_type'], verify['person'], verify['proof_id']) == ("ai_content", "alice", "pending_ai_content_alice")
+    assert [step['index'] for step in plan['steps']] == [0, 1, 2]
+    assert plan['optimization']['removedSteps'] == [{"index": 1, "type": "generate_proof", "reason": "duplicate of step 1"}]
+    assert plan['optimization']['estimatedSecondsSaved'] == 20.0
+    # The parsed workflow is left as it was
+    assert len(workflow['steps']) == 4 and 'optimization' not in workflow
+
+
+def test_local_verification_merges_into_following_chain_verification():
+    plan = optimize_plan(_plan(
+        {"type": "generate_proof", "proof_type": "kyc", "person": "bob"},
+        {"type": "verify_proof", "proof_type": "kyc", "person": "bob"},
+        {"type": "verify_on_ethereum", "proof_type": "kyc", "person": "bob"},
+        {"type": "verify_proof", "proof_type": "location"},
+        {"type": "verify_on_solana", "proof_type": "kyc", "person": "bob"},
+    ))
+    assert _types(plan) == ["generate_proof", "verify_on_ethereum", "verify_proof", "verify_on_solana"]
+    assert plan['steps'][1]['verify_locally'] is True
+    # A different proof in between: nothing to merge
+    assert 'verify_locally' not in plan['steps'][3]
+    assert plan['optimization']['mergedSteps'] == [{"index": 1, "into": 2}]
+
+
+def test_generations_with_different_inputs_are_kept():
+    workflow = _plan(
+        {"type": "generate_proof", "proof_type": "kyc", "person": "alice", "parameters": {"kyc_approved": 1}},
+        {"type": "verify_proof", "proof_type": "kyc", "person": "alice"},
+        {"type": "generate_proof", "proof_type": "kyc", "person": "alice", "parameters": {"kyc_approved": 0}},
+        {"type": "verify_proof", "proof_type": "kyc", "person": "alice"},
+        {"type": "generate_proof", "proof_type": "kyc", "person": "Alice", "parameters": {"kyc_approved": "0"}},
+    )
+    plan = optimize_plan(workflow)
+    # The second verification checks the kyc_approved=0 proof, not a repeat of the first
+    assert _types(plan) == ["generate_proof", "verify_proof", "generate_proof", "verify_proof"]
+    assert plan['optimization']['removedSteps'] == [{"index": 4, "type": "generate_proof", "reason": "duplicate of step 3"}]
+
+
+def test_merge_needs_the_same_proof_as_the_executor_reads_it():
+    plan = optimize_plan(_plan(
+        {"type": "generate_proof", "proof_type": "kyc"},
+        {"type": "generate_proof", "proof_type": "location"},
+        # verificationType wins over proof_type in the executor: this verifies location
+        {"type": "verify_proof", "proof_type": "kyc", "verificationType": "location"},
+        {"type": "verify_on_ethereum", "proof_type": "kyc"},
+        {"type": "verify_proof", "verificationType": "kyc"},
+        {"type": "verify_on_solana", "proofType": "kyc"},
+        {"type": "verify_proof", "verificationType": "last"},
+        {"type": "verify_proof", "verificationType": "last"},
+    ))
+    assert _types(plan) == ["generate_proof", "generate_proof", "verify_proof", "verify_on_ethereum",
+                            "verify_on_solana", "verify_proof", "verify_proof"]
+    assert 'verify_locally' not in plan['steps'][3] and plan['steps'][4]['verify_locally'] is True
+    assert plan['optimization']['mergedSteps'] == [{"index": 4, "into": 5}]
+
+
+def test_repeated_verifications_and_listings_are_dropped():
+    plan = optimize_plan(_plan(
+        {"type": "list_proofs", "list_type": "proofs"},
+        {"type": "generate_proof", "proof_type": "kyc"},
+        {"type": "verify_proof", "proof_type": "kyc"},
+        {"type": "verify_proof", "proof_type": "kyc"},
+        {"type": "verify_proof", "proof_id": "proof_kyc_1752343501908"},
+        {"type": "verify_proof", "proof_id": "proof_kyc_1752343501908"},
+        {"type": "list_proofs", "list_type": "verifications"},
+        {"type": "list_proofs", "list_type": "proofs"},
+    ))
+    assert _types(plan) == ["generate_proof", "verify_proof", "verify_proof", "list_proofs", "list_proofs"]
+    assert [r['index'] for r in plan['optimization']['removedSteps']] == [0, 3, 5]
+    assert plan['optimization']['estimatedSecondsSaved'] == 1.0 + 3.5 + 3.5
+
+
+def test_plan_without_redundancy_is_unchanged():
+    workflow = _plan(
+        {"type": "generate_proof", "proof_type": "kyc", "person": "alice"},
+        {"type": "generate_proof", "proof_type": "kyc", "person": "bob"},
+        {"type": "verify_proof", "proof_type": "kyc", "person": "alice"},
+        {"type": "verify_proof", "proof_type": "kyc", "person": "bob"},
+        {"type": "process_with_ai", "request": "explain"},
+    )
+    plan = optimize_plan(workflow)
+    assert plan['steps'] == workflow['steps']
+    assert plan['optimization']['removedSteps'] == []
+    assert plan['optimization']['estimatedSecondsSaved'] == 0.0